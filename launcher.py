@@ -1,6 +1,7 @@
 import sys
 import os
 import subprocess
+import compileall
 from src.updater.core import Updater, UpdateInfo
 from src.version import VERSION
 
@@ -8,6 +9,22 @@ from src.version import VERSION
 UPDATE_URL = "https://tu-servidor.com/updates/latest.json"
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 
+def precompile(root):
+    """
+    Compilar a bytecode el código de la app antes de lanzarla.
+
+    Sin los .pyc, el primer arranque tras instalar o actualizar compila cada
+    módulo al importarlo. compileall solo recompila los archivos cuyo .pyc
+    falta o quedó viejo, así que en los arranques normales apenas revisa fechas.
+    """
+    if getattr(sys, "frozen", False) or sys.dont_write_bytecode:
+        return
+    try:
+        compileall.compile_dir(os.path.join(root, "src"), quiet=1)
+    except Exception as e:
+        # Un .pyc que no se pudo escribir no impide arrancar; Python compila al importar
+        print(f"Aviso: no se pudo precompilar ({e})")
+
 def main():
     print(f"Sistema Admin Launcher - Versión {VERSION}")
     
@@ -29,11 +46,15 @@ def main():
             else:
                 print("La actualización falló. Iniciando versión actual...")
     
-    # 2. Iniciar la Aplicación Principal
+    # 2. Precompilar (tras una actualización los .py nuevos aún no tienen .pyc)
+    if "--no-compile" not in sys.argv:
+        precompile(APP_ROOT)
+
+    # 3. Iniciar la Aplicación Principal
     print("Iniciando aplicación...")
     try:
         # Opción A: Ejecutar como subproceso (Más seguro para aislar errores de memoria)
-        subprocess.run([sys.executable, "run_app.py"], check=True)
+        subprocess.run([sys.executable, os.path.join(APP_ROOT, "run_app.py")], check=True)
         
         # Opción B: Importar y ejecutar (Más rápido, comparte memoria)
         # from run_app import main as app_main
@@ -0,0 +1,53 @@
+"""
+Publicar una versión para el actualizador (src/updater).
+
+Calcula el manifiesto (SHA-256 por archivo) del árbol de la aplicación y copia al
+directorio del servidor solo los objetos que aún no existan, direccionados por
+contenido (`objects/<sha[:2]>/<sha>`), junto con `latest.json`. Ese directorio
+se sirve tal cual por HTTP; los clientes bajan únicamente los archivos cambiados.
+
+Ejemplo:
+  python scripts/publish_update.py --out \\\\servidor\\updates --notes "Corrige reportes"
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.updater.manifest import DEFAULT_INCLUDE, build_manifest, publish
+
+
+def current_version(root: Path) -> str:
+    text = (root / "src" / "version.py").read_text(encoding="utf-8")
+    match = re.search(r'VERSION\s*=\s*"([^"]+)"', text)
+    if not match:
+        raise SystemExit("No se encontró VERSION en src/version.py")
+    return match.group(1)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Publicar manifiesto y objetos de actualización")
+    p.add_argument("--source", default=str(PROJECT_ROOT), help="Raíz de la aplicación a publicar")
+    p.add_argument("--out", required=True, help="Directorio servido por HTTP")
+    p.add_argument("--version", default=None, help="Versión (por defecto la de src/version.py)")
+    p.add_argument("--notes", default="", help="Notas de la versión")
+    p.add_argument("--include", nargs="*", default=list(DEFAULT_INCLUDE))
+    args = p.parse_args()
+
+    source = Path(args.source)
+    version = args.version or current_version(source)
+    manifest = build_manifest(source, version, args.include, args.notes)
+    added = publish(source, manifest, Path(args.out))
+    total = sum(m["size"] for m in manifest["files"].values())
+    print(f"Versión {version}: {len(manifest['files'])} archivos ({total / 1e6:.1f} MB), {added} objetos nuevos")
+
+
+if __name__ == "__main__":
+    main()
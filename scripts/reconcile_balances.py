@@ -0,0 +1,54 @@
+"""Verifica los saldos de las cuentas contra el libro de transacciones.
+
+Uso:
+    python scripts/reconcile_balances.py [--fix] [--snapshot] [--tolerance 0.01]
+
+Sale con código 1 si hay descuadres y no se usó --fix.
+"""
+import argparse
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.services.account_balances import (
+    DRIFT_TOLERANCE,
+    reconcile_account_balances,
+    take_balance_snapshot,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fix", action="store_true", help="Reescribir Account.balance con el saldo de libro")
+    parser.add_argument("--snapshot", action="store_true", help="Guardar un snapshot de saldos a la fecha actual")
+    parser.add_argument("--tolerance", type=float, default=DRIFT_TOLERANCE)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    session_factory = make_session_factory(engine)
+    with session_factory() as session:
+        drifts = reconcile_account_balances(session, tolerance=args.tolerance, fix=args.fix)
+        if not drifts:
+            print("Todas las cuentas cuadran con el libro.")
+        else:
+            print(f"{'ID':<5} {'Cuenta':<35} {'Moneda':<7} {'Guardado':>14} {'Libro':>14} {'Diferencia':>14}")
+            print("-" * 94)
+            for d in drifts:
+                print(f"{d.account_id:<5} {d.name:<35} {d.currency:<7} {d.stored:>14,.2f} {d.ledger:>14,.2f} {d.diff:>+14,.2f}")
+
+        if args.snapshot:
+            n = take_balance_snapshot(session)
+            print(f"\nSnapshot guardado para {n} cuentas.")
+
+        if args.fix or args.snapshot:
+            session.commit()
+        if args.fix and drifts:
+            print(f"\n{len(drifts)} cuentas corregidas.")
+
+    if drifts and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cruza los pagos de ventas con sus transacciones contables y reporta diferencias.
+
+Uso:
+    python scripts/reconcile_payments.py [--fix] [--batch-size 5000]
+
+Sale con código 1 si hay diferencias y no se usó --fix.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.services.payment_reconciliation import reconcile_payment_transactions
+
+
+def _preview(ids, limit=20):
+    shown = ", ".join(str(i) for i in ids[:limit])
+    return shown + (" ..." if len(ids) > limit else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fix", action="store_true", help="Crear faltantes, borrar huérfanas/duplicadas y corregir montos")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    session_factory = make_session_factory(engine)
+    with session_factory() as session:
+        t0 = time.perf_counter()
+        report = reconcile_payment_transactions(session, fix=args.fix, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - t0
+
+    print(f"Pagos revisados:        {report.payments_scanned}")
+    print(f"Transacciones revisadas: {report.transactions_scanned}")
+    print(f"Sin transacción:        {report.missing_count}  {_preview(report.missing)}")
+    print(f"Huérfanas:              {report.orphan_count}  {_preview(report.orphans)}")
+    print(f"Duplicadas:             {report.duplicate_count}  {_preview(report.duplicates)}")
+    print(f"Monto distinto:         {report.mismatch_count}")
+    for m in report.mismatches[:20]:
+        print(f"  pago {m.payment_id} / txn {m.transaction_id}: {m.currency} {m.actual:,.2f} -> {m.expected:,.2f}")
+    print(f"Sin pago asociado:      {report.unlinked_count}  {_preview(report.unlinked)}")
+    print(f"Sin tasa para verificar: {report.undetermined}")
+    print(f"Tiempo:                 {elapsed:.1f}s")
+    if args.fix:
+        print(f"\n{report.fixed} correcciones aplicadas.")
+    elif not report.is_clean:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
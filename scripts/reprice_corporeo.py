@@ -0,0 +1,59 @@
+"""Re-cotiza las cotizaciones corpóreo guardadas con los precios de parámetros vigentes.
+
+Uso:
+    python scripts/reprice_corporeo.py [--dry-run] [--all] [--batch-size 500]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.services.corporeo_repricing import (
+    CONFIG_TOTAL_UNIT,
+    PAYLOAD_TOTAL_UNIT,
+    reprice_corporeo_configs,
+    reprice_corporeo_payloads,
+)
+
+
+def _print_summary(title, summary, elapsed):
+    print(f"\n{title}")
+    print(f"  Revisados:   {summary.scanned}")
+    print(f"  Modificados: {summary.changed} (suben {summary.increased}, bajan {summary.decreased})")
+    print(f"  Omitidos:    {summary.skipped} (payload inválido)")
+    print(f"  Delta total: {summary.delta_total:+,.2f}")
+    print(f"  Mayor alza:  {summary.max_increase:+,.2f}   Mayor baja: {summary.max_decrease:+,.2f}")
+    print(f"  Tiempo:      {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="Calcular deltas sin escribir")
+    parser.add_argument("--all", action="store_true", help="Incluir pedidos entregados/cancelados")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    session_factory = make_session_factory(engine)
+
+    def progress(summary):
+        print(f"\r  id<={summary.last_id}  revisados={summary.scanned}  modificados={summary.changed}", end="", flush=True)
+
+    opts = dict(batch_size=args.batch_size, only_pending=not args.all, dry_run=args.dry_run, progress=progress)
+    with session_factory() as session:
+        t0 = time.perf_counter()
+        summary = reprice_corporeo_payloads(session, **opts)
+        _print_summary(f"corporeo_payloads ({PAYLOAD_TOTAL_UNIT})", summary, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        summary = reprice_corporeo_configs(session, **opts)
+        _print_summary(f"corporeo_configs (precio final {CONFIG_TOTAL_UNIT})", summary, time.perf_counter() - t0)
+
+    if args.dry_run:
+        print("\n(dry-run: no se escribieron cambios)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 from .app import MainWindow, create_qt_app
 from .ui.login_dialog import LoginDialog
 from .db import make_engine, make_session_factory
+from .utils.ui_profiler import start_from_env
 
 
 def main() -> None:
     app = create_qt_app()
+    # Perfilado opcional de la interfaz (ADMIN_APP_PROFILE); debe instalarse antes de crear las vistas
+    start_from_env(app)
     # Mostrar login
     # Construir una session_factory mínima para autenticación previa
     try:
@@ -10,7 +10,6 @@ from PySide6.QtWidgets import (
     QLabel,
 )
 from PySide6.QtGui import QAction, QKeySequence, QIcon
-from PySide6.QtCore import QTimer
 from typing import cast
 from pathlib import Path
 import sys
@@ -19,8 +18,10 @@ from sqlalchemy.orm import sessionmaker
 
 from .db import make_engine, make_session_factory, get_data_dir
 from .repository import init_db
-from .models import User, Role, Order, DailyReport
+from .models import User, Role
 from .utils.db_watcher import DbWatcher  # <-- Import Watcher
+from .utils.poll_scheduler import PollScheduler
+from .services.notifications import badge_deltas, notification_counts
 
 from .ui.customers_view import CustomersView
 from .ui.sidebar import SidebarNav
@@ -118,17 +119,18 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(right_container, 1)
 
-        # Timer for clock
-        self._clock_timer = QTimer(self)
-        self._clock_timer.timeout.connect(self._update_clock)
-        self._clock_timer.start(1000)
+        # Un solo planificador para reloj, DbWatcher, notificaciones y tablero.
+        # Con la ventana inactiva o minimizada los sondeos a la base se espacian.
+        self._scheduler = PollScheduler(tick_ms=1000, parent=self)
+        self._scheduler.watch(self)
+        self._scheduler.add_job("clock", 1000, self._update_clock, idle_backoff=False, pause_when_hidden=True)
         self._update_clock() # Initial call
 
         # --- DB Watcher Integration ---
         # Watch the main DB file for external changes (or writes from other views)
         db_file = os.path.join(get_data_dir(), "app.db")
         self._watcher = DbWatcher(db_file, interval=3000, parent=self)
-        self._watcher.start()
+        self._scheduler.add_job("db_watcher", 3000, self._watcher.check_now)
         # Connect to specific slot that propagates refresh
         self._watcher.db_updated.connect(self._on_global_data_changed)
 
@@ -274,11 +276,13 @@ class MainWindow(QMainWindow):
             self._user_permissions = set()
             self._is_admin = False
 
-        # Configurar timer de notificaciones
-        self._notification_timer = QTimer(self)
-        self._notification_timer.timeout.connect(self._check_notifications)
-        self._notification_timer.start(10000) # Check every 10 seconds
-        QTimer.singleShot(2000, self._check_notifications)
+        # Notificaciones: una consulta agregada por sondeo; solo se tocan los badges que cambian
+        self._badges: dict[str, int] = {}
+        self._scheduler.add_job("notifications", 10000, self._check_notifications, delay_ms=2000)
+        # El tablero se refresca desde el planificador y solo si está a la vista
+        self._home_view.set_auto_refresh(False)
+        self._scheduler.add_job("home", 30000, self._refresh_home_if_visible)
+        self._scheduler.start()
 
         self.on_navigate("home")
         # Advertir si se está usando SQLite local (producción debe usar servidor)
@@ -340,35 +344,24 @@ class MainWindow(QMainWindow):
 
     def _check_notifications(self) -> None:
         """Verifica estado de pedidos/reportes y actualiza notificaciones en sidebar."""
+        # Pedidos NUEVO/POR_PRODUCIR para todos (diseño y producción deben verlos);
+        # reportes diarios pendientes solo para Admin/Gerencia.
+        include_reports = self._role_name in ('admin', 'administrador')
         try:
             with self._session_factory() as session:
-                total_notifications = 0
-
-                # 1. Chequear nuevos pedidos
-                # Solicitud: "si el administrador agrega un pedido, los de produccion y diseño deben ver la notificacion"
-                check_orders = True 
-                if check_orders:
-                    # Contar pedidos con status 'NUEVO' (diseño) o 'POR_PRODUCIR' (directo a producción)
-                    new_orders = session.query(Order).filter(Order.status.in_(['NUEVO', 'POR_PRODUCIR'])).count()
-                    self._sidebar.set_notification('pedidos', new_orders)
-                    if new_orders > 0:
-                        total_notifications += new_orders
-
-                # 2. Chequear reportes diarios pendientes (para Admin/Gerencia)
-                # Solicitud: "si produccion envia un reporte, el administrador debe ver la notificacion"
-                check_reports = self._role_name in ('admin', 'administrador')
-                if check_reports:
-                    pending_reports = session.query(DailyReport).filter(DailyReport.status == 'PENDIENTE').count()
-                    self._sidebar.set_notification('reportes_diarios', pending_reports)
-                    if pending_reports > 0:
-                        total_notifications += pending_reports
-                
-                # Actualizar home con el total
-                self._sidebar.set_notification('home', total_notifications)
-
-        except Exception as e:
+                counts = notification_counts(session, include_reports=include_reports)
+        except Exception:
             # Silencioso para no spammear consola en loop
-            pass
+            return
+
+        badges = counts.badges(include_reports=include_reports)
+        for key, value in badge_deltas(self._badges, badges).items():
+            self._sidebar.set_notification(key, value)
+        self._badges = badges
+
+    def _refresh_home_if_visible(self) -> None:
+        if self._stack.currentWidget() is self._home_view:
+            self._home_view.refresh_data()
 
     def _maybe_warn_sqlite(self) -> None:
         """Muestra una advertencia si el backend es SQLite y permite suprimir futuros avisos."""
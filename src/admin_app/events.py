@@ -1,4 +1,150 @@
-from PySide6.QtCore import QObject, Signal
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, replace
+from typing import Iterable
+
+from PySide6.QtCore import QCoreApplication, QObject, Qt, QTimer, Signal
+from sqlalchemy import event, select
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .models import Customer, Delivery, Order, Sale, SalePayment
+
+
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+# Ventana en la que se acumulan cambios antes de avisar a las vistas
+COALESCE_WINDOW_MS = 60
+
+# Filas que se leen antes de un UPDATE/DELETE masivo; si hay más se avisa por tabla
+BULK_ID_LIMIT = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class SaleChanged:
+    id: int
+    op: str
+
+
+@dataclass(frozen=True, slots=True)
+class OrderChanged:
+    id: int
+    op: str
+    sale_id: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentChanged:
+    id: int
+    op: str
+    sale_id: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryChanged:
+    id: int
+    op: str
+    order_id: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class CustomerChanged:
+    id: int
+    op: str
+
+
+@dataclass(frozen=True, slots=True)
+class TableChanged:
+    """Cambio masivo sin ids (demasiadas filas para leerlas): quien escuche `kind` debe recargar."""
+    kind: type
+    op: str
+
+
+ChangeEvent = SaleChanged | OrderChanged | PaymentChanged | DeliveryChanged | CustomerChanged | TableChanged
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeBatch:
+    """Cambios acumulados durante una ráfaga, ya fusionados por entidad."""
+    events: tuple[ChangeEvent, ...]
+
+    def of(self, kind: type) -> tuple[ChangeEvent, ...]:
+        return tuple(e for e in self.events if type(e) is kind)
+
+    def ids(self, kind: type, *ops: str) -> set[int]:
+        return {e.id for e in self.events if type(e) is kind and (not ops or e.op in ops)}
+
+    def touches(self, *kinds: type) -> bool:
+        return any(type(e) in kinds for e in self.events) or self.whole(*kinds)
+
+    def whole(self, *kinds: type) -> bool:
+        """True si alguna de `kinds` cambió en bloque, sin ids (ver `TableChanged`)."""
+        return any(type(e) is TableChanged and e.kind in kinds for e in self.events)
+
+
+def _key(ev: ChangeEvent) -> tuple[type, object]:
+    return (TableChanged, ev.kind) if type(ev) is TableChanged else (type(ev), ev.id)
+
+
+def _merge(previous: ChangeEvent | None, current: ChangeEvent) -> ChangeEvent:
+    """Fusiona dos eventos de la misma entidad.
+
+    Creado y luego borrado queda como borrado: una vista pudo haberlo cargado
+    antes de que llegara el aviso, y borrar una fila inexistente no cuesta nada.
+    """
+    if previous is None:
+        return current
+    if previous.op == CREATED and current.op != DELETED:
+        return replace(current, op=CREATED)
+    if previous.op == DELETED and current.op == CREATED:
+        return replace(current, op=UPDATED)
+    return current
+
+
+class EventBus(QObject):
+    """Bus de eventos por entidad que agrupa ráfagas de cambios.
+
+    `publish` puede llamarse desde cualquier hilo; `changes` se emite en el hilo
+    del bus como mucho una vez por ventana de `window_ms`, con un `ChangeBatch`.
+    """
+
+    changes = Signal(object)
+    _schedule = Signal()
+
+    def __init__(self, window_ms: int = COALESCE_WINDOW_MS, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[type, object], ChangeEvent] = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(window_ms)
+        self._timer.timeout.connect(self.flush)
+        self._schedule.connect(self._timer.start, Qt.ConnectionType.QueuedConnection)
+
+    def publish(self, *items: ChangeEvent) -> None:
+        # Sin aplicación Qt (scripts, pruebas de repositorio) no hay quién escuche
+        if not items or QCoreApplication.instance() is None:
+            return
+        with self._lock:
+            was_idle = not self._pending
+            for ev in items:
+                key = _key(ev)
+                self._pending[key] = _merge(self._pending.get(key), ev)
+        if was_idle:
+            self._schedule.emit()
+
+    def flush(self) -> ChangeBatch | None:
+        """Entrega de inmediato lo acumulado (lo llama el temporizador)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        batch = ChangeBatch(tuple(pending.values()))
+        if not batch.events:
+            return None
+        self.changes.emit(batch)
+        _emit_legacy(batch)
+        return batch
 
 
 class _AppEvents(QObject):
@@ -6,3 +152,106 @@ class _AppEvents(QObject):
     sale_updated = Signal()      # Signal to refresh sales lists
 
 events = _AppEvents()
+bus = EventBus()
+
+
+def _emit_legacy(batch: ChangeBatch) -> None:
+    # Señales anteriores al bus: una por ráfaga para quien aún las use
+    for order_id in sorted(batch.ids(OrderChanged, CREATED)):
+        events.order_created.emit(order_id)
+    if batch.touches(SaleChanged, PaymentChanged):
+        events.sale_updated.emit()
+
+
+# --- Captura automática de cambios del ORM ---
+
+_PENDING_KEY = "_change_events"
+
+
+def _event_for(obj, op: str) -> ChangeEvent | None:
+    ident = getattr(obj, 'id', None)
+    if ident is None:
+        return None
+    if isinstance(obj, Sale):
+        return SaleChanged(ident, op)
+    if isinstance(obj, Order):
+        return OrderChanged(ident, op, obj.sale_id)
+    if isinstance(obj, SalePayment):
+        return PaymentChanged(ident, op, obj.sale_id)
+    if isinstance(obj, Delivery):
+        return DeliveryChanged(ident, op, obj.order_id)
+    if isinstance(obj, Customer):
+        return CustomerChanged(ident, op)
+    return None
+
+
+def _collect(session: Session, objs: Iterable, op: str) -> None:
+    record(session, *filter(None, (_event_for(obj, op) for obj in objs)))
+
+
+def record(session: Session, *items: ChangeEvent) -> None:
+    """Anotar eventos a publicar cuando `session` confirme (para escrituras que el ORM no ve)."""
+    if items:
+        session.info.setdefault(_PENDING_KEY, []).extend(items)
+
+
+# Tablas con eventos: (clase del evento, columna del padre que lleva el evento)
+_BULK_TRACKED = {
+    Sale.__table__: (SaleChanged, None),
+    Order.__table__: (OrderChanged, 'sale_id'),
+    SalePayment.__table__: (PaymentChanged, 'sale_id'),
+    Delivery.__table__: (DeliveryChanged, 'order_id'),
+    Customer.__table__: (CustomerChanged, None),
+}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state: ORMExecuteState) -> None:
+    """UPDATE/DELETE masivos (`query.delete()`, `session.execute(update(...))`) no pasan por el flush.
+
+    Antes de ejecutarlos se leen los ids afectados con el mismo WHERE, hasta
+    `BULK_ID_LIMIT`; si hay más se anota un `TableChanged` en su lugar. Sin
+    aplicación Qt no se lee nada: `publish` descartaría los eventos.
+    """
+    if not (state.is_update or state.is_delete) or QCoreApplication.instance() is None:
+        return
+    table = getattr(state.statement, 'table', None)
+    tracked = _BULK_TRACKED.get(table)
+    if tracked is None:
+        return
+    kind, parent = tracked
+    columns = [table.c.id] + ([table.c[parent]] if parent else [])
+    query = select(*columns).limit(BULK_ID_LIMIT + 1)
+    if state.statement.whereclause is not None:
+        query = query.where(state.statement.whereclause)
+    params = state.parameters
+    param_sets = params if isinstance(params, list) else [params or {}]
+    op = UPDATED if state.is_update else DELETED
+    found: dict[int, ChangeEvent] = {}
+    for values in param_sets:
+        for row in state.session.execute(query, values):
+            found[row[0]] = kind(row[0], op, *row[1:])
+        if len(found) > BULK_ID_LIMIT:
+            record(state.session, TableChanged(kind, op))
+            return
+    record(state.session, *found.values())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    _collect(session, session.new, CREATED)
+    _collect(session, (o for o in session.dirty if session.is_modified(o, include_collections=False)), UPDATED)
+    _collect(session, session.deleted, DELETED)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    # Solo se publica lo confirmado: las vistas recargan y deben ver los cambios
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bus.publish(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_uncommitted(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
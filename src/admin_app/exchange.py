@@ -19,10 +19,11 @@ import time
 from pathlib import Path
 from datetime import date as _date, datetime as _dt
 
-try:
-	import requests  # type: ignore
-except Exception:  # requests puede no estar instalado aún
-	requests = None  # type: ignore
+from .utils.lazy_import import lazy_module
+
+# Diferido: importar requests (urllib3, ssl, charset_normalizer) cuesta ~50 ms al arrancar
+# y solo se usa al consultar la tasa. None si requests no está instalado.
+requests = lazy_module("requests", optional=True)  # type: ignore
 
 
 def _try_get(url: str, json_path: tuple[str, ...], timeout: float = 5.0) -> Optional[float]:
@@ -5,7 +5,7 @@ from sqlalchemy import Text, JSON
 
 from datetime import datetime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, DateTime, Float, ForeignKey, Boolean, Table
+from sqlalchemy import Integer, String, DateTime, Float, ForeignKey, Boolean, Table, UniqueConstraint, Index
 from typing import List
 
 class Base(DeclarativeBase):
@@ -413,6 +413,10 @@ class OrderSequence(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Cola de trabajo por rol: estado (+ diseñador asignado) en orden de llegada
+        Index("ix_orders_status_designer_created", "status", "designer_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sale_id: Mapped[int] = mapped_column(Integer, ForeignKey("sales.id"), nullable=False)
@@ -722,6 +726,12 @@ class DeliveryPayment(Base):
 
 class Delivery(Base):
     __tablename__ = "deliveries"
+    __table_args__ = (
+        # Pendientes de pago por motorizado y lotes ya pagados (payment_id = :id)
+        Index("ix_deliveries_payment_rider_sent", "payment_id", "delivery_user_id", "sent_at"),
+        # Listado por rango de fechas y estado
+        Index("ix_deliveries_sent_status", "sent_at", "status"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     order_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("orders.id"), nullable=True)
@@ -783,6 +793,12 @@ class TransactionCategory(Base):
 class Transaction(Base):
     """Movimientos contables (ingresos, egresos, transferencias)"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Búsqueda de la transacción de un pago/entrega/nómina por su origen
+        Index("ix_transactions_related", "related_table", "related_id"),
+        # Estado de nómina por rango de fechas
+        Index("ix_transactions_category_related_date", "category_id", "related_table", "date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
@@ -799,6 +815,8 @@ class Transaction(Base):
     # Tracking origin
     related_table: Mapped[str | None] = mapped_column(String(50)) 
     related_id: Mapped[int | None] = mapped_column(Integer)
+    # Pagos de nómina: 1 = primera quincena, 2 = segunda (None en otros movimientos)
+    quincena: Mapped[int | None] = mapped_column(Integer)
 
     account: Mapped["Account"] = relationship("Account")
     category: Mapped["TransactionCategory"] = relationship("TransactionCategory")
@@ -807,6 +825,21 @@ class Transaction(Base):
         return f"Transaction(id={self.id!r}, type={self.transaction_type!r}, amount={self.amount!r})"
 
 
+class AccountBalanceSnapshot(Base):
+    """Saldo de una cuenta calculado desde el libro (transactions) a una fecha de corte."""
+    __tablename__ = "account_balance_snapshots"
+    __table_args__ = (UniqueConstraint("account_id", "as_of", name="uq_account_balance_snapshot"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    account_id: Mapped[int] = mapped_column(Integer, ForeignKey("accounts.id"), nullable=False)
+    as_of: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    balance: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    def __repr__(self) -> str:
+        return f"AccountBalanceSnapshot(account_id={self.account_id!r}, as_of={self.as_of!r}, balance={self.balance!r})"
+
+
 
 from sqlalchemy import Date
 
@@ -856,3 +889,38 @@ class AccountsPayable(Base):
 
     def __repr__(self) -> str:
         return f"Bill(id={self.id!r}, to={self.supplier_name!r}, amount={self.amount!r}, status={self.status!r})"
+
+
+class SyncChange(Base):
+    """
+    Registro local de cambios para la sincronización incremental con el
+    servidor: 'U' (fila actualizada) o 'D' (lápida de una fila borrada).
+    Las altas se anotan como 'U'; ver services/delta_sync.py.
+    """
+    __tablename__ = "sync_changes"
+    __table_args__ = (Index("ix_sync_changes_table_row", "table_name", "row_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    table_name: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    op: Mapped[str] = mapped_column(String(1), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"SyncChange({self.table_name}#{self.row_id} {self.op})"
+
+
+class SyncOrigin(Base):
+    """
+    Lado servidor de la sincronización incremental: qué estación envió cada
+    fila. Una estación no puede pisar ni borrar filas de otra (mismo id en
+    dos sucursales); ver services/delta_sync.py.
+    """
+    __tablename__ = "sync_origins"
+
+    table_name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    row_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    station: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"SyncOrigin({self.table_name}#{self.row_id} <- {self.station})"
@@ -0,0 +1,29 @@
+"""
+Formas de pago de ventas, tal como se guardan en `sale_payments.payment_method`.
+
+Los combos de pago, el cálculo de "Ingresos $" (solo divisas) y los datos
+sintéticos usan estos nombres; un nombre distinto se cuenta como divisa.
+"""
+
+from __future__ import annotations
+
+
+EFECTIVO_USD = "Efectivo USD"
+ZELLE = "Zelle"
+BANESCO_PANAMA = "Banesco Panamá"
+BINANCE = "Binance"
+PAYPAL = "PayPal"
+
+EFECTIVO_BS = "Efectivo Bs.D"
+PAGO_MOVIL = "Pago móvil"
+TRANSFERENCIA_BS = "Transferencia Bs.D"
+PUNTO_DE_VENTA = "Punto de Venta"
+
+USD_METHODS: tuple[str, ...] = (EFECTIVO_USD, ZELLE, BANESCO_PANAMA, BINANCE, PAYPAL)
+BS_METHODS: tuple[str, ...] = (EFECTIVO_BS, PAGO_MOVIL, TRANSFERENCIA_BS, PUNTO_DE_VENTA)
+SALE_METHODS: tuple[str, ...] = USD_METHODS + BS_METHODS
+
+
+def is_bs_method(method: str | None) -> bool:
+    """True si la forma de pago es en bolívares."""
+    return method in BS_METHODS
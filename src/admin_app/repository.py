@@ -66,7 +66,7 @@ def delete_product_by_id(session: Session, product_id: int) -> bool:
 from typing import Iterable, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, text
+from sqlalchemy import event, inspect, select, text
 from sqlalchemy.exc import IntegrityError
 import hashlib, os, hmac
 
@@ -103,129 +103,183 @@ from .models import (
 )
 
 
+# --- Enrutamiento de pagos a cuentas ---
+# La tabla de rutas se arma una vez por sesión a partir de las cuentas activas y se
+# descarta cuando se crea, elimina, renombra o (des)activa una cuenta.
+
+_ACCOUNT_ROUTER_KEY = "_account_router"
+_SALES_CATEGORY_KEY = "_sales_category_id"
+
+# Grupo de palabra clave -> fragmentos buscados en el nombre de la cuenta
+_ACCOUNT_KEYWORDS: dict[str, tuple[str, ...]] = {
+    'cash': ('efectivo', 'caja'),
+    'venezuela': ('venezuela',),
+    'bancamiga': ('bancamiga',),
+    'banesco': ('banesco',),
+    'zelle': ('zelle',),
+    'digital': ('zelle', 'digital'),
+}
+
+
+class _AccountRouter:
+    """Cuentas activas por moneda con la primera coincidencia de cada palabra clave precalculada."""
+
+    __slots__ = ("by_currency", "by_keyword", "_bank_memo")
+
+    def __init__(self, accounts: Iterable[Account]):
+        self.by_currency: dict[str, list[Account]] = {}
+        self.by_keyword: dict[tuple[str, str], Account] = {}
+        self._bank_memo: dict[tuple[str, str], Account | None] = {}
+        for acc in accounts:
+            self.by_currency.setdefault(acc.currency, []).append(acc)
+            name = (acc.name or "").lower()
+            for kw, parts in _ACCOUNT_KEYWORDS.items():
+                if (acc.currency, kw) not in self.by_keyword and any(p in name for p in parts):
+                    self.by_keyword[(acc.currency, kw)] = acc
+
+    def first(self, currency: str) -> Account | None:
+        accounts = self.by_currency.get(currency)
+        return accounts[0] if accounts else None
+
+    def keyword(self, currency: str, kw: str) -> Account | None:
+        return self.by_keyword.get((currency, kw))
+
+    def bank(self, currency: str, bank: str) -> Account | None:
+        key = (currency, bank.lower())
+        if key not in self._bank_memo:
+            self._bank_memo[key] = next(
+                (a for a in self.by_currency.get(currency, []) if key[1] in (a.name or "").lower()), None
+            )
+        return self._bank_memo[key]
+
+
+def _account_router(session: Session) -> _AccountRouter:
+    router = session.info.get(_ACCOUNT_ROUTER_KEY)
+    if router is None:
+        accounts = session.query(Account).filter(Account.is_active == True).order_by(Account.id).all()
+        router = session.info[_ACCOUNT_ROUTER_KEY] = _AccountRouter(accounts)
+    return router
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_account_router(session: Session, flush_context) -> None:
+    if _ACCOUNT_ROUTER_KEY not in session.info:
+        return
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Account):
+            session.info.pop(_ACCOUNT_ROUTER_KEY, None)
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Account):
+            state = inspect(obj)
+            if any(state.attrs[a].history.has_changes() for a in ('name', 'currency', 'is_active')):
+                session.info.pop(_ACCOUNT_ROUTER_KEY, None)
+                return
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_routing_cache(session: Session, previous_transaction) -> None:
+    session.info.pop(_ACCOUNT_ROUTER_KEY, None)
+    session.info.pop(_SALES_CATEGORY_KEY, None)
+
+
+def _sales_category_id(session: Session) -> int | None:
+    """ID de la categoría 'Ventas', memorizado en la sesión una vez encontrado."""
+    cat_id = session.info.get(_SALES_CATEGORY_KEY)
+    if cat_id is None:
+        cat_id = session.query(TransactionCategory.id).filter(TransactionCategory.name == "Ventas").scalar()
+        if cat_id is not None:
+            session.info[_SALES_CATEGORY_KEY] = cat_id
+    return cat_id
+
+
 def _get_or_create_account_by_context(session: Session, method: str, currency: str = 'USD', bank: str = None) -> Account | None:
     """Helper to find the best matching account for a payment. Creates one if specific bank provided."""
     method = (method or "").lower()
     bank_raw = (bank or "").strip()
-    
-    query = session.query(Account).filter(Account.is_active == True)
-    
-    if currency == 'VES':
-        query = query.filter(Account.currency == 'VES')
-        accounts = query.all()
-        
-        # Priority 1: Bank Name Match (if provided)
-        if bank_raw:
-            # Check existing
-            for acc in accounts:
-                if bank_raw.lower() in acc.name.lower():
-                    return acc
-            
-            # Create NEW Bank Account if specific bank name was given
+    router = _account_router(session)
+    currency = 'VES' if currency == 'VES' else 'USD'
+
+    # Priority 1: Bank/Platform name match (if provided)
+    if bank_raw:
+        match = router.bank(currency, bank_raw)
+        if match:
+            return match
+
+        # Create NEW account if specific bank name was given
+        acc_name = bank_raw.title()
+        if currency == 'VES' and "banco" not in acc_name.lower():
             # Naming convention: "Banco [Name]"
-            acc_name = bank_raw.title()
-            if "banco" not in acc_name.lower():
-                acc_name = f"Banco {acc_name}"
-                
-            new_acc = Account(
-                name=acc_name,
-                type='bank',
-                currency='VES',
-                balance=0.0,
-                is_active=True
-            )
-            session.add(new_acc)
-            session.flush()
-            return new_acc
-                    
-        # Priority 2: Method keywords (if no bank name)
-        if "efectivo" in method:
-            for acc in accounts:
-                # Look for 'Efectivo' or legacy 'Caja'
-                if "efectivo" in acc.name.lower() or "caja" in acc.name.lower():
-                    return acc
-        
-        # Priority 3: Default fallbacks for common banks if mentioned in method
-        # Check specific company banks
-        lower_method = method.lower()
-        if "venezuela" in lower_method:
-             match = next((a for a in accounts if "venezuela" in a.name.lower()), None)
-             if match: return match
-        if "bancamiga" in lower_method:
-             match = next((a for a in accounts if "bancamiga" in a.name.lower()), None)
-             if match: return match
-        if "banesco" in lower_method:
-             match = next((a for a in accounts if "banesco" in a.name.lower()), None)
-             if match: return match
-
-        # Generic fallbacks
-        for acc in accounts:
-            if "banesco" in acc.name.lower() or "banesco" in method:
-                return acc
-                
-        # Fallback: any VES account (usually Banesco)
-        if accounts: return accounts[0]
-        
-    else: # USD
-        query = query.filter(Account.currency == 'USD')
-        accounts = query.all()
-        
-        # Priority 1: Specific Bank/Platform name
-        if bank_raw:
-             for acc in accounts:
-                if bank_raw.lower() in acc.name.lower():
-                    return acc
-             
-             # Create New USD Account (e.g. "Zelle Juan", "Banesco Panama")
-             acc_name = bank_raw.title()
-             # If it's a bank, maybe prefix? For USD, often user types "Zelle" or "Panama". 
-             # Let's just use what they typed but capitalized.
-             new_acc = Account(
-                name=acc_name,
-                type='bank',
-                currency='USD',
-                balance=0.0,
-                is_active=True
-             )
-             session.add(new_acc)
-             session.flush()
-             return new_acc
-
-        # Priority 2: Method keywords
-        if "efectivo" in method:
-            for acc in accounts:
-                if "efectivo" in acc.name.lower() or "caja" in acc.name.lower():
-                    return acc
-        
-        # Priority 3: Digital (Zelle, etc)
-        # Check Zelle specifically
-        if "zelle" in method:
-             match = next((a for a in accounts if "zelle" in a.name.lower()), None)
-             if match: return match
-
-        if any(x in method for x in ["binance", "paypal", "panamá", "digital"]):
-            for acc in accounts:
-                if "zelle" in acc.name.lower() or "digital" in acc.name.lower():
-                    return acc
-        
-        # Fallback
-        if accounts: return accounts[0]
-            
-    return None
+            acc_name = f"Banco {acc_name}"
+        # For USD, often user types "Zelle" or "Panama": use what they typed but capitalized.
+        new_acc = Account(
+            name=acc_name,
+            type='bank',
+            currency=currency,
+            balance=0.0,
+            is_active=True
+        )
+        session.add(new_acc)
+        session.flush()
+        return new_acc
+
+    # Priority 2: Method keywords ('Efectivo' or legacy 'Caja')
+    if "efectivo" in method:
+        match = router.keyword(currency, 'cash')
+        if match:
+            return match
+
+    if currency == 'VES':
+        # Priority 3: Default fallbacks for common company banks if mentioned in method
+        for kw in ('venezuela', 'bancamiga', 'banesco'):
+            if kw in method:
+                match = router.keyword('VES', kw)
+                if match:
+                    return match
+        # Generic fallback: Banesco, else any VES account
+        return router.keyword('VES', 'banesco') or router.first('VES')
+
+    # Priority 3: Digital (Zelle, etc)
+    if "zelle" in method:
+        match = router.keyword('USD', 'zelle')
+        if match:
+            return match
+    if any(x in method for x in ["binance", "paypal", "panamá", "digital"]):
+        match = router.keyword('USD', 'digital')
+        if match:
+            return match
+
+    # Fallback
+    return router.first('USD')
 
 def _sync_payment_to_transaction(session: Session, payment: SalePayment, sale_desc: str = ""):
     """Creates or links a Transaction to a SalePayment."""
-    if not payment.id:
-        session.flush() # Ensure ID
-        
-    # Check if exists
-    existing = session.query(Transaction).filter(
-        Transaction.related_table == 'sale_payments', 
-        Transaction.related_id == payment.id
-    ).first()
-    
-    if existing: return # Already synced
-    
+    _sync_payments_to_transactions(session, [payment], sale_desc)
+
+
+def _sync_payments_to_transactions(session: Session, payments: list[SalePayment], sale_desc: str = "") -> None:
+    """Versión por lotes: un solo flush, una consulta de existentes y la categoría una vez."""
+    if not payments:
+        return
+    if any(not p.id for p in payments):
+        session.flush() # Ensure IDs
+
+    synced = {rid for (rid,) in session.query(Transaction.related_id).filter(
+        Transaction.related_table == 'sale_payments',
+        Transaction.related_id.in_([p.id for p in payments]),
+    )}
+    cat_id = _sales_category_id(session)
+
+    for payment in payments:
+        if payment.id in synced:
+            continue # Already synced
+        try:
+            _add_payment_transaction(session, payment, sale_desc, cat_id)
+        except Exception as e:
+            print(f"Error syncing transaction: {e}")
+
+
+def _add_payment_transaction(session: Session, payment: SalePayment, sale_desc: str, cat_id: int | None) -> None:
     # Determine Currency and Amount
     method = (payment.payment_method or "").lower()
     
@@ -310,10 +364,6 @@ def _sync_payment_to_transaction(session: Session, payment: SalePayment, sale_de
     if not acc:
         return # Cannot register without account
         
-    # Find Category 'Ventas'
-    cat = session.query(TransactionCategory).filter(TransactionCategory.name == "Ventas").first()
-    cat_id = cat.id if cat else None
-    
     # Create Transaction
     desc = f"Venta: {sale_desc}"
     if payment.reference:
@@ -450,14 +500,48 @@ def user_has_permission(session: Session, *, user_id: int, permission_code: str)
     return session.query(q.exists()).scalar() or False
 
 
+# Roles por usuario memorizados en la sesión: las vistas preguntan por varios roles
+# seguidos (tablero, permisos de menú) y cada pregunta era una consulta.
+_USER_ROLES_KEY = "_user_role_names"
+
+
+def user_role_names(session: Session, user_id: int) -> frozenset[str]:
+    """Nombres de los roles de `user_id`, una consulta por usuario y sesión."""
+    cache = session.info.setdefault(_USER_ROLES_KEY, {})
+    names = cache.get(user_id)
+    if names is None:
+        names = cache[user_id] = frozenset(
+            session.scalars(
+                select(Role.name).join(UserRole, UserRole.role_id == Role.id).where(UserRole.user_id == user_id)
+            )
+        )
+    return names
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_user_roles(session: Session, flush_context) -> None:
+    if _USER_ROLES_KEY not in session.info:
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (UserRole, Role)):
+            session.info.pop(_USER_ROLES_KEY, None)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_user_roles_on_commit(session: Session) -> None:
+    # Los borrados masivos de user_roles no pasan por after_flush
+    session.info.pop(_USER_ROLES_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_user_roles(session: Session, previous_transaction) -> None:
+    session.info.pop(_USER_ROLES_KEY, None)
+
+
 def user_has_role(session: Session, *, user_id: int, role_name: str) -> bool:
     """Verifica si un usuario tiene un rol específico."""
-    q = (
-        session.query(UserRole)
-        .join(Role, Role.id == UserRole.role_id)
-        .filter(UserRole.user_id == user_id, Role.name == role_name)
-    )
-    return session.query(q.exists()).scalar() or False
+    return role_name in user_role_names(session, user_id)
 
 
 # --- Auth CRUD extra ---
@@ -565,6 +649,25 @@ def set_role_permissions(session: Session, *, role_id: int, permission_ids: list
     session.commit()
 
 
+def _ensure_model_indexes(engine) -> None:
+    """Crea los índices declarados en los modelos que falten en tablas ya existentes.
+
+    create_all/Alembic solo los crean junto con la tabla; en bases antiguas hay que agregarlos.
+    """
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not table.indexes or not insp.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=engine)
+            except Exception as e:
+                print(f"Advertencia: no se pudo crear el índice {index.name}: {e}")
+
+
 def init_db(engine, seed: bool = True) -> None:
     """Crea tablas y opcionalmente inserta datos de ejemplo."""
     
@@ -593,6 +696,10 @@ def init_db(engine, seed: bool = True) -> None:
                     conn.execute(text(f"ALTER TABLE customers ADD COLUMN {col} VARCHAR(50)"))
                 elif col == "short_address":
                     conn.execute(text("ALTER TABLE customers ADD COLUMN short_address VARCHAR(200)"))
+    # Búsqueda de clientes en PostgreSQL: índices de trigramas para ILIKE (no-op en SQLite)
+    if insp.has_table('customers'):
+        from .services.customer_search import ensure_trigram_indexes
+        ensure_trigram_indexes(engine)
     # Migración ligera: columna notes en sales
     if insp.has_table('sales'):
         sales_cols = {c['name'] for c in insp.get_columns('sales')}
@@ -687,6 +794,21 @@ def init_db(engine, seed: bool = True) -> None:
         if 'order_number' not in cols:
             with engine.begin() as conn:
                 conn.execute(text("ALTER TABLE corporeo_configs ADD COLUMN order_number VARCHAR(50)"))
+    # Migración ligera: quincena como columna real en pagos de nómina
+    if insp.has_table('transactions'):
+        txn_cols = {c['name'] for c in insp.get_columns('transactions')}
+        if 'quincena' not in txn_cols:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE transactions ADD COLUMN quincena INTEGER"))
+                # Los pagos viejos llevaban la quincena como etiqueta en la descripción
+                for q in (1, 2):
+                    conn.execute(text(
+                        "UPDATE transactions SET quincena = :q "
+                        "WHERE related_table = 'workers' AND quincena IS NULL AND UPPER(description) LIKE :tag"
+                    ), {'q': q, 'tag': f'%[Q{q}]%'})
+
+    _ensure_model_indexes(engine)
+
     if not seed:
         return
 
@@ -995,10 +1117,142 @@ def count_customers(session: Session) -> int:
 APIs EAV y Productos: mantenemos un set mínimo para soportar el configurador Corpóreo.
 """
 
+# --- Caché de esquema EAV ---
+#
+# Tipos, atributos y opciones cambian muy poco y se consultan cada vez que se abre
+# CorporeoDialog o se edita una venta corpórea. Se cargan una vez por engine como
+# snapshots inmutables y se invalidan al modificar opciones (o tras _EAV_CACHE_TTL
+# segundos, para ver cambios hechos desde otras estaciones).
+
+import threading as _threading
+import time as _time
+import weakref as _weakref
+from dataclasses import dataclass as _dataclass
+
+_EAV_CACHE_TTL = 300.0
+
+
+@_dataclass(frozen=True, slots=True)
+class EavTypeInfo:
+    id: int
+    key: str
+    name: str
+
+
+@_dataclass(frozen=True, slots=True)
+class EavAttributeInfo:
+    id: int
+    code: str
+    name: str
+    data_type: str
+    unit: str | None
+    price_per_unit: float
+    price_affects: bool
+    extra_percent: float
+    visible_expr: str | None
+
+
+@_dataclass(frozen=True, slots=True)
+class EavOptionInfo:
+    id: int
+    attribute_id: int
+    code: str
+    label: str
+    price_per_unit: float
+
+
+@_dataclass(frozen=True, slots=True)
+class _EavSchema:
+    types: tuple[EavTypeInfo, ...]
+    attributes_by_code: dict[str, EavAttributeInfo]
+    options_by_attribute: dict[int, tuple[EavOptionInfo, ...]]
+    type_attributes: dict[int, tuple[EavAttributeInfo, ...]]
+    loaded_at: float
+
+
+_eav_cache: "_weakref.WeakKeyDictionary[object, _EavSchema]" = _weakref.WeakKeyDictionary()
+_eav_cache_lock = _threading.Lock()
+
+
+def _eav_cache_key(session: Session):
+    bind = session.get_bind()
+    return getattr(bind, 'engine', bind)
+
+
+def _load_eav_schema(session: Session) -> _EavSchema:
+    # Atributos con sus opciones en una sola consulta (LEFT JOIN)
+    rows = (
+        session.query(EavAttribute, EavAttributeOption)
+        .outerjoin(EavAttributeOption, EavAttributeOption.attribute_id == EavAttribute.id)
+        .order_by(EavAttribute.id.asc(), EavAttributeOption.id.asc())
+        .all()
+    )
+    by_id: dict[int, EavAttributeInfo] = {}
+    options: dict[int, list[EavOptionInfo]] = {}
+    for atr, op in rows:
+        if atr.id not in by_id:
+            by_id[atr.id] = EavAttributeInfo(
+                id=atr.id, code=atr.code, name=atr.name, data_type=atr.data_type, unit=atr.unit,
+                price_per_unit=float(atr.price_per_unit or 0.0), price_affects=bool(atr.price_affects),
+                extra_percent=float(atr.extra_percent or 0.0), visible_expr=atr.visible_expr,
+            )
+            options[atr.id] = []
+        if op is not None:
+            options[atr.id].append(EavOptionInfo(
+                id=op.id, attribute_id=op.attribute_id, code=op.code, label=op.label,
+                price_per_unit=float(op.price_per_unit or 0.0),
+            ))
+
+    # Tipos con la lista ordenada de sus atributos
+    type_rows = (
+        session.query(EavProductType, EavTypeAttribute.attribute_id)
+        .outerjoin(EavTypeAttribute, EavTypeAttribute.type_id == EavProductType.id)
+        .order_by(EavProductType.name.asc(), EavTypeAttribute.sort_order.asc(), EavTypeAttribute.id.asc())
+        .all()
+    )
+    types: dict[int, EavTypeInfo] = {}
+    type_attrs: dict[int, list[EavAttributeInfo]] = {}
+    for t, attr_id in type_rows:
+        if t.id not in types:
+            types[t.id] = EavTypeInfo(id=t.id, key=t.key, name=t.name)
+            type_attrs[t.id] = []
+        if attr_id is not None and attr_id in by_id:
+            type_attrs[t.id].append(by_id[attr_id])
+
+    return _EavSchema(
+        types=tuple(types.values()),
+        attributes_by_code={a.code: a for a in by_id.values()},
+        options_by_attribute={k: tuple(v) for k, v in options.items()},
+        type_attributes={k: tuple(v) for k, v in type_attrs.items()},
+        loaded_at=_time.monotonic(),
+    )
+
+
+def _eav_schema(session: Session) -> _EavSchema:
+    key = _eav_cache_key(session)
+    with _eav_cache_lock:
+        schema = _eav_cache.get(key)
+        if schema is not None and _time.monotonic() - schema.loaded_at < _EAV_CACHE_TTL:
+            return schema
+    schema = _load_eav_schema(session)
+    with _eav_cache_lock:
+        _eav_cache[key] = schema
+    return schema
+
+
+def eav_invalidate_cache(session: Session | None = None) -> None:
+    """Descarta el esquema EAV en caché (de un engine o de todos)."""
+    with _eav_cache_lock:
+        if session is None:
+            _eav_cache.clear()
+        else:
+            _eav_cache.pop(_eav_cache_key(session), None)
+
+
 # --- EAV APIs ---
 
-def eav_list_types(session: Session) -> list[EavProductType]:
-    return session.query(EavProductType).order_by(EavProductType.name.asc()).all()
+def eav_list_types(session: Session) -> list[EavTypeInfo]:
+    return list(_eav_schema(session).types)
 
 
 def eav_list_products(session: Session, *, type_id: int) -> list[EavProduct]:
@@ -1013,32 +1267,18 @@ def eav_create_product(session: Session, *, type_id: int, name: str) -> EavProdu
     return obj
 
 
-def eav_list_attributes_for_type(session: Session, type_id: int) -> list[tuple[EavAttribute, list[EavAttributeOption]]]:
-    # Obtener atributos asociados al tipo y sus opciones
-    tas = (
-        session.query(EavTypeAttribute)
-        .filter(EavTypeAttribute.type_id == type_id)
-        .order_by(EavTypeAttribute.sort_order.asc(), EavTypeAttribute.id.asc())
-        .all()
-    )
-    result: list[tuple[EavAttribute, list[EavAttributeOption]]] = []
-    for ta in tas:
-        atr = session.get(EavAttribute, ta.attribute_id)
-        if not atr:
-            continue
-        opts = (
-            session.query(EavAttributeOption)
-            .filter(EavAttributeOption.attribute_id == atr.id)
-            .order_by(EavAttributeOption.id.asc())
-            .all()
-        )
-        result.append((atr, opts))
-    return result
+def eav_list_attributes_for_type(session: Session, type_id: int) -> list[tuple[EavAttributeInfo, list[EavOptionInfo]]]:
+    # Atributos asociados al tipo (en orden) y sus opciones, servidos desde caché
+    schema = _eav_schema(session)
+    return [
+        (atr, list(schema.options_by_attribute.get(atr.id, ())))
+        for atr in schema.type_attributes.get(type_id, ())
+    ]
 
 
 # --- EAV helpers mínimos para Corpóreo ---
-def eav_get_attribute_by_code(session: Session, code: str) -> EavAttribute | None:
-    return session.query(EavAttribute).filter(EavAttribute.code == code).first()
+def eav_get_attribute_by_code(session: Session, code: str) -> EavAttributeInfo | None:
+    return _eav_schema(session).attributes_by_code.get(code)
 
 
 def eav_add_option(session: Session, *, attribute_code: str, code: str, label: str, price_per_unit: float | None = None) -> EavAttributeOption | None:
@@ -1056,6 +1296,7 @@ def eav_add_option(session: Session, *, attribute_code: str, code: str, label: s
     session.add(op)
     session.commit()
     session.refresh(op)
+    eav_invalidate_cache(session)
     return op
 
 
@@ -1065,6 +1306,7 @@ def eav_set_option_price(session: Session, *, option_id: int, price_per_unit: fl
         return
     op.price_per_unit = float(price_per_unit or 0.0)
     session.commit()
+    eav_invalidate_cache(session)
 
 
 def eav_save_values(session: Session, *, product_id: int, values: list[tuple[int, dict]]) -> None:
@@ -1088,26 +1330,74 @@ def eav_save_values(session: Session, *, product_id: int, values: list[tuple[int
 
 
 def eav_get_product_values(session: Session, *, product_id: int) -> dict:
+    # Un solo JOIN por columnas: no se hidratan entidades EavValue/EavAttribute
     rows = (
-        session.query(EavValue, EavAttribute)
+        session.query(
+            EavAttribute.code, EavValue.value_text, EavValue.value_number,
+            EavValue.option_id, EavValue.value_bool, EavValue.subtotal_money,
+        )
         .join(EavAttribute, EavAttribute.id == EavValue.attribute_id)
         .filter(EavValue.product_id == product_id)
         .all()
     )
     out = {}
-    for v, atr in rows:
-        out[atr.code] = {
-            'text': v.value_text,
-            'number': v.value_number,
-            'option_id': v.option_id,
-            'bool': v.value_bool,
-            'subtotal': v.subtotal_money,
+    for code, text_val, number, option_id, bool_val, subtotal in rows:
+        out[code] = {
+            'text': text_val,
+            'number': number,
+            'option_id': option_id,
+            'bool': bool_val,
+            'subtotal': subtotal,
         }
     return out
 
 
+# Atributos mínimos del tipo Corpóreo: (code, name, data_type, unit, opciones)
+_CORPOREO_EAV_SPEC: tuple[tuple[str, str, str, str | None, tuple[tuple[str, str], ...]], ...] = (
+    ('alto_mm', 'Alto (mm)', 'number', 'mm', ()),
+    ('ancho_mm', 'Ancho (mm)', 'number', 'mm', ()),
+    ('diametro_mm', 'Diámetro (mm)', 'number', 'mm', ()),
+    ('corte_tipo', 'Tipo de Corte', 'option', None, (('recto', 'Recto'), ('silueta', 'Silueta'), ('redondo', 'Redondo'))),
+    ('material', 'Material', 'option', None, (('acrilico', 'Acrílico'), ('mdf', 'MDF'), ('pvc', 'PVC Espumado'))),
+    ('espesor_mm', 'Espesor', 'option', None, (('3', '3 mm'), ('5', '5 mm'), ('10', '10 mm'), ('15', '15 mm'))),
+    ('base_tipo', 'Tipo de Base', 'option', None, (('sin', 'Sin base'), ('mdf', 'MDF'), ('acrilico', 'Acrílico'), ('pvc', 'PVC'))),
+    ('base_color_code', 'Código Color', 'text', None, ()),
+    ('corporeo_modelos', 'Modelos Seleccionados', 'text', None, ()),
+    ('luces_tipo', 'Tipo de Luz', 'option', None, (('cinta', 'Cinta LED'), ('manguera', 'Neón manguera'), ('ceo', 'CEO'))),
+    ('luces_color', 'Color de Luz', 'option', None, (('calido', 'Cálido'), ('frio', 'Frío'), ('rgb', 'RGB'))),
+    ('luces_long_m', 'Longitud (m)', 'number', 'm', ()),
+    ('luces_precio_unit', 'Precio unit luz', 'money', None, ()),
+    ('regulador_amp', 'Regulador (Amp)', 'option', None, (('3A', '3A'), ('5A', '5A'), ('7A', '7A'))),
+    ('regulador_cant', 'Cant. Regulador', 'number', None, ()),
+    ('posicion_luz', 'Posición de Luz', 'option', None, (('frontal', 'Frontal'), ('posterior', 'Posterior'), ('borde', 'Borde'))),
+    ('posicion_borde', 'Borde', 'option', None, (('plano', 'Plano'), ('biselado', 'Biselado'))),
+    ('silueta_extra', 'Silueta $/m²', 'money', None, ()),
+    ('caja_de_luz', 'Caja de Luz', 'bool', None, ()),
+    ('caja_de_luz_pct', '% Caja de Luz', 'number', None, ()),
+)
+
+
+def _corporeo_eav_is_complete(schema: _EavSchema) -> int | None:
+    t = next((t for t in schema.types if t.key == 'CORPOREO'), None)
+    if t is None:
+        return None
+    linked = {a.code: a for a in schema.type_attributes.get(t.id, ())}
+    for code, _name, _dt, _unit, opts in _CORPOREO_EAV_SPEC:
+        atr = linked.get(code)
+        if atr is None:
+            return None
+        have = {o.code for o in schema.options_by_attribute.get(atr.id, ())}
+        if any(oc not in have for oc, _ in opts):
+            return None
+    return t.id
+
+
 def ensure_corporeo_eav(session: Session) -> int:
     """Asegura el tipo y atributos/opciones mínimas para Corpóreo. Retorna type_id."""
+    # Camino rápido: el esquema en caché ya tiene todo sembrado
+    type_id = _corporeo_eav_is_complete(_eav_schema(session))
+    if type_id is not None:
+        return type_id
     # Tipo
     t = session.query(EavProductType).filter(EavProductType.key == 'CORPOREO').first()
     if not t:
@@ -1133,7 +1423,7 @@ def ensure_corporeo_eav(session: Session) -> int:
             ta = EavTypeAttribute(type_id=type_id, attribute_id=a.id, sort_order=sort)
             session.add(ta); session.commit()
         return a
-    def ensure_opts(atr: EavAttribute, items: list[tuple[str, str]]):
+    def ensure_opts(atr: EavAttribute, items: tuple[tuple[str, str], ...]):
         for code, label in items:
             existing = (
                 session.query(EavAttributeOption)
@@ -1144,41 +1434,15 @@ def ensure_corporeo_eav(session: Session) -> int:
                 session.add(EavAttributeOption(attribute_id=atr.id, code=code, label=label, price_per_unit=0.0))
         session.commit()
     # Atributos y opciones mínimas
-    sort = 0
-    ensure_attr('alto_mm', 'Alto (mm)', 'number', unit='mm', sort=sort); sort += 1
-    ensure_attr('ancho_mm', 'Ancho (mm)', 'number', unit='mm', sort=sort); sort += 1
-    ensure_attr('diametro_mm', 'Diámetro (mm)', 'number', unit='mm', sort=sort); sort += 1
-    atr_corte = ensure_attr('corte_tipo', 'Tipo de Corte', 'option', sort=sort); sort += 1
-    ensure_opts(atr_corte, [('recto', 'Recto'), ('silueta', 'Silueta'), ('redondo', 'Redondo')])
-    atr_mat = ensure_attr('material', 'Material', 'option', sort=sort); sort += 1
-    ensure_opts(atr_mat, [('acrilico', 'Acrílico'), ('mdf', 'MDF'), ('pvc', 'PVC Espumado')])
-    atr_esp = ensure_attr('espesor_mm', 'Espesor', 'option', sort=sort); sort += 1
-    ensure_opts(atr_esp, [('3', '3 mm'), ('5', '5 mm'), ('10', '10 mm'), ('15', '15 mm')])
-    atr_base = ensure_attr('base_tipo', 'Tipo de Base', 'option', sort=sort); sort += 1
-    ensure_opts(atr_base, [('sin', 'Sin base'), ('mdf', 'MDF'), ('acrilico', 'Acrílico'), ('pvc', 'PVC')])
-    ensure_attr('base_color_code', 'Código Color', 'text', sort=sort); sort += 1
-    ensure_attr('corporeo_modelos', 'Modelos Seleccionados', 'text', sort=sort); sort += 1
-    atr_luz_t = ensure_attr('luces_tipo', 'Tipo de Luz', 'option', sort=sort); sort += 1
-    ensure_opts(atr_luz_t, [('cinta', 'Cinta LED'), ('manguera', 'Neón manguera'), ('ceo', 'CEO')])
-    atr_luz_c = ensure_attr('luces_color', 'Color de Luz', 'option', sort=sort); sort += 1
-    ensure_opts(atr_luz_c, [('calido', 'Cálido'), ('frio', 'Frío'), ('rgb', 'RGB')])
-    ensure_attr('luces_long_m', 'Longitud (m)', 'number', unit='m', sort=sort); sort += 1
-    ensure_attr('luces_precio_unit', 'Precio unit luz', 'money', sort=sort); sort += 1
-    atr_reg = ensure_attr('regulador_amp', 'Regulador (Amp)', 'option', sort=sort); sort += 1
-    ensure_opts(atr_reg, [('3A', '3A'), ('5A', '5A'), ('7A', '7A')])
-    ensure_attr('regulador_cant', 'Cant. Regulador', 'number', sort=sort); sort += 1
-    atr_pos_luz = ensure_attr('posicion_luz', 'Posición de Luz', 'option', sort=sort); sort += 1
-    ensure_opts(atr_pos_luz, [('frontal', 'Frontal'), ('posterior', 'Posterior'), ('borde', 'Borde')])
-    atr_pos_borde = ensure_attr('posicion_borde', 'Borde', 'option', sort=sort); sort += 1
-    ensure_opts(atr_pos_borde, [('plano', 'Plano'), ('biselado', 'Biselado')])
-    ensure_attr('silueta_extra', 'Silueta $/m²', 'money', sort=sort); sort += 1
-    ensure_attr('caja_de_luz', 'Caja de Luz', 'bool', sort=sort); sort += 1
-    ensure_attr('caja_de_luz_pct', '% Caja de Luz', 'number', sort=sort); sort += 1
+    for sort, (code, name, data_type, unit, opts) in enumerate(_CORPOREO_EAV_SPEC):
+        atr = ensure_attr(code, name, data_type, unit=unit, sort=sort)
+        if opts:
+            ensure_opts(atr, opts)
+    eav_invalidate_cache(session)
     return type_id
 
 
 
-
 def set_product_bom(session: Session, product_id: int, items: list[tuple[int, float, float]]) -> None:
     pass
 
@@ -1398,6 +1662,7 @@ def add_sale(
         # Guardar pagos si existen
         if payments:
             from .models import SalePayment
+            new_payments = []
             for pay in payments:
                 # Parsear fecha
                 p_date = datetime.utcnow()
@@ -1421,11 +1686,9 @@ def add_sale(
                     payment_date=p_date
                 )
                 session.add(sp)
-                # Auto-sync to accounting
-                try:
-                    _sync_payment_to_transaction(session, sp, sale_desc=f"{obj.numero_orden} - {obj.articulo}")
-                except Exception as e:
-                    print(f"Error syncing transaction: {e}")
+                new_payments.append(sp)
+            # Auto-sync to accounting
+            _sync_payments_to_transactions(session, new_payments, sale_desc=f"{obj.numero_orden} - {obj.articulo}")
 
         # Determinar si crear pedido
         # Antes se filtraba por 'corp' o descripción. Ahora, por solicitud del usuario,
@@ -1532,14 +1795,9 @@ def add_sale(
             obj.details_json = json.dumps(details_for_sale, ensure_ascii=False)
         except Exception:
             pass
+        # El aviso a las vistas (OrderChanged/SaleChanged) lo publica events al confirmar
         session.commit()
         session.refresh(obj)
-        if created_order_id:
-            try:
-                from .events import events
-                events.order_created.emit(created_order_id)
-            except Exception:
-                pass
         # Adjuntar info del pedido creado (si aplica) al objeto devuelto
         if created_order_id:
             try:
@@ -1601,21 +1859,8 @@ def update_sale(session: Session, sale_id: int, **fields) -> bool:
         payments_data = fields.pop('payments')
         if isinstance(payments_data, list):
             # Eliminar pagos existentes Y sus transacciones vinculadas
+            _remove_payment_transactions(session, [pay.id for pay in obj.payments])
             for pay in obj.payments:
-                # Find linked transaction
-                txn = session.query(Transaction).filter(
-                    Transaction.related_table == 'sale_payments',
-                    Transaction.related_id == pay.id
-                ).first()
-                if txn:
-                    # Reverse balance effect
-                    if txn.account:
-                        if txn.transaction_type == 'INCOME':
-                            txn.account.balance -= txn.amount
-                        else:
-                            txn.account.balance += txn.amount
-                    session.delete(txn)
-                
                 session.delete(pay)
             obj.payments = [] # Limpiar relación en memoria
             
@@ -1642,12 +1887,9 @@ def update_sale(session: Session, sale_id: int, **fields) -> bool:
                 )
                 obj.payments.append(new_pay) # Add to relationship
                 session.add(new_pay) # Ensure added to session
-                
-                # Auto-sync
-                try:
-                    _sync_payment_to_transaction(session, new_pay, sale_desc=f"{obj.numero_orden} - {obj.articulo}")
-                except Exception as e:
-                    print(f"Error syncing transaction in update: {e}")
+
+            # Auto-sync
+            _sync_payments_to_transactions(session, list(obj.payments), sale_desc=f"{obj.numero_orden} - {obj.articulo}")
 
     # Actualizar campos simples
     for k, v in fields.items():
@@ -1693,11 +1935,19 @@ def update_sale(session: Session, sale_id: int, **fields) -> bool:
 
 
 def _remove_payment_transaction(session: Session, payment_id: int):
-    txn = session.query(Transaction).filter(
+    _remove_payment_transactions(session, [payment_id])
+
+
+def _remove_payment_transactions(session: Session, payment_ids: list[int]) -> None:
+    """Elimina las transacciones de varios pagos (una sola consulta) revirtiendo el saldo."""
+    payment_ids = [pid for pid in payment_ids if pid]
+    if not payment_ids:
+        return
+    txns = session.query(Transaction).options(joinedload(Transaction.account)).filter(
         Transaction.related_table == 'sale_payments',
-        Transaction.related_id == payment_id
-    ).first()
-    if txn:
+        Transaction.related_id.in_(payment_ids)
+    ).all()
+    for txn in txns:
         # Reverse balance
         if txn.account:
              if txn.transaction_type == 'INCOME':
@@ -1712,8 +1962,7 @@ def delete_sale_by_id(session: Session, sale_id: int) -> bool:
         return False
     
     # Clean up Transactions linked to payments
-    for pay in obj.payments:
-         _remove_payment_transaction(session, pay.id)
+    _remove_payment_transactions(session, [pay.id for pay in obj.payments])
 
     # Delete associated orders first to maintain consistency
     orders = session.query(Order).filter(Order.sale_id == sale_id).all()
@@ -2085,7 +2334,7 @@ def get_daily_sales_data(session: Session, target_date: Optional[datetime | _dat
     daily_sales = query.all()
 
     # Obtener pagos de cuentas por cobrar del día
-    payments_query = session.query(SalePayment).filter(
+    payments_query = session.query(SalePayment).options(joinedload(SalePayment.sale)).filter(
         SalePayment.payment_date >= datetime.combine(day, datetime.min.time()),
         SalePayment.payment_date < datetime.combine(day, datetime.max.time())
     )
@@ -2463,93 +2712,141 @@ def get_sales_by_user(session: Session, start_date: Optional[datetime] = None, e
     ]
 
 
-def get_daily_sales_chart_data(session: Session, days_back: int = 7, filter_user: Optional[str] = None) -> dict:
-    """Obtener datos de ventas por día para gráficos."""
-    from .models import Sale
-    from datetime import datetime, date, timedelta
-    
-    today = date.today()
-    start_date = datetime.combine(today - timedelta(days=days_back - 1), datetime.min.time())
-    end_date = datetime.combine(today, datetime.max.time())
-    
-    # Obtener ventas en el rango
-    query = session.query(Sale).filter(
-        Sale.fecha >= start_date,
-        Sale.fecha <= end_date
+# --- Series de ventas agrupadas por fecha ---
+# El agrupamiento se hace en SQL (date_trunc en Postgres, date() en SQLite) y los
+# períodos sin ventas se rellenan en Python, así el costo no depende de cuántas
+# ventas haya en el rango sino de cuántos períodos se muestran.
+
+SERIES_GRANULARITIES = ("day", "week", "month")
+
+
+@_dataclass(frozen=True, slots=True)
+class SalesBucket:
+    start: _date  # primer día del período (semanas desde el lunes)
+    total_sales: float
+    sales_count: int
+    asesor: str | None = None
+
+
+def _bucket_start(day: _date, granularity: str) -> _date:
+    from datetime import timedelta
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day: _date, granularity: str) -> _date:
+    from datetime import timedelta
+    if granularity == "week":
+        return day + timedelta(days=7)
+    if granularity == "month":
+        return _date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def date_bucket(session: Session, column, granularity: str):
+    """Expresión SQL con el inicio del período de `column` según el motor de la sesión."""
+    from sqlalchemy import func
+    if granularity not in SERIES_GRANULARITIES:
+        raise ValueError(f"Granularidad no soportada: {granularity!r}")
+    if session.get_bind().dialect.name == "sqlite":
+        if granularity == "week":
+            # Lunes igual o anterior: retroceder 6 días y avanzar al siguiente lunes
+            return func.date(column, "-6 days", "weekday 1")
+        if granularity == "month":
+            return func.date(column, "start of month")
+        return func.date(column)
+    return func.date_trunc(granularity, column)
+
+
+def _bucket_value(value) -> _date:
+    # SQLite devuelve texto; date_trunc en Postgres, un timestamp
+    if isinstance(value, str):
+        return _date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def get_sales_series(
+    session: Session,
+    start: _date,
+    end: _date,
+    granularity: str = "day",
+    *,
+    filter_user: Optional[str] = None,
+    by_asesor: bool = False,
+) -> tuple[SalesBucket, ...]:
+    """
+    Ventas por período cubriendo [start, end), con todos los períodos presentes
+    (los vacíos en cero). El primer período se toma completo. Con `by_asesor`, una serie completa por cada asesor
+    con ventas en el rango, ordenadas por asesor.
+    """
+    from sqlalchemy import func, select
+
+    first = _bucket_start(start, granularity)
+    bucket = date_bucket(session, Sale.fecha, granularity)
+    cols = [bucket, func.sum(Sale.venta_usd), func.count(Sale.id)]
+    groups = [bucket]
+    if by_asesor:
+        cols.append(Sale.asesor)
+        groups.append(Sale.asesor)
+    stmt = select(*cols).where(
+        Sale.fecha >= datetime.combine(first, datetime.min.time()),
+        Sale.fecha < datetime.combine(end, datetime.min.time()),
     )
-    
     if filter_user:
-        query = query.filter(Sale.asesor == filter_user)
-        
-    sales = query.all()
-    
-    # Inicializar diccionario con todos los días en el rango
-    daily_data = {}
-    for i in range(days_back):
-        day = today - timedelta(days=days_back - 1 - i)
-        day_key = day.strftime("%Y-%m-%d")
-        daily_data[day_key] = {
-            'date': day,
-            'total_sales': 0.0,
-            'sales_count': 0
-        }
+        stmt = stmt.where(Sale.asesor == filter_user)
+
+    found: dict[tuple[str | None, _date], tuple[float, int]] = {}
+    for row in session.execute(stmt.group_by(*groups)):
+        asesor = row[3] if by_asesor else None
+        found[(asesor, _bucket_value(row[0]))] = (float(row[1] or 0), int(row[2]))
+
+    periods = []
+    period = first
+    while period < end:
+        periods.append(period)
+        period = _next_bucket(period, granularity)
+
+    asesores = sorted({a for a, _ in found}) if by_asesor else [None]
+    return tuple(
+        SalesBucket(period, *found.get((asesor, period), (0.0, 0)), asesor=asesor)
+        for asesor in asesores
+        for period in periods
+    )
 
-    # Agrupar ventas
-    for sale in sales:
-        day_key = sale.fecha.strftime("%Y-%m-%d")
-        if day_key in daily_data:
-            daily_data[day_key]['total_sales'] += (sale.venta_usd or 0.0)
-            daily_data[day_key]['sales_count'] += 1
-            
-    # Convertir a lista ordenada
-    result_list = sorted(daily_data.values(), key=lambda x: x['date'])
-    
+
+def get_daily_sales_chart_data(session: Session, days_back: int = 7, filter_user: Optional[str] = None) -> dict:
+    """Obtener datos de ventas por día para gráficos."""
+    from datetime import timedelta
+
+    today = _date.today()
+    series = get_sales_series(
+        session, today - timedelta(days=days_back - 1), today + timedelta(days=1), "day", filter_user=filter_user
+    )
     return {
-        'daily_data': result_list
+        'daily_data': [
+            {'date': b.start, 'total_sales': b.total_sales, 'sales_count': b.sales_count} for b in series
+        ]
     }
 
 
 def get_weekly_sales_data(session: Session, weeks_back: int = 4, filter_user: Optional[str] = None) -> dict:
-    """Obtener datos de ventas por semana para gráficos."""
-    from .models import Sale
-    from datetime import datetime, date, timedelta
-    import calendar
-    
-    today = date.today()
-    start_date = datetime.combine(today - timedelta(weeks=weeks_back), datetime.min.time())
-    end_date = datetime.combine(today, datetime.max.time())
-    
-    # Obtener ventas en el rango
-    query = session.query(Sale).filter(
-        Sale.fecha >= start_date,
-        Sale.fecha <= end_date
-    )
-    
-    if filter_user:
-        query = query.filter(Sale.asesor == filter_user)
-        
-    sales = query.all()
-    
-    # Agrupar por semana
-    weekly_data = {}
-    for sale in sales:
-        week_start = sale.fecha.date() - timedelta(days=sale.fecha.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weekly_data:
-            weekly_data[week_key] = {
-                'week_start': week_start,
-                'total_sales': 0.0,
-                'sales_count': 0
-            }
-        
-        weekly_data[week_key]['total_sales'] += sale.venta_usd
-        weekly_data[week_key]['sales_count'] += 1
-    
+    """Obtener datos de ventas por semana para gráficos (semanas sin ventas incluidas)."""
+    from datetime import timedelta
+
+    today = _date.today()
+    start_date = today - timedelta(weeks=weeks_back)
+    series = get_sales_series(session, start_date, today + timedelta(days=1), "week", filter_user=filter_user)
     return {
-        'weekly_data': list(weekly_data.values()),
-        'start_date': start_date.date(),
-        'end_date': end_date.date()
+        'weekly_data': [
+            {'week_start': b.start, 'total_sales': b.total_sales, 'sales_count': b.sales_count} for b in series
+        ],
+        'start_date': start_date,
+        'end_date': today
     }
 
 
@@ -2601,6 +2898,155 @@ def get_dashboard_kpis(session: Session, filter_user: Optional[str] = None) -> d
     }
 
 
+# --- Snapshot del tablero principal ---
+# HomeView pide todo su estado en una sola llamada: un lote corto de consultas
+# agregadas que devuelve valores inmutables, para poder compararlo con el
+# snapshot anterior y redibujar solo lo que cambió.
+
+# Períodos que muestra el gráfico del tablero según la granularidad elegida
+DASHBOARD_CHART_PERIODS = {"day": 7, "week": 12, "month": 12}
+DEFAULT_MONTHLY_GOAL = 12000.0
+# Roles que ven las ventas de todos en los KPIs y el gráfico
+_DASHBOARD_ALL_SALES_ROLES = frozenset({"ADMIN", "ADMINISTRACION"})
+# Roles a los que se muestra el panel de pedidos aunque esté vacío
+_DASHBOARD_PENDING_ROLES = frozenset({"DISEÑADOR", "PRODUCCION", "VENDEDOR", "ADMIN"})
+
+
+@_dataclass(frozen=True, slots=True)
+class DashboardKpis:
+    total_customers: int
+    monthly_sales: float
+    monthly_orders: int
+    today_sales: float
+
+
+@_dataclass(frozen=True, slots=True)
+class TeamMember:
+    asesor: str
+    total_sales: float
+    sales_count: int
+    goal: float  # meta individual o, si no tiene, la global
+
+
+@_dataclass(frozen=True, slots=True)
+class PendingOrder:
+    id: int
+    order_number: str
+    product_name: str
+    created_at: datetime
+    status: str | None
+
+
+@_dataclass(frozen=True, slots=True)
+class DashboardSnapshot:
+    kpis: DashboardKpis
+    goal: float
+    chart: tuple[SalesBucket, ...]
+    team: tuple[TeamMember, ...]
+    pending_orders: tuple[PendingOrder, ...]
+    show_pending: bool
+
+
+def _chart_start(today: _date, granularity: str) -> _date:
+    """Inicio del primer período para que el gráfico termine en el período actual."""
+    from datetime import timedelta
+    periods = DASHBOARD_CHART_PERIODS[granularity]
+    current = _bucket_start(today, granularity)
+    if granularity == "month":
+        months = current.year * 12 + current.month - 1 - (periods - 1)
+        return _date(months // 12, months % 12 + 1, 1)
+    step = 7 if granularity == "week" else 1
+    return current - timedelta(days=step * (periods - 1))
+
+
+def get_dashboard_snapshot(
+    session: Session, username: str | None, *, chart_granularity: str = "day", today: _date | None = None
+) -> DashboardSnapshot:
+    """
+    Estado completo del tablero para `username` en cinco consultas:
+    roles del usuario, KPIs + meta (subconsultas escalares), serie del gráfico
+    (agrupada por `chart_granularity`), equipo de ventas y pedidos pendientes
+    (una sola consulta con las reglas por rol).
+    """
+    from datetime import timedelta
+    from sqlalchemy import func, select
+
+    today = today or _date.today()
+    month_start = datetime(today.year, today.month, 1)
+    next_month = datetime(today.year + (today.month == 12), today.month % 12 + 1, 1)
+    today_start = datetime.combine(today, datetime.min.time())
+    tomorrow = today_start + timedelta(days=1)
+
+    # 1. Usuario y roles
+    rows = session.execute(
+        select(User.id, Role.name)
+        .outerjoin(UserRole, UserRole.user_id == User.id)
+        .outerjoin(Role, Role.id == UserRole.role_id)
+        .where(User.username == username)
+    ).all()
+    user_id = rows[0][0] if rows else None
+    roles = {name for _, name in rows if name}
+    asesor_filter = None if roles & _DASHBOARD_ALL_SALES_ROLES else username
+
+    def sales_in(start: datetime, end: datetime):
+        conds = [Sale.fecha >= start, Sale.fecha < end]
+        if asesor_filter is not None:
+            conds.append(Sale.asesor == asesor_filter)
+        return conds
+
+    # 2. KPIs y meta global
+    kpi_row = session.execute(select(
+        select(func.count(Customer.id)).scalar_subquery(),
+        select(func.coalesce(func.sum(Sale.venta_usd), 0.0)).where(*sales_in(month_start, next_month)).scalar_subquery(),
+        select(func.count(Sale.id)).where(*sales_in(month_start, next_month)).scalar_subquery(),
+        select(func.coalesce(func.sum(Sale.venta_usd), 0.0)).where(*sales_in(today_start, tomorrow)).scalar_subquery(),
+        select(SystemConfig.config_value).where(SystemConfig.config_key == "monthly_sales_goal").scalar_subquery(),
+    )).one()
+    kpis = DashboardKpis(int(kpi_row[0] or 0), float(kpi_row[1] or 0), int(kpi_row[2] or 0), float(kpi_row[3] or 0))
+    try:
+        goal = float(kpi_row[4]) if kpi_row[4] is not None else DEFAULT_MONTHLY_GOAL
+    except (TypeError, ValueError):
+        goal = DEFAULT_MONTHLY_GOAL
+
+    # 3. Serie del gráfico (agrupada en SQL, períodos vacíos en cero)
+    chart = get_sales_series(
+        session, _chart_start(today, chart_granularity), today + timedelta(days=1), chart_granularity,
+        filter_user=asesor_filter,
+    )
+
+    # 4. Equipo de ventas: todos los usuarios activos, sin filtro, para motivar
+    month_sales = (
+        select(Sale.asesor, func.sum(Sale.venta_usd).label("total"), func.count(Sale.id).label("cnt"))
+        .where(Sale.fecha >= month_start, Sale.fecha < next_month)
+        .group_by(Sale.asesor)
+        .subquery()
+    )
+    total_col = func.coalesce(month_sales.c.total, 0.0)
+    team = tuple(
+        TeamMember(name, float(total), int(cnt), float(user_goal) if user_goal and user_goal > 0 else goal)
+        for name, user_goal, total, cnt in session.execute(
+            select(User.username, User.monthly_goal, total_col, func.coalesce(month_sales.c.cnt, 0))
+            .outerjoin(month_sales, month_sales.c.asesor == User.username)
+            .where(User.is_active == True)  # noqa: E712
+            .order_by(total_col.desc(), User.username)
+        )
+    )
+
+    # 5. Pedidos pendientes según rol (misma cola que get_pending_orders_for_user)
+    pending: tuple[PendingOrder, ...] = ()
+    if user_id is not None:
+        queue = _order_queue_stmt(user_id, username, roles)
+        pending = tuple(
+            PendingOrder(*row)
+            for row in session.execute(select(queue).order_by(queue.c.created_at.asc(), queue.c.id.asc()))
+        )
+    show_pending = user_id is not None and bool(
+        pending or roles & _DASHBOARD_PENDING_ROLES or username == "admin"
+    )
+
+    return DashboardSnapshot(kpis, goal, chart, team, pending, show_pending)
+
+
 # --- Funciones avanzadas de gestión de usuarios ---
 
 def update_user(session: Session, *, user_id: int, username: str | None = None, full_name: str | None = None, 
@@ -3632,70 +4078,104 @@ def get_assigned_orders(session: Session, user_id: int) -> list[Order]:
     return session.query(Order).filter(Order.designer_id == user_id).order_by(Order.created_at.desc()).all()
 
 
-def get_pending_orders_for_user(session: Session, user_id: int) -> list[Order]:
+# Cola de trabajo por rol. Cada rol aporta una rama del UNION ALL con estados
+# disjuntos entre sí, así que no hay duplicados que quitar en Python.
+ORDER_QUEUE_RULES = {
+    "DISEÑADOR": ("NUEVO", "DISEÑO"),
+    "PRODUCCION": ("POR_PRODUCIR", "PRODUCCION", "EN_PRODUCCION"),
+}
+SELLER_QUEUE_STATUS = "LISTO"
+
+
+def _order_queue_stmt(user_id: int, username: str, roles: frozenset[str] | set[str]):
+    """UNION ALL de las ramas que aplican a los roles dados (la de vendedor aplica siempre)."""
+    from sqlalchemy import union_all
+
+    cols = (Order.id, Order.order_number, Order.product_name, Order.created_at, Order.status)
+    branches = [
+        select(*cols)
+        .join(Sale, Sale.id == Order.sale_id)
+        .where(Order.status == SELLER_QUEUE_STATUS, Sale.asesor == username)
+    ]
+    if "DISEÑADOR" in roles:
+        branches.append(
+            select(*cols).where(Order.status.in_(ORDER_QUEUE_RULES["DISEÑADOR"]), Order.designer_id == user_id)
+        )
+    if "PRODUCCION" in roles:
+        branches.append(select(*cols).where(Order.status.in_(ORDER_QUEUE_RULES["PRODUCCION"])))
+    return union_all(*branches).subquery("queue")
+
+
+def get_pending_orders_for_user(
+    session: Session,
+    user_id: int,
+    *,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    roles: frozenset[str] | set[str] | None = None,
+) -> list[PendingOrder]:
     """
-    Obtiene pedidos pendientes según el rol del usuario:
+    Cola de pedidos pendientes según el rol del usuario, más antiguos primero:
     - DISEÑADOR: Pedidos asignados en estado NUEVO o DISEÑO.
-    - PRODUCCION: Pedidos en estado PRODUCCION o EN_PRODUCCION.
+    - PRODUCCION: Pedidos en estado POR_PRODUCIR, PRODUCCION o EN_PRODUCCION.
     - VENDEDOR (o cualquiera): Pedidos de sus ventas en estado LISTO.
+
+    `after` es el (created_at, id) del último pedido recibido, para paginar colas
+    largas de a `limit`. `roles` evita consultarlos si el llamador ya los tiene.
     """
-    from .models import Order, User, Sale
-    
-    user = session.get(User, user_id)
-    if not user:
+    from sqlalchemy import tuple_
+
+    username = session.scalar(select(User.username).where(User.id == user_id))
+    if username is None:
         return []
-    
-    orders = []
-    
-    # 1. Rol DISEÑADOR
-    if user_has_role(session, user_id=user.id, role_name="DISEÑADOR"):
-        designer_orders = (
-            session.query(Order)
-            .filter(Order.designer_id == user.id)
-            .filter(Order.status.in_(["NUEVO", "DISEÑO"]))
-            .order_by(Order.created_at.asc())
-            .all()
-        )
-        orders.extend(designer_orders)
-        
-    # 2. Rol PRODUCCION
-    if user_has_role(session, user_id=user.id, role_name="PRODUCCION"):
-        prod_orders = (
-            session.query(Order)
-            .filter(Order.status.in_(["POR_PRODUCIR", "PRODUCCION", "EN_PRODUCCION"]))
-            .order_by(Order.created_at.asc())
-            .all()
+    if roles is None:
+        roles = user_role_names(session, user_id)
+
+    queue = _order_queue_stmt(user_id, username, roles)
+    stmt = select(queue).order_by(queue.c.created_at.asc(), queue.c.id.asc())
+    if after is not None:
+        stmt = stmt.where(tuple_(queue.c.created_at, queue.c.id) > tuple_(*after))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [PendingOrder(*row) for row in session.execute(stmt)]
+
+
+PAYROLL_CATEGORY = "Nómina"
+
+
+def _payroll_quincena_rows(session: Session, start: datetime, end: datetime, *, by_month: bool):
+    """(worker_id, [mes,] quincena) pagados en [start, end), agrupado en la base.
+
+    La quincena sale de la columna `quincena`; si es NULL (pagos sin quincena
+    explícita) se deduce del día: 1-15 primera, 16+ segunda.
+    """
+    from sqlalchemy import case, extract
+
+    cat_id = session.query(TransactionCategory.id).filter(TransactionCategory.name == PAYROLL_CATEGORY).scalar()
+    if cat_id is None:
+        return []
+
+    quincena = case(
+        (Transaction.quincena.isnot(None), Transaction.quincena),
+        (extract('day', Transaction.date) <= 15, 1),
+        else_=2,
+    )
+    cols = [Transaction.related_id]
+    if by_month:
+        cols.append(extract('month', Transaction.date))
+    cols.append(quincena)
+    return (
+        session.query(*cols)
+        .filter(
+            Transaction.category_id == cat_id,
+            Transaction.related_table == "workers",
+            Transaction.date >= start,
+            Transaction.date < end,
+            Transaction.related_id.isnot(None),
         )
-        # Evitar duplicados si el usuario tiene ambos roles (raro pero posible)
-        existing_ids = {o.id for o in orders}
-        for o in prod_orders:
-            if o.id not in existing_ids:
-                orders.append(o)
-                existing_ids.add(o.id)
-
-    # 3. Vendedor (Dueño de la venta) - Ver pedidos LISTOS para entregar
-    # Asumimos que 'asesor' en Sale coincide con user.username o user.full_name
-    # O mejor, si tenemos user_id en Sale (no lo tenemos, es string 'asesor').
-    # Usaremos el username para filtrar.
-    seller_orders = (
-        session.query(Order)
-        .join(Sale)
-        .filter(Sale.asesor == user.username)
-        .filter(Order.status == "LISTO")
-        .order_by(Order.created_at.asc())
+        .group_by(*cols)
         .all()
     )
-    
-    existing_ids = {o.id for o in orders}
-    for o in seller_orders:
-        if o.id not in existing_ids:
-            orders.append(o)
-            existing_ids.add(o.id)
-            
-    # Ordenar todo por fecha (más antiguos primero para atenderlos antes)
-    orders.sort(key=lambda x: x.created_at)
-    
-    return orders
 
 
 def get_payroll_status_by_month(session: Session, year: int, month: int) -> dict[int, dict[str, bool]]:
@@ -3703,44 +4183,18 @@ def get_payroll_status_by_month(session: Session, year: int, month: int) -> dict
     Returns a dict mapping worker_id -> {'q1': bool, 'q2': bool}
     indicating if they have been paid for Query 1 or Query 2 of the specified month.
     """
-    from .models import Transaction, TransactionCategory
-    from sqlalchemy import extract, and_
-    
-    # Find Category ID for 'Nómina'
-    cat = session.query(TransactionCategory).filter(TransactionCategory.name == "Nómina").first()
-    if not cat:
-        return {}
-        
-    # Query transactions for this month/year for category 'Nómina' linked to workers
-    txs = session.query(Transaction).filter(
-        and_(
-            extract('year', Transaction.date) == year,
-            extract('month', Transaction.date) == month,
-            Transaction.category_id == cat.id,
-            Transaction.related_table == "workers",
-            Transaction.related_id.isnot(None)
-        )
-    ).all()
-    
-    status = {}
-    for tx in txs:
-        wid = tx.related_id
-        if wid not in status:
-            status[wid] = {'q1': False, 'q2': False}
-            
-        desc = tx.description.upper()
-        
-        # Check explicit tags
-        if "[Q1]" in desc:
-            status[wid]['q1'] = True
-        elif "[Q2]" in desc:
-            status[wid]['q2'] = True
-        else:
-            # Fallback by date
-            day = tx.date.day
-            if day <= 15:
-                status[wid]['q1'] = True
-            else:
-                status[wid]['q2'] = True
-                
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    status: dict[int, dict[str, bool]] = {}
+    for wid, q in _payroll_quincena_rows(session, start, end, by_month=False):
+        status.setdefault(wid, {'q1': False, 'q2': False})[f"q{int(q)}"] = True
+    return status
+
+
+def get_payroll_status_by_year(session: Session, year: int) -> dict[int, dict[int, dict[str, bool]]]:
+    """worker_id -> mes (1-12) -> {'q1': bool, 'q2': bool} para todo el año en una sola consulta."""
+    status: dict[int, dict[int, dict[str, bool]]] = {}
+    for wid, month, q in _payroll_quincena_rows(session, datetime(year, 1, 1), datetime(year + 1, 1, 1), by_month=True):
+        months = status.setdefault(wid, {})
+        months.setdefault(int(month), {'q1': False, 'q2': False})[f"q{int(q)}"] = True
     return status
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Account, AccountBalanceSnapshot, Transaction
+
+
+# Diferencia mínima (en la moneda de la cuenta) para considerar que hay descuadre
+DRIFT_TOLERANCE = 0.01
+
+
+def _signed_amount():
+    """INCOME suma y cualquier otro tipo (EXPENSE) resta, igual que en las vistas."""
+    return case(
+        (Transaction.transaction_type == 'INCOME', Transaction.amount),
+        else_=-Transaction.amount,
+    )
+
+
+def ledger_balances(
+    session: Session,
+    *,
+    as_of: datetime | None = None,
+    after: datetime | None = None,
+    account_ids: Iterable[int] | None = None,
+) -> dict[int, float]:
+    """Saldos por cuenta calculados desde `transactions` con un único SUM agrupado.
+
+    `as_of` limita a movimientos con fecha <= as_of; `after` a fecha > after
+    (útil para sumar solo lo ocurrido después de un snapshot).
+    """
+    stmt = select(Transaction.account_id, func.coalesce(func.sum(_signed_amount()), 0.0)).group_by(Transaction.account_id)
+    if as_of is not None:
+        stmt = stmt.where(Transaction.date <= as_of)
+    if after is not None:
+        stmt = stmt.where(Transaction.date > after)
+    if account_ids is not None:
+        stmt = stmt.where(Transaction.account_id.in_(list(account_ids)))
+    return {acc_id: float(total or 0.0) for acc_id, total in session.execute(stmt)}
+
+
+def take_balance_snapshot(session: Session, as_of: datetime | None = None) -> int:
+    """Guarda el saldo de libro de todas las cuentas a la fecha `as_of`.
+
+    Un snapshot existente para la misma fecha se reemplaza. Devuelve la cantidad
+    de filas escritas. No hace commit.
+    """
+    as_of = as_of or datetime.now()
+    balances = ledger_balances(session, as_of=as_of)
+    account_ids = session.execute(select(Account.id)).scalars().all()
+    rows = [
+        {'account_id': acc_id, 'as_of': as_of, 'balance': round(balances.get(acc_id, 0.0), 2), 'created_at': datetime.now()}
+        for acc_id in account_ids
+    ]
+    session.execute(delete(AccountBalanceSnapshot).where(AccountBalanceSnapshot.as_of == as_of))
+    if rows:
+        session.execute(insert(AccountBalanceSnapshot), rows)
+    return len(rows)
+
+
+def balance_at(session: Session, account_id: int, at: datetime) -> float:
+    """Saldo de una cuenta en un instante: último snapshot <= `at` más los movimientos posteriores."""
+    snap = session.execute(
+        select(AccountBalanceSnapshot.as_of, AccountBalanceSnapshot.balance)
+        .where(AccountBalanceSnapshot.account_id == account_id)
+        .where(AccountBalanceSnapshot.as_of <= at)
+        .order_by(AccountBalanceSnapshot.as_of.desc())
+        .limit(1)
+    ).first()
+    base_as_of, base = (snap.as_of, float(snap.balance)) if snap else (None, 0.0)
+    if base_as_of == at:
+        return base
+    delta = ledger_balances(session, as_of=at, after=base_as_of, account_ids=[account_id])
+    return base + delta.get(account_id, 0.0)
+
+
+@dataclass(frozen=True, slots=True)
+class BalanceDrift:
+    """Cuenta cuyo saldo guardado no coincide con el libro."""
+    account_id: int
+    name: str
+    currency: str
+    stored: float
+    ledger: float
+
+    @property
+    def diff(self) -> float:
+        return self.stored - self.ledger
+
+
+def reconcile_account_balances(
+    session: Session,
+    *,
+    tolerance: float = DRIFT_TOLERANCE,
+    fix: bool = False,
+) -> list[BalanceDrift]:
+    """Compara `Account.balance` con el saldo de libro y devuelve los descuadres.
+
+    Con `fix=True` reescribe el saldo guardado con el del libro (sin commit).
+    """
+    balances = ledger_balances(session)
+    accounts = session.execute(select(Account.id, Account.name, Account.currency, Account.balance).order_by(Account.id)).all()
+
+    drifts = []
+    for acc_id, name, currency, stored in accounts:
+        ledger = round(balances.get(acc_id, 0.0), 2)
+        if abs(float(stored or 0.0) - ledger) >= tolerance:
+            drifts.append(BalanceDrift(acc_id, name, currency, float(stored or 0.0), ledger))
+
+    if fix and drifts:
+        session.execute(
+            update(Account),
+            [{'id': d.account_id, 'balance': d.ledger} for d in drifts],
+        )
+    return drifts
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.orm import Session
+
+from ..models import CorporeoConfig, CorporeoPayload, Order, ProductParameterValue
+
+
+# Claves de precio en `row_data_json` (mismo orden que usa CorporeoDialog)
+PRICE_KEYS: tuple[str, ...] = ('Precio', 'precio', 'Price', 'price', 'valor', 'Valor')
+
+# Estados de pedido que ya no admiten re-cotización
+CLOSED_ORDER_STATUSES: tuple[str, ...] = ('ENTREGADO', 'CANCELADO', 'ANULADO')
+
+# Los totales guardados vienen de etiquetas con 2 decimales
+_EPS = 0.01
+
+# Unidad de los deltas de cada tabla: `corporeo_payloads.total` es subtotal + caja
+# con los precios de lista; `corporeo_configs.precio_total_usd` ya aplica las tasas
+PAYLOAD_TOTAL_UNIT = "total de lista, antes de tasas"
+CONFIG_TOTAL_UNIT = "USD"
+
+
+@dataclass(slots=True)
+class RepricingSummary:
+    """Resumen de una corrida de re-cotización sobre una tabla.
+
+    Los deltas van en la unidad del total de esa tabla (ver `PAYLOAD_TOTAL_UNIT`
+    y `CONFIG_TOTAL_UNIT`): no se suman corridas de tablas distintas.
+    """
+    scanned: int = 0
+    changed: int = 0
+    skipped: int = 0
+    increased: int = 0
+    decreased: int = 0
+    delta_total: float = 0.0
+    max_increase: float = 0.0
+    max_decrease: float = 0.0
+    last_id: int = 0
+
+    def add_delta(self, delta: float) -> None:
+        self.changed += 1
+        self.delta_total += delta
+        if delta > 0:
+            self.increased += 1
+            self.max_increase = max(self.max_increase, delta)
+        elif delta < 0:
+            self.decreased += 1
+            self.max_decrease = min(self.max_decrease, delta)
+
+
+def _to_float(value: Any) -> float | None:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        try:
+            return float(str(value).replace('$', '').replace(',', '').strip())
+        except (TypeError, ValueError):
+            return None
+
+
+def extract_row_price(row_data: dict | str | None) -> float | None:
+    """Devuelve el precio de una fila de parámetros (o None si no tiene)."""
+    if isinstance(row_data, str):
+        try:
+            row_data = json.loads(row_data or '{}')
+        except ValueError:
+            return None
+    if not isinstance(row_data, dict):
+        return None
+    for key in PRICE_KEYS:
+        price = _to_float(row_data.get(key))
+        if price is not None:
+            return price
+    return None
+
+
+def _as_int(value: Any) -> int | None:
+    try:
+        if value is None or isinstance(value, bool):
+            return None
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def referenced_price_ids(payload: dict) -> set[int]:
+    """Ids de `product_parameter_values` cuyo precio interviene en el payload."""
+    ids: set[int] = set()
+    for block in ('espesor', 'regulador'):
+        b = payload.get(block)
+        if isinstance(b, dict):
+            pid = _as_int(b.get('id'))
+            if pid is not None:
+                ids.add(pid)
+    for item in payload.get('tipos_corporeo') or []:
+        if isinstance(item, dict):
+            pid = _as_int(item.get('pv_id'))
+            if pid is not None:
+                ids.add(pid)
+    luces = payload.get('luces')
+    if isinstance(luces, dict):
+        for item in luces.get('selected') or []:
+            if isinstance(item, dict):
+                pid = _as_int(item.get('pv_id'))
+                if pid is not None:
+                    ids.add(pid)
+    return ids
+
+
+def reprice_payload(payload: dict, prices: dict[int, float]) -> dict:
+    """Recalcula un payload de CorporeoDialog con los precios vigentes.
+
+    Replica la fórmula de `CorporeoDialog._recalc`: material por m², soportes y
+    reguladores por unidad, tipos de corpóreo por m², luces por metro lineal,
+    silueta por m² y el porcentaje de caja sobre el subtotal. Las tasas guardadas
+    en el payload se conservan. Devuelve una copia; no modifica `payload`.
+    """
+    out = json.loads(json.dumps(payload))
+
+    def _price(block: dict, key: str, id_key: str) -> float:
+        pid = _as_int(block.get(id_key))
+        if pid is not None and pid in prices:
+            block[key] = float(prices[pid])
+        return _to_float(block.get(key)) or 0.0
+
+    med = out.get('medidas') if isinstance(out.get('medidas'), dict) else {}
+    alto = _to_float(med.get('alto_cm')) or 0.0
+    ancho = _to_float(med.get('ancho_cm')) or 0.0
+    diam = _to_float(med.get('diam_mm')) or 0.0
+    is_round = diam > 0.0
+    area = _to_float(med.get('area_m2'))
+    if area is None:
+        area = math.pi * (diam / 2000.0) ** 2 if is_round else (alto / 100.0) * (ancho / 100.0)
+    linear_m = math.pi * (diam / 1000.0) if is_round else 2.0 * ((alto + ancho) / 100.0)
+
+    esp = out.get('espesor') if isinstance(out.get('espesor'), dict) else {}
+    subtotal = area * _price(esp, 'price', 'id')
+
+    sup = out.get('soporte') if isinstance(out.get('soporte'), dict) else {}
+    subtotal += (_as_int(sup.get('qty')) or 0) * (_to_float(sup.get('price')) or 0.0)
+
+    reg = out.get('regulador') if isinstance(out.get('regulador'), dict) else {}
+    reg_price = _price(reg, 'price', 'id')
+    subtotal += (_as_int(reg.get('qty')) or 0) * reg_price
+
+    for tipo in out.get('tipos_corporeo') or []:
+        if isinstance(tipo, dict):
+            subtotal += area * _price(tipo, 'price', 'pv_id')
+
+    luces = out.get('luces') if isinstance(out.get('luces'), dict) else {}
+    for luz in luces.get('selected') or []:
+        if not isinstance(luz, dict):
+            continue
+        price = _price(luz, 'price', 'pv_id')
+        if not price:
+            continue
+        if linear_m:
+            subtotal += price * linear_m
+        else:
+            subtotal += price * area * (math.pi if is_round else 1.0)
+
+    sil = out.get('silueta') if isinstance(out.get('silueta'), dict) else {}
+    if (_to_float(sil.get('subtotal')) or 0.0) > 0.0:
+        sil['subtotal'] = area * (_to_float(sil.get('price_m2')) or 0.0)
+        subtotal += sil['subtotal']
+
+    caja = out.get('caja') if isinstance(out.get('caja'), dict) else {}
+    pct = _to_float(caja.get('pct')) or 0.0
+    total = subtotal + (subtotal * pct / 100.0 if caja.get('enabled') and pct else 0.0)
+
+    totals = out.get('totals') if isinstance(out.get('totals'), dict) else {}
+    tasa_corp = _to_float(out.get('tasa_corporeo', totals.get('tasa_corporeo'))) or 0.0
+    tasa_bcv = _to_float(out.get('tasa_bcv', totals.get('tasa_bcv'))) or 0.0
+    precio_final_usd = (subtotal * tasa_corp) / tasa_bcv if tasa_bcv > 0 else 0.0
+    precio_final_bs = precio_final_usd * tasa_bcv
+
+    out['subtotal'] = float(subtotal)
+    out['total'] = float(total)
+    out['precio_final_usd'] = float(precio_final_usd)
+    out['precio_final_bs'] = float(precio_final_bs)
+    if isinstance(out.get('totals'), dict):
+        out['totals']['total_usd'] = float(precio_final_usd)
+        out['totals']['total_bs'] = float(precio_final_bs)
+    return out
+
+
+class _PriceIndex:
+    """Precios de filas de parámetros cargados bajo demanda por lote."""
+
+    def __init__(self, session: Session) -> None:
+        self._session = session
+        self._prices: dict[int, float] = {}
+        self._seen: set[int] = set()
+
+    def load(self, ids: Iterable[int]) -> dict[int, float]:
+        missing = [i for i in ids if i not in self._seen]
+        if missing:
+            rows = self._session.execute(
+                select(ProductParameterValue.id, ProductParameterValue.row_data_json)
+                .where(ProductParameterValue.id.in_(missing))
+                .where(ProductParameterValue.is_active == True)
+            )
+            for pid, raw in rows:
+                price = extract_row_price(raw)
+                if price is not None:
+                    self._prices[int(pid)] = price
+            self._seen.update(missing)
+        return self._prices
+
+
+def bulk_update_from_values(session: Session, table: str, columns: tuple[str, ...], rows: list[dict], casts: dict[str, str]) -> None:
+    """Actualiza `table` con un único `UPDATE … FROM (VALUES …)` por lote.
+
+    `rows` son dicts con `id` y cada nombre de `columns`. Se expresa como CTE
+    para que la misma sentencia funcione en PostgreSQL y SQLite (>= 3.33).
+    """
+    if not rows:
+        return
+    names = ('id',) + columns
+    # SQLite no necesita (ni respeta) los CAST; PostgreSQL los exige para tipar VALUES
+    use_casts = session.get_bind().dialect.name != 'sqlite'
+    params: dict[str, Any] = {}
+    tuples = []
+    for n, row in enumerate(rows):
+        cells = []
+        for col in names:
+            key = f"{col}_{n}"
+            params[key] = row[col]
+            cells.append(f"CAST(:{key} AS {casts.get(col, 'INTEGER')})" if use_casts else f":{key}")
+        tuples.append(f"({', '.join(cells)})")
+    assignments = ', '.join(f"{col} = v.{col}" for col in columns)
+    sql = (
+        f"WITH v({', '.join(names)}) AS (VALUES {', '.join(tuples)}) "
+        f"UPDATE {table} SET {assignments} FROM v WHERE {table}.id = v.id"
+    )
+    session.execute(text(sql), params)
+
+
+def _iter_batches(session: Session, stmt_for: Callable[[int], Any], batch_size: int):
+    """Paginación por clave (id > último) para recorrer tablas grandes."""
+    last_id = 0
+    while True:
+        rows = session.execute(stmt_for(last_id).limit(batch_size)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = int(rows[-1][0])
+
+
+def _pending_filter(model):
+    return or_(
+        model.order_id.is_(None),
+        model.order_id.in_(
+            select(Order.id).where(or_(Order.status.is_(None), Order.status.notin_(CLOSED_ORDER_STATUSES)))
+        ),
+    )
+
+
+def _run(
+    session: Session,
+    *,
+    model,
+    total_column: str,
+    payload_total_key: str,
+    build_update: Callable[[int, dict, dict], dict],
+    update_columns: tuple[str, ...],
+    casts: dict[str, str],
+    batch_size: int,
+    only_pending: bool,
+    dry_run: bool,
+    progress: Callable[[RepricingSummary], None] | None,
+) -> RepricingSummary:
+    summary = RepricingSummary()
+    index = _PriceIndex(session)
+    total_col = getattr(model, total_column)
+
+    def stmt_for(last_id: int):
+        stmt = select(model.id, model.payload_json, total_col).where(model.id > last_id)
+        if only_pending:
+            stmt = stmt.where(_pending_filter(model))
+        return stmt.order_by(model.id.asc())
+
+    for rows in _iter_batches(session, stmt_for, batch_size):
+        parsed = []
+        wanted: set[int] = set()
+        for rid, raw, old_total in rows:
+            summary.scanned += 1
+            try:
+                payload = json.loads(raw) if raw else None
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                summary.skipped += 1
+                continue
+            wanted |= referenced_price_ids(payload)
+            parsed.append((int(rid), payload, old_total))
+
+        prices = index.load(wanted)
+        now = datetime.utcnow()
+        updates = []
+        for rid, payload, old_total in parsed:
+            new_payload = reprice_payload(payload, prices)
+            new_row = build_update(rid, new_payload, {'updated_at': now})
+            old = _to_float(old_total)
+            if old is None:
+                old = _to_float(payload.get(payload_total_key)) or 0.0
+            new = float(new_payload[payload_total_key])
+            if abs(new - old) < _EPS:
+                continue
+            summary.add_delta(new - old)
+            updates.append(new_row)
+
+        if updates and not dry_run:
+            bulk_update_from_values(session, model.__tablename__, update_columns, updates, casts)
+            session.commit()
+        summary.last_id = int(rows[-1][0])
+        if progress is not None:
+            progress(summary)
+    return summary
+
+
+_PAYLOAD_COLUMNS = ('subtotal', 'total', 'espesor_price', 'regulador_price', 'luz_price', 'payload_json', 'updated_at')
+_CONFIG_COLUMNS = ('precio_total_usd', 'precio_total_bs', 'luz_price', 'payload_json', 'updated_at')
+_CASTS = {
+    'id': 'INTEGER',
+    'subtotal': 'DOUBLE PRECISION',
+    'total': 'DOUBLE PRECISION',
+    'espesor_price': 'DOUBLE PRECISION',
+    'regulador_price': 'DOUBLE PRECISION',
+    'luz_price': 'DOUBLE PRECISION',
+    'precio_total_usd': 'DOUBLE PRECISION',
+    'precio_total_bs': 'DOUBLE PRECISION',
+    'payload_json': 'TEXT',
+    'updated_at': 'TIMESTAMP',
+}
+
+
+def _first_light_price(payload: dict) -> float | None:
+    luces = payload.get('luces') if isinstance(payload.get('luces'), dict) else {}
+    sel = luces.get('selected') or []
+    if sel and isinstance(sel[0], dict):
+        return _to_float(sel[0].get('price'))
+    return None
+
+
+def _payload_row(rid: int, payload: dict, extra: dict) -> dict:
+    esp = payload.get('espesor') if isinstance(payload.get('espesor'), dict) else {}
+    reg = payload.get('regulador') if isinstance(payload.get('regulador'), dict) else {}
+    return {
+        'id': rid,
+        'subtotal': payload['subtotal'],
+        'total': payload['total'],
+        'espesor_price': _to_float(esp.get('price')),
+        'regulador_price': _to_float(reg.get('price')),
+        'luz_price': _first_light_price(payload),
+        'payload_json': json.dumps(payload, ensure_ascii=False),
+        **extra,
+    }
+
+
+def _config_row(rid: int, payload: dict, extra: dict) -> dict:
+    return {
+        'id': rid,
+        'precio_total_usd': payload['precio_final_usd'],
+        'precio_total_bs': payload['precio_final_bs'],
+        'luz_price': _first_light_price(payload),
+        'payload_json': json.dumps(payload, ensure_ascii=False),
+        **extra,
+    }
+
+
+def reprice_corporeo_payloads(
+    session: Session,
+    *,
+    batch_size: int = 500,
+    only_pending: bool = True,
+    dry_run: bool = False,
+    progress: Callable[[RepricingSummary], None] | None = None,
+) -> RepricingSummary:
+    """Re-cotiza `corporeo_payloads` por lotes con los precios de parámetros vigentes.
+
+    Recorre la tabla con paginación por clave, recalcula cada payload y escribe
+    solo las filas cuyo total cambió. Cada lote se confirma por separado, por lo
+    que la memoria usada es proporcional a `batch_size` y no al tamaño de la tabla.
+    """
+    return _run(
+        session,
+        model=CorporeoPayload,
+        total_column='total',
+        payload_total_key='total',
+        build_update=_payload_row,
+        update_columns=_PAYLOAD_COLUMNS,
+        casts=_CASTS,
+        batch_size=batch_size,
+        only_pending=only_pending,
+        dry_run=dry_run,
+        progress=progress,
+    )
+
+
+def reprice_corporeo_configs(
+    session: Session,
+    *,
+    batch_size: int = 500,
+    only_pending: bool = True,
+    dry_run: bool = False,
+    progress: Callable[[RepricingSummary], None] | None = None,
+) -> RepricingSummary:
+    """Igual que `reprice_corporeo_payloads` pero sobre `corporeo_configs` (total en USD)."""
+    return _run(
+        session,
+        model=CorporeoConfig,
+        total_column='precio_total_usd',
+        payload_total_key='precio_final_usd',
+        build_update=_config_row,
+        update_columns=_CONFIG_COLUMNS,
+        casts=_CASTS,
+        batch_size=batch_size,
+        only_pending=only_pending,
+        dry_run=dry_run,
+        progress=progress,
+    )
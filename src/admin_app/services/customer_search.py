@@ -0,0 +1,471 @@
+"""
+Búsqueda de clientes por nombre, documento, teléfono, email o dirección.
+
+`CustomerIndex` mantiene en memoria un índice normalizado: tokens sin
+acentos y en minúsculas (ordenados, para buscar por prefijo con bisect),
+trigramas de cada token (para fragmentos interiores y errores de tipeo) y
+los dígitos de documento y teléfono ("12345678" encuentra "V-12.345.678").
+Cada tecla resuelve la búsqueda en microsegundos sin recorrer filas.
+
+Para bases grandes, `search_customers` hace la búsqueda en el servidor con
+ILIKE por token y, en PostgreSQL con `pg_trgm`, ordena por similitud
+(`ensure_trigram_indexes` crea los índices GIN que usa ILIKE).
+`CustomerSearch` elige entre ambos según la cantidad de clientes; los
+diálogos comparten una instancia por `session_factory` (`CustomerSearch.shared`)
+para no rearmar el índice cada vez que se abren.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+import weakref
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import Customer
+
+
+DEFAULT_LIMIT = 20
+# Con más clientes que esto no se arma el índice en memoria y se busca en el servidor
+INDEX_MAX_ROWS = 200_000
+MIN_DIGITS = 3
+TRIGRAM_THRESHOLD = 0.5
+# Segundos tras los que el índice compartido se rearma (cambios hechos desde otros equipos)
+INDEX_MAX_AGE = 300.0
+
+# Separadores de términos: todo lo que no sea letra o dígito (Unicode), "_", "@" o "."
+_NON_WORD = re.compile(r"[^\w@.]+")
+_TRGM_COLUMNS = ("name", "first_name", "last_name", "document", "phone", "email", "short_address")
+
+
+def fold(value: str | None) -> str:
+    """Minúsculas sin acentos ("Núñez" -> "nunez")."""
+    if not value:
+        return ""
+    nfkd = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in nfkd if not unicodedata.combining(c)).lower()
+
+
+def tokenize(value: str | None) -> list[str]:
+    return [t for t in _NON_WORD.split(fold(value)) if t]
+
+
+def digits(value: str | None) -> str:
+    return "".join(c for c in (value or "") if c.isdigit())
+
+
+def _is_numeric(query: str) -> bool:
+    """Consulta de documento o teléfono: dígitos y separadores, sin letras (salvo el prefijo V/J/E/G)."""
+    letters = [c for c in fold(query) if c.isalpha()]
+    return len(letters) <= 1 and any(c.isdigit() for c in query)
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def customer_label(name: str | None, first_name: str | None, last_name: str | None, cid: int | None) -> str:
+    """Nombre a mostrar: `name`, o nombre + apellido, o "Cliente #id"."""
+    label = (name or "").strip()
+    if not label:
+        label = f"{first_name or ''} {last_name or ''}".strip()
+    return label or f"Cliente #{cid if cid is not None else ''}".strip()
+
+
+@dataclass(frozen=True, slots=True)
+class CustomerRecord:
+    """Datos de un cliente para búsquedas y combos (sin sesión ni carga perezosa)."""
+    id: int
+    name: str
+    first_name: str = ""
+    last_name: str = ""
+    document: str = ""
+    phone: str = ""
+    email: str = ""
+    short_address: str = ""
+
+    @property
+    def label(self) -> str:
+        return customer_label(self.name, self.first_name, self.last_name, self.id)
+
+    @classmethod
+    def from_row(cls, row) -> CustomerRecord:
+        return cls(
+            id=int(row.id),
+            name=row.name or "",
+            first_name=row.first_name or "",
+            last_name=row.last_name or "",
+            document=row.document or "",
+            phone=row.phone or "",
+            email=row.email or "",
+            short_address=row.short_address or "",
+        )
+
+
+_RECORD_COLUMNS = (
+    Customer.id, Customer.name, Customer.first_name, Customer.last_name,
+    Customer.document, Customer.phone, Customer.email, Customer.short_address,
+)
+
+
+def load_records(session: Session) -> list[CustomerRecord]:
+    rows = session.execute(select(*_RECORD_COLUMNS).order_by(Customer.id)).all()
+    return [CustomerRecord.from_row(r) for r in rows]
+
+
+# --- Índice en memoria ---------------------------------------------------
+
+class CustomerIndex:
+    """Índice de prefijos, trigramas y dígitos sobre los clientes cargados."""
+
+    def __init__(self, records: Iterable[CustomerRecord] = ()) -> None:
+        self._lock = threading.RLock()
+        self._records: dict[int, CustomerRecord] = {}
+        self._tokens_by_id: dict[int, set[str]] = {}
+        self._digits_by_id: dict[int, tuple[str, ...]] = {}
+        self._token_ids: dict[str, set[int]] = {}
+        self._trigram_tokens: dict[str, set[str]] = {}
+        self._sorted: list[str] | None = None
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def build(cls, session: Session) -> CustomerIndex:
+        return cls(load_records(session))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, customer_id: int) -> CustomerRecord | None:
+        return self._records.get(customer_id)
+
+    def records(self) -> list[CustomerRecord]:
+        with self._lock:
+            return list(self._records.values())
+
+    def add(self, record: CustomerRecord) -> None:
+        """Agregar o reemplazar un cliente."""
+        with self._lock:
+            self.remove(record.id)
+            tokens = set()
+            for value in (record.name, record.first_name, record.last_name, record.document, record.email,
+                          record.short_address):
+                tokens.update(tokenize(value))
+            self._records[record.id] = record
+            self._tokens_by_id[record.id] = tokens
+            self._digits_by_id[record.id] = tuple(d for d in (digits(record.document), digits(record.phone)) if d)
+            for token in tokens:
+                ids = self._token_ids.get(token)
+                if ids is None:
+                    self._token_ids[token] = ids = set()
+                    for gram in trigrams(token):
+                        self._trigram_tokens.setdefault(gram, set()).add(token)
+                    self._sorted = None
+                ids.add(record.id)
+
+    def remove(self, customer_id: int) -> None:
+        with self._lock:
+            if self._records.pop(customer_id, None) is None:
+                return
+            self._digits_by_id.pop(customer_id, None)
+            for token in self._tokens_by_id.pop(customer_id, ()):
+                ids = self._token_ids.get(token)
+                if ids is None:
+                    continue
+                ids.discard(customer_id)
+                if not ids:
+                    del self._token_ids[token]
+                    for gram in trigrams(token):
+                        self._trigram_tokens.get(gram, set()).discard(token)
+                    self._sorted = None
+
+    def _prefix_tokens(self, prefix: str) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self._token_ids)
+        tokens = self._sorted
+        out = []
+        i = bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            out.append(tokens[i])
+            i += 1
+        return out
+
+    def _similar_tokens(self, term: str) -> dict[str, float]:
+        """Tokens que comparten suficientes trigramas con `term` (fragmentos, errores de tipeo)."""
+        grams = trigrams(term)
+        counts: dict[str, int] = {}
+        for gram in grams:
+            for token in self._trigram_tokens.get(gram, ()):
+                counts[token] = counts.get(token, 0) + 1
+        return {t: n / len(grams) for t, n in counts.items() if n / len(grams) >= TRIGRAM_THRESHOLD}
+
+    def _term_scores(self, term: str) -> dict[int, float]:
+        """Mejor puntaje de cada cliente para un término: exacto 3, prefijo 2, trigramas <= 1."""
+        scores: dict[int, float] = {}
+
+        def bump(ids: Iterable[int], score: float) -> None:
+            for cid in ids:
+                if scores.get(cid, 0.0) < score:
+                    scores[cid] = score
+
+        for token in self._prefix_tokens(term):
+            bump(self._token_ids[token], 3.0 if token == term else 2.0)
+        if len(term) >= 3 and not term.isdigit():
+            for token, similarity in self._similar_tokens(term).items():
+                bump(self._token_ids[token], similarity)
+        return scores
+
+    def _digit_scores(self, number: str) -> dict[int, float]:
+        scores = {}
+        for cid, values in self._digits_by_id.items():
+            if any(v.startswith(number) for v in values):
+                scores[cid] = 3.0
+            elif any(number in v for v in values):
+                scores[cid] = 2.0
+        return scores
+
+    def search(self, query: str, limit: int | None = DEFAULT_LIMIT) -> list[CustomerRecord]:
+        """
+        Clientes que coinciden con todos los términos de `query`, del más al
+        menos relevante. Un término de solo dígitos (>= 3) se busca también en
+        documento y teléfono. `limit=None` devuelve todos.
+        """
+        terms = tokenize(query)
+        number = digits(query)
+        if not terms and len(number) < MIN_DIGITS:
+            return []
+        with self._lock:
+            total: dict[int, float] | None = None
+            for term in terms:
+                scores = self._term_scores(term)
+                if term.isdigit() and len(term) >= MIN_DIGITS:
+                    for cid, score in self._digit_scores(term).items():
+                        scores[cid] = max(scores.get(cid, 0.0), score)
+                total = scores if total is None else {cid: total[cid] + s for cid, s in scores.items() if cid in total}
+                if not total:
+                    break
+            total = total or {}
+            if _is_numeric(query) and len(number) >= MIN_DIGITS:
+                # "0414-123" o "12.345.678": los dígitos juntos, aunque vengan separados
+                for cid, score in self._digit_scores(number).items():
+                    total[cid] = max(total.get(cid, 0.0), score)
+            if not total:
+                return []
+            ranked = sorted(total.items(), key=lambda kv: (-kv[1], fold(self._records[kv[0]].label), kv[0]))
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [self._records[cid] for cid, _ in ranked]
+
+
+# --- Búsqueda en el servidor ---------------------------------------------
+
+def _digits_expr(column):
+    # Documento/teléfono sin separadores, en SQL portable (SQLite y PostgreSQL)
+    expr = func.coalesce(column, "")
+    for sep in ("-", ".", " ", "(", ")", "/"):
+        expr = func.replace(expr, sep, "")
+    return expr
+
+
+def _fold_sql(session: Session, column):
+    """
+    Columna comparable con los términos normalizados. En SQLite se registra
+    `fold` como función SQL; en PostgreSQL se compara tal cual (ILIKE ya
+    ignora mayúsculas y así los índices de trigramas sirven), por lo que los
+    acentos deben coincidir con lo tipeado.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        raw = session.connection().connection.driver_connection
+        raw.create_function("admin_fold", 1, fold, deterministic=True)
+        return func.admin_fold(column)
+    return column
+
+
+def _sql_terms(session: Session, query: str) -> list[str]:
+    if session.get_bind().dialect.name == "sqlite":
+        return tokenize(query)
+    return [t for t in _NON_WORD.split(query.lower()) if t] or tokenize(query)
+
+
+def _like_escape(term: str) -> str:
+    """`_` y `%` literales en un patrón LIKE (con ESCAPE '\\')."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def has_pg_trgm(session: Session) -> bool:
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    info = bind.engine.info
+    if "pg_trgm" not in info:
+        info["pg_trgm"] = bool(session.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).scalar())
+    return info["pg_trgm"]
+
+
+def search_customers(session: Session, query: str, limit: int | None = DEFAULT_LIMIT) -> list[CustomerRecord]:
+    """
+    Búsqueda en la base: cada término debe aparecer (ILIKE) en nombre,
+    apellido, documento, teléfono, email o dirección; los dígitos se comparan contra
+    documento y teléfono sin separadores. Con `pg_trgm` se ordena por
+    similitud; si no, por nombre.
+    """
+    terms = _sql_terms(session, query)
+    number = digits(query)
+    if not terms and len(number) < MIN_DIGITS:
+        return []
+    columns = [getattr(Customer, c) for c in _TRGM_COLUMNS]
+    searchable = [_fold_sql(session, c) for c in columns]
+    conds = []
+    for term in terms:
+        pattern = f"%{_like_escape(term)}%"
+        conds.append(or_(*[c.ilike(pattern, escape="\\") for c in searchable]))
+    where = and_(*conds)
+    if _is_numeric(query) and len(number) >= MIN_DIGITS:
+        where = or_(
+            where,
+            _digits_expr(Customer.document).like(f"%{number}%"),
+            _digits_expr(Customer.phone).like(f"%{number}%"),
+        )
+    stmt = select(*_RECORD_COLUMNS).where(where)
+    if has_pg_trgm(session):
+        stmt = stmt.order_by(func.greatest(*[func.similarity(func.coalesce(c, ""), query) for c in columns]).desc())
+    stmt = stmt.order_by(func.lower(Customer.name), Customer.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [CustomerRecord.from_row(r) for r in session.execute(stmt).all()]
+
+
+def ensure_trigram_indexes(engine: Engine) -> bool:
+    """
+    En PostgreSQL, activar `pg_trgm` y crear índices GIN por trigramas para
+    que ILIKE '%texto%' no recorra toda la tabla. Devuelve False en otras
+    bases o si el usuario no tiene permiso para crear la extensión.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for column in _TRGM_COLUMNS:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_customers_{column}_trgm "
+                    f"ON customers USING gin ({column} gin_trgm_ops)"
+                ))
+    except Exception as e:
+        print(f"Advertencia: no se pudieron crear índices de trigramas: {e}")
+        return False
+    engine.info.pop("pg_trgm", None)
+    return True
+
+
+# --- Fachada -------------------------------------------------------------
+
+_shared: "weakref.WeakKeyDictionary[sessionmaker, CustomerSearch]" = weakref.WeakKeyDictionary()
+_shared_lock = threading.Lock()
+
+
+class CustomerSearch:
+    """
+    Búsqueda de clientes para la interfaz: índice en memoria si la tabla es
+    chica, consulta al servidor si supera `max_rows`. Es segura para usarla
+    desde varios hilos: el índice se arma una sola vez y se rearma pasados
+    `max_age` segundos o tras `invalidate`.
+    """
+
+    def __init__(
+        self, session_factory: sessionmaker, *, max_rows: int = INDEX_MAX_ROWS, max_age: float | None = INDEX_MAX_AGE,
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._index: CustomerIndex | None = None
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, session_factory: sessionmaker) -> CustomerSearch:
+        """La instancia de `session_factory`, creada en el primer uso."""
+        with _shared_lock:
+            search = _shared.get(session_factory)
+            if search is None:
+                search = _shared[session_factory] = cls(session_factory)
+            return search
+
+    @classmethod
+    def invalidate_shared(cls) -> None:
+        with _shared_lock:
+            searches = list(_shared.values())
+        for search in searches:
+            search.invalidate()
+
+    @property
+    def index(self) -> CustomerIndex | None:
+        return self._index
+
+    def _stale(self) -> bool:
+        if not self._loaded:
+            return True
+        return self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age
+
+    def _load_locked(self) -> None:
+        with self._session_factory() as session:
+            count = session.execute(select(func.count(Customer.id))).scalar() or 0
+            self._index = CustomerIndex.build(session) if count <= self.max_rows else None
+        self._loaded_at = time.monotonic()
+        self._loaded = True
+
+    def load(self) -> None:
+        """Armar el índice (o decidir buscar en el servidor)."""
+        with self._lock:
+            self._load_locked()
+
+    def _current(self) -> CustomerIndex | None:
+        """Índice vigente (None: buscar en el servidor); si hace falta se arma, una sola vez entre hilos."""
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    self._load_locked()
+        return self._index
+
+    def search(self, query: str, limit: int | None = DEFAULT_LIMIT) -> list[CustomerRecord]:
+        index = self._current()
+        if index is not None:
+            return index.search(query, limit)
+        with self._session_factory() as session:
+            return search_customers(session, query, limit)
+
+    def get(self, customer_id: int) -> CustomerRecord | None:
+        index = self._current()
+        if index is not None:
+            return index.get(customer_id)
+        with self._session_factory() as session:
+            row = session.execute(select(*_RECORD_COLUMNS).where(Customer.id == customer_id)).first()
+            return CustomerRecord.from_row(row) if row else None
+
+    def upsert(self, record: CustomerRecord) -> None:
+        index = self._index
+        if index is not None:
+            index.add(record)
+
+    def remove(self, customer_id: int) -> None:
+        index = self._index
+        if index is not None:
+            index.remove(customer_id)
+
+    def invalidate(self) -> None:
+        """Olvidar el índice; la próxima búsqueda lo vuelve a armar."""
+        with self._lock:
+            self._loaded = False
+            self._index = None
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, or_, select, true, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import Customer, Delivery, DeliveryZone, Order, Sale, User
+from .delivery_settlement import PAYABLE_SOURCE
+
+
+DEFAULT_PAGE_SIZE = 100
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryRow:
+    """Fila de la tabla de entregas, solo con las columnas que muestra la vista."""
+    id: int
+    sent_at: datetime | None
+    order_number: str | None
+    zone: str | None
+    address: str | None
+    price: float
+    amount_bs: float
+    payment_source: str | None
+    payment_id: int | None
+    rider: str | None
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryWindowSummary:
+    """Conteo del filtro actual y pendiente de pago (EMPRESA) del rango de fechas."""
+    total_count: int
+    pending_count: int
+    pending_bs: float
+
+
+def _joined(stmt):
+    # Order -> Sale -> Customer son muchos-a-uno: los outer join no multiplican filas
+    return (
+        stmt.select_from(Delivery)
+        .outerjoin(Order, Delivery.order_id == Order.id)
+        .outerjoin(Sale, Order.sale_id == Sale.id)
+        .outerjoin(Customer, Sale.cliente_id == Customer.id)
+        .outerjoin(DeliveryZone, Delivery.zone_id == DeliveryZone.id)
+        .outerjoin(User, Delivery.delivery_user_id == User.id)
+    )
+
+
+# Textos que la tabla muestra cuando falta el pedido o el motorizado; la búsqueda también los encuentra
+NO_ORDER_LABEL = "DILIGENCIA"
+NO_RIDER_LABEL = "Sin Asignar"
+
+
+def _in_range(start: datetime | None, end: datetime | None):
+    # Rango semiabierto [start, end) sobre sent_at (ix_deliveries_sent_status)
+    conds = []
+    if start is not None:
+        conds.append(Delivery.sent_at >= start)
+    if end is not None:
+        conds.append(Delivery.sent_at < end)
+    return and_(*conds) if conds else true()
+
+
+def _window(start: datetime | None, end: datetime | None):
+    # Las entregas sin fecha (datos antiguos) no caen en ningún rango: se listan siempre, al final
+    if start is None and end is None:
+        return true()
+    return or_(_in_range(start, end), Delivery.sent_at.is_(None))
+
+
+def _matches(status: str | None, search: str | None) -> list:
+    conds = []
+    if status:
+        conds.append(Delivery.status == status)
+    text = (search or "").strip()
+    if text:
+        pattern = f"%{text}%"
+        conds.append(or_(
+            func.coalesce(Order.order_number, NO_ORDER_LABEL).ilike(pattern),
+            DeliveryZone.name.ilike(pattern),
+            Customer.short_address.ilike(pattern),
+            Delivery.notes.ilike(pattern),
+            func.coalesce(User.username, NO_RIDER_LABEL).ilike(pattern),
+        ))
+    return conds
+
+
+def delivery_window_summary(
+    session: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    status: str | None = None,
+    search: str | None = None,
+) -> DeliveryWindowSummary:
+    """Una sola consulta para el total filtrado y lo pendiente de pago del rango.
+
+    El pendiente ignora estado y búsqueda: es lo mismo que liquida el cierre semanal,
+    así que tampoco cuenta las entregas sin fecha (el total sí, como la tabla).
+    """
+    matches = _matches(status, search)
+    pending = and_(
+        Delivery.payment_source == PAYABLE_SOURCE, Delivery.payment_id.is_(None), _in_range(start, end),
+    )
+    stmt = _joined(select(
+        func.sum(case((and_(*matches), 1), else_=0)) if matches else func.count(Delivery.id),
+        func.sum(case((pending, 1), else_=0)),
+        func.sum(case((pending, Delivery.amount_bs), else_=0.0)),
+    )).where(_window(start, end))
+    total, pending_count, pending_bs = session.execute(stmt).one()
+    return DeliveryWindowSummary(int(total or 0), int(pending_count or 0), float(pending_bs or 0.0))
+
+
+def query_deliveries(
+    session: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    status: str | None = None,
+    search: str | None = None,
+    after: tuple[datetime | None, int] | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[DeliveryRow, ...]:
+    """Página de entregas (más recientes primero) sin materializar objetos ORM.
+
+    La paginación es por clave: `after` es (sent_at, id) de la última fila ya
+    mostrada, así que pedir más páginas no recorre las anteriores. Las entregas
+    sin fecha van al final (NULLS LAST) y se paginan solo por id.
+    """
+    stmt = _joined(select(
+        Delivery.id, Delivery.sent_at, Order.order_number, DeliveryZone.name,
+        func.coalesce(Customer.short_address, Delivery.notes), func.coalesce(DeliveryZone.price, 0.0),
+        func.coalesce(Delivery.amount_bs, 0.0), Delivery.payment_source, Delivery.payment_id,
+        User.username, Delivery.status,
+    )).where(_window(start, end), *_matches(status, search))
+    if after is not None:
+        stmt = stmt.where(_after(*after))
+    stmt = stmt.order_by(Delivery.sent_at.desc().nulls_last(), Delivery.id.desc()).limit(limit)
+    return tuple(DeliveryRow(*r) for r in session.execute(stmt))
+
+
+def _after(sent_at: datetime | None, delivery_id: int):
+    """Filas posteriores a (sent_at, id) en el orden sent_at DESC NULLS LAST, id DESC."""
+    if sent_at is None:
+        return and_(Delivery.sent_at.is_(None), Delivery.id < delivery_id)
+    return or_(tuple_(Delivery.sent_at, Delivery.id) < tuple_(sent_at, delivery_id), Delivery.sent_at.is_(None))
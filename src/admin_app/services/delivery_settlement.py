@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Account, Delivery, DeliveryPayment, Transaction, TransactionCategory, User
+
+
+RELATED_TABLE = 'delivery_payments'
+PAYABLE_SOURCE = 'EMPRESA'
+CATEGORY_NAME = 'Delivery'
+
+
+@dataclass(frozen=True, slots=True)
+class RiderPending:
+    """Carreras pendientes de pago de un motorizado en el rango consultado."""
+    rider_id: int
+    username: str
+    full_name: str | None
+    count: int
+    total_bs: float
+
+    @property
+    def display_name(self) -> str:
+        return self.full_name or self.username
+
+
+@dataclass(frozen=True, slots=True)
+class Settlement:
+    """Pago registrado: lote de carreras marcado y transacción contable asociada."""
+    payment_id: int
+    rider_id: int
+    count: int
+    amount_bs: float
+    transaction_id: int
+
+
+def _pending_filter(start: datetime | None, end: datetime | None, status: str | None) -> list:
+    # Rango semiabierto [start, end), igual que el libro contable
+    conds = [Delivery.payment_source == PAYABLE_SOURCE, Delivery.payment_id.is_(None)]
+    if start is not None:
+        conds.append(Delivery.sent_at >= start)
+    if end is not None:
+        conds.append(Delivery.sent_at < end)
+    if status:
+        conds.append(Delivery.status == status)
+    return conds
+
+
+def pending_by_rider(
+    session: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    status: str | None = None,
+) -> list[RiderPending]:
+    """Totales pendientes por motorizado con una sola consulta agrupada."""
+    stmt = (
+        select(User.id, User.username, User.full_name, func.count(Delivery.id), func.sum(Delivery.amount_bs))
+        .join(Delivery, Delivery.delivery_user_id == User.id)
+        .where(*_pending_filter(start, end, status))
+        .group_by(User.id, User.username, User.full_name)
+        .order_by(User.username)
+    )
+    return [
+        RiderPending(rider_id, username, full_name, int(n), float(total or 0.0))
+        for rider_id, username, full_name, n, total in session.execute(stmt)
+    ]
+
+
+def pending_totals(
+    session: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    status: str | None = None,
+) -> tuple[int, float]:
+    """Cantidad y monto pendiente de todos los motorizados en el rango."""
+    n, total = session.execute(
+        select(func.count(Delivery.id), func.sum(Delivery.amount_bs)).where(*_pending_filter(start, end, status))
+    ).one()
+    return int(n or 0), float(total or 0.0)
+
+
+def _settle(
+    session: Session,
+    riders: dict[int, str],
+    start: datetime,
+    end: datetime,
+    account_id: int,
+    status: str | None,
+    notes: str | None,
+) -> list[Settlement]:
+    now = datetime.now()
+    payment_ids: dict[int, int] = {}
+    for rider_id in riders:
+        payment_ids[rider_id] = session.execute(
+            insert(DeliveryPayment).values(
+                rider_id=rider_id, amount_bs=0.0, quantity=0,
+                start_date=start, end_date=end,
+                created_at=now, notes=notes,
+            ).returning(DeliveryPayment.id)
+        ).scalar_one()
+
+    # Un solo UPDATE marca el lote de todos los motorizados. Los montos se calculan
+    # después sobre lo efectivamente marcado, así que coinciden aunque entren carreras nuevas.
+    batch = case(
+        *((Delivery.delivery_user_id == rider_id, pid) for rider_id, pid in payment_ids.items()),
+        else_=Delivery.payment_id,
+    )
+    session.execute(
+        update(Delivery)
+        .where(Delivery.delivery_user_id.in_(payment_ids), *_pending_filter(start, end, status))
+        .values(payment_id=batch)
+        .execution_options(synchronize_session=False)
+    )
+
+    marked = dict(
+        (pid, (int(n), float(total or 0.0)))
+        for pid, n, total in session.execute(
+            select(Delivery.payment_id, func.count(Delivery.id), func.sum(Delivery.amount_bs))
+            .where(Delivery.payment_id.in_(payment_ids.values()))
+            .group_by(Delivery.payment_id)
+        )
+    )
+
+    empty = [pid for pid in payment_ids.values() if pid not in marked]
+    if empty:
+        session.execute(delete(DeliveryPayment).where(DeliveryPayment.id.in_(empty)))
+    if not marked:
+        return []
+
+    payments = DeliveryPayment.__table__
+    session.execute(
+        update(payments).where(payments.c.id == bindparam('pid')).values(amount_bs=bindparam('amount'), quantity=bindparam('qty')),
+        [{'pid': pid, 'amount': total, 'qty': n} for pid, (n, total) in marked.items()],
+    )
+
+    cat_id = session.execute(
+        select(TransactionCategory.id).where(TransactionCategory.name == CATEGORY_NAME).limit(1)
+    ).scalar()
+    settled: list[Settlement] = []
+    for rider_id, pid in payment_ids.items():
+        if pid not in marked:
+            continue
+        n, total = marked[pid]
+        txn_id = session.execute(
+            insert(Transaction).values(
+                date=now, amount=total, transaction_type='EXPENSE',
+                description=f"Pago Semanal Delivery: {riders[rider_id]} ({n} envíos)",
+                account_id=account_id, category_id=cat_id,
+                related_table=RELATED_TABLE, related_id=pid,
+            ).returning(Transaction.id)
+        ).scalar_one()
+        settled.append(Settlement(pid, rider_id, n, total, txn_id))
+
+    session.execute(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=Account.balance - sum(s.amount_bs for s in settled))
+        .execution_options(synchronize_session=False)
+    )
+    return settled
+
+
+def _commit(session: Session, fn) -> list[Settlement]:
+    try:
+        settled = fn()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    # Saldos y lotes cambiaron con UPDATE directo: no confiar en objetos cargados
+    session.expire_all()
+    return settled
+
+
+def settle_rider(
+    session: Session,
+    rider_id: int,
+    start: datetime,
+    end: datetime,
+    account_id: int,
+    *,
+    status: str | None = None,
+    notes: str | None = None,
+) -> Settlement | None:
+    """Registra el pago de las carreras pendientes de un motorizado en [start, end).
+
+    Pago, marcado de carreras (un UPDATE), transacción y débito de la cuenta van
+    en una sola transacción de base de datos. Devuelve None si no había nada pendiente.
+    """
+    username = session.execute(select(User.username).where(User.id == rider_id)).scalar() or str(rider_id)
+    settled = _commit(session, lambda: _settle(session, {rider_id: username}, start, end, account_id, status, notes))
+    return settled[0] if settled else None
+
+
+def settle_all_riders(
+    session: Session,
+    start: datetime,
+    end: datetime,
+    account_id: int,
+    *,
+    status: str | None = None,
+    notes: str | None = None,
+) -> list[Settlement]:
+    """Registra de una vez el pago de todos los motorizados con carreras pendientes."""
+    def run() -> list[Settlement]:
+        riders = {r.rider_id: r.username for r in pending_by_rider(session, start, end, status=status)}
+        return _settle(session, riders, start, end, account_id, status, notes) if riders else []
+    return _commit(session, run)
+
+
+def unsettle_payment(session: Session, payment_id: int) -> bool:
+    """Elimina un pago: revierte su transacción en la cuenta y deja las carreras pendientes."""
+    def run() -> list:
+        if session.get(DeliveryPayment, payment_id) is None:
+            return []
+        txns = session.execute(
+            select(Transaction.account_id, func.sum(Transaction.amount))
+            .where(Transaction.related_table == RELATED_TABLE, Transaction.related_id == payment_id)
+            .group_by(Transaction.account_id)
+        ).all()
+        for acc_id, total in txns:
+            session.execute(
+                update(Account).where(Account.id == acc_id)
+                .values(balance=Account.balance + float(total or 0.0))
+                .execution_options(synchronize_session=False)
+            )
+        session.execute(delete(Transaction).where(
+            Transaction.related_table == RELATED_TABLE, Transaction.related_id == payment_id
+        ))
+        session.execute(
+            update(Delivery).where(Delivery.payment_id == payment_id).values(payment_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        session.execute(delete(DeliveryPayment).where(DeliveryPayment.id == payment_id))
+        return [payment_id]
+    return bool(_commit(session, run))
@@ -0,0 +1,329 @@
+"""
+Sincronización incremental de una estación SQLite hacia el servidor central.
+
+En lugar de volver a migrar todo, cada pasada envía solo lo que cambió:
+
+- Altas y modificaciones: filas anotadas como 'U' en `sync_changes`, filas
+  con `id` mayor que la marca de agua de la tabla y filas con `updated_at`
+  posterior a la marca (en las tablas que lo tienen). El registro lo llenan
+  triggers de SQLite en las estaciones con ADMIN_APP_SYNC_TARGET (ver
+  `track_changes`), porque la mayoría de las tablas no tiene `updated_at`;
+  así también quedan anotados los UPDATE/DELETE masivos y el SQL directo,
+  que no pasan por el flush del ORM. Las altas se anotan también porque las
+  tablas no usan AUTOINCREMENT: tras borrar la última fila, SQLite reutiliza
+  su id y la marca de agua no vería la fila nueva.
+- Bajas: lápidas 'D' de `sync_changes`, aplicadas en orden inverso de FKs.
+  Una lápida cuyo id vuelve a existir en la estación no se aplica.
+
+Las filas viajan en lotes con upsert (`on_conflict_do_update` sobre la
+clave primaria), así reenviar un lote tras un corte es inofensivo. Las
+marcas de agua se guardan en un JSON local después de confirmar en el
+servidor; las entradas de `sync_changes` ya enviadas se purgan al final.
+Cada pasada envía todo lo que queda en el registro hasta su último id (sin
+ventana desde la pasada anterior): tras la purga SQLite vuelve a numerar
+desde 1, y lo que una pasada cortada no purgó se reenvía sin daño.
+
+Cada fila enviada queda a nombre de la estación en `sync_origins` del
+servidor. Si el id ya es de otra estación (o existe en el servidor sin
+dueño) la pasada se detiene con `SyncConflict` en lugar de pisarla.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import Table, and_, delete, event, func, insert, or_, select
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import Base, SyncChange, SyncOrigin
+from .pg_migration import reset_sequences
+
+
+DEFAULT_BATCH_SIZE = 1000
+UPDATED = "U"
+DELETED = "D"
+
+_tracked: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+class SyncConflict(RuntimeError):
+    """Filas de la estación cuyo id en el servidor pertenece a otra estación (o a nadie)."""
+
+    def __init__(self, table: str, ids: list[int], owners: set[str | None]) -> None:
+        self.table, self.ids, self.owners = table, ids, owners
+        shown = ", ".join(map(str, ids[:10])) + (" ..." if len(ids) > 10 else "")
+        who = ", ".join(sorted(o or "el servidor (sin estación)" for o in owners))
+        super().__init__(f"{table}: los ids {shown} ya existen en el servidor a nombre de {who}")
+
+
+def synced_tables() -> list[Table]:
+    """Tablas del modelo en orden de FKs, sin el propio registro de cambios."""
+    return [t for t in Base.metadata.sorted_tables if t.name != SyncChange.__tablename__ and "id" in t.c]
+
+
+def station_id() -> str:
+    """Nombre de esta estación: ADMIN_APP_STATION_ID o el nombre del equipo."""
+    return os.getenv("ADMIN_APP_STATION_ID") or platform.node() or "estacion"
+
+
+# --- Registro de cambios (lado estación) ---------------------------------
+
+_TRIGGER_SQL = (
+    '''CREATE TRIGGER IF NOT EXISTS "sync_{t}_i" AFTER INSERT ON "{t}" BEGIN
+        INSERT INTO sync_changes (table_name, row_id, op, changed_at) VALUES ('{t}', NEW.id, 'U', CURRENT_TIMESTAMP);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS "sync_{t}_u" AFTER UPDATE ON "{t}" BEGIN
+        INSERT INTO sync_changes (table_name, row_id, op, changed_at) VALUES ('{t}', NEW.id, 'U', CURRENT_TIMESTAMP);
+        INSERT INTO sync_changes (table_name, row_id, op, changed_at)
+            SELECT '{t}', OLD.id, 'D', CURRENT_TIMESTAMP WHERE OLD.id <> NEW.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS "sync_{t}_d" AFTER DELETE ON "{t}" BEGIN
+        INSERT INTO sync_changes (table_name, row_id, op, changed_at) VALUES ('{t}', OLD.id, 'D', CURRENT_TIMESTAMP);
+    END''',
+)
+
+
+def _install_triggers(conn: Connection) -> None:
+    existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars())
+    if SyncChange.__tablename__ not in existing:
+        return
+    for table in synced_tables():
+        if table.name in existing:
+            for sql in _TRIGGER_SQL:
+                conn.exec_driver_sql(sql.format(t=table.name))
+
+
+def _on_after_create(target, connection: Connection, **kw) -> None:
+    # Tablas creadas después de track_changes (base nueva): se les ponen los triggers
+    if connection.engine in _tracked:
+        _install_triggers(connection)
+
+
+def track_changes(engine: Engine) -> Engine:
+    """
+    Anotar en `sync_changes` toda alta, modificación y baja sobre `engine`
+    (SQLite), con triggers: cubren el ORM, `update()`/`delete()` masivos y SQL directo.
+    """
+    if engine.dialect.name != "sqlite":
+        raise ValueError("El registro de cambios es para estaciones SQLite")
+    _tracked.add(engine)
+    with engine.begin() as conn:
+        _install_triggers(conn)
+    if not event.contains(Base.metadata, "after_create", _on_after_create):
+        event.listen(Base.metadata, "after_create", _on_after_create)
+    return engine
+
+
+# --- Estado de sincronización --------------------------------------------
+
+class SyncState:
+    """Marcas de agua por tabla y nombre de la estación, en un JSON local."""
+
+    def __init__(self, path: Path | str | None) -> None:
+        self.path = Path(path) if path else None
+        self.data: dict = {"tables": {}}
+        if self.path and self.path.exists():
+            self.data = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def table(self, name: str) -> dict:
+        return self.data["tables"].setdefault(name, {"id": 0, "updated_at": None, "ids_at": []})
+
+    @property
+    def station(self) -> str:
+        # Se fija en la primera pasada: cambiar el nombre del equipo no cambia el dueño de las filas
+        return self.data.setdefault("station", station_id())
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+@dataclass(slots=True)
+class SyncReport:
+    upserted: dict[str, int] = field(default_factory=dict)
+    deleted: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.upserted.values()) + sum(self.deleted.values())
+
+
+# --- Envío ---------------------------------------------------------------
+
+def _upsert_stmt(conn: Connection, table: Table):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Upsert no soportado para {conn.dialect.name}")
+    stmt = dialect_insert(table)
+    pk = list(table.primary_key.columns)
+    return stmt.on_conflict_do_update(
+        index_elements=pk,
+        set_={c: stmt.excluded[c.key] for c in table.columns if not c.primary_key},
+    )
+
+
+def _unclaimed(dst: Connection, table: Table, ids: list[int], station: str, *, adopt: bool = False) -> list[int]:
+    """
+    Ids de `ids` que aún no tienen dueño en el servidor. Falla con
+    `SyncConflict` si alguno es de otra estación, o si ya existe en el
+    servidor sin dueño (salvo con `adopt`, que lo toma como propio).
+    """
+    origin = SyncOrigin.__table__
+    owners = dict(dst.execute(
+        select(origin.c.row_id, origin.c.station)
+        .where(origin.c.table_name == table.name, origin.c.row_id.in_(ids))
+    ).all())
+    existing = set() if adopt else set(dst.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+    foreign = sorted(i for i in ids if (owners[i] != station if i in owners else i in existing))
+    if foreign:
+        raise SyncConflict(table.name, foreign, {owners.get(i) for i in foreign})
+    return [i for i in ids if i not in owners]
+
+
+def _claim(dst: Connection, table: Table, ids: list[int], station: str, *, adopt: bool = False) -> None:
+    new = _unclaimed(dst, table, ids, station, adopt=adopt)
+    if new:
+        dst.execute(insert(SyncOrigin.__table__), [
+            {"table_name": table.name, "row_id": i, "station": station} for i in new
+        ])
+
+
+def claim_existing(
+    local: Engine, remote: Engine, station: str, *, batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict[str, int]:
+    """
+    Poner a nombre de `station` las filas locales que ya están en el servidor
+    (tras una migración completa), para que las próximas pasadas puedan
+    modificarlas. Las que sean de otra estación producen `SyncConflict`.
+    """
+    claimed: dict[str, int] = {}
+    for table in synced_tables():
+        with local.connect() as src:
+            result = src.execution_options(yield_per=batch_size).execute(select(table.c.id).order_by(table.c.id))
+            for part in result.partitions():
+                ids = [r.id for r in part]
+                with remote.begin() as dst:
+                    present = list(dst.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+                    if present:
+                        _claim(dst, table, present, station, adopt=True)
+                claimed[table.name] = claimed.get(table.name, 0) + len(present)
+    return {name: n for name, n in claimed.items() if n}
+
+
+def _changed_rows_stmt(table: Table, mark: dict, upto: int):
+    id_col = table.c.id
+    conds = [id_col > mark["id"]]
+    if "updated_at" in table.c and mark["updated_at"]:
+        since = datetime.fromisoformat(mark["updated_at"])
+        conds.append(table.c.updated_at > since)
+        conds.append(and_(table.c.updated_at == since, id_col.notin_(mark["ids_at"] or [-1])))
+    elif "updated_at" in table.c:
+        conds.append(table.c.updated_at.isnot(None))
+    conds.append(id_col.in_(
+        select(SyncChange.row_id).where(
+            SyncChange.table_name == table.name, SyncChange.op == UPDATED, SyncChange.id <= upto,
+        )
+    ))
+    return select(table).where(or_(*conds)).order_by(id_col)
+
+
+def _advance(mark: dict, table: Table, rows: list) -> None:
+    mark["id"] = max(mark["id"], max(r.id for r in rows))
+    if "updated_at" not in table.c:
+        return
+    stamps = [r.updated_at for r in rows if r.updated_at is not None]
+    if not stamps:
+        return
+    newest = max(stamps)
+    current = datetime.fromisoformat(mark["updated_at"]) if mark["updated_at"] else None
+    at_newest = sorted({r.id for r in rows if r.updated_at == newest})
+    if current is None or newest > current:
+        mark["updated_at"], mark["ids_at"] = newest.isoformat(), at_newest
+    elif newest == current:
+        mark["ids_at"] = sorted(set(mark["ids_at"]) | set(at_newest))
+
+
+def sync_once(
+    local: Engine,
+    remote: Engine,
+    state: SyncState,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[str, int], None] | None = None,
+) -> SyncReport:
+    """
+    Una pasada de sincronización; devuelve cuántas filas se enviaron y
+    borraron por tabla. Con `SyncConflict` se detiene sin enviar el lote en
+    conflicto (los lotes anteriores quedan confirmados y anotados).
+    """
+    started = time.perf_counter()
+    report = SyncReport()
+    station = state.station
+    tables = synced_tables()
+    with local.connect() as conn:
+        upto = conn.execute(select(func.coalesce(func.max(SyncChange.id), 0))).scalar()
+
+    for table in tables:
+        mark = state.table(table.name)
+        sent = 0
+        with local.connect() as src:
+            result = src.execution_options(yield_per=batch_size).execute(_changed_rows_stmt(table, mark, upto))
+            for rows in result.partitions():
+                keys = [c.key for c in table.columns]
+                with remote.begin() as dst:
+                    _claim(dst, table, [r.id for r in rows], station)
+                    dst.execute(_upsert_stmt(dst, table), [dict(zip(keys, r)) for r in rows])
+                _advance(mark, table, rows)
+                sent += len(rows)
+                if progress:
+                    progress(table.name, sent)
+        if sent:
+            report.upserted[table.name] = sent
+            state.save()
+
+    with local.connect() as conn:
+        tombstones = conn.execute(
+            select(SyncChange.table_name, SyncChange.row_id)
+            .where(SyncChange.op == DELETED, SyncChange.id <= upto)
+        ).all()
+        by_table: dict[str, set[int]] = {}
+        for name, row_id in tombstones:
+            by_table.setdefault(name, set()).add(row_id)
+        # Id reutilizado por un alta posterior: la fila viva ya se envió arriba
+        for table in tables:
+            if by_table.get(table.name):
+                alive = conn.execute(select(table.c.id).where(table.c.id.in_(by_table[table.name]))).scalars()
+                by_table[table.name].difference_update(alive)
+    origin = SyncOrigin.__table__
+    with remote.begin() as dst:
+        for table in reversed(tables):
+            ids = sorted(by_table.get(table.name, ()))
+            if ids:
+                _unclaimed(dst, table, ids, station)
+                dst.execute(delete(table).where(table.c.id.in_(ids)))
+                dst.execute(delete(origin).where(origin.c.table_name == table.name, origin.c.row_id.in_(ids)))
+                report.deleted[table.name] = len(ids)
+
+    if report.upserted:
+        reset_sequences(remote, [t for t in tables if t.name in report.upserted])
+    state.save()
+    with local.begin() as conn:
+        conn.execute(delete(SyncChange).where(SyncChange.id <= upto))
+    report.seconds = time.perf_counter() - started
+    return report
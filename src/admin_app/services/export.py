@@ -0,0 +1,304 @@
+"""
+Exportación de clientes, ventas, pagos, órdenes y movimientos a CSV o XLSX.
+
+Las filas salen directo de la consulta (`yield_per`: en PostgreSQL con
+cursor del lado del servidor) y se escriben por lotes, sin pasar por la
+tabla de la vista ni tener el resultado completo en memoria. El XLSX usa el
+modo `write_only` de openpyxl, que escribe cada fila al disco al agregarla;
+si se supera el máximo de filas de Excel se continúa en otra hoja.
+
+Se escribe a un archivo temporal junto al destino y se renombra al
+terminar: una exportación cancelada o fallida no deja un archivo a medias.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+from sqlalchemy import ColumnElement, Select, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import Account, Customer, Order, Sale, SalePayment, Transaction, TransactionCategory, User
+
+
+DEFAULT_BATCH_SIZE = 2000
+FORMATS = ("csv", "xlsx")
+XLSX_MAX_ROWS = 1_048_576  # incluye el encabezado
+IDS_CHUNK = 900  # por debajo del límite de parámetros de SQLite
+
+# (filas escritas, total o None si no se contó)
+ProgressFn = Callable[[int, int | None], None]
+
+
+@dataclass(frozen=True, slots=True)
+class ExportSpec:
+    """Qué se exporta: encabezados y columnas en el mismo orden, y la fecha para filtrar por período."""
+    key: str
+    title: str
+    columns: tuple[tuple[str, object], ...]
+    date_column: object | None = None
+    id_column: object | None = None
+    joins: tuple[tuple[object, object], ...] = ()
+    order_by: tuple[object, ...] = ()
+
+    @property
+    def headers(self) -> list[str]:
+        return [header for header, _ in self.columns]
+
+
+@dataclass(frozen=True, slots=True)
+class ExportResult:
+    path: Path
+    rows: int
+    seconds: float
+    cancelled: bool = False
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+SPECS: dict[str, ExportSpec] = {
+    "customers": ExportSpec(
+        "customers", "Clientes",
+        (
+            ("ID", Customer.id), ("Nombre", Customer.first_name), ("Apellido", Customer.last_name),
+            ("Razón social / nombre", Customer.name), ("Documento", Customer.document),
+            ("Dirección", Customer.short_address), ("Teléfono", Customer.phone), ("Email", Customer.email),
+            ("Creado", Customer.created_at),
+        ),
+        date_column=Customer.created_at, id_column=Customer.id, order_by=(Customer.id,),
+    ),
+    "sales": ExportSpec(
+        "sales", "Ventas",
+        (
+            ("ID", Sale.id), ("Fecha", Sale.fecha), ("Orden", Sale.numero_orden), ("Cliente", Sale.cliente),
+            ("Cliente ID", Sale.cliente_id), ("Artículo", Sale.articulo), ("Asesor", Sale.asesor),
+            ("Venta $", Sale.venta_usd), ("Abono $", Sale.abono_usd), ("Restante $", Sale.restante),
+            ("Forma de pago", Sale.forma_pago), ("Monto Bs", Sale.monto_bs), ("Tasa BCV", Sale.tasa_bcv),
+            ("IVA", Sale.iva), ("Diseño $", Sale.diseno_usd), ("Delivery $", Sale.delivery_usd),
+            ("Ingresos $", Sale.ingresos_usd), ("Notas", Sale.notes),
+        ),
+        date_column=Sale.fecha, id_column=Sale.id, order_by=(Sale.fecha, Sale.id),
+    ),
+    "payments": ExportSpec(
+        "payments", "Pagos",
+        (
+            ("ID", SalePayment.id), ("Fecha", SalePayment.payment_date), ("Venta ID", SalePayment.sale_id),
+            ("Orden", Sale.numero_orden), ("Cliente", Sale.cliente), ("Método", SalePayment.payment_method),
+            ("Monto $", SalePayment.amount_usd), ("Monto Bs", SalePayment.amount_bs),
+            ("Tasa", SalePayment.exchange_rate), ("Banco", SalePayment.bank), ("Referencia", SalePayment.reference),
+        ),
+        date_column=SalePayment.payment_date, id_column=SalePayment.id,
+        joins=((Sale, SalePayment.sale_id == Sale.id),),
+        order_by=(SalePayment.payment_date, SalePayment.id),
+    ),
+    "orders": ExportSpec(
+        "orders", "Órdenes",
+        (
+            ("ID", Order.id), ("Creada", Order.created_at), ("Orden", Order.order_number),
+            ("Venta ID", Order.sale_id), ("Cliente", Sale.cliente), ("Producto", Order.product_name),
+            ("Estado", Order.status), ("Diseñador", User.username), ("Entrega", Order.delivery_method),
+            ("Entregada", Order.delivered_at),
+        ),
+        date_column=Order.created_at, id_column=Order.id,
+        joins=((Sale, Order.sale_id == Sale.id), (User, Order.designer_id == User.id)),
+        order_by=(Order.created_at, Order.id),
+    ),
+    "transactions": ExportSpec(
+        "transactions", "Movimientos",
+        (
+            ("ID", Transaction.id), ("Fecha", Transaction.date), ("Tipo", Transaction.transaction_type),
+            ("Descripción", Transaction.description), ("Categoría", TransactionCategory.name),
+            ("Cuenta", Account.name), ("Moneda", Account.currency), ("Monto", Transaction.amount),
+            ("Referencia", Transaction.reference), ("Origen", Transaction.related_table),
+            ("Origen ID", Transaction.related_id),
+        ),
+        date_column=Transaction.date, id_column=Transaction.id,
+        joins=((Account, Transaction.account_id == Account.id),
+               (TransactionCategory, Transaction.category_id == TransactionCategory.id)),
+        order_by=(Transaction.date, Transaction.id),
+    ),
+}
+
+
+def build_statement(
+    spec: ExportSpec,
+    *,
+    start: datetime | date | None = None,
+    end: datetime | date | None = None,
+    ids: Iterable[int] | None = None,
+    where: Iterable[ColumnElement[bool]] = (),
+) -> Select:
+    """
+    SELECT de las columnas de `spec`, con período semiabierto [start, end),
+    ids y condiciones extra (p. ej. las ventas de un asesor) opcionales.
+    """
+    # La primera columna es de la entidad principal; el resto se une con outer join
+    stmt = select(*[col for _, col in spec.columns]).select_from(spec.columns[0][1].class_)
+    for target, onclause in spec.joins:
+        stmt = stmt.outerjoin(target, onclause)
+    if spec.date_column is not None:
+        if start is not None:
+            stmt = stmt.where(spec.date_column >= _as_datetime(start))
+        if end is not None:
+            stmt = stmt.where(spec.date_column < _as_datetime(end))
+    if ids is not None and spec.id_column is not None:
+        stmt = stmt.where(spec.id_column.in_(list(ids)))
+    for condition in where:
+        stmt = stmt.where(condition)
+    return stmt.order_by(*spec.order_by)
+
+
+def _statements(spec: ExportSpec, start, end, ids: Iterable[int] | None, where) -> list[Select]:
+    """Una consulta, o una por tramo de `IDS_CHUNK` ids si se filtra por muchos ids.
+
+    Con ids el archivo sale ordenado por id y no por `spec.order_by`: cada tramo
+    se ordena por separado, y solo el id mantiene el orden de un tramo al siguiente.
+    """
+    if ids is None:
+        return [build_statement(spec, start=start, end=end, where=where)]
+    ordered = sorted(set(ids))
+    return [
+        build_statement(spec, start=start, end=end, ids=ordered[i:i + IDS_CHUNK], where=where)
+        .order_by(None).order_by(spec.id_column)
+        for i in range(0, len(ordered), IDS_CHUNK)
+    ]
+
+
+def _as_datetime(value: datetime | date) -> datetime:
+    return value if isinstance(value, datetime) else datetime.combine(value, datetime.min.time())
+
+
+def count_rows(session: Session, stmt: Select) -> int:
+    return session.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar() or 0
+
+
+# --- Escritores ----------------------------------------------------------
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+class CsvSink:
+    """CSV UTF-8 con BOM (Excel lo abre con acentos correctos)."""
+
+    def __init__(self, path: Path, headers: list[str], title: str) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(headers)
+
+    def write(self, rows) -> None:
+        self._writer.writerows([["" if v is None else _cell(v) for v in row] for row in rows])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class XlsxSink:
+    """Libro openpyxl en modo write_only: memoria constante sin importar la cantidad de filas."""
+
+    def __init__(self, path: Path, headers: list[str], title: str) -> None:
+        from openpyxl import Workbook
+
+        self._path = path
+        self._headers = headers
+        self._title = title[:28]
+        self._book = Workbook(write_only=True)
+        self._sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        self._sheets += 1
+        name = self._title if self._sheets == 1 else f"{self._title} ({self._sheets})"
+        self._sheet = self._book.create_sheet(name[:31])
+        self._sheet.append(self._headers)
+        self._sheet_rows = 1
+
+    def write(self, rows) -> None:
+        for row in rows:
+            if self._sheet_rows >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self._sheet.append(list(row))
+            self._sheet_rows += 1
+
+    def close(self) -> None:
+        self._book.save(self._path)
+
+
+_SINKS = {"csv": CsvSink, "xlsx": XlsxSink}
+
+
+def format_for(path: Path | str) -> str:
+    fmt = Path(path).suffix.lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {Path(path).suffix or '(sin extensión)'} (use .csv o .xlsx)")
+    return fmt
+
+
+# --- Exportación ---------------------------------------------------------
+
+def export(
+    session_factory: sessionmaker,
+    spec: ExportSpec | str,
+    path: Path | str,
+    *,
+    start: datetime | date | None = None,
+    end: datetime | date | None = None,
+    ids: Iterable[int] | None = None,
+    where: Iterable[ColumnElement[bool]] = (),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: ProgressFn | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> ExportResult:
+    """
+    Escribir en `path` (.csv o .xlsx) las filas de `spec`, por lotes de
+    `batch_size`. `progress(hechas, total)` se llama tras cada lote;
+    si `cancelled()` devuelve True se abandona y se borra el temporal.
+    """
+    if isinstance(spec, str):
+        spec = SPECS[spec]
+    path = Path(path)
+    fmt = format_for(path)
+    started = time.perf_counter()
+    statements = _statements(spec, start, end, ids, tuple(where))
+    tmp = path.with_name(f".{path.name}.part")
+    done = 0
+    sink = None
+    try:
+        with session_factory() as session:
+            total = sum(count_rows(session, stmt) for stmt in statements) if progress else None
+            sink = _SINKS[fmt](tmp, spec.headers, spec.title)
+            if progress:
+                progress(0, total)
+            for stmt in statements:
+                result = session.execute(stmt.execution_options(yield_per=batch_size))
+                for rows in result.partitions():
+                    if cancelled and cancelled():
+                        raise ExportCancelled()
+                    sink.write(rows)
+                    done += len(rows)
+                    if progress:
+                        progress(done, total)
+        sink.close()
+        sink = None
+        os.replace(tmp, path)
+        return ExportResult(path, done, time.perf_counter() - started)
+    except ExportCancelled:
+        return ExportResult(path, done, time.perf_counter() - started, cancelled=True)
+    finally:
+        if sink is not None:
+            try:
+                sink.close()
+            except Exception:
+                pass
+        if tmp.exists():
+            tmp.unlink()
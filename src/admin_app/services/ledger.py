@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Account, Transaction, TransactionCategory
+
+
+DEFAULT_PAGE_SIZE = 200
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerRow:
+    """Fila del libro de movimientos, solo con las columnas que muestran las vistas."""
+    id: int
+    date: datetime
+    description: str
+    transaction_type: str
+    amount: float
+    currency: str
+    account_name: str
+    category_name: str | None
+    related_table: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerPage:
+    """Una página de movimientos más los totales de todo el rango filtrado."""
+    rows: tuple[LedgerRow, ...]
+    offset: int
+    total_count: int
+    # (transaction_type, currency) -> suma de montos
+    totals: dict[tuple[str, str], float] = field(default_factory=dict)
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.rows) < self.total_count
+
+    def total(self, transaction_type: str, currency: str) -> float:
+        return self.totals.get((transaction_type, currency), 0.0)
+
+
+def _apply_filters(stmt, start: datetime | None, end: datetime | None, transaction_type: str | None):
+    # Rango semiabierto [start, end) para que días/meses contiguos no se solapen
+    if start is not None:
+        stmt = stmt.where(Transaction.date >= start)
+    if end is not None:
+        stmt = stmt.where(Transaction.date < end)
+    if transaction_type:
+        stmt = stmt.where(Transaction.transaction_type == transaction_type)
+    return stmt
+
+
+def ledger_totals(
+    session: Session,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    transaction_type: str | None = None,
+) -> tuple[int, dict[tuple[str, str], float]]:
+    """Cantidad de movimientos y SUM agrupado por (tipo, moneda), calculados en la base."""
+    stmt = _apply_filters(
+        select(Transaction.transaction_type, Account.currency, func.count(Transaction.id), func.sum(Transaction.amount))
+        .join(Account, Account.id == Transaction.account_id)
+        .group_by(Transaction.transaction_type, Account.currency),
+        start, end, transaction_type,
+    )
+    count = 0
+    totals: dict[tuple[str, str], float] = {}
+    for t_type, currency, n, total in session.execute(stmt):
+        count += n
+        totals[(t_type, currency)] = float(total or 0.0)
+    return count, totals
+
+
+def query_ledger(
+    session: Session,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    transaction_type: str | None = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    with_totals: bool = True,
+) -> LedgerPage:
+    """Página de movimientos (más recientes primero) sin materializar objetos ORM.
+
+    Con `with_totals=False` no se recalculan los totales (útil al pedir páginas
+    siguientes de un mismo filtro); `total_count` queda en -1.
+    """
+    stmt = _apply_filters(
+        select(
+            Transaction.id, Transaction.date, Transaction.description, Transaction.transaction_type,
+            Transaction.amount, Account.currency, Account.name, TransactionCategory.name, Transaction.related_table,
+        )
+        .join(Account, Account.id == Transaction.account_id)
+        .outerjoin(TransactionCategory, TransactionCategory.id == Transaction.category_id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .offset(offset)
+        .limit(limit),
+        start, end, transaction_type,
+    )
+    rows = tuple(LedgerRow(*r) for r in session.execute(stmt))
+    count, totals = ledger_totals(session, start=start, end=end, transaction_type=transaction_type) if with_totals else (-1, {})
+    return LedgerPage(rows=rows, offset=offset, total_count=count, totals=totals)
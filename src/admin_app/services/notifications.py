@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from ..models import DailyReport, Order
+
+
+# Pedidos que esperan acción de diseño o producción
+NEW_ORDER_STATUSES = ('NUEVO', 'POR_PRODUCIR')
+PENDING_REPORT_STATUS = 'PENDIENTE'
+
+
+@dataclass(frozen=True, slots=True)
+class NotificationCounts:
+    new_orders: int
+    pending_reports: int
+
+    def badges(self, *, include_reports: bool) -> dict[str, int]:
+        """Valor de cada badge de la barra lateral (clave del módulo -> cantidad)."""
+        badges = {'pedidos': self.new_orders}
+        total = self.new_orders
+        if include_reports:
+            badges['reportes_diarios'] = self.pending_reports
+            total += self.pending_reports
+        badges['home'] = total
+        return badges
+
+
+def notification_counts(session: Session, *, include_reports: bool = True) -> NotificationCounts:
+    """Todos los conteos de notificaciones en una sola sentencia (subconsultas escalares)."""
+    orders = (
+        select(func.count(Order.id)).where(Order.status.in_(NEW_ORDER_STATUSES)).scalar_subquery()
+    )
+    reports = (
+        select(func.count(DailyReport.id)).where(DailyReport.report_status == PENDING_REPORT_STATUS).scalar_subquery()
+        if include_reports else literal(0)
+    )
+    new_orders, pending_reports = session.execute(select(orders, reports)).one()
+    return NotificationCounts(int(new_orders or 0), int(pending_reports or 0))
+
+
+def badge_deltas(previous: Mapping[str, int], current: Mapping[str, int]) -> dict[str, int]:
+    """Solo los badges cuyo valor cambió desde el último sondeo."""
+    return {key: value for key, value in current.items() if previous.get(key) != value}
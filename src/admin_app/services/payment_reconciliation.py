@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from sqlalchemy import bindparam, case, delete, func, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
+
+from ..models import Account, SalePayment, Transaction
+
+
+RELATED_TABLE = 'sale_payments'
+# Diferencia mínima entre el monto esperado y el registrado para considerarlo descuadre
+AMOUNT_TOLERANCE = 0.01
+# Cuántos ids de cada tipo se guardan en el reporte; el resto solo se cuenta
+MAX_LISTED = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class AmountMismatch:
+    payment_id: int
+    transaction_id: int
+    account_id: int
+    currency: str
+    expected: float
+    actual: float
+
+
+@dataclass(slots=True)
+class PaymentReconciliation:
+    """Resultado de cruzar sale_payments con sus transacciones.
+
+    - missing: pagos con monto sin transacción.
+    - orphans: transacciones cuyo pago ya no existe.
+    - duplicates: transacciones adicionales para un pago que ya tiene una.
+    - mismatches: transacción cuyo monto no coincide con el del pago.
+    - unlinked: transacciones de pagos sin `related_id`; no se sabe de qué pago
+      son, así que `fix` no las toca y quedan para revisión manual.
+    """
+    payments_scanned: int = 0
+    transactions_scanned: int = 0
+    missing_count: int = 0
+    orphan_count: int = 0
+    duplicate_count: int = 0
+    mismatch_count: int = 0
+    unlinked_count: int = 0
+    undetermined: int = 0  # pagos sin tasa propia: el monto no se puede verificar
+    fixed: int = 0
+    missing: list[int] = field(default_factory=list)
+    orphans: list[int] = field(default_factory=list)
+    duplicates: list[int] = field(default_factory=list)
+    mismatches: list[AmountMismatch] = field(default_factory=list)
+    unlinked: list[int] = field(default_factory=list)
+
+    @property
+    def is_clean(self) -> bool:
+        return not (
+            self.missing_count or self.orphan_count or self.duplicate_count or self.mismatch_count
+            or self.unlinked_count
+        )
+
+
+def expected_amount(amount_usd: float, amount_bs: float, exchange_rate: float, currency: str) -> float | None:
+    """Monto que debería tener la transacción en la moneda de su cuenta (None si depende de otra tasa)."""
+    usd, bs, rate = amount_usd or 0.0, amount_bs or 0.0, exchange_rate or 0.0
+    if currency == 'VES':
+        if bs > 0:
+            return bs
+        return usd * rate if usd > 0 and rate > 0 else None
+    if usd > 0:
+        return usd
+    return bs / rate if bs > 0 and rate > 0 else None
+
+
+def _keyset_stream(session: Session, build: Callable, batch_size: int) -> Iterator:
+    """Recorre una consulta ordenada por lotes de `batch_size` usando la última clave leída."""
+    last = None
+    while True:
+        rows = session.execute(build(last).limit(batch_size)).all()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+
+
+def _payments_page(last):
+    stmt = select(SalePayment.id, SalePayment.amount_usd, SalePayment.amount_bs, SalePayment.exchange_rate).order_by(SalePayment.id)
+    return stmt.where(SalePayment.id > last.id) if last is not None else stmt
+
+
+def _transactions_page(last):
+    stmt = (
+        select(Transaction.id, Transaction.related_id, Transaction.amount, Transaction.account_id, Account.currency)
+        .join(Account, Account.id == Transaction.account_id)
+        .where(Transaction.related_table == RELATED_TABLE, Transaction.related_id.isnot(None))
+        .order_by(Transaction.related_id, Transaction.id)
+    )
+    if last is not None:
+        stmt = stmt.where(tuple_(Transaction.related_id, Transaction.id) > tuple_(last.related_id, last.id))
+    return stmt
+
+
+def _unlinked_page(last):
+    # Sin related_id no entran en el merge-join (NULL no se compara con un id)
+    stmt = (
+        select(Transaction.id)
+        .where(Transaction.related_table == RELATED_TABLE, Transaction.related_id.is_(None))
+        .order_by(Transaction.id)
+    )
+    return stmt.where(Transaction.id > last.id) if last is not None else stmt
+
+
+class _Fixer:
+    """Acumula correcciones y las aplica en bloque cada `batch_size` elementos."""
+
+    def __init__(self, session: Session, batch_size: int):
+        self.session = session
+        self.batch_size = batch_size
+        self.missing: list[int] = []
+        self.remove: list[int] = []
+        self.amounts: list[AmountMismatch] = []
+        self.applied = 0
+
+    def pending(self) -> int:
+        return len(self.missing) + len(self.remove) + len(self.amounts)
+
+    def maybe_flush(self) -> None:
+        if self.pending() >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending():
+            return
+        s = self.session
+        acc = Account.__table__
+        adjust = (
+            update(acc)
+            .where(acc.c.id == bindparam('acc_id'))
+            .values(balance=acc.c.balance + bindparam('delta'))
+        )
+
+        # Pagos cuyas transacciones cambian: las vistas que escuchan el bus deben enterarse
+        touched = {m.payment_id for m in self.amounts}
+        applied = len(self.amounts)
+
+        if self.remove:
+            touched.update(s.scalars(select(Transaction.related_id).where(Transaction.id.in_(self.remove))))
+            # Revertir el efecto en el saldo agrupado por cuenta y borrar de una vez
+            signed = case((Transaction.transaction_type == 'INCOME', Transaction.amount), else_=-Transaction.amount)
+            deltas = s.execute(
+                select(Transaction.account_id, func.sum(signed))
+                .where(Transaction.id.in_(self.remove))
+                .group_by(Transaction.account_id)
+            ).all()
+            if deltas:
+                s.execute(adjust, [{'acc_id': a, 'delta': -float(d or 0.0)} for a, d in deltas])
+            applied += s.execute(delete(Transaction).where(Transaction.id.in_(self.remove))).rowcount
+
+        if self.amounts:
+            txn = Transaction.__table__
+            s.execute(
+                update(txn).where(txn.c.id == bindparam('txn_id')).values(amount=bindparam('new_amount')),
+                [{'txn_id': m.transaction_id, 'new_amount': m.expected} for m in self.amounts],
+            )
+            s.execute(adjust, [{'acc_id': m.account_id, 'delta': m.expected - m.actual} for m in self.amounts])
+
+        if self.missing:
+            # Las transacciones nuevas pasan por el mismo enrutamiento que una venta.
+            # Va al final: las cuentas se cargan (o recargan) después de los UPDATE directos.
+            from ..repository import _sync_payments_to_transactions
+            payments = s.query(SalePayment).options(joinedload(SalePayment.sale)).filter(SalePayment.id.in_(self.missing)).all()
+            by_sale: dict[int, list[SalePayment]] = {}
+            for p in payments:
+                by_sale.setdefault(p.sale_id, []).append(p)
+            for group in by_sale.values():
+                sale = group[0].sale
+                desc = f"{sale.numero_orden} - {sale.articulo}" if sale else ""
+                _sync_payments_to_transactions(s, group, sale_desc=desc)
+            # Sin cuenta o sin monto convertible el pago queda sin transacción: no cuenta como corregido
+            created = set(s.scalars(
+                select(Transaction.related_id)
+                .where(Transaction.related_table == RELATED_TABLE, Transaction.related_id.in_(self.missing))
+            ))
+            touched |= created
+            applied += len(created)
+
+        _record_payment_changes(s, touched)
+        s.commit()
+        # Los saldos se modificaron con UPDATE directo: no confiar en objetos cargados
+        s.expire_all()
+        self.applied += applied
+        self.missing, self.remove, self.amounts = [], [], []
+
+
+def _record_payment_changes(session: Session, payment_ids: set[int]) -> None:
+    # Import diferido: los scripts de conciliación no necesitan Qt hasta que hay algo que avisar
+    from ..events import UPDATED, PaymentChanged, record
+
+    ids = sorted(i for i in payment_ids if i is not None)
+    for start in range(0, len(ids), 900):
+        rows = session.execute(
+            select(SalePayment.id, SalePayment.sale_id).where(SalePayment.id.in_(ids[start:start + 900]))
+        )
+        record(session, *(PaymentChanged(pid, UPDATED, sale_id) for pid, sale_id in rows))
+
+
+def reconcile_payment_transactions(
+    session: Session,
+    *,
+    fix: bool = False,
+    batch_size: int = 5000,
+    tolerance: float = AMOUNT_TOLERANCE,
+    max_listed: int = MAX_LISTED,
+) -> PaymentReconciliation:
+    """Cruza pagos y transacciones con un merge-join sobre ambas tablas ordenadas.
+
+    Ambas consultas se leen por lotes (paginación por clave), así que la memoria
+    queda acotada por `batch_size` y `max_listed`, no por el tamaño de las tablas.
+    Con `fix=True` crea las transacciones faltantes, elimina huérfanas y duplicadas
+    (revirtiendo su efecto en el saldo) y corrige montos, haciendo commit por bloque.
+    """
+    report = PaymentReconciliation()
+    fixer = _Fixer(session, batch_size) if fix else None
+
+    def note(items: list, value) -> None:
+        if len(items) < max_listed:
+            items.append(value)
+
+    payments = _keyset_stream(session, _payments_page, batch_size)
+    txns = _keyset_stream(session, _transactions_page, batch_size)
+    p = next(payments, None)
+    t = next(txns, None)
+
+    while p is not None or t is not None:
+        if t is None or (p is not None and p.id < t.related_id):
+            report.payments_scanned += 1
+            if (p.amount_usd or 0) > 0 or (p.amount_bs or 0) > 0:
+                report.missing_count += 1
+                note(report.missing, p.id)
+                if fixer:
+                    fixer.missing.append(p.id)
+            p = next(payments, None)
+        elif p is None or t.related_id < p.id:
+            report.transactions_scanned += 1
+            report.orphan_count += 1
+            note(report.orphans, t.id)
+            if fixer:
+                fixer.remove.append(t.id)
+            t = next(txns, None)
+        else:
+            report.payments_scanned += 1
+            report.transactions_scanned += 1
+            expected = expected_amount(p.amount_usd, p.amount_bs, p.exchange_rate, t.currency)
+            if expected is None:
+                report.undetermined += 1
+            elif abs(expected - (t.amount or 0.0)) >= tolerance:
+                m = AmountMismatch(p.id, t.id, t.account_id, t.currency, round(expected, 2), float(t.amount or 0.0))
+                report.mismatch_count += 1
+                note(report.mismatches, m)
+                if fixer:
+                    fixer.amounts.append(m)
+            # Cualquier otra transacción del mismo pago sobra
+            t = next(txns, None)
+            while t is not None and t.related_id == p.id:
+                report.transactions_scanned += 1
+                report.duplicate_count += 1
+                note(report.duplicates, t.id)
+                if fixer:
+                    fixer.remove.append(t.id)
+                t = next(txns, None)
+            p = next(payments, None)
+
+        if fixer:
+            fixer.maybe_flush()
+
+    for row in _keyset_stream(session, _unlinked_page, batch_size):
+        report.transactions_scanned += 1
+        report.unlinked_count += 1
+        note(report.unlinked, row.id)
+
+    if fixer:
+        fixer.flush()
+        report.fixed = fixer.applied
+    return report
@@ -0,0 +1,292 @@
+"""
+Copia en streaming de todas las tablas del modelo entre dos bases de datos
+(pensado para SQLite → PostgreSQL), reanudable y en paralelo.
+
+- Las filas se leen por clave primaria ascendente con `stream_results` /
+  `yield_per`, así la memoria depende del tamaño de bloque y no del de la
+  tabla.
+- Contra PostgreSQL con psycopg 3 cada bloque entra con `COPY ... FROM
+  STDIN`; con otros destinos se usa `insert()` por lotes.
+- Las tablas se agrupan por nivel de claves foráneas; las de un mismo nivel
+  son independientes y se copian en conexiones paralelas.
+- Tras confirmar cada bloque se guarda en un archivo de control la última
+  clave copiada de la tabla; al reanudar se continúa desde ahí.
+- Una tabla sin punto de control debe estar vacía en destino: si ya tiene
+  filas (otra migración sin su archivo de control) se falla antes de copiar.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy import JSON, Table, select, text, tuple_
+from sqlalchemy.engine import Engine
+
+from ..models import Base
+
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_JOBS = 4
+
+
+@dataclass(frozen=True, slots=True)
+class TableReport:
+    table: str
+    rows: int
+    seconds: float
+    resumed: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+class Checkpoint:
+    """Archivo JSON con la última clave copiada por tabla (escritura atómica)."""
+
+    def __init__(self, path: Path | str | None) -> None:
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._data: dict[str, dict] = {}
+        if self.path and self.path.exists():
+            self._data = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def get(self, table: str) -> dict | None:
+        with self._lock:
+            entry = self._data.get(table)
+            return dict(entry) if entry else None
+
+    def update(self, table: str, last_pk: Sequence, rows: int, *, done: bool = False) -> None:
+        with self._lock:
+            self._data[table] = {"last_pk": list(last_pk) if last_pk is not None else None, "rows": rows, "done": done}
+            self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data = {}
+            if self.path and self.path.exists():
+                self.path.unlink()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._data, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def fk_levels(tables: Iterable[Table]) -> list[list[Table]]:
+    """Agrupar tablas por profundidad de dependencias (nivel 0: sin claves foráneas hacia el conjunto)."""
+    tables = list(tables)
+    names = {t.name for t in tables}
+    level: dict[str, int] = {}
+
+    def depth(t: Table, visiting: frozenset = frozenset()) -> int:
+        if t.name in level:
+            return level[t.name]
+        parents = {
+            fk.column.table for fk in t.foreign_keys
+            if fk.column.table.name in names and fk.column.table.name != t.name and fk.column.table.name not in visiting
+        }
+        level[t.name] = 1 + max((depth(p, visiting | {t.name}) for p in parents), default=-1)
+        return level[t.name]
+
+    groups: dict[int, list[Table]] = {}
+    for t in tables:
+        groups.setdefault(depth(t), []).append(t)
+    return [groups[k] for k in sorted(groups)]
+
+
+def _pk(table: Table) -> list:
+    return list(table.primary_key.columns) or list(table.columns)
+
+
+def _after(table: Table, last_pk: Sequence | None):
+    stmt = select(table).order_by(*_pk(table))
+    if last_pk:
+        cols = _pk(table)
+        cond = cols[0] > last_pk[0] if len(cols) == 1 else tuple_(*cols) > tuple_(*last_pk)
+        stmt = stmt.where(cond)
+    return stmt
+
+
+def _last_pk_in(engine: Engine, table: Table) -> list | None:
+    cols = _pk(table)
+    with engine.connect() as conn:
+        row = conn.execute(select(*cols).order_by(*(c.desc() for c in cols)).limit(1)).first()
+    return list(row) if row else None
+
+
+def _has_rows(engine: Engine, table: Table) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(select(1).select_from(table).limit(1)).first() is not None
+
+
+def ensure_empty_targets(dst: Engine, tables: Iterable[Table], checkpoint: Checkpoint) -> None:
+    """Fallar si alguna tabla sin punto de control ya tiene filas en destino."""
+    occupied = [t.name for t in tables if not checkpoint.get(t.name) and _has_rows(dst, t)]
+    if occupied:
+        raise RuntimeError(
+            f"El destino ya tiene filas en {', '.join(occupied)} y no hay punto de control para ellas; "
+            "vacíe el destino (--truncate / --restart) o indique el archivo de control de esa migración"
+        )
+
+
+def stream_chunks(engine: Engine, table: Table, last_pk: Sequence | None, chunk_size: int) -> Iterator[list]:
+    """Filas de `table` posteriores a `last_pk`, en bloques de `chunk_size`, sin cargar la tabla entera."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(_after(table, last_pk))
+        for part in result.partitions():
+            yield part
+
+
+class InsertLoader:
+    """Carga genérica con `insert()` por lotes (SQLite u otros motores)."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+
+    def load(self, table: Table, rows: list) -> None:
+        keys = [c.key for c in table.columns]
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), [dict(zip(keys, row)) for row in rows])
+
+    def close(self) -> None:
+        pass
+
+
+class CopyLoader:
+    """Carga con COPY FROM STDIN sobre una conexión psycopg 3 propia del hilo."""
+
+    def __init__(self, engine: Engine) -> None:
+        from psycopg.types.json import Json
+
+        self._json = Json
+        self._raw = engine.raw_connection()
+
+    def load(self, table: Table, rows: list) -> None:
+        cols = list(table.columns)
+        wrap = [isinstance(c.type, JSON) for c in cols]
+        names = ", ".join(f'"{c.name}"' for c in cols)
+        cur = self._raw.cursor()
+        try:
+            with cur.copy(f'COPY "{table.name}" ({names}) FROM STDIN') as copy:
+                for row in rows:
+                    if any(wrap):
+                        row = [self._json(v) if w and v is not None else v for v, w in zip(row, wrap)]
+                    copy.write_row(row)
+            self._raw.commit()
+        except Exception:
+            self._raw.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+def uses_copy(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg"
+
+
+def make_loader(engine: Engine):
+    return CopyLoader(engine) if uses_copy(engine) else InsertLoader(engine)
+
+
+def copy_table(
+    src: Engine,
+    dst: Engine,
+    table: Table,
+    checkpoint: Checkpoint,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Callable[[str, int], None] | None = None,
+) -> TableReport:
+    """Copiar una tabla desde su punto de control; devuelve las filas copiadas en esta ejecución."""
+    state = checkpoint.get(table.name)
+    if state and state.get("done"):
+        return TableReport(table.name, 0, 0.0, resumed=True)
+    if not state:
+        ensure_empty_targets(dst, [table], checkpoint)
+    last_pk = None
+    rows = 0
+    if state:
+        # Lo confirmado en destino manda: un bloque pudo quedar copiado sin llegar a anotarse
+        last_pk = _last_pk_in(dst, table) or state.get("last_pk")
+        rows = state.get("rows", 0)
+    columns = list(table.columns)
+    index = [columns.index(c) for c in _pk(table)]
+
+    started = time.perf_counter()
+    copied = 0
+    loader = make_loader(dst)
+    try:
+        for chunk in stream_chunks(src, table, last_pk, chunk_size):
+            loader.load(table, chunk)
+            copied += len(chunk)
+            last_pk = [chunk[-1][i] for i in index]
+            checkpoint.update(table.name, last_pk, rows + copied)
+            if progress:
+                progress(table.name, rows + copied)
+    finally:
+        loader.close()
+    checkpoint.update(table.name, last_pk, rows + copied, done=True)
+    return TableReport(table.name, copied, time.perf_counter() - started, resumed=state is not None)
+
+
+def reset_sequences(dst: Engine, tables: Iterable[Table]) -> None:
+    """Postgres: dejar cada secuencia de `id` después del máximo copiado."""
+    if dst.dialect.name != "postgresql":
+        return
+    with dst.begin() as conn:
+        for table in tables:
+            if "id" not in table.primary_key.columns.keys():
+                continue
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence(:t, 'id'), COALESCE((SELECT MAX(id) FROM \"{table.name}\"), 1))"
+            ), {"t": table.name})
+
+
+def migrate(
+    src: Engine,
+    dst: Engine,
+    checkpoint: Checkpoint,
+    *,
+    tables: Iterable[Table] | None = None,
+    jobs: int = DEFAULT_JOBS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Callable[[str, int], None] | None = None,
+) -> list[TableReport]:
+    """
+    Copiar `tables` (por defecto, todo el modelo) nivel por nivel de claves
+    foráneas, con hasta `jobs` tablas a la vez. Si una tabla falla, se termina
+    el nivel en curso y se relanza el error sin empezar el siguiente.
+    """
+    tables = list(tables) if tables is not None else list(Base.metadata.sorted_tables)
+    ensure_empty_targets(dst, tables, checkpoint)
+    reports: list[TableReport] = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for level in fk_levels(tables):
+            futures = [
+                pool.submit(copy_table, src, dst, t, checkpoint, chunk_size=chunk_size, progress=progress)
+                for t in level
+            ]
+            errors = []
+            for f in futures:
+                try:
+                    reports.append(f.result())
+                except Exception as ex:
+                    errors.append(ex)
+            if errors:
+                raise errors[0]
+    reset_sequences(dst, tables)
+    return reports
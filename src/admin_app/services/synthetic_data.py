@@ -0,0 +1,404 @@
+"""
+Generador determinista de datos sintéticos a escala de producción.
+
+Con la misma semilla y el mismo `DatasetSpec` produce exactamente las mismas
+filas (ids incluidos), sin importar el tamaño de lote. Inserta con Core
+(`insert()` + executemany por lotes), sin pasar por el ORM ni por los eventos
+de sesión, y funciona igual sobre SQLite o un Postgres local.
+
+Las ventas se generan por bloques; cada bloque inserta en orden de claves
+foráneas sus ventas, ítems, pagos, pedidos, entregas y movimientos contables,
+así la memoria no crece con el volumen total.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .. import payment_methods as pm
+from ..models import (
+    Account, ConfigurableProduct, Customer, Delivery, DeliveryZone, Order, ProductParameterTable,
+    ProductParameterValue, Role, Sale, SaleItem, SalePayment, Transaction, TransactionCategory, User,
+    UserRole, Worker,
+)
+
+
+DEFAULT_SEED = 20250101
+DEFAULT_BATCH_SIZE = 2000
+
+FIRST_NAMES = (
+    "María", "José", "Luis", "Ana", "Carlos", "Carmen", "Jesús", "Rosa", "Pedro", "Luisa",
+    "Miguel", "Andreína", "Rafael", "Gabriela", "Juan", "Daniela", "Jorge", "Valentina",
+)
+LAST_NAMES = (
+    "González", "Rodríguez", "Pérez", "Hernández", "García", "Martínez", "López", "Sánchez",
+    "Ramírez", "Torres", "Flores", "Rivas", "Suárez", "Medina", "Rojas", "Mendoza",
+)
+PRODUCTS = (
+    ("Corpóreo", 180.0), ("Pendón", 35.0), ("Talonario", 22.0), ("Sello", 18.0),
+    ("Vinil Impreso", 28.0), ("Tarjetas de Presentación", 15.0), ("Banner", 45.0), ("Letrero Luminoso", 260.0),
+)
+ZONES = (("Centro", 120.0), ("Norte", 180.0), ("Sur", 150.0), ("Este", 200.0), ("Oeste", 160.0))
+ACCOUNTS = (
+    ("Caja USD", "CASH", "USD"), ("Zelle", "DIGITAL", "USD"), ("Binance", "DIGITAL", "USD"),
+    ("Banco Nacional", "BANK", "VES"), ("Caja Bs", "CASH", "VES"),
+)
+# Mismos nombres que los combos de pago: "Ingresos $" solo suma los que no son en Bs
+ACCOUNT_FOR_METHOD = {
+    pm.EFECTIVO_USD: "Caja USD", pm.ZELLE: "Zelle", pm.BINANCE: "Binance",
+    pm.EFECTIVO_BS: "Caja Bs", pm.PAGO_MOVIL: "Banco Nacional", pm.TRANSFERENCIA_BS: "Banco Nacional",
+    pm.PUNTO_DE_VENTA: "Banco Nacional",
+}
+PAYMENT_METHODS = tuple((m, "VES" if pm.is_bs_method(m) else "USD") for m in ACCOUNT_FOR_METHOD)
+CATEGORIES = (("Ventas", "INCOME"), ("Delivery", "EXPENSE"), ("Nómina", "EXPENSE"))
+ROLES = ("VENDEDOR", "DISEÑADOR", "PRODUCCION", "DELIVERY")
+# Estados de pedido para ventas recientes (las antiguas quedan casi todas entregadas)
+OPEN_ORDER_STATUSES = ("NUEVO", "DISEÑO", "POR_PRODUCIR", "EN_PRODUCCION", "LISTO")
+
+
+@dataclass(frozen=True, slots=True)
+class DatasetSpec:
+    """Volúmenes del conjunto de datos; las tablas hijas salen de proporciones fijas."""
+    sales: int = 10_000
+    customers: int = 2_000
+    sellers: int = 8
+    designers: int = 3
+    producers: int = 2
+    riders: int = 4
+    workers: int = 25
+    parameter_tables: int = 6
+    parameter_rows: int = 250
+    days: int = 365
+    end: datetime = datetime(2025, 12, 31)
+    seed: int = DEFAULT_SEED
+    delivery_ratio: float = 0.3  # fracción de pedidos con entrega
+
+    @classmethod
+    def scaled(cls, sales: int, **overrides) -> "DatasetSpec":
+        """Spec con clientes y tablas de parámetros proporcionales a `sales`."""
+        base = cls(
+            sales=sales,
+            customers=max(50, sales // 5),
+            workers=max(10, min(500, sales // 2_000)),
+            parameter_rows=max(50, min(20_000, sales // 20)),
+        )
+        return replace(base, **overrides)
+
+
+@dataclass(slots=True)
+class _Context:
+    """Ids de referencia ya insertados y siguiente id libre por tabla."""
+    next_id: dict[str, int]
+    sellers: list[str]
+    designer_ids: list[int]
+    rider_ids: list[int]
+    zones: list[tuple[int, float]]
+    account_ids: dict[str, int]
+    category_ids: dict[str, int]
+
+    def take(self, table: str) -> int:
+        ident = self.next_id[table]
+        self.next_id[table] = ident + 1
+        return ident
+
+
+def _next_id(conn: Connection, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert(conn: Connection, model, rows: list[dict], batch_size: int) -> int:
+    for start in range(0, len(rows), batch_size):
+        conn.execute(model.__table__.insert(), rows[start:start + batch_size])
+    return len(rows)
+
+
+def _get_or_create(conn: Connection, model, key: str, values: dict) -> int:
+    table = model.__table__
+    found = conn.execute(select(table.c.id).where(table.c[key] == values[key])).scalar()
+    if found is not None:
+        return found
+    return conn.execute(table.insert().values(**values).returning(table.c.id)).scalar_one()
+
+
+def _person(rng: random.Random) -> tuple[str, str]:
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def _reference_data(conn: Connection, spec: DatasetSpec, rng: random.Random, created: datetime, counts: dict) -> _Context:
+    """Usuarios con roles, zonas, cuentas, categorías, trabajadores y tablas de parámetros."""
+    role_ids = {name: _get_or_create(conn, Role, "name", {"name": name, "created_at": created}) for name in ROLES}
+
+    users, user_roles = [], []
+    next_user = _next_id(conn, User)
+    by_role: dict[str, list[tuple[int, str]]] = {}
+    for role, count in (("VENDEDOR", spec.sellers), ("DISEÑADOR", spec.designers),
+                        ("PRODUCCION", spec.producers), ("DELIVERY", spec.riders)):
+        for n in range(count):
+            first, last = _person(rng)
+            username = f"{role.lower()}{n + 1:02d}_{next_user}"
+            users.append({
+                "id": next_user, "username": username, "full_name": f"{first} {last}",
+                # Hash inválido a propósito: los usuarios sintéticos no pueden iniciar sesión
+                "password_hash": "!synthetic", "is_active": True,
+                "monthly_goal": float(rng.choice((0, 5000, 8000, 12000))), "created_at": created,
+            })
+            user_roles.append({"user_id": next_user, "role_id": role_ids[role], "created_at": created})
+            by_role.setdefault(role, []).append((next_user, username))
+            next_user += 1
+    counts["users"] = _insert(conn, User, users, DEFAULT_BATCH_SIZE)
+    _insert(conn, UserRole, user_roles, DEFAULT_BATCH_SIZE)
+
+    zones = []
+    for name, price in ZONES:
+        zone_id = _get_or_create(conn, DeliveryZone, "name", {"name": name, "price": price, "created_at": created})
+        zones.append((zone_id, price))
+    account_ids = {
+        name: _get_or_create(conn, Account, "name", {
+            "name": name, "type": kind, "currency": currency, "balance": 0.0, "is_active": True, "created_at": created,
+        })
+        for name, kind, currency in ACCOUNTS
+    }
+    category_ids = {
+        name: _get_or_create(conn, TransactionCategory, "name", {"name": name, "type": kind, "is_active": True})
+        for name, kind in CATEGORIES
+    }
+
+    workers = []
+    for _ in range(spec.workers):
+        first, last = _person(rng)
+        workers.append({
+            "full_name": f"{first} {last}", "first_name": first, "last_name": last,
+            # Claves Core = nombres de columna heredados (rol, salario, fecha_ingreso)
+            "cedula": f"V-{rng.randint(5_000_000, 32_000_000)}", "rol": rng.choice(("Diseño", "Producción", "Ventas", "Instalación")),
+            "salario": round(rng.uniform(150, 600), 2), "commission_pct": rng.choice((0.0, 1.0, 2.5)),
+            "payment_frequency": rng.choice(("QUINCENAL", "SEMANAL")), "is_active": True,
+            "fecha_ingreso": created - timedelta(days=rng.randint(30, 2000)), "created_at": created, "updated_at": created,
+        })
+    counts["workers"] = _insert(conn, Worker, workers, DEFAULT_BATCH_SIZE)
+
+    # Tablas de parámetros con filas JSON (como las que arma el editor de productos)
+    owner = users[0]["id"] if users else 1
+    next_product = _next_id(conn, ConfigurableProduct)
+    next_table = _next_id(conn, ProductParameterTable)
+    products, tables, values = [], [], []
+    for n in range(spec.parameter_tables):
+        product_id, table_id = next_product + n, next_table + n
+        products.append({
+            "id": product_id, "name": f"Producto sintético {product_id}", "is_active": True,
+            "created_by": owner, "created_at": created, "updated_at": created,
+        })
+        schema = [
+            {"name": "material", "type": "text"}, {"name": "ancho_cm", "type": "number"},
+            {"name": "alto_cm", "type": "number"}, {"name": "precio", "type": "money"},
+        ]
+        tables.append({
+            "id": table_id, "product_id": product_id, "table_name": f"param_synth_{table_id}",
+            "display_name": f"Parámetros {product_id}", "schema_json": json.dumps(schema),
+            "has_auto_id": True, "is_active": True, "created_at": created, "updated_at": created,
+        })
+        for _ in range(spec.parameter_rows):
+            values.append({
+                "parameter_table_id": table_id, "is_active": True, "created_at": created, "updated_at": created,
+                "row_data_json": json.dumps({
+                    "material": rng.choice(("Acrílico", "PVC", "Aluminio", "MDF", "Lona")),
+                    "ancho_cm": rng.randint(10, 400), "alto_cm": rng.randint(10, 300),
+                    "precio": round(rng.uniform(5, 500), 2),
+                }, ensure_ascii=False),
+            })
+    _insert(conn, ConfigurableProduct, products, DEFAULT_BATCH_SIZE)
+    _insert(conn, ProductParameterTable, tables, DEFAULT_BATCH_SIZE)
+    counts["product_parameter_values"] = _insert(conn, ProductParameterValue, values, DEFAULT_BATCH_SIZE)
+
+    return _Context(
+        next_id={
+            name: _next_id(conn, model)
+            for name, model in (("sales", Sale), ("sale_items", SaleItem), ("sale_payments", SalePayment),
+                                ("orders", Order), ("deliveries", Delivery), ("transactions", Transaction))
+        },
+        sellers=[u for _, u in by_role.get("VENDEDOR", [])] or ["admin"],
+        designer_ids=[i for i, _ in by_role.get("DISEÑADOR", [])],
+        rider_ids=[i for i, _ in by_role.get("DELIVERY", [])],
+        zones=zones,
+        account_ids=account_ids,
+        category_ids=category_ids,
+    )
+
+
+def _customers(spec: DatasetSpec, rng: random.Random, start: datetime) -> Iterator[dict]:
+    span = int((spec.end - start).total_seconds())
+    for n in range(spec.customers):
+        first, last = _person(rng)
+        yield {
+            "name": f"{first} {last}", "first_name": first, "last_name": last,
+            "document": f"V-{rng.randint(3_000_000, 32_000_000)}",
+            "short_address": f"Calle {rng.randint(1, 120)}, {rng.choice(ZONES)[0]}",
+            "phone": f"0414-{rng.randint(1_000_000, 9_999_999)}",
+            "email": f"cliente{n}@example.com" if rng.random() < 0.6 else None,
+            "created_at": start + timedelta(seconds=rng.randrange(span)),
+        }
+
+
+def _sale_rows(ctx: _Context, spec: DatasetSpec, rng: random.Random, start: datetime, customer_ids: range, out: dict) -> None:
+    """Una venta con sus ítems, pagos, pedido, entrega y movimientos; agrega filas a `out`."""
+    span = int((spec.end - start).total_seconds())
+    fecha = start + timedelta(seconds=rng.randrange(span))
+    sale_id = ctx.take("sales")
+    rate = round(36.0 + (fecha - start).days * 0.08, 2)  # tasa BCV creciendo en el año
+
+    items, total = [], 0.0
+    for _ in range(rng.choices((1, 2, 3, 4), weights=(55, 25, 15, 5))[0]):
+        product, base_price = rng.choice(PRODUCTS)
+        qty = float(rng.choice((1, 1, 1, 2, 5, 10)))
+        unit = round(base_price * rng.uniform(0.8, 1.5), 2)
+        items.append((product, qty, unit))
+        total += qty * unit
+    total = round(total, 2)
+
+    customer_id = rng.choice(customer_ids) if customer_ids else None
+    first, last = _person(rng)
+    asesor = rng.choice(ctx.sellers)
+    paid_fraction = 1.0 if rng.random() < 0.8 else rng.choice((0.5, 0.7))
+    abono = round(total * paid_fraction, 2)
+    out["sales"].append({
+        "id": sale_id, "fecha": fecha, "numero_orden": f"ORD-{fecha.year}-{sale_id:07d}",
+        "articulo": items[0][0], "asesor": asesor, "venta_usd": total,
+        "cliente": f"{first} {last}", "cliente_id": customer_id,
+        "cantidad": items[0][1], "precio_unitario": items[0][2], "tasa_bcv": rate,
+        "total_bs": round(total * rate, 2), "abono_usd": abono, "restante": round(total - abono, 2),
+        "delivery_usd": 0.0, "commission_paid": fecha < spec.end - timedelta(days=30),
+        "descripcion": ", ".join(p for p, _, _ in items),
+        "details_json": json.dumps({"items": len(items), "origen": "sintetico"}),
+        "created_at": fecha,
+    })
+    for product, qty, unit in items:
+        out["sale_items"].append({
+            "id": ctx.take("sale_items"), "sale_id": sale_id, "product_name": product,
+            "quantity": qty, "unit_price": unit, "total_price": round(qty * unit, 2),
+            "details_json": json.dumps({"acabado": rng.choice(("mate", "brillante"))}),
+        })
+
+    # Pagos: uno o dos abonos que suman lo pagado, cada uno con su movimiento contable
+    parts = (abono,) if rng.random() < 0.7 else (round(abono * 0.5, 2), round(abono - round(abono * 0.5, 2), 2))
+    for n, amount in enumerate(parts):
+        method, currency = rng.choice(PAYMENT_METHODS)
+        paid_at = fecha + timedelta(days=n * rng.randint(1, 10), minutes=rng.randint(0, 600))
+        payment_id = ctx.take("sale_payments")
+        amount_bs = round(amount * rate, 2) if currency == "VES" else 0.0
+        out["sale_payments"].append({
+            "id": payment_id, "sale_id": sale_id, "payment_method": method, "amount_usd": amount,
+            "amount_bs": amount_bs, "exchange_rate": rate if currency == "VES" else 0.0,
+            "reference": f"{rng.randint(100000, 999999)}" if currency == "VES" else None,
+            "payment_date": paid_at,
+        })
+        out["transactions"].append({
+            "id": ctx.take("transactions"), "date": paid_at,
+            "amount": amount_bs if currency == "VES" else amount, "transaction_type": "INCOME",
+            "description": f"Pago venta ORD-{fecha.year}-{sale_id:07d}",
+            "account_id": ctx.account_ids[ACCOUNT_FOR_METHOD[method]], "category_id": ctx.category_ids["Ventas"],
+            "related_table": "sale_payments", "related_id": payment_id,
+        })
+
+    # Pedido: las ventas viejas quedan entregadas; las recientes, repartidas en la cola
+    age_days = (spec.end - fecha).days
+    if age_days > 21 or rng.random() < 0.3:
+        status = "ENTREGADO"
+    else:
+        status = rng.choice(OPEN_ORDER_STATUSES)
+    order_id = ctx.take("orders")
+    out["orders"].append({
+        "id": order_id, "sale_id": sale_id, "order_number": f"ORD-{fecha.year}-{sale_id:07d}",
+        "product_name": items[0][0], "status": status,
+        "designer_id": rng.choice(ctx.designer_ids) if ctx.designer_ids else None,
+        "details_json": json.dumps({
+            "items": [
+                {"product_name": p, "cantidad": q, "precio_unitario": u, "subtotal_usd": round(q * u, 2)}
+                for p, q, u in items
+            ],
+            "urgente": rng.random() < 0.1,
+        }, ensure_ascii=False),
+        "created_at": fecha, "delivered_at": fecha + timedelta(days=rng.randint(2, 10)) if status == "ENTREGADO" else None,
+        "delivery_method": None,
+    })
+    if rng.random() < spec.delivery_ratio and status in ("LISTO", "ENTREGADO"):
+        zone_id, zone_price = rng.choice(ctx.zones)
+        out["orders"][-1]["delivery_method"] = "DELIVERY"
+        out["deliveries"].append({
+            "id": ctx.take("deliveries"), "order_id": order_id, "zone_id": zone_id,
+            "delivery_user_id": rng.choice(ctx.rider_ids) if ctx.rider_ids else None,
+            "sent_at": fecha + timedelta(days=rng.randint(1, 8)),
+            "status": "ENTREGADO" if status == "ENTREGADO" else "PENDIENTE",
+            "payment_source": rng.choice(("EMPRESA", "EMPRESA", "CLIENTE")),
+            "amount_bs": zone_price, "notes": None, "payment_id": None,
+        })
+
+
+# Orden de inserción de cada bloque de ventas (respeta las claves foráneas)
+_SALE_TABLES = (
+    ("sales", Sale), ("sale_items", SaleItem), ("sale_payments", SalePayment),
+    ("orders", Order), ("deliveries", Delivery), ("transactions", Transaction),
+)
+
+
+def _reset_sequences(conn: Connection) -> None:
+    # Se insertaron ids explícitos: en Postgres hay que adelantar las secuencias
+    if conn.dialect.name != "postgresql":
+        return
+    for model in (User, Customer, Worker, ConfigurableProduct, ProductParameterTable, ProductParameterValue,
+                  *(m for _, m in _SALE_TABLES)):
+        table = model.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+
+def generate_dataset(
+    engine: Engine,
+    spec: DatasetSpec = DatasetSpec(),
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[int, int], None] | None = None,
+) -> dict[str, int]:
+    """
+    Insertar el conjunto de datos descrito por `spec` y devolver cuántas filas
+    se crearon por tabla. Las tablas deben existir (create_all o migraciones).
+    `progress(ventas_hechas, total)` se llama tras cada bloque.
+    """
+    rng = random.Random(spec.seed)
+    start = spec.end - timedelta(days=spec.days)
+    counts: dict[str, int] = {name: 0 for name, _ in _SALE_TABLES}
+
+    with engine.begin() as conn:
+        ctx = _reference_data(conn, spec, rng, start, counts)
+
+        first_customer = _next_id(conn, Customer)
+        customers = list(_customers(spec, rng, start))
+        for offset, row in enumerate(customers):
+            row["id"] = first_customer + offset
+        counts["customers"] = _insert(conn, Customer, customers, batch_size)
+        customer_ids = range(first_customer, first_customer + len(customers))
+        del customers
+
+    done = 0
+    while done < spec.sales:
+        chunk = min(batch_size, spec.sales - done)
+        out: dict[str, list[dict]] = {name: [] for name, _ in _SALE_TABLES}
+        for _ in range(chunk):
+            _sale_rows(ctx, spec, rng, start, customer_ids, out)
+        with engine.begin() as conn:
+            for name, model in _SALE_TABLES:
+                counts[name] += _insert(conn, model, out[name], batch_size)
+        done += chunk
+        if progress is not None:
+            progress(done, spec.sales)
+
+    with engine.begin() as conn:
+        _reset_sequences(conn)
+    return counts
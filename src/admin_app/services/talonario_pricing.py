@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import weakref
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import ProductParameterTable, ProductParameterValue
+
+
+log = logging.getLogger(__name__)
+
+# Nombres (display_name en minúsculas) de las tablas de parámetros del talonario
+PRICE_TABLE = "talonario"
+QUANTITY_TABLE = "cantidad"
+
+
+@dataclass(frozen=True, slots=True)
+class PriceTiers:
+    """Escalones de precio para una combinación (papel, tamaño).
+
+    `quantities` está ordenado de forma ascendente y `prices[i]` es el precio
+    del paquete de `quantities[i]` unidades.
+    """
+    quantities: tuple[int, ...]
+    prices: tuple[float, ...]
+
+    def price_for(self, qty: int) -> float:
+        """Precio de `qty` unidades armando paquetes de mayor a menor.
+
+        Cada paso ubica por bisección el escalón más grande que cabe en lo que
+        falta, así que solo se visitan los escalones realmente usados. Si queda
+        un remanente menor al escalón mínimo se cobra proporcional a ese escalón.
+        """
+        if qty <= 0 or not self.quantities:
+            return 0.0
+        remaining = int(qty)
+        hi = len(self.quantities)
+        total = 0.0
+        while remaining > 0:
+            idx = bisect_right(self.quantities, remaining, 0, hi) - 1
+            if idx < 0:
+                total += remaining * (self.prices[0] / self.quantities[0])
+                break
+            q = self.quantities[idx]
+            total += (remaining // q) * self.prices[idx]
+            remaining %= q
+            hi = idx
+        return total
+
+
+@dataclass(frozen=True, slots=True)
+class TalonarioPriceMatrix:
+    """Matriz de precios de talonarios indexada por (id_papel, id_tamaño)."""
+    tiers: dict[tuple[int, int], PriceTiers] = field(default_factory=dict)
+    version: tuple = ()
+
+    def price_for(self, paper_id: Any, size_id: Any, qty: int) -> float:
+        try:
+            key = (int(paper_id), int(size_id))
+        except (TypeError, ValueError):
+            return 0.0
+        tiers = self.tiers.get(key)
+        return tiers.price_for(qty) if tiers is not None else 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.tiers)
+
+
+def _find_key(row: dict, *candidates: str, contains: tuple[str, ...] = ()) -> str | None:
+    for c in candidates:
+        if c in row:
+            return c
+    for k in row:
+        if any(part in k for part in contains):
+            return k
+    return None
+
+
+def _as_int(value: Any) -> int | None:
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _price_keys(data: dict) -> tuple[str | None, ...]:
+    return (
+        _find_key(data, 'id_cantidad', contains=('cantidad',)),
+        _find_key(data, 'id_tipo_de_papel', contains=('papel',)),
+        _find_key(data, 'id_tamaño', 'id_tamano', contains=('tamaño', 'tamano')),
+        _find_key(data, 'precio', 'Precio', 'price', contains=('precio',)),
+    )
+
+
+def build_price_matrix(quantity_rows: list[tuple[int, dict]], price_rows: list[tuple[int, dict]], version: tuple = ()) -> TalonarioPriceMatrix:
+    """Construye la matriz a partir de filas (id, row_data) ya decodificadas.
+
+    Los nombres de columna (`id_tamaño`/`tamano`, etc.) se resuelven una vez por
+    cada juego de columnas distinto, no en cada fila. Las filas a las que les
+    falta alguna columna se omiten y se registran en el log.
+    """
+    qty_by_id: dict[int, int] = {}
+    qty_keys: dict[frozenset, str | None] = {}
+    for rid, data in quantity_rows:
+        shape = frozenset(data)
+        if shape not in qty_keys:
+            qty_keys[shape] = _find_key(data, 'cantidad', contains=('cantidad',))
+        qty_key = qty_keys[shape]
+        qty = _as_int(data.get(qty_key)) if qty_key else None
+        if qty:
+            qty_by_id[int(rid)] = qty
+
+    buckets: dict[tuple[int, int], dict[int, float]] = {}
+    price_keys: dict[frozenset, tuple[str | None, ...]] = {}
+    skipped: list[int] = []
+    for rid, data in price_rows:
+        shape = frozenset(data)
+        if shape not in price_keys:
+            price_keys[shape] = _price_keys(data)
+        k_qty, k_papel, k_tam, k_precio = price_keys[shape]
+        if not (k_qty and k_papel and k_tam and k_precio):
+            skipped.append(rid)
+            continue
+        qty = qty_by_id.get(_as_int(data.get(k_qty)) or 0)
+        papel = _as_int(data.get(k_papel))
+        tam = _as_int(data.get(k_tam))
+        precio = _as_float(data.get(k_precio))
+        if qty and papel and tam and precio is not None:
+            buckets.setdefault((papel, tam), {})[qty] = precio
+    if skipped:
+        log.warning(
+            "Talonario: %d filas de precio sin cantidad/papel/tamaño/precio omitidas (ids %s)",
+            len(skipped), skipped[:20],
+        )
+
+    tiers = {}
+    for key, by_qty in buckets.items():
+        qtys = tuple(sorted(by_qty))
+        tiers[key] = PriceTiers(quantities=qtys, prices=tuple(by_qty[q] for q in qtys))
+    return TalonarioPriceMatrix(tiers=tiers, version=version)
+
+
+# --- Caché por proceso: una matriz por engine y producto, reconstruida solo
+# cuando cambia la versión de las tablas (cantidad de filas y última edición).
+
+_cache: "weakref.WeakKeyDictionary[object, dict[int, TalonarioPriceMatrix]]" = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+
+
+def _table_ids(session: Session, product_id: int) -> dict[str, int]:
+    rows = session.execute(
+        select(ProductParameterTable.id, ProductParameterTable.display_name)
+        .where(ProductParameterTable.product_id == product_id)
+    ).all()
+    return {(name or '').lower().strip(): tid for tid, name in rows}
+
+
+def _tables_version(session: Session, table_ids: list[int]) -> tuple:
+    count, last_update, last_id = session.execute(
+        select(
+            func.count(ProductParameterValue.id),
+            func.max(ProductParameterValue.updated_at),
+            func.max(ProductParameterValue.id),
+        ).where(ProductParameterValue.parameter_table_id.in_(table_ids))
+        .where(ProductParameterValue.is_active == True)
+    ).one()
+    return (tuple(table_ids), count, str(last_update), last_id)
+
+
+def _load_rows(session: Session, table_id: int) -> list[tuple[int, dict]]:
+    out = []
+    rows = session.execute(
+        select(ProductParameterValue.id, ProductParameterValue.row_data_json)
+        .where(ProductParameterValue.parameter_table_id == table_id)
+        .where(ProductParameterValue.is_active == True)
+        .order_by(ProductParameterValue.id)
+    )
+    for rid, raw in rows:
+        try:
+            data = json.loads(raw or '{}')
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            out.append((rid, data))
+    return out
+
+
+def get_talonario_price_matrix(session: Session, product_id: int) -> TalonarioPriceMatrix:
+    """Matriz de precios del producto configurable de talonarios (con caché)."""
+    tables = _table_ids(session, product_id)
+    tid_precio = tables.get(PRICE_TABLE)
+    tid_cantidad = tables.get(QUANTITY_TABLE)
+    if not tid_precio or not tid_cantidad:
+        return TalonarioPriceMatrix()
+
+    version = _tables_version(session, [tid_cantidad, tid_precio])
+    bind = session.get_bind()
+    engine = getattr(bind, 'engine', bind)
+    with _cache_lock:
+        cached = _cache.get(engine, {}).get(product_id)
+    if cached is not None and cached.version == version:
+        return cached
+
+    matrix = build_price_matrix(_load_rows(session, tid_cantidad), _load_rows(session, tid_precio), version)
+    with _cache_lock:
+        _cache.setdefault(engine, {})[product_id] = matrix
+    return matrix
@@ -0,0 +1,276 @@
+"""
+Instrumentación de las sentencias SQL que la app envía a la base de datos.
+
+Se activa con ADMIN_APP_SQL_STATS=1 (lo engancha `db.make_engine`). Por cada
+forma de sentencia (el SQL con literales y listas IN normalizados) acumula
+ejecuciones, tiempo total, p95 y filas informadas por el driver. Además:
+
+- N+1: si una misma forma se ejecuta más de ADMIN_APP_SQL_N_PLUS_ONE veces
+  (10 por defecto) dentro de una sesión, se registra un hallazgo con la
+  función de la app que la disparó.
+- Consultas lentas: las que superan ADMIN_APP_SLOW_QUERY_MS (200 por
+  defecto) se escriben en `slow_queries.log` de la carpeta de datos, o en
+  la ruta de ADMIN_APP_SLOW_QUERY_LOG. De los parámetros solo se anotan
+  cantidad y tipos (pueden llevar datos de clientes); los valores se
+  incluyen solo con ADMIN_APP_SLOW_QUERY_PARAMS=1.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+DEFAULT_N_PLUS_ONE = 10
+DEFAULT_SLOW_MS = 200.0
+# Muestras recientes por forma para el p95 (memoria acotada en sesiones largas)
+LATENCY_SAMPLES = 1000
+
+_START_KEY = "_sql_stats_start"
+_SCOPE_KEY = "_sql_stats_scope"
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# Marcadores de los demás drivers (%(name)s, %s, :name, $1) -> ?; `::tipo` no es marcador
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_RE = re.compile(r"(\([^()]*\))(?:\s*,\s*\(\s*[^()]*\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+slow_log = logging.getLogger("admin_app.sql.slow")
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, "0").lower() in ("1", "true", "yes")
+
+
+def enabled() -> bool:
+    return _flag("ADMIN_APP_SQL_STATS")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    """SQL sin literales y con listas IN / VALUES múltiples colapsadas."""
+    shape = _STRING_RE.sub("?", statement)
+    shape = _PLACEHOLDER_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(?, ...)", shape)
+    shape = _VALUES_RE.sub(r"\1, ...", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+def _caller() -> str:
+    """Primera función de la app (fuera de SQLAlchemy y de este módulo) en la pila."""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith("sqlalchemy") and module != __name__:
+            name = f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+            if "admin_app" in module:
+                return name
+            if fallback is None:
+                fallback = f"{name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return fallback or "?"
+
+
+def _describe_parameters(parameters) -> str:
+    """Cantidad y tipos de los parámetros, sin sus valores."""
+    if parameters is None:
+        return "sin parámetros"
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f"{len(parameters)} filas de {_describe_parameters(parameters[0])}"
+    if isinstance(parameters, dict):
+        types = ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items())
+    else:
+        types = ", ".join(type(v).__name__ for v in parameters)
+    return f"{len(parameters)} parámetros ({types})"
+
+
+@dataclass(slots=True)
+class StatementStat:
+    shape: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    samples: deque = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    @property
+    def p95_ms(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(0, -(-len(ordered) * 95 // 100) - 1)]
+
+
+@dataclass(frozen=True, slots=True)
+class StatementSummary:
+    shape: str
+    count: int
+    total_ms: float
+    p95_ms: float
+    max_ms: float
+    rows: int
+
+
+@dataclass(frozen=True, slots=True)
+class NPlusOne:
+    shape: str
+    count: int
+    caller: str
+
+
+class _Scope:
+    """Conteo por forma dentro de una sesión ORM."""
+
+    __slots__ = ("counts", "reported", "__weakref__")
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.reported: dict[str, str] = {}
+
+
+class SqlStats:
+    """Agregado global (compartido entre engines e hilos) de las sentencias medidas."""
+
+    def __init__(self, n_plus_one: int = DEFAULT_N_PLUS_ONE, slow_ms: float = DEFAULT_SLOW_MS) -> None:
+        self.n_plus_one = n_plus_one
+        self.slow_ms = slow_ms
+        self.slow_log_path: Path | None = None
+        self.log_parameter_values = False
+        self._lock = threading.Lock()
+        self._stats: dict[str, StatementStat] = {}
+        self._findings: dict[tuple[str, str], int] = {}
+
+    def record(self, statement: str, elapsed_ms: float, rows: int, scope: _Scope | None, parameters=None) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            stat = self._stats.get(shape)
+            if stat is None:
+                stat = self._stats[shape] = StatementStat(shape)
+            stat.count += 1
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            stat.samples.append(elapsed_ms)
+            if rows > 0:
+                stat.rows += rows
+            if scope is not None:
+                seen = scope.counts[shape] = scope.counts.get(shape, 0) + 1
+                if seen > self.n_plus_one:
+                    caller = scope.reported.get(shape)
+                    if caller is None:
+                        # Solo se recorre la pila al cruzar el umbral
+                        caller = scope.reported[shape] = _caller()
+                    key = (shape, caller)
+                    self._findings[key] = max(self._findings.get(key, 0), seen)
+        if elapsed_ms >= self.slow_ms and slow_log.handlers:
+            params = repr(parameters) if self.log_parameter_values else _describe_parameters(parameters)
+            slow_log.warning("%.1f ms | %s | %s | %s", elapsed_ms, _caller(), _SPACE_RE.sub(" ", statement), params)
+
+    def summary(self) -> list[StatementSummary]:
+        """Formas ordenadas por tiempo total descendente."""
+        with self._lock:
+            rows = [
+                StatementSummary(s.shape, s.count, round(s.total_ms, 3), round(s.p95_ms, 3), round(s.max_ms, 3), s.rows)
+                for s in self._stats.values()
+            ]
+        return sorted(rows, key=lambda r: (-r.total_ms, r.shape))
+
+    def n_plus_one_findings(self) -> list[NPlusOne]:
+        with self._lock:
+            found = [NPlusOne(shape, count, caller) for (shape, caller), count in self._findings.items()]
+        return sorted(found, key=lambda f: (-f.count, f.caller))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._findings.clear()
+
+
+STATS = SqlStats()
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def _on_before(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _on_after(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    rows = getattr(cursor, "rowcount", -1)
+    STATS.record(statement, elapsed_ms, rows if isinstance(rows, int) else -1, conn.info.get(_SCOPE_KEY), parameters)
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    # La conexión vuelve al pool: deja de pertenecer a la sesión
+    connection_record.info.pop(_SCOPE_KEY, None)
+    connection_record.info.pop(_START_KEY, None)
+
+
+def _on_session_begin(session: Session, transaction, connection) -> None:
+    if connection.engine in _instrumented:
+        scope = session.info.get(_SCOPE_KEY)
+        if scope is None:
+            scope = session.info[_SCOPE_KEY] = _Scope()
+        connection.info[_SCOPE_KEY] = scope
+
+
+def _configure_slow_log() -> None:
+    if slow_log.handlers:
+        return
+    path = os.getenv("ADMIN_APP_SLOW_QUERY_LOG")
+    if path:
+        target = Path(path).expanduser()
+    else:
+        from .db import get_data_dir
+        target = get_data_dir() / "slow_queries.log"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    handler = logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_log.addHandler(handler)
+    slow_log.setLevel(logging.WARNING)
+    slow_log.propagate = False
+    STATS.slow_log_path = target
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Enganchar la medición al engine (idempotente) y configurar umbrales desde el entorno."""
+    if engine in _instrumented:
+        return engine
+    STATS.n_plus_one = int(os.getenv("ADMIN_APP_SQL_N_PLUS_ONE", DEFAULT_N_PLUS_ONE))
+    STATS.slow_ms = float(os.getenv("ADMIN_APP_SLOW_QUERY_MS", DEFAULT_SLOW_MS))
+    STATS.log_parameter_values = _flag("ADMIN_APP_SLOW_QUERY_PARAMS")
+    try:
+        _configure_slow_log()
+    except OSError:
+        # Sin carpeta escribible se mide igual, solo sin archivo de lentas
+        pass
+    event.listen(engine, "before_cursor_execute", _on_before)
+    event.listen(engine, "after_cursor_execute", _on_after)
+    event.listen(engine.pool, "checkin", _on_checkin)
+    if not event.contains(Session, "after_begin", _on_session_begin):
+        event.listen(Session, "after_begin", _on_session_begin)
+    _instrumented.add(engine)
+    return engine
+
+
+def is_instrumented(engine: Engine) -> bool:
+    return engine in _instrumented
@@ -4,19 +4,94 @@ from PySide6.QtWidgets import (
     QDialog, QFormLayout, QMessageBox, QTabWidget, QGroupBox, QDoubleSpinBox,
     QFrame
 )
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex
 from PySide6.QtGui import QColor, QFont
 from datetime import datetime
 
 from ..models import Account, Transaction, TransactionCategory, Worker, AccountsPayable, Supplier
+from ..services.ledger import DEFAULT_PAGE_SIZE, LedgerPage, LedgerRow, query_ledger
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, 
     QTableWidgetItem, QHeaderView, QDateEdit, QComboBox, QLineEdit, 
     QDialog, QFormLayout, QMessageBox, QTabWidget, QGroupBox, QDoubleSpinBox,
-    QFrame, QCheckBox, QTextEdit, QGridLayout
+    QFrame, QCheckBox, QTextEdit, QGridLayout, QTableView
 )
 from sqlalchemy import or_, not_
 
+
+class LedgerTableModel(QAbstractTableModel):
+    """Modelo virtual del libro de movimientos: trae páginas a medida que la vista hace scroll.
+
+    `columns` es una lista de (encabezado, función(LedgerRow) -> str).
+    """
+
+    INCOME_COLOR = QColor("#2ecc71")
+    EXPENSE_COLOR = QColor("#e74c3c")
+
+    def __init__(self, session_factory, columns, amount_column: int | None = None,
+                 transaction_type: str | None = None, page_size: int = DEFAULT_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        self._columns = columns
+        self._amount_column = amount_column
+        self._transaction_type = transaction_type
+        self._page_size = page_size
+        self._start: datetime | None = None
+        self._rows: list[LedgerRow] = []
+        self._total_count = 0
+
+    def load(self, start: datetime | None) -> LedgerPage:
+        """Reinicia el modelo con la primera página del filtro y devuelve sus totales."""
+        self._start = start
+        with self.session_factory() as session:
+            page = query_ledger(session, start=start, transaction_type=self._transaction_type, limit=self._page_size)
+        self.beginResetModel()
+        self._rows = list(page.rows)
+        self._total_count = page.total_count
+        self.endResetModel()
+        return page
+
+    def row_at(self, row: int) -> LedgerRow | None:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and len(self._rows) < self._total_count
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid():
+            return
+        with self.session_factory() as session:
+            page = query_ledger(session, start=self._start, transaction_type=self._transaction_type,
+                                offset=len(self._rows), limit=self._page_size, with_totals=False)
+        if not page.rows:
+            self._total_count = len(self._rows)
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page.rows) - 1)
+        self._rows.extend(page.rows)
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._columns[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        t = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._columns[index.column()][1](t)
+        if role == Qt.ItemDataRole.ForegroundRole and index.column() == self._amount_column:
+            return self.INCOME_COLOR if t.transaction_type == 'INCOME' else self.EXPENSE_COLOR
+        return None
+
 class AccountingView(QWidget):
     def __init__(self, session_factory, parent=None):
         super().__init__(parent)
@@ -67,73 +142,79 @@ class AccountingView(QWidget):
         self.transactions_tab.data_changed.connect(self.income_expenses_tab.load_data)
 
     def refresh_dashboard(self):
+        # Solo columnas: no hace falta materializar las cuentas completas
+        with self.session_factory() as session:
+            accounts = session.query(
+                Account.id, Account.name, Account.currency, Account.balance
+            ).filter(Account.is_active == True).all()
+
+        total_usd = sum(a.balance for a in accounts if a.currency == 'USD')
+        total_bs = sum(a.balance for a in accounts if a.currency == 'VES')
+
+        # Sort: USD then VES
+        sorted_accs = sorted(accounts, key=lambda x: (x.currency, x.name))
+        values = {
+            'total_usd': f"${total_usd:,.2f}",
+            'total_bs': f"Bs. {total_bs:,.2f}",
+        }
+        for acc in sorted_accs:
+            symbol = "$" if acc.currency == 'USD' else "Bs."
+            values[acc.id] = f"{symbol} {acc.balance:,.2f}"
+
+        # Si las cuentas son las mismas solo se actualizan los saldos que cambiaron
+        layout_key = tuple((a.id, a.name, a.currency) for a in sorted_accs)
+        if layout_key == getattr(self, '_cards_layout_key', None):
+            for key, text in values.items():
+                lbl = self._card_values[key]
+                if lbl.text() != text:
+                    lbl.setText(text)
+            return
+
         # Clear existing widgets in layout
         while self.dashboard_layout.count():
             item = self.dashboard_layout.takeAt(0)
             widget = item.widget()
             if widget:
                 widget.deleteLater()
-                
-        # Fetch accounts
-        with self.session_factory() as session:
-            accounts = session.query(Account).filter(Account.is_active == True).all()
-            
-            # Use a Horizontal Layout with a Scroll Area if needed, or just add them.
-            # But QHBoxLayout doesn't wrap. 
-            # We'll use a container widget with a Flow Layout logic simulation 
-            # or just a Grid Layout wrapped in a widget.
-            
-            # Since we can't easily implement FlowLayout, let's use a nice ScrollArea 
-            # with a horizontal layout of cards.
-            
-            from PySide6.QtWidgets import QScrollArea
-            scroll = QScrollArea()
-            scroll.setWidgetResizable(True)
-            scroll.setStyleSheet("background: transparent; border: none;")
-            scroll.setFixedHeight(140) # Limit height for the dashboard strip
-            
-            container = QWidget()
-            container.setStyleSheet("background: transparent;")
-            # Use HBox for a horizontal strip of cards
-            h_layout = QHBoxLayout(container)
-            h_layout.setSpacing(15)
-            h_layout.setContentsMargins(0, 0, 0, 0)
-            
-            # 1. Add Total Summaries (Optional, user liked them initially but asked for Bank Names)
-            # User said "quiero son unas tarjeta... con los nombres de los banco"
-            # Maybe we can have Totals as special cards at the start.
-            
-            total_usd = sum(a.balance for a in accounts if a.currency == 'USD')
-            total_bs = sum(a.balance for a in accounts if a.currency == 'VES')
-            
-            h_layout.addWidget(self._create_simple_card("Total USD", f"${total_usd:,.2f}", "#2ecc71"))
-            h_layout.addWidget(self._create_simple_card("Total Bs", f"Bs. {total_bs:,.2f}", "#3498db"))
-            
-            # Separator card or just space?
-            line = QFrame()
-            line.setFrameShape(QFrame.VLine)
-            line.setStyleSheet("color: #444;")
-            h_layout.addWidget(line)
-            
-            # 2. Add Individual Bank Cards
-            # Sort: USD then VES
-            sorted_accs = sorted(accounts, key=lambda x: (x.currency, x.name))
-            
-            for acc in sorted_accs:
-                # Color code by currency
-                color = "#2ecc71" if acc.currency == 'USD' else "#3498db"
-                symbol = "$" if acc.currency == 'USD' else "Bs."
-                
-                val_str = f"{symbol} {acc.balance:,.2f}"
-                
-                # Create Card
-                card = self._create_simple_card(acc.name, val_str, color)
-                h_layout.addWidget(card)
-                
-            h_layout.addStretch()
-            
-            scroll.setWidget(container)
-            self.dashboard_layout.addWidget(scroll)
+
+        # ScrollArea with a horizontal strip of cards
+        from PySide6.QtWidgets import QScrollArea
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setStyleSheet("background: transparent; border: none;")
+        scroll.setFixedHeight(140) # Limit height for the dashboard strip
+
+        container = QWidget()
+        container.setStyleSheet("background: transparent;")
+        h_layout = QHBoxLayout(container)
+        h_layout.setSpacing(15)
+        h_layout.setContentsMargins(0, 0, 0, 0)
+
+        self._card_values = {}
+
+        # 1. Total Summaries as special cards at the start
+        for key, title, color in (('total_usd', "Total USD", "#2ecc71"), ('total_bs', "Total Bs", "#3498db")):
+            card = self._create_simple_card(title, values[key], color)
+            self._card_values[key] = card.value_label
+            h_layout.addWidget(card)
+
+        line = QFrame()
+        line.setFrameShape(QFrame.VLine)
+        line.setStyleSheet("color: #444;")
+        h_layout.addWidget(line)
+
+        # 2. Individual Bank Cards, color coded by currency
+        for acc in sorted_accs:
+            color = "#2ecc71" if acc.currency == 'USD' else "#3498db"
+            card = self._create_simple_card(acc.name, values[acc.id], color)
+            self._card_values[acc.id] = card.value_label
+            h_layout.addWidget(card)
+
+        h_layout.addStretch()
+
+        scroll.setWidget(container)
+        self.dashboard_layout.addWidget(scroll)
+        self._cards_layout_key = layout_key
 
     def _create_simple_card(self, title, value, color):
         card = QFrame()
@@ -168,11 +249,19 @@ class AccountingView(QWidget):
         
         l.addWidget(lbl_t)
         l.addWidget(lbl_v)
+        card.value_label = lbl_v
         return card
 
 
 class IncomeExpensesManager(QWidget):
     """Gestor separado de ingresos y egresos."""
+    _COLUMNS = [
+        ("Fecha", lambda t: t.date.strftime("%d/%m")),
+        ("Descripción", lambda t: t.description),
+        ("Monto", lambda t: f"{t.currency} {t.amount:,.2f}"),
+        ("Cuenta", lambda t: t.account_name),
+    ]
+
     def __init__(self, session_factory, parent=None):
         super().__init__(parent)
         self.session_factory = session_factory
@@ -201,9 +290,9 @@ class IncomeExpensesManager(QWidget):
         grp_inc = QGroupBox("Ingresos")
         grp_inc.setStyleSheet("QGroupBox { border: 1px solid #2ecc71; margin-top: 10px; } QGroupBox::title { color: #2ecc71; }")
         l_inc = QVBoxLayout(grp_inc)
-        self.table_inc = QTableWidget()
-        self.table_inc.setColumnCount(4)
-        self.table_inc.setHorizontalHeaderLabels(["Fecha", "Descripción", "Monto", "Cuenta"])
+        self.model_inc = LedgerTableModel(session_factory, self._COLUMNS, amount_column=2, transaction_type='INCOME', parent=self)
+        self.table_inc = QTableView()
+        self.table_inc.setModel(self.model_inc)
         self.table_inc.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         l_inc.addWidget(self.table_inc)
         self.lbl_total_inc = QLabel("Total: 0.00")
@@ -215,9 +304,9 @@ class IncomeExpensesManager(QWidget):
         grp_exp = QGroupBox("Egresos")
         grp_exp.setStyleSheet("QGroupBox { border: 1px solid #e74c3c; margin-top: 10px; } QGroupBox::title { color: #e74c3c; }")
         l_exp = QVBoxLayout(grp_exp)
-        self.table_exp = QTableWidget()
-        self.table_exp.setColumnCount(4)
-        self.table_exp.setHorizontalHeaderLabels(["Fecha", "Descripción", "Monto", "Cuenta"])
+        self.model_exp = LedgerTableModel(session_factory, self._COLUMNS, amount_column=2, transaction_type='EXPENSE', parent=self)
+        self.table_exp = QTableView()
+        self.table_exp.setModel(self.model_exp)
         self.table_exp.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         l_exp.addWidget(self.table_exp)
         self.lbl_total_exp = QLabel("Total: 0.00")
@@ -230,40 +319,15 @@ class IncomeExpensesManager(QWidget):
 
     def load_data(self):
         start_date = datetime.combine(self.date_filter.date().toPython(), datetime.min.time())
-        with self.session_factory() as session:
-            # Fetch all transactons
-            txns = session.query(Transaction).filter(Transaction.date >= start_date).order_by(Transaction.date.desc()).all()
-            
-            incomes = [t for t in txns if t.transaction_type == 'INCOME']
-            expenses = [t for t in txns if t.transaction_type == 'EXPENSE']
-            
-            self._fill_table(self.table_inc, incomes, "#2ecc71")
-            self._fill_table(self.table_exp, expenses, "#e74c3c")
-            
-            # Totals (approximate mixing currencies just for visuals or separate?)
-            # Ideally separate totals by currency.
-            # Let's show multiline label.
-            self.lbl_total_inc.setText(self._calc_totals(incomes))
-            self.lbl_total_exp.setText(self._calc_totals(expenses))
-
-    def _fill_table(self, table, data, color_hex):
-        table.setRowCount(len(data))
-        for i, t in enumerate(data):
-            table.setItem(i, 0, QTableWidgetItem(t.date.strftime("%d/%m")))
-            table.setItem(i, 1, QTableWidgetItem(t.description))
-            
-            curr = t.account.currency if t.account else ""
-            amt = QTableWidgetItem(f"{curr} {t.amount:,.2f}")
-            amt.setForeground(QColor(color_hex))
-            table.setItem(i, 2, amt)
-            
-            acc = t.account.name if t.account else ""
-            table.setItem(i, 3, QTableWidgetItem(acc))
+        # Cada modelo trae su primera página y los totales por moneda calculados en la base
+        incomes = self.model_inc.load(start_date)
+        expenses = self.model_exp.load(start_date)
+        self.lbl_total_inc.setText(self._format_totals(incomes, 'INCOME'))
+        self.lbl_total_exp.setText(self._format_totals(expenses, 'EXPENSE'))
 
-    def _calc_totals(self, data):
-        sum_usd = sum(t.amount for t in data if t.account and t.account.currency == 'USD')
-        sum_bs = sum(t.amount for t in data if t.account and t.account.currency == 'VES')
-        return f"USD: {sum_usd:,.2f} | Bs: {sum_bs:,.2f}"
+    @staticmethod
+    def _format_totals(page: LedgerPage, transaction_type: str) -> str:
+        return f"USD: {page.total(transaction_type, 'USD'):,.2f} | Bs: {page.total(transaction_type, 'VES'):,.2f}"
 
 
 class Paragraph(QWidget): # Dummy filler if needed
@@ -273,6 +337,16 @@ class TransactionsManager(QWidget):
     from PySide6.QtCore import Signal
     data_changed = Signal()
 
+    _COLUMNS = [
+        ("ID", lambda t: str(t.id)),
+        ("Fecha", lambda t: t.date.strftime("%d/%m/%Y %H:%M")),
+        ("Descripción", lambda t: t.description),
+        ("Categoría", lambda t: t.category_name or "General"),
+        ("Monto", lambda t: f"{t.currency} {t.amount:,.2f}"),
+        ("Cuenta", lambda t: t.account_name),
+        ("Origen", lambda t: t.related_table or ""),
+    ]
+
     def __init__(self, session_factory, parent=None):
         super().__init__(parent)
         self.session_factory = session_factory
@@ -348,10 +422,16 @@ class TransactionsManager(QWidget):
         btn_update.setStyleSheet(btn_style_base)
         btn_update.clicked.connect(self.refresh_view)
         
+        btn_export = QPushButton("📄 Exportar")
+        btn_export.setCursor(Qt.CursorShape.PointingHandCursor)
+        btn_export.setStyleSheet(btn_style_base)
+        btn_export.clicked.connect(self.export_transactions)
+        
         top_layout.addWidget(QLabel("Desde:"))
         top_layout.addWidget(self.date_filter)
         top_layout.addWidget(btn_filter)
         top_layout.addWidget(btn_update)
+        top_layout.addWidget(btn_export)
         top_layout.addStretch()
         
         # 1. New
@@ -385,18 +465,17 @@ class TransactionsManager(QWidget):
         
         layout.addWidget(top_container)
         
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(8) # Added hidden column for flags
-        self.table.setHorizontalHeaderLabels(["ID", "Fecha", "Descripción", "Categoría", "Monto", "Cuenta", "Origen", "raw_t"])
+        # Table (virtual: las filas se piden por páginas al hacer scroll)
+        self.model = LedgerTableModel(session_factory, self._COLUMNS, amount_column=4, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setColumnHidden(6, True) # Origin hidden
-        self.table.setColumnHidden(7, True) # raw hidden
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.setAlternatingRowColors(True)
         # Connect double click to edit
-        self.table.itemDoubleClicked.connect(self.edit_transaction)
-        self.table.itemSelectionChanged.connect(self._on_selection_changed)
+        self.table.doubleClicked.connect(self.edit_transaction)
+        self.table.selectionModel().selectionChanged.connect(self._on_selection_changed)
         layout.addWidget(self.table)
         
         # Apply permissions
@@ -438,18 +517,14 @@ class TransactionsManager(QWidget):
         if self._current_user_role != 'admin':
             return
 
-        row = self.table.currentRow()
-        if row < 0:
+        rec = self._current_record()
+        if rec is None:
             self.btn_edit.setEnabled(False)
             self.btn_delete.setEnabled(False)
             return
 
-        # Check origin
-        origin_item = self.table.item(row, 6)
-        origin = origin_item.text() if origin_item else ""
-        
         # If origin is from Sale (Sales module), disable actions
-        is_sale = (origin == "sale_payments") or ("Venta:" in self.table.item(row, 2).text())
+        is_sale = (rec.related_table == "sale_payments") or ("Venta:" in (rec.description or ""))
         
         self.btn_edit.setEnabled(not is_sale)
         self.btn_delete.setEnabled(not is_sale)
@@ -459,8 +534,8 @@ class TransactionsManager(QWidget):
             QMessageBox.warning(self, "Acceso Denegado", "Solo el administrador puede editar movimientos.")
             return
 
-        row = self.table.currentRow()
-        if row < 0:
+        rec = self._current_record()
+        if rec is None:
             QMessageBox.warning(self, "Aviso", "Seleccione un movimiento para editar.")
             return
             
@@ -469,7 +544,7 @@ class TransactionsManager(QWidget):
             QMessageBox.warning(self, "Aviso", "Este movimiento proviene de una Venta y no se puede editar aquí.\nEdite la Venta original.")
             return
 
-        tx_id = self.table.item(row, 0).text()
+        tx_id = rec.id
         
         # Open Dialog with existing data
         # We need to modify TransactionDialog to accept an ID or use a different method
@@ -482,8 +557,8 @@ class TransactionsManager(QWidget):
         if self._current_user_role != 'admin':
             return
 
-        row = self.table.currentRow()
-        if row < 0:
+        rec = self._current_record()
+        if rec is None:
             QMessageBox.warning(self, "Aviso", "Seleccione un movimiento para eliminar.")
             return
 
@@ -492,8 +567,8 @@ class TransactionsManager(QWidget):
             QMessageBox.warning(self, "Aviso", "Este movimiento proviene de una Venta y no se puede eliminar aquí.")
             return
 
-        tx_id = self.table.item(row, 0).text()
-        desc = self.table.item(row, 2).text()
+        tx_id = rec.id
+        desc = rec.description
         
         confirm = QMessageBox.question(
             self, 
@@ -521,42 +596,26 @@ class TransactionsManager(QWidget):
 
     def load_data(self):
         start_date = datetime.combine(self.date_filter.date().toPython(), datetime.min.time())
-        
-        self.table.setRowCount(0)
-        with self.session_factory() as session:
-            transactions = session.query(Transaction).filter(Transaction.date >= start_date).order_by(Transaction.date.desc()).all()
-            
-            self.table.setRowCount(len(transactions))
-            for i, t in enumerate(transactions):
-                self.table.setItem(i, 0, QTableWidgetItem(str(t.id)))
-                self.table.setItem(i, 1, QTableWidgetItem(t.date.strftime("%d/%m/%Y %H:%M")))
-                self.table.setItem(i, 2, QTableWidgetItem(t.description))
-                
-                cat_name = t.category.name if t.category else "General"
-                self.table.setItem(i, 3, QTableWidgetItem(cat_name))
-                
-                amount_str = f"{t.amount:,.2f}"
-                currency = t.account.currency if t.account else ""
-                
-                item_amt = QTableWidgetItem(f"{currency} {amount_str}")
-                if t.transaction_type == 'INCOME':
-                    item_amt.setForeground(QColor("#2ecc71"))
-                else:
-                    item_amt.setForeground(QColor("#e74c3c"))
-                    
-                self.table.setItem(i, 4, item_amt)
-                
-                acc_name = t.account.name if t.account else "Unknown"
-                self.table.setItem(i, 5, QTableWidgetItem(acc_name))
+        self.model.load(start_date)
 
-                # Hidden columns for logic
-                # col 6: origin
-                self.table.setItem(i, 6, QTableWidgetItem(str(t.related_table or "")))
-                # col 7: raw object (not safe in item, just skip)
-                
         # Trigger selection change to update buttons for initial state
         self._on_selection_changed()
 
+    def _current_record(self) -> LedgerRow | None:
+        index = self.table.currentIndex()
+        return self.model.row_at(index.row()) if index.isValid() else None
+
+    def export_transactions(self):
+        """Exportar a CSV/XLSX los movimientos desde la fecha del filtro, directo desde la base."""
+        from .export_progress import start_export
+
+        start = self.date_filter.date().toPython()
+        start_export(
+            self, self.session_factory, "transactions",
+            default_name=f"movimientos_{start:%Y%m%d}_{datetime.now():%Y%m%d_%H%M}.xlsx",
+            start=start,
+        )
+
     def refresh_view(self):
         """Force reload of data and notify parent to update dashboard"""
         self.load_data()
@@ -564,6 +564,12 @@ class ConfigView(QWidget):
             }
         """)
 
+        # Botón para ver el diagnóstico de consultas SQL
+        sql_btn = QPushButton("📊 Diagnóstico SQL")
+        sql_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        sql_btn.clicked.connect(self._show_sql_diagnostics)
+        sql_btn.setStyleSheet(test_btn.styleSheet())
+
         # Botón para guardar configuraciones
         save_btn = QPushButton("💾 Guardar Cambios")
         save_btn.setCursor(Qt.CursorShape.PointingHandCursor)
@@ -584,6 +590,7 @@ class ConfigView(QWidget):
 
         btn_layout.addStretch()
         btn_layout.addWidget(test_btn)
+        btn_layout.addWidget(sql_btn)
         btn_layout.addWidget(save_btn)
         
         layout.addLayout(btn_layout)
@@ -620,6 +627,11 @@ class ConfigView(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al probar conexión: {str(e)}")
     
+    def _show_sql_diagnostics(self):
+        """Mostrar estadísticas por sentencia y posibles N+1 de la instrumentación SQL."""
+        from .sql_diagnostics_dialog import SqlDiagnosticsDialog
+        SqlDiagnosticsDialog(self).exec()
+
     def _wire_events(self) -> None:
         """Conectar eventos de las pestañas."""
         # Usuarios
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QModelIndex, QStringListModel, Qt, QThread, QTimer, Signal
+from PySide6.QtWidgets import QCompleter, QLineEdit
+
+from ..events import ChangeBatch, CustomerChanged, bus
+from ..services.customer_search import DEFAULT_LIMIT, CustomerRecord, CustomerSearch
+
+
+DEFAULT_DELAY_MS = 150
+
+# Hilos en curso: se mantienen vivos hasta terminar aunque se cierre el diálogo que los pidió
+_running: set[QThread] = set()
+
+
+def _on_changes(batch: ChangeBatch) -> None:
+    # Los índices compartidos entre diálogos se rearman en la próxima búsqueda
+    if batch.touches(CustomerChanged):
+        CustomerSearch.invalidate_shared()
+
+
+bus.changes.connect(_on_changes)
+
+
+class _SearchThread(QThread):
+    found = Signal(int, list)
+
+    def __init__(self, search: CustomerSearch, request_id: int, query: str, limit: int) -> None:
+        super().__init__()
+        self._search = search
+        self._request_id = request_id
+        self._query = query
+        self._limit = limit
+
+    def run(self) -> None:  # type: ignore[override]
+        try:
+            records = self._search.search(self._query, self._limit)
+        except Exception as e:
+            print(f"Error en búsqueda de clientes: {e}")
+            records = []
+        self.found.emit(self._request_id, records)
+
+
+def describe(record: CustomerRecord) -> str:
+    """Texto de la sugerencia: nombre · documento · teléfono."""
+    parts = [record.label] + [p for p in (record.document, record.phone) if p]
+    return " · ".join(parts)
+
+
+class CustomerCompleter(QCompleter):
+    """
+    Sugerencias de clientes para un QLineEdit (o el de un QComboBox editable).
+
+    Al dejar de tipear se piden los `limit` mejores resultados a
+    `CustomerSearch` en un hilo aparte; si llega la respuesta de una
+    consulta ya superada, se descarta. Al elegir una sugerencia se emite
+    `customerChosen` con el `CustomerRecord`.
+    """
+
+    customerChosen = Signal(object)
+
+    def __init__(
+        self,
+        search: CustomerSearch,
+        parent=None,
+        *,
+        limit: int = DEFAULT_LIMIT,
+        delay_ms: int = DEFAULT_DELAY_MS,
+        min_chars: int = 2,
+    ) -> None:
+        super().__init__(parent)
+        self._search = search
+        self._limit = limit
+        self._min_chars = min_chars
+        self._request_id = 0
+        self._records: list[CustomerRecord] = []
+        self._model = QStringListModel(self)
+        self.setModel(self._model)
+        # El filtrado ya lo hizo la búsqueda: mostrar los resultados tal cual
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setMaxVisibleItems(12)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start_search)
+        self.activated[QModelIndex].connect(self._on_activated)
+
+    @property
+    def records(self) -> list[CustomerRecord]:
+        """Resultados mostrados actualmente."""
+        return list(self._records)
+
+    def attach(self, line_edit: QLineEdit) -> None:
+        self.setWidget(line_edit)
+        line_edit.textEdited.connect(self._on_text_edited)
+
+    def _on_text_edited(self, text: str) -> None:
+        if len(text.strip()) < self._min_chars:
+            self._timer.stop()
+            self._request_id += 1  # descartar lo que esté en curso
+            self._show([])
+            return
+        self._timer.start()
+
+    def _start_search(self) -> None:
+        widget = self.widget()
+        if widget is None:
+            return
+        self._request_id += 1
+        thread = _SearchThread(self._search, self._request_id, widget.text(), self._limit)
+        thread.found.connect(self._on_found)
+        _running.add(thread)
+        thread.finished.connect(lambda t=thread: (_running.discard(t), t.deleteLater()))
+        thread.start()
+
+    def _on_found(self, request_id: int, records: list) -> None:
+        if request_id != self._request_id:
+            return
+        self._show(records)
+
+    def _show(self, records: list[CustomerRecord]) -> None:
+        self._records = list(records)
+        self._model.setStringList([describe(r) for r in self._records])
+        widget = self.widget()
+        if self._records and widget is not None and widget.hasFocus():
+            self.complete()
+        else:
+            self.popup().hide()
+
+    def _on_activated(self, index: QModelIndex) -> None:
+        # Sin filtrado propio del QCompleter, las filas del popup son las del modelo
+        row = index.row()
+        if 0 <= row < len(self._records):
+            self.customerChosen.emit(self._records[row])
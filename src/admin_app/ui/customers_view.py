@@ -15,16 +15,21 @@ from PySide6.QtWidgets import (
     QLabel,
     QComboBox,
 )
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QThread, QTimer, Signal
 from sqlalchemy.orm import sessionmaker
 from ..repository import list_customers, add_customers, delete_customer_by_id, update_customer
 from ..models import Customer
+from ..services.customer_search import CustomerIndex, CustomerRecord
 from ..permissions import is_admin_user
 from .customer_dialog import CustomerDialog
 
 
+FILTER_DELAY_MS = 150
+
+
 class _LoadCustomersThread(QThread):
-    loaded = Signal(list)
+    # Filas para la tabla e índice de búsqueda (CustomerIndex), armado fuera del hilo de la UI
+    loaded = Signal(list, object)
 
     def __init__(self, session_factory: sessionmaker) -> None:
         super().__init__()
@@ -35,6 +40,7 @@ class _LoadCustomersThread(QThread):
             with self._session_factory() as session:
                 customers = list_customers(session)
                 data = []
+                index = CustomerIndex()
                 for c in customers:
                     try:
                         data.append({
@@ -46,12 +52,13 @@ class _LoadCustomersThread(QThread):
                             "phone": getattr(c, 'phone', None) or "",
                             "email": c.email or "",
                         })
+                        index.add(CustomerRecord.from_row(c))
                     except Exception as e:
                         print(f"Error al cargar cliente {c.id}: {e}")
-                self.loaded.emit(data)
+                self.loaded.emit(data, index)
         except Exception as e:
             print(f"Error en thread de carga: {e}")
-            self.loaded.emit([])
+            self.loaded.emit([], None)
 
 
 class CustomersView(QWidget):
@@ -60,6 +67,12 @@ class CustomersView(QWidget):
         self._session_factory = session_factory
         self._current_user = None
         self._loader: _LoadCustomersThread | None = None
+        self._index: CustomerIndex | None = None
+        # Filtrar al dejar de tipear, no en cada tecla
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self._apply_filter)
         self._can_edit = False
         self._can_create = False
         self._can_delete = False
@@ -106,7 +119,7 @@ class CustomersView(QWidget):
         self.search_edit = QLineEdit(self)
         self.search_edit.setPlaceholderText("🔍 Buscar por nombre, apellido, documento o email...")
         self.search_edit.setClearButtonEnabled(True)
-        self.search_edit.textChanged.connect(self._apply_filter)
+        self.search_edit.textChanged.connect(lambda _text: self._filter_timer.start())
         
         self.filter_document = QComboBox(self)
         self.filter_document.addItems(["Todos", "V-", "J-", "E-", "G-"])
@@ -206,8 +219,9 @@ class CustomersView(QWidget):
         self._loader.finished.connect(lambda: self.setEnabled(True))
         self._loader.start()
 
-    def _on_loaded(self, customers: list[dict]) -> None:
+    def _on_loaded(self, customers: list[dict], index: CustomerIndex | None = None) -> None:
         """Maneja la carga de datos en la tabla."""
+        self._index = index
         self._table.setUpdatesEnabled(False)
         self._table.setSortingEnabled(False)
         
@@ -253,45 +267,43 @@ class CustomersView(QWidget):
             self._table.setUpdatesEnabled(True)
             self._apply_filter()
 
+    def _matching_ids(self) -> set[int] | None:
+        """Ids que pasan la búsqueda y el tipo de documento (None = sin filtro)."""
+        if self._index is None:
+            return None
+        search_text = self.search_edit.text().strip() if hasattr(self, 'search_edit') else ""
+        doc_filter = self.filter_document.currentText() if hasattr(self, 'filter_document') else "Todos"
+        ids = None
+        if search_text:
+            ids = {r.id for r in self._index.search(search_text, limit=None)}
+        if doc_filter != "Todos":
+            prefix = doc_filter.upper()
+            records = (self._index.get(cid) for cid in ids) if ids is not None else self._index.records()
+            ids = {r.id for r in records if r and r.document.upper().strip().startswith(prefix)}
+        return ids
+
     def _apply_filter(self, text: str = "") -> None:
         """Aplica filtros de búsqueda y tipo de documento."""
         if not hasattr(self, '_table') or not self._table:
             return
-            
-        search_text = self.search_edit.text().lower() if hasattr(self, 'search_edit') else text.lower()
-        doc_filter = self.filter_document.currentText() if hasattr(self, 'filter_document') else "Todos"
-        
+        self._filter_timer.stop()
+        matching = self._matching_ids()
+
         self._table.setUpdatesEnabled(False)
         visible_count = 0
         total_count = self._table.rowCount()
         
         try:
             for row in range(total_count):
-                text_match = True
-                doc_match = True
-                
-                # Filtro de texto
-                if search_text.strip():
-                    text_match = False
-                    for col in range(1, self._table.columnCount()):
-                        item = self._table.item(row, col)
-                        if item and item.text() and search_text in item.text().lower():
-                            text_match = True
-                            break
-                
-                # Filtro de documento
-                if doc_filter != "Todos":
-                    doc_item = self._table.item(row, 3)
-                    if doc_item and doc_item.text():
-                        doc_text = doc_item.text().upper().strip()
-                        # Usar startswith directamente ya que el filtro es "V-", "J-", etc.
-                        doc_match = doc_text.startswith(doc_filter.upper())
-                    else:
-                        doc_match = False
-                
-                # Aplicar visibilidad
-                is_visible = text_match and doc_match
-                self._table.setRowHidden(row, not is_visible)
+                if matching is None:
+                    is_visible = True
+                else:
+                    id_item = self._table.item(row, 0)
+                    cid = id_item.data(Qt.ItemDataRole.DisplayRole) if id_item else None
+                    is_visible = cid in matching
+                # Tocar solo las filas que cambian de estado
+                if self._table.isRowHidden(row) == is_visible:
+                    self._table.setRowHidden(row, not is_visible)
                 if is_visible:
                     visible_count += 1
                     
@@ -398,6 +410,8 @@ class CustomersView(QWidget):
                 with self._session_factory() as session:
                     if delete_customer_by_id(session, cid):
                         self._table.removeRow(row)
+                        if self._index is not None:
+                            self._index.remove(cid)
                         total = self._table.rowCount()
                         visible = sum(1 for r in range(total) if not self._table.isRowHidden(r))
                         self._status_label.setText(f"Total: {total} clientes")
@@ -429,43 +443,12 @@ class CustomersView(QWidget):
             return None
 
     def _on_export(self) -> None:
-        """Exporta la lista de clientes a CSV."""
-        try:
-            from PySide6.QtWidgets import QFileDialog
-            import csv
-            from datetime import datetime
-            
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "Exportar Clientes",
-                f"clientes_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                "CSV Files (*.csv);;All Files (*)"
-            )
-            
-            if not file_path:
-                return
-            
-            data = []
-            headers = ["ID", "Nombre", "Apellido", "Documento", "Dirección", "Teléfono", "Email"]
-            
-            for row in range(self._table.rowCount()):
-                if not self._table.isRowHidden(row):
-                    row_data = []
-                    for col in range(7):
-                        item = self._table.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    data.append(row_data)
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(headers)
-                writer.writerows(data)
-            
-            QMessageBox.information(
-                self, 
-                "Exportar", 
-                f"Se exportaron {len(data)} clientes a:\n{file_path}"
-            )
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Error al exportar: {str(e)}")
\ No newline at end of file
+        """Exporta a CSV/XLSX los clientes que pasan el filtro actual (desde la base, no desde la tabla)."""
+        from datetime import datetime
+        from .export_progress import start_export
+
+        start_export(
+            self, self._session_factory, "customers",
+            default_name=f"clientes_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            ids=self._matching_ids(),
+        )
@@ -7,15 +7,17 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QDate, QDateTime, QTimer
 from sqlalchemy.orm import sessionmaker, joinedload, contains_eager
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 import os
 
 from ..models import Delivery, DeliveryZone, Order, User, Sale, Customer, DeliveryPayment, Account, Transaction, TransactionCategory, SalePayment
-from ..events import events
 from .delivery_zones_view import DeliveryZonesView
 from sqlalchemy import func
 from ..exchange import get_bcv_rate
+from ..payment_methods import SALE_METHODS
 from ..services.delivery_sale_sync import infer_delivery_charge
+from ..services.delivery_listing import DEFAULT_PAGE_SIZE as DELIVERY_PAGE_SIZE, delivery_window_summary, query_deliveries
+from ..services.delivery_settlement import pending_by_rider, pending_totals, settle_all_riders, settle_rider, unsettle_payment
 
 class PaymentDialog(QDialog):
     def __init__(self, session_factory, start_date, end_date, parent=None):
@@ -47,53 +49,46 @@ class PaymentDialog(QDialog):
         
         self.layout.addWidget(self.table)
         
+        hb_buttons = QHBoxLayout()
+        self.btn_pay_all = QPushButton("Pagar Todos")
+        self.btn_pay_all.setStyleSheet("background-color: #3498db; color: white;")
+        self.btn_pay_all.clicked.connect(self.pay_all)
+        hb_buttons.addWidget(self.btn_pay_all)
+        hb_buttons.addStretch()
         self.btn_close = QPushButton("Cerrar")
         self.btn_close.clicked.connect(self.accept)
-        self.layout.addWidget(self.btn_close, 0, Qt.AlignmentFlag.AlignRight)
+        hb_buttons.addWidget(self.btn_close)
+        self.layout.addLayout(hb_buttons)
         
         self.load_data()
         
+    def _date_range(self):
+        # Rango semiabierto: del inicio del primer día al inicio del día siguiente al último
+        start = datetime.combine(self.start_date.toPython(), time.min)
+        end = datetime.combine(self.end_date.toPython() + timedelta(days=1), time.min)
+        return start, end
+
     def load_data(self):
         self.table.setRowCount(0)
-        
-        # Convert QDate to datetime for query
-        dt_start = datetime.combine(self.start_date.toPython(), time.min)
-        dt_end = datetime.combine(self.end_date.toPython(), time.max)
-        
+        start, end = self._date_range()
+
         with self.session_factory() as session:
-            # Query grouped by user
-            # Filter: Date range, Payment Source=EMPRESA, Not Paid (payment_id IS NULL)
-            # We assume 'status'='ENTREGADO' or maybe all statuses? 
-            # Usually only delivered ones are paid. Let's filter by status='ENTREGADO' for safety?
-            # Or maybe PENDIENTE/ENTREGADO? User didn't specify, but usually paid after done.
-            # Let's count all that are 'EMPRESA' and payment_id is Null.
-            
-            results = session.query(
-                User.id, 
-                User.username, 
-                func.count(Delivery.id), 
-                func.sum(Delivery.amount_bs)
-            ).join(Delivery.delivery_user)\
-             .filter(Delivery.sent_at >= dt_start, Delivery.sent_at <= dt_end)\
-             .filter(Delivery.payment_source == 'EMPRESA')\
-             .filter(Delivery.payment_id == None)\
-             .group_by(User.id, User.username).all()
-            
-            self.table.setRowCount(len(results))
-            for i, row in enumerate(results):
-                user_id, username, count, total_bs = row
-                total_bs = total_bs or 0.0
-                
-                self.table.setItem(i, 0, QTableWidgetItem(username))
-                self.table.setItem(i, 1, QTableWidgetItem(str(count)))
-                self.table.setItem(i, 2, QTableWidgetItem(f"Bs. {total_bs:,.2f}"))
-                self.table.setItem(i, 3, QTableWidgetItem("Pendiente"))
-                
-                # Pay Button
-                btn_pay = QPushButton("Pagar")
-                btn_pay.setStyleSheet("background-color: #2ecc71; color: white;")
-                btn_pay.clicked.connect(lambda _, uid=user_id, uname=username, c=count, amt=total_bs: self.process_payment(uid, uname, c, amt))
-                self.table.setCellWidget(i, 4, btn_pay)
+            # Carreras EMPRESA sin pagar, agrupadas por motorizado en una sola consulta
+            riders = pending_by_rider(session, start, end)
+
+        self.btn_pay_all.setEnabled(bool(riders))
+        self.table.setRowCount(len(riders))
+        for i, r in enumerate(riders):
+            self.table.setItem(i, 0, QTableWidgetItem(r.username))
+            self.table.setItem(i, 1, QTableWidgetItem(str(r.count)))
+            self.table.setItem(i, 2, QTableWidgetItem(f"Bs. {r.total_bs:,.2f}"))
+            self.table.setItem(i, 3, QTableWidgetItem("Pendiente"))
+
+            # Pay Button
+            btn_pay = QPushButton("Pagar")
+            btn_pay.setStyleSheet("background-color: #2ecc71; color: white;")
+            btn_pay.clicked.connect(lambda _, uid=r.rider_id, uname=r.username, c=r.count, amt=r.total_bs: self.process_payment(uid, uname, c, amt))
+            self.table.setCellWidget(i, 4, btn_pay)
 
     def _load_accounts(self):
         with self.session_factory() as session:
@@ -124,63 +119,44 @@ class PaymentDialog(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            dt_start = datetime.combine(self.start_date.toPython(), time.min)
-            dt_end = datetime.combine(self.end_date.toPython(), time.max)
-            
+            start, end = self._date_range()
             with self.session_factory() as session:
-                # 1. Create Payment Record
-                payment = DeliveryPayment(
-                    rider_id=user_id,
-                    amount_bs=amount,
-                    quantity=count,
-                    start_date=dt_start,
-                    end_date=dt_end,
-                    created_at=datetime.now(),
-                    notes=f"Pago semana {self.start_date.toString('dd/MM')} al {self.end_date.toString('dd/MM')}"
-                )
-                session.add(payment)
-                session.flush() # Get ID
-                
-                # 2. Update Deliveries
-                deliveries = session.query(Delivery).filter(
-                    Delivery.delivery_user_id == user_id,
-                    Delivery.sent_at >= dt_start, 
-                    Delivery.sent_at <= dt_end,
-                    Delivery.payment_source == 'EMPRESA',
-                    Delivery.payment_id == None
-                ).all()
-                
-                for d in deliveries:
-                    d.payment_id = payment.id
+                settlement = settle_rider(session, user_id, start, end, acc_id, notes=self._notes())
+            if settlement is None:
+                QMessageBox.information(self, "Sin pendientes", "Las carreras de este motorizado ya fueron pagadas.")
+            else:
+                QMessageBox.information(self, "Éxito", "Pago registrado y contabilidad actualizada.")
+            self._after_payment()
 
-                # 3. Create Accounting Transaction
-                cat = session.query(TransactionCategory).filter(TransactionCategory.name == "Delivery").first()
-                cat_id = cat.id if cat else None
-                
-                txn = Transaction(
-                    date=datetime.now(),
-                    amount=amount,
-                    transaction_type="EXPENSE",
-                    description=f"Pago Semanal Delivery: {username} ({count} envíos)",
-                    account_id=acc_id,
-                    category_id=cat_id,
-                    related_table="delivery_payments",
-                    related_id=payment.id
-                )
-                session.add(txn)
-                
-                # Debit Account
-                acc = session.get(Account, acc_id)
-                if acc:
-                    acc.balance -= amount
+    def pay_all(self):
+        acc_id = self.cb_account.currentData()
+        if acc_id is None:
+            QMessageBox.warning(self, "Atención", "Seleccione una cuenta para debitar el pago.")
+            return
 
-                session.commit()
-                QMessageBox.information(self, "Éxito", "Pago registrado y contabilidad actualizada.")
-                self.load_data() # Refresh table
-                self._load_accounts() # Update balance display (simple reload: clears combo)
-                # Ideally refresh combo properly, but clearing dupes is needed
-                self.cb_account.clear()
-                self._load_accounts()
+        start, end = self._date_range()
+        with self.session_factory() as session:
+            count, amount = pending_totals(session, start, end)
+        reply = QMessageBox.question(
+            self,
+            "Confirmar Pago",
+            f"¿Registrar el pago de todos los motorizados?\n\nCarreras: {count}\nMonto: Bs. {amount:,.2f}\n\nSe debitará de la cuenta seleccionada.",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            with self.session_factory() as session:
+                settled = settle_all_riders(session, start, end, acc_id, notes=self._notes())
+            QMessageBox.information(self, "Éxito", f"{len(settled)} pagos registrados y contabilidad actualizada.")
+            self._after_payment()
+
+    def _notes(self) -> str:
+        return f"Pago semana {self.start_date.toString('dd/MM')} al {self.end_date.toString('dd/MM')}"
+
+    def _after_payment(self):
+        self.load_data() # Refresh table
+        # Update balance display
+        self.cb_account.clear()
+        self._load_accounts()
 
 
 
@@ -260,36 +236,11 @@ class PaymentHistoryDialog(QDialog):
         if reply == QMessageBox.Yes:
             try:
                 with self.session_factory() as session:
-                    payment = session.get(DeliveryPayment, payment_id)
-                    if not payment:
+                    if not unsettle_payment(session, payment_id):
                         return
 
-                    # 1. Reverse Transaction
-                    txn = session.query(Transaction).filter(
-                        Transaction.related_table == "delivery_payments",
-                        Transaction.related_id == payment.id
-                    ).first()
-                    
-                    if txn:
-                        # Credit back to account
-                        if txn.account_id:
-                            acc = session.get(Account, txn.account_id)
-                            if acc:
-                                acc.balance += txn.amount
-                        
-                        session.delete(txn)
-                    
-                    # 2. Reset Deliveries
-                    deliveries = session.query(Delivery).filter(Delivery.payment_id == payment.id).all()
-                    for d in deliveries:
-                        d.payment_id = None
-                        
-                    # 3. Delete Payment
-                    session.delete(payment)
-                    session.commit()
-                    
-                    QMessageBox.information(self, "Eliminado", "Pago eliminado exitosamente.")
-                    self.load_data()
+                QMessageBox.information(self, "Eliminado", "Pago eliminado exitosamente.")
+                self.load_data()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al eliminar pago: {e}")
 
@@ -455,9 +406,7 @@ class CreateDeliveryDialog(QDialog):
         # 1. Method
         self.cb_client_method = QComboBox()
         self.cb_client_method.addItems([
-            "---- Seleccione ----",
-            "Efectivo USD", "Zelle", "Banesco Panamá", "Binance", "PayPal",
-            "Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"
+            "---- Seleccione ----", *SALE_METHODS
         ])
         
         # 2. Amount Bs
@@ -849,7 +798,14 @@ class DeliveriesView(QWidget):
     def __init__(self, session_factory: sessionmaker, parent=None):
         super().__init__(parent)
         self.session_factory = session_factory
-        self.all_deliveries = [] # Store for filtering
+        # Paginación por clave: (sent_at, id) de la última fila cargada
+        self._last_key = None
+        self._has_more = False
+        self._total_count = 0
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(300)
+        self._refresh_timer.timeout.connect(self.refresh)
         
         layout = QVBoxLayout(self)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -872,6 +828,11 @@ class DeliveriesView(QWidget):
         self.search_edit.setPlaceholderText("🔍 Buscar por número de orden, zona, motorizado...")
         self.search_edit.setClearButtonEnabled(True)
         self.search_edit.textChanged.connect(self._apply_filter)
+        self.cb_status_filter = QComboBox()
+        self.cb_status_filter.addItem("Todos", None)
+        self.cb_status_filter.addItem("PENDIENTE", "PENDIENTE")
+        self.cb_status_filter.addItem("ENTREGADO", "ENTREGADO")
+        self.cb_status_filter.currentIndexChanged.connect(lambda _: self.refresh())
         self.search_edit.setStyleSheet("""
             QLineEdit {
                 background-color: #2b2b2b;
@@ -884,6 +845,7 @@ class DeliveriesView(QWidget):
         
         search_layout.addWidget(lbl_search)
         search_layout.addWidget(self.search_edit)
+        search_layout.addWidget(self.cb_status_filter)
         
         top_bar.addWidget(search_container, 1) # Expand search
         
@@ -962,6 +924,8 @@ class DeliveriesView(QWidget):
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
         self.table.setColumnHidden(0, True) # Ocultar ID
+        # Las páginas siguientes se cargan al llegar al final del scroll
+        self.table.verticalScrollBar().valueChanged.connect(self._maybe_fetch_more)
 
         # IMPORTANT: Removing explicit table stylesheet to inherit global styles
         # or minimal tweaks. SalesView does NOT have explicit background color set.
@@ -1041,7 +1005,10 @@ class DeliveriesView(QWidget):
         monday = today.addDays(-(today.dayOfWeek() - 1))
         friday = monday.addDays(4)
         self.dt_start.setDate(monday)
-        self.dt_end.setDate(friday)
+        # La tabla muestra el mismo rango: incluir hoy si ya pasó el viernes
+        self.dt_end.setDate(max(friday, today))
+        self.dt_start.dateChanged.connect(lambda _: self._refresh_timer.start())
+        self.dt_end.dateChanged.connect(lambda _: self._refresh_timer.start())
         
         layout_summary.addWidget(self.dt_start)
         layout_summary.addWidget(QLabel("-"))
@@ -1050,7 +1017,7 @@ class DeliveriesView(QWidget):
         btn_calc = QPushButton(" 🔄 Calcular ")
         btn_calc.setCursor(Qt.CursorShape.PointingHandCursor)
         btn_calc.setStyleSheet(button_style)
-        btn_calc.clicked.connect(self.calculate_weekly_summary)
+        btn_calc.clicked.connect(self.refresh)
         layout_summary.addWidget(btn_calc)
         
         layout_summary.addSpacing(30)
@@ -1080,121 +1047,88 @@ class DeliveriesView(QWidget):
         layout.addWidget(self.grp_summary)
         
         self.refresh()
-        self.calculate_weekly_summary()
         
-    def calculate_weekly_summary(self):
+    def _date_range(self):
+        # Rango semiabierto: del inicio del primer día al inicio del día siguiente al último
         start = datetime.combine(self.dt_start.date().toPython(), time.min)
-        end = datetime.combine(self.dt_end.date().toPython(), time.max)
-        
+        end = datetime.combine(self.dt_end.date().toPython() + timedelta(days=1), time.min)
+        return start, end
+
+    def _filters(self):
+        start, end = self._date_range()
+        return dict(start=start, end=end, status=self.cb_status_filter.currentData(), search=self.search_edit.text())
+
+    def calculate_weekly_summary(self):
+        # El conteo de la tabla y el pendiente semanal salen de la misma consulta agregada
         with self.session_factory() as session:
-            # Query sum of amount_bs for EMPRESA payments within range and NOT PAID
-            result = session.query(
-                func.count(Delivery.id),
-                func.sum(Delivery.amount_bs)
-            ).filter(
-                Delivery.sent_at >= start,
-                Delivery.sent_at <= end,
-                Delivery.payment_source == 'EMPRESA',
-                Delivery.payment_id == None
-            ).first()
-            
-            count = result[0] if result[0] else 0
-            amount = result[1] if result[1] else 0.0
-            
-            self.lbl_week_count.setText(f"Carreras Empresa: {count}")
-            self.lbl_week_amount.setText(f"Monto Pendiente: Bs. {amount:,.2f}")
+            summary = delivery_window_summary(session, **self._filters())
+
+        self._total_count = summary.total_count
+        self.lbl_week_count.setText(f"Carreras Empresa: {summary.pending_count}")
+        self.lbl_week_amount.setText(f"Monto Pendiente: Bs. {summary.pending_bs:,.2f}")
 
     def open_payment_dialog(self):
         dlg = PaymentDialog(self.session_factory, self.dt_start.date(), self.dt_end.date(), self)
         if dlg.exec(): # If closed/accepted (though button handles logic)
             self.refresh()
-            self.calculate_weekly_summary()
 
     def refresh(self):
+        self._refresh_timer.stop()
         self.table.setRowCount(0)
-        self.all_deliveries = []
-        
+        self._last_key = None
+        self._has_more = True
+        self.calculate_weekly_summary()
+        self._fetch_page()
+
+    def _fetch_page(self):
         with self.session_factory() as session:
-            # Query Delivery and Customer Address
-            # Join Order -> Sale -> Customer (Outer Join for Customer in case not present)
-            query = session.query(Delivery, Customer.short_address)\
-                .select_from(Delivery)\
-                .outerjoin(Order, Delivery.order_id == Order.id)\
-                .outerjoin(Sale, Order.sale_id == Sale.id)\
-                .outerjoin(Customer, Sale.cliente_id == Customer.id)\
-                .options(
-                    joinedload(Delivery.zone),
-                    joinedload(Delivery.delivery_user),
-                    contains_eager(Delivery.order)
-                ).order_by(Delivery.sent_at.desc())
-
-            results = query.all()
-            
-            # Cache for filtering
-            for d, address in results:
-                self.all_deliveries.append({
-                    "id": d.id,
-                    "date": d.sent_at,
-                    "order_num": d.order.order_number if d.order else "DILIGENCIA",
-                    "zone": d.zone.name if d.zone else "",
-                    "address": address if address else (d.notes or ""),
-                    "price": d.zone.price if d.zone else 0.0,
-                    "amount_bs": d.amount_bs if hasattr(d, 'amount_bs') else 0.0,
-                    "payment_source": d.payment_source if hasattr(d, 'payment_source') and d.payment_source else "EMPRESA",
-                    "payment_id": d.payment_id,
-                    "user": d.delivery_user.username if d.delivery_user else "Sin Asignar",
-                    "status": d.status,
-                    "obj_id": d.id
-                })
-                
-        self._populate_table(self.all_deliveries)
+            rows = query_deliveries(session, **self._filters(), after=self._last_key, limit=DELIVERY_PAGE_SIZE)
+        self._has_more = len(rows) == DELIVERY_PAGE_SIZE
+        if rows:
+            self._last_key = (rows[-1].sent_at, rows[-1].id)
+        self._populate_table(rows)
+
+    def _maybe_fetch_more(self, value):
+        bar = self.table.verticalScrollBar()
+        if self._has_more and value >= bar.maximum() - 2:
+            self._fetch_page()
 
     def open_history(self):
         dlg = PaymentHistoryDialog(self.session_factory, self)
         dlg.exec()
 
     def _apply_filter(self):
-        text = self.search_edit.text().strip().lower()
-        if not text:
-            self._populate_table(self.all_deliveries)
-            return
-            
-        filtered = []
-        for item in self.all_deliveries:
-            # Search in order, zone, address, user
-            if (text in item["order_num"].lower() or 
-                text in item["zone"].lower() or 
-                text in item["address"].lower() or
-                text in item["user"].lower()):
-                filtered.append(item)
-        
-        self._populate_table(filtered)
-
-    def _populate_table(self, data):
-        self.table.setRowCount(len(data))
-        for i, item in enumerate(data):
-            self.table.setItem(i, 0, QTableWidgetItem(str(item["id"])))
+        # La búsqueda se resuelve en SQL; se espera a que el usuario deje de escribir
+        self._refresh_timer.start()
+
+    def _populate_table(self, rows):
+        # Agrega la página al final de lo ya cargado
+        first = self.table.rowCount()
+        self.table.setRowCount(first + len(rows))
+        for i, d in enumerate(rows, start=first):
+            payment_source = d.payment_source or "EMPRESA"
+            self.table.setItem(i, 0, QTableWidgetItem(str(d.id)))
             
-            date_str = item["date"].strftime("%d/%m/%Y %I:%M %p") if item["date"] else "-"
+            date_str = d.sent_at.strftime("%d/%m/%Y %I:%M %p") if d.sent_at else "-"
             self.table.setItem(i, 1, QTableWidgetItem(date_str))
             
-            self.table.setItem(i, 2, QTableWidgetItem(f"{item['order_num']}"))
-            self.table.setItem(i, 3, QTableWidgetItem(item["zone"]))
-            self.table.setItem(i, 4, QTableWidgetItem(item["address"]))
+            self.table.setItem(i, 2, QTableWidgetItem(d.order_number or "DILIGENCIA"))
+            self.table.setItem(i, 3, QTableWidgetItem(d.zone or ""))
+            self.table.setItem(i, 4, QTableWidgetItem(d.address or ""))
             
-            self.table.setItem(i, 5, QTableWidgetItem(f"${item['price']:.2f}"))
-            self.table.setItem(i, 6, QTableWidgetItem(f"Bs. {item['amount_bs']:,.2f}"))
+            self.table.setItem(i, 5, QTableWidgetItem(f"${d.price:.2f}"))
+            self.table.setItem(i, 6, QTableWidgetItem(f"Bs. {d.amount_bs:,.2f}"))
             
             # Payment Source column
-            payment_item = QTableWidgetItem(item["payment_source"])
-            if item["payment_source"] == "CLIENTE":
+            payment_item = QTableWidgetItem(payment_source)
+            if payment_source == "CLIENTE":
                 payment_item.setForeground(Qt.GlobalColor.cyan)
-            self.table.setItem(i, 7, QTableWidgetItem(payment_item))
+            self.table.setItem(i, 7, payment_item)
             
-            self.table.setItem(i, 8, QTableWidgetItem(item["user"]))
+            self.table.setItem(i, 8, QTableWidgetItem(d.rider or "Sin Asignar"))
             
-            status_item = QTableWidgetItem(item["status"])
-            if item["status"] == "ENTREGADO":
+            status_item = QTableWidgetItem(d.status)
+            if d.status == "ENTREGADO":
                 status_item.setForeground(Qt.GlobalColor.green)
             else:
                 status_item.setForeground(Qt.GlobalColor.yellow)
@@ -1204,11 +1138,11 @@ class DeliveriesView(QWidget):
             
             # Payment Status Column
             paid_status = "PENDIENTE"
-            if item["payment_source"] == "CLIENTE":
+            if payment_source == "CLIENTE":
                 paid_status = "N/A (Cliente)"
                 item_pay = QTableWidgetItem(paid_status)
                 item_pay.setForeground(Qt.GlobalColor.gray)
-            elif item["payment_id"]:
+            elif d.payment_id:
                 paid_status = "PAGADO"
                 item_pay = QTableWidgetItem(paid_status)
                 item_pay.setForeground(Qt.GlobalColor.green)
@@ -1220,14 +1154,14 @@ class DeliveriesView(QWidget):
             item_pay.setTextAlignment(Qt.AlignCenter)
             self.table.setItem(i, 10, item_pay)
             
-            self.table.item(i, 0).setData(Qt.UserRole, item["obj_id"])
+            self.table.item(i, 0).setData(Qt.UserRole, d.id)
             
             # Edit Button
             btn_edit = QPushButton("✏️")
             btn_edit.setToolTip("Editar Delivery")
             btn_edit.setCursor(Qt.CursorShape.PointingHandCursor)
             btn_edit.setStyleSheet("background-color: #f39c12; color: white; border: none; padding: 4px; border-radius: 4px; font-size: 14px;")
-            btn_edit.clicked.connect(lambda _, did=item["id"]: self.edit_delivery(did))
+            btn_edit.clicked.connect(lambda _, did=d.id: self.edit_delivery(did))
             self.table.setCellWidget(i, 11, btn_edit)
 
             # Delete Button
@@ -1235,10 +1169,10 @@ class DeliveriesView(QWidget):
             btn_delete.setToolTip("Eliminar Delivery")
             btn_delete.setCursor(Qt.CursorShape.PointingHandCursor)
             btn_delete.setStyleSheet("background-color: #c0392b; color: white; border: none; padding: 4px; border-radius: 4px; font-size: 14px;")
-            btn_delete.clicked.connect(lambda _, did=item["id"]: self.delete_delivery(did))
+            btn_delete.clicked.connect(lambda _, did=d.id: self.delete_delivery(did))
             self.table.setCellWidget(i, 12, btn_delete)
             
-        self._status_label.setText(f"✅ {len(data)} entregas cargadas")
+        self._status_label.setText(f"✅ {self.table.rowCount()} de {self._total_count} entregas cargadas")
 
     def add_delivery(self):
         dlg = CreateDeliveryDialog(self.session_factory, self)
@@ -1253,7 +1187,6 @@ class DeliveriesView(QWidget):
             sent_dt = sent_date
 
             with self.session_factory() as session:
-                sale_was_updated = False
                 # DEBUG LOGGING
                 try:
                     os.makedirs("logs", exist_ok=True)
@@ -1363,17 +1296,9 @@ class DeliveriesView(QWidget):
                                     bank=bank_input
                                 )
                                 session.add(new_pay)
-                                sale_was_updated = True
 
+                # Al confirmar, events publica SaleChanged/PaymentChanged y Ventas parchea la fila
                 session.commit()
-
-                # Notificar DESPUÉS del commit (si no, Ventas refresca y no ve cambios aún)
-                if sale_was_updated:
-                    # Encolar la señal para que Ventas refresque cuando el event loop esté libre
-                    try:
-                        QTimer.singleShot(0, events.sale_updated.emit)
-                    except Exception:
-                        pass
             self.refresh()
 
     def open_zones_dialog(self):
@@ -1475,7 +1400,6 @@ class DeliveriesView(QWidget):
                     d.notes = data['notes']
                     session.commit()
             self.refresh()
-            self.calculate_weekly_summary()
 
     def delete_delivery(self, delivery_id):
         with self.session_factory() as session:
@@ -1497,4 +1421,3 @@ class DeliveriesView(QWidget):
                 session.commit()
                 
         self.refresh()
-        self.calculate_weekly_summary()
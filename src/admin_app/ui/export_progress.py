@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog, QWidget
+from sqlalchemy.orm import sessionmaker
+
+from ..services.export import SPECS, ExportResult, export
+
+
+FILE_FILTERS = "Excel (*.xlsx);;CSV (*.csv)"
+
+# Hilos en curso: se mantienen vivos hasta terminar aunque se cierre la vista que los lanzó
+_running: set[QThread] = set()
+
+
+class ExportThread(QThread):
+    """Ejecuta `services.export.export` fuera del hilo de la interfaz."""
+
+    progress = Signal(int, int)  # filas escritas, total (-1 si no se conoce)
+    done = Signal(object)  # ExportResult
+    failed = Signal(str)
+
+    def __init__(self, session_factory: sessionmaker, key: str, path: str, **filters) -> None:
+        super().__init__()
+        self._session_factory = session_factory
+        self._key = key
+        self._path = path
+        self._filters = filters
+        self._cancel = False
+
+    def cancel(self) -> None:
+        self._cancel = True
+
+    def run(self) -> None:  # type: ignore[override]
+        try:
+            result = export(
+                self._session_factory, self._key, self._path,
+                progress=lambda n, total: self.progress.emit(n, -1 if total is None else total),
+                cancelled=lambda: self._cancel,
+                **self._filters,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(result)
+
+
+def start_export(
+    parent: QWidget,
+    session_factory: sessionmaker,
+    key: str,
+    *,
+    default_name: str | None = None,
+    **filters,
+) -> ExportThread | None:
+    """
+    Pedir el archivo destino y exportar `key` en segundo plano con una
+    barra de progreso cancelable. `filters` se pasa a `export`
+    (start, end, ids). Devuelve el hilo, o None si se canceló el diálogo.
+    """
+    spec = SPECS[key]
+    name = default_name or f"{key}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+    path, selected = QFileDialog.getSaveFileName(parent, f"Exportar {spec.title}", name, FILE_FILTERS)
+    if not path:
+        return None
+    if not path.lower().endswith((".csv", ".xlsx")):
+        path += ".csv" if "csv" in selected.lower() else ".xlsx"
+
+    dialog = QProgressDialog(f"Exportando {spec.title.lower()}...", "Cancelar", 0, 0, parent)
+    dialog.setWindowTitle("Exportar")
+    dialog.setWindowModality(Qt.WindowModality.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+
+    thread = ExportThread(session_factory, key, path, **filters)
+
+    def on_progress(done: int, total: int) -> None:
+        if total >= 0:
+            dialog.setMaximum(max(total, 1))
+            dialog.setValue(min(done, max(total, 1)))
+        dialog.setLabelText(f"Exportando {spec.title.lower()}... {done:,} filas")
+
+    def on_done(result: ExportResult) -> None:
+        dialog.close()
+        if result.cancelled:
+            return
+        QMessageBox.information(
+            parent, "Exportar", f"Se exportaron {result.rows:,} filas a:\n{result.path}"
+        )
+
+    def on_failed(message: str) -> None:
+        dialog.close()
+        QMessageBox.warning(parent, "Error", f"Error al exportar: {message}")
+
+    thread.progress.connect(on_progress)
+    thread.done.connect(on_done)
+    thread.failed.connect(on_failed)
+    dialog.canceled.connect(thread.cancel)
+    _running.add(thread)
+    thread.finished.connect(lambda t=thread: (_running.discard(t), t.deleteLater()))
+    thread.start()
+    return thread
@@ -14,13 +14,20 @@ from datetime import datetime
 import os
 
 from ..repository import (
-    get_dashboard_kpis, get_sales_by_user, get_weekly_sales_data, get_daily_sales_data,
+    DashboardSnapshot, get_dashboard_snapshot,
     get_monthly_sales_goal, set_monthly_sales_goal, set_user_monthly_goal,
-    get_pending_orders_for_user, user_has_role, update_order
+    update_order
 )
 from .deliveries_view import CreateDeliveryDialog
 from ..models import Delivery
 
+# Rangos del gráfico: (texto del selector, granularidad, título)
+CHART_RANGES = [
+    ("7 días", "day", "Rendimiento Diario (Últimos 7 días)"),
+    ("12 semanas", "week", "Rendimiento Semanal (Últimas 12 semanas)"),
+    ("12 meses", "month", "Rendimiento Mensual (Últimos 12 meses)"),
+]
+
 # --- Utils ---
 def get_icon_path(name: str) -> str:
     """Helper to get icon path."""
@@ -140,19 +147,50 @@ class VendorListItem(QFrame):
         name_lbl.setStyleSheet("color: #333; border: none;")
         
         # Progress Bar
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        self.progress.setFixedHeight(6)
+        self.progress.setTextVisible(False)
+        
+        info_layout.addWidget(name_lbl)
+        info_layout.addWidget(self.progress)
+        
+        # Amount
+        self.amount_lbl = QLabel()
+        self.amount_lbl.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        self.amount_lbl.setStyleSheet("color: #2c3e50; border: none;")
+        self.amount_lbl.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        
+        # Percent text
+        self.pct_lbl = QLabel()
+        self.pct_lbl.setFont(QFont("Segoe UI", 9))
+        self.pct_lbl.setStyleSheet("color: #7f8c8d; border: none;")
+        self.pct_lbl.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        
+        right_widget = QWidget()
+        right_layout = QVBoxLayout(right_widget)
+        right_layout.setContentsMargins(0,0,0,0)
+        right_layout.setSpacing(0)
+        right_layout.addWidget(self.amount_lbl)
+        right_layout.addWidget(self.pct_lbl)
+
+        layout.addWidget(avatar)
+        layout.addWidget(info_widget, 1)
+        layout.addWidget(right_widget)
+
+        self.set_values(amount, goal)
+
+    def set_values(self, amount: float, goal: float):
+        """Actualizar monto y progreso sin recrear el widget."""
         percentage = (amount / goal * 100) if goal > 0 else 0
-        progress = QProgressBar()
-        progress.setRange(0, 100)
-        progress.setValue(int(percentage))
-        progress.setFixedHeight(6)
-        progress.setTextVisible(False)
+        self.progress.setValue(min(int(percentage), 100))
         
         # Color logic
         color = "#FF6900" # Default orange
         if percentage >= 100: color = "#2ecc71" # Green
         elif percentage >= 50: color = "#f1c40f" # Yellow
         
-        progress.setStyleSheet(f"""
+        self.progress.setStyleSheet(f"""
             QProgressBar {{
                 border: none;
                 background-color: #f0f0f0;
@@ -163,32 +201,8 @@ class VendorListItem(QFrame):
                 border-radius: 3px;
             }}
         """)
-        
-        info_layout.addWidget(name_lbl)
-        info_layout.addWidget(progress)
-        
-        # Amount
-        amount_lbl = QLabel(f"${amount:,.2f}")
-        amount_lbl.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
-        amount_lbl.setStyleSheet("color: #2c3e50; border: none;")
-        amount_lbl.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        
-        # Percent text
-        pct_lbl = QLabel(f"{percentage:.0f}%")
-        pct_lbl.setFont(QFont("Segoe UI", 9))
-        pct_lbl.setStyleSheet("color: #7f8c8d; border: none;")
-        pct_lbl.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        
-        right_widget = QWidget()
-        right_layout = QVBoxLayout(right_widget)
-        right_layout.setContentsMargins(0,0,0,0)
-        right_layout.setSpacing(0)
-        right_layout.addWidget(amount_lbl)
-        right_layout.addWidget(pct_lbl)
-
-        layout.addWidget(avatar)
-        layout.addWidget(info_widget, 1)
-        layout.addWidget(right_widget)
+        self.amount_lbl.setText(f"${amount:,.2f}")
+        self.pct_lbl.setText(f"{percentage:.0f}%")
 
 class UserGoalsDialog(QDialog):
     def __init__(self, session_factory, parent=None):
@@ -561,7 +575,15 @@ class AssignedOrdersWidget(QFrame):
         self.list_layout = QVBoxLayout(self.list_widget)
         self.list_layout.setContentsMargins(0, 0, 0, 0)
         self.list_layout.setSpacing(0)
+        
+        # Empty state (va después de las filas, antes del stretch)
+        self._empty_lbl = QLabel("¡Todo al día! No tienes pedidos pendientes.")
+        self._empty_lbl.setStyleSheet("color: #95a5a6; font-size: 14px; font-style: italic; border: none; background: transparent; padding: 20px;")
+        self._empty_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._empty_lbl.setVisible(False)
+        self.list_layout.addWidget(self._empty_lbl)
         self.list_layout.addStretch()
+        self._rows: dict[int, tuple[object, OrderListItem]] = {}
         
         self.scroll.setWidget(self.list_widget)
         self.scroll.setFixedHeight(180) # Fixed height for list
@@ -569,29 +591,41 @@ class AssignedOrdersWidget(QFrame):
         self.layout.addWidget(self.scroll)
 
     def update_orders(self, orders):
-        # Clear existing (except stretch)
-        while self.list_layout.count() > 1:
-            item = self.list_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
+        """
+        Sincronizar la lista con `orders` reutilizando las filas cuyo pedido no
+        cambió; solo se crean filas para pedidos nuevos o modificados.
+        """
         count = len(orders)
         self.count_badge.setText(str(count))
         self.count_badge.setVisible(count > 0)
-        
-        if not orders:
-            # Show empty state
-            empty_lbl = QLabel("¡Todo al día! No tienes pedidos pendientes.")
-            empty_lbl.setStyleSheet("color: #95a5a6; font-size: 14px; font-style: italic; border: none; background: transparent; padding: 20px;")
-            empty_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.list_layout.insertWidget(0, empty_lbl)
-            return
 
+        previous = self._rows
+        rows: dict[int, tuple[object, OrderListItem]] = {}
         for order in orders:
+            old = previous.pop(order.id, None)
+            if old is not None and old[0] == order:
+                rows[order.id] = old
+                continue
+            if old is not None:
+                self.list_layout.removeWidget(old[1])
+                old[1].deleteLater()
             item = OrderListItem(order)
             # Propagate signal (int, str, dict)
             item.status_change_requested.connect(self.status_change_requested.emit)
-            self.list_layout.insertWidget(self.list_layout.count()-1, item)
+            rows[order.id] = (order, item)
+        for _, item in previous.values():
+            self.list_layout.removeWidget(item)
+            item.deleteLater()
+        self._rows = rows
+
+        # Reordenar según la lista recibida
+        for index, order in enumerate(orders):
+            item = rows[order.id][1]
+            if self.list_layout.indexOf(item) != index:
+                self.list_layout.removeWidget(item)
+                self.list_layout.insertWidget(index, item)
+
+        self._empty_lbl.setVisible(not orders)
 
 
 class HomeView(QWidget):
@@ -604,11 +638,19 @@ class HomeView(QWidget):
         self._can_view_all_sales = self._check_can_view_all_sales()
         
         self.kpi_cards = {}
+        # Último snapshot dibujado; refresh_data solo toca lo que cambió respecto a él
+        self._snapshot: DashboardSnapshot | None = None
+        self._vendor_items: dict[str, VendorListItem] = {}
+        self._chart_bars: QBarSet | None = None
+        self._chart_axis_y: QValueAxis | None = None
+        self._chart_days: list[str] = []
+        self._chart_granularity = CHART_RANGES[0][1]
+        self._team_empty_lbl: QLabel | None = None
         
         self._setup_ui()
         
-        # Timer
-        self.update_timer = QTimer()
+        # Timer (MainWindow lo reemplaza por su planificador con set_auto_refresh(False))
+        self.update_timer = QTimer(self)
         self.update_timer.timeout.connect(self.refresh_data)
         self.update_timer.start(30000)
         
@@ -732,10 +774,20 @@ class HomeView(QWidget):
         chart_layout = QVBoxLayout(chart_container)
         chart_layout.setContentsMargins(20, 20, 20, 20)
         
-        chart_title = QLabel("Rendimiento Diario (Últimos 7 días)")
-        chart_title.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
-        chart_title.setStyleSheet("color: #2c3e50; border: none;")
-        chart_layout.addWidget(chart_title)
+        chart_header = QHBoxLayout()
+        self.chart_title = QLabel(CHART_RANGES[0][2])
+        self.chart_title.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
+        self.chart_title.setStyleSheet("color: #2c3e50; border: none;")
+        
+        self.chart_range_combo = QComboBox()
+        for label, granularity, _ in CHART_RANGES:
+            self.chart_range_combo.addItem(label, granularity)
+        self.chart_range_combo.currentIndexChanged.connect(self._on_chart_range_changed)
+        
+        chart_header.addWidget(self.chart_title)
+        chart_header.addStretch()
+        chart_header.addWidget(self.chart_range_combo)
+        chart_layout.addLayout(chart_header)
         
         self.chart = QChart()
         self.chart.setBackgroundVisible(False)
@@ -904,68 +956,82 @@ class HomeView(QWidget):
             print(f"Error actualizando estado de pedido: {e}")
             QMessageBox.critical(self, "Error", f"Error actualizando estado: {e}")
 
+    def set_auto_refresh(self, enabled: bool) -> None:
+        """Activar o detener el refresco periódico propio de la vista."""
+        if enabled:
+            self.update_timer.start(30000)
+        else:
+            self.update_timer.stop()
+
     def refresh_data(self):
-        """Actualizar todos los datos del dashboard."""
+        """Actualizar el dashboard a partir de un snapshot nuevo."""
         try:
             with self._session_factory() as session:
-                filter_user = None
-                if not self._can_view_all_sales:
-                    filter_user = self._current_user
-
-                # Actualizar KPIs
-                kpis = get_dashboard_kpis(session, filter_user=filter_user)
-                self.kpi_cards["Clientes"].update_value(str(kpis['total_customers']))
-                self.kpi_cards["Ventas del Mes"].update_value(f"${kpis['monthly_sales']:,.2f}")
-                self.kpi_cards["Pedidos del Mes"].update_value(str(kpis['monthly_orders']))
-                self.kpi_cards["Ventas Hoy"].update_value(f"${kpis['today_sales']:,.2f}")
-                
-                # Actualizar meta actual
-                current_goal = get_monthly_sales_goal(session)
-                self.goal_label.setText(f"Meta: ${current_goal:,.0f}")
-                
-                # Actualizar gráfico diario
-                self.update_daily_chart(session, filter_user=filter_user)
-                
-                # Actualizar lista de vendedores (Mostrar TODOS para motivar, sin filtro)
-                self.update_sales_team_list(session, current_goal, filter_user=None)
-
-                # Check for Pending Orders (Designer, Production, Seller)
-                from ..models import User
-                user = session.query(User).filter(User.username == self._current_user).first()
-                if user:
-                    orders = get_pending_orders_for_user(session, user.id)
-                    
-                    # Determine visibility: Show if orders exist OR if user has specific roles
-                    should_show = False
-                    if orders:
-                        should_show = True
-                    else:
-                        # Check if user is Designer, Production or Seller to show empty state
-                        if (user_has_role(session, user_id=user.id, role_name="DISEÑADOR") or 
-                            user_has_role(session, user_id=user.id, role_name="PRODUCCION") or
-                            user_has_role(session, user_id=user.id, role_name="VENDEDOR") or
-                            user_has_role(session, user_id=user.id, role_name="ADMIN") or
-                            user.username == "admin"):
-                            should_show = True
-                    
-                    self.assigned_orders_widget.setVisible(should_show)
-                    if should_show:
-                        self.assigned_orders_widget.update_orders(orders)
-                
+                snapshot = get_dashboard_snapshot(
+                    session, self._current_user, chart_granularity=self._chart_granularity
+                )
         except Exception as e:
             print(f"Error actualizando datos del dashboard: {e}")
+            return
+        self.apply_snapshot(snapshot)
 
-    def update_daily_chart(self, session, filter_user=None):
+    def apply_snapshot(self, snapshot: DashboardSnapshot):
+        """Redibujar solo las partes del tablero que difieren del snapshot anterior."""
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous == snapshot:
+            return
+
+        if previous is None or previous.kpis != snapshot.kpis:
+            kpis = snapshot.kpis
+            self.kpi_cards["Clientes"].update_value(str(kpis.total_customers))
+            self.kpi_cards["Ventas del Mes"].update_value(f"${kpis.monthly_sales:,.2f}")
+            self.kpi_cards["Pedidos del Mes"].update_value(str(kpis.monthly_orders))
+            self.kpi_cards["Ventas Hoy"].update_value(f"${kpis.today_sales:,.2f}")
+
+        if previous is None or previous.goal != snapshot.goal:
+            self.goal_label.setText(f"Meta: ${snapshot.goal:,.0f}")
+
+        if previous is None or previous.chart != snapshot.chart:
+            self.update_sales_chart(snapshot.chart)
+
+        # Lista de vendedores (todos, sin filtro, para motivar)
+        if previous is None or previous.team != snapshot.team:
+            self.update_sales_team_list(snapshot.team)
+
+        if previous is None or previous.show_pending != snapshot.show_pending:
+            self.assigned_orders_widget.setVisible(snapshot.show_pending)
+        if snapshot.show_pending and (previous is None or previous.pending_orders != snapshot.pending_orders):
+            self.assigned_orders_widget.update_orders(snapshot.pending_orders)
+
+    def _on_chart_range_changed(self, index: int):
+        self._chart_granularity = self.chart_range_combo.itemData(index)
+        self.chart_title.setText(CHART_RANGES[index][2])
+        self.refresh_data()
+
+    def update_sales_chart(self, points):
         try:
-            from ..repository import get_daily_sales_chart_data
-            daily_data = get_daily_sales_chart_data(session, days_back=7, filter_user=filter_user)
+            label_format = "%m/%Y" if self._chart_granularity == "month" else "%d/%m"
+            categories = [point.start.strftime(label_format) for point in points]
+            values = [point.total_sales for point in points]
+            max_val = max(values, default=0)
+            y_range = (0, max_val * 1.1 if max_val > 0 else 100) # 10% padding
+
+            # Mismos días: se actualizan las barras existentes
+            if self._chart_bars is not None and self._chart_days == categories:
+                for i, val in enumerate(values):
+                    if self._chart_bars.at(i) != val:
+                        self._chart_bars.replace(i, val)
+                self._chart_axis_y.setRange(*y_range)
+                return
+
             self.chart.removeAllSeries()
+            self._chart_bars = None
             
             # Remove axes properly
             for axis in self.chart.axes():
                 self.chart.removeAxis(axis)
             
-            if daily_data['daily_data']:
+            if points:
                 series = QBarSeries()
                 series.setBarWidth(0.5) # Barras más delgadas
                 
@@ -978,16 +1044,7 @@ class HomeView(QWidget):
                 gradient.setColorAt(1.0, QColor("#FF6900")) # Naranja base abajo
                 bar_set.setBrush(QBrush(gradient))
                 bar_set.setBorderColor(QColor("#FF6900"))
-                
-                categories = []
-                max_val = 0
-                
-                for day_info in daily_data['daily_data']:
-                    day_label = day_info['date'].strftime("%d/%m")
-                    categories.append(day_label)
-                    val = day_info['total_sales']
-                    bar_set.append(val)
-                    if val > max_val: max_val = val
+                bar_set.append(values)
                 
                 series.append(bar_set)
                 self.chart.addSeries(series)
@@ -1002,7 +1059,7 @@ class HomeView(QWidget):
                 series.attachAxis(axis_x)
                 
                 axis_y = QValueAxis()
-                axis_y.setRange(0, max_val * 1.1 if max_val > 0 else 100) # 10% padding
+                axis_y.setRange(*y_range)
                 axis_y.setLabelFormat("$%.0f")
                 axis_y.setLabelsFont(QFont("Segoe UI", 9))
                 axis_y.setLabelsColor(QColor("#7f8c8d"))
@@ -1011,39 +1068,53 @@ class HomeView(QWidget):
                 series.attachAxis(axis_y)
                 
                 self.chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
+                self._chart_bars = bar_set
+                self._chart_axis_y = axis_y
+                self._chart_days = categories
                 
         except Exception as e:
             print(f"Error chart: {e}")
 
-    def update_sales_team_list(self, session, goal, filter_user=None):
+    def update_sales_team_list(self, team):
         try:
-            # Clear list (keep stretch at end)
-            while self.team_list_layout.count() > 1:
-                item = self.team_list_layout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            
-            sales_data = get_sales_by_user(session, filter_user=filter_user)
-            if not sales_data:
-                lbl = QLabel("Sin ventas registradas")
-                lbl.setStyleSheet("color: #999; padding: 20px;")
-                lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.team_list_layout.insertWidget(0, lbl)
+            if not team:
+                for item in self._vendor_items.values():
+                    self.team_list_layout.removeWidget(item)
+                    item.deleteLater()
+                self._vendor_items = {}
+                self._team_empty_label().setVisible(True)
                 return
+            self._team_empty_label().setVisible(False)
 
-            sales_data_sorted = sorted(sales_data, key=lambda x: x['total_sales'], reverse=True)
-            
-            for data in sales_data_sorted:
-                # Use individual goal if > 0, else fallback to global goal
-                user_goal = data.get('monthly_goal', 0.0)
-                target_goal = user_goal if user_goal > 0 else goal
-                
-                item = VendorListItem(data['asesor'], data['total_sales'], target_goal)
-                self.team_list_layout.insertWidget(self.team_list_layout.count()-1, item)
+            # Reutilizar las filas existentes; solo se crean las de vendedores nuevos
+            items: dict[str, VendorListItem] = {}
+            for index, member in enumerate(team):
+                item = self._vendor_items.pop(member.asesor, None)
+                if item is None:
+                    item = VendorListItem(member.asesor, member.total_sales, member.goal)
+                else:
+                    item.set_values(member.total_sales, member.goal)
+                items[member.asesor] = item
+                if self.team_list_layout.indexOf(item) != index:
+                    self.team_list_layout.removeWidget(item)
+                    self.team_list_layout.insertWidget(index, item)
+            for item in self._vendor_items.values():
+                self.team_list_layout.removeWidget(item)
+                item.deleteLater()
+            self._vendor_items = items
                 
         except Exception as e:
             print(f"Error team list: {e}")
 
+    def _team_empty_label(self) -> QLabel:
+        if self._team_empty_lbl is None:
+            self._team_empty_lbl = QLabel("Sin ventas registradas")
+            self._team_empty_lbl.setStyleSheet("color: #999; padding: 20px;")
+            self._team_empty_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            # Antes del stretch, después de las filas
+            self.team_list_layout.insertWidget(self.team_list_layout.count() - 1, self._team_empty_lbl)
+        return self._team_empty_lbl
+
     def change_sales_goal(self):
         """Abrir diálogo para cambiar la meta de ventas por usuario."""
         dialog = UserGoalsDialog(self._session_factory, self)
@@ -17,7 +17,7 @@ from ..repository import (
 )
 from ..models import User
 from ..permissions import is_admin_user
-from ..events import events
+from ..events import OrderChanged, SaleChanged, bus
 from .order_details_dialog import OrderDetailsDialog
 from zoneinfo import ZoneInfo
 from datetime import timezone
@@ -150,6 +150,8 @@ class OrdersView(QWidget):
         self._session_factory = session_factory
         self._current_user = current_user
         self._loading = False
+        self._filter_user: str | None = None  # asesor al que se limita la lista (None = todas)
+        self._visible_ids: list[int] | None = None  # ids que pasan la búsqueda (None = sin búsqueda)
         self._orders_data = [] # Store data for filtering
         self._can_edit = False  # ediciones de flujo (estado/asignación)
         self._can_delete = False  # eliminación (solo ADMIN)
@@ -178,11 +180,15 @@ class OrdersView(QWidget):
         self.btn_delete.clicked.connect(self._on_delete)
         self.btn_delete.setVisible(False)
         
+        self.btn_export = QPushButton("📄 Exportar", self)
+        self.btn_export.clicked.connect(self._on_export)
+        
         header_layout.addWidget(QLabel("Buscar:"))
         header_layout.addWidget(self.search, 1)
         header_layout.addWidget(self.btn_view)
         header_layout.addWidget(self.btn_print)
         header_layout.addWidget(self.btn_delete)
+        header_layout.addWidget(self.btn_export)
         header_layout.addWidget(self.btn_refresh)
         
         layout.addLayout(header_layout)
@@ -216,27 +222,8 @@ class OrdersView(QWidget):
         # Initial load
         QTimer.singleShot(100, self.refresh)
         
-        # Events
-        try:
-            # Usar una referencia débil o verificar isVisible/isValid antes de llamar
-            # Para simplificar, capturamos RuntimeError dentro de la lambda
-            def safe_refresh(oid):
-                try:
-                    if self.isVisible():
-                        self.refresh()
-                except RuntimeError:
-                    pass
-            events.order_created.connect(safe_refresh)
-            
-            def safe_refresh_void():
-                try:
-                    if self.isVisible():
-                        self.refresh()
-                except RuntimeError:
-                    pass
-            events.sale_updated.connect(safe_refresh_void)
-        except Exception:
-            pass
+        # Events: una recarga por ráfaga de cambios en pedidos o ventas
+        bus.changes.connect(self._on_changes)
 
     def set_permissions(self, permissions: set[str]):
         """Configurar permisos de edición y eliminación."""
@@ -255,6 +242,16 @@ class OrdersView(QWidget):
         """Contrato usado por MainWindow/DbWatcher para refrescar la vista."""
         self.refresh()
 
+    def _on_changes(self, batch) -> None:
+        if not batch.touches(OrderChanged, SaleChanged):
+            return
+        try:
+            if self.isVisible():
+                self.refresh()
+        except RuntimeError:
+            # La vista ya fue destruida
+            pass
+
     def refresh(self) -> None:
         if self._loading:
             return
@@ -278,6 +275,7 @@ class OrdersView(QWidget):
             except Exception as e:
                 print(f"Error checking permissions in OrdersView: {e}")
         
+        self._filter_user = filter_user
         self._thread = _LoadOrdersThread(self._session_factory, filter_user=filter_user, parent=self)
         self._thread.loaded.connect(self._on_loaded)
         self._thread.finished.connect(self._on_finished)
@@ -307,6 +305,7 @@ class OrdersView(QWidget):
                 text in str(row['status']).lower()):
                 filtered.append(row)
         
+        self._visible_ids = [row['id'] for row in filtered] if text else None
         self._populate_table(filtered)
 
     def _populate_table(self, rows: list) -> None:
@@ -479,6 +478,19 @@ class OrdersView(QWidget):
         except Exception:
             QMessageBox.warning(self, "Pedidos", "No se pudo eliminar el pedido.")
 
+    def _on_export(self) -> None:
+        """Exportar a CSV/XLSX las órdenes de la lista (con la búsqueda aplicada), directo desde la base."""
+        from datetime import datetime
+        from ..models import Sale
+        from .export_progress import start_export
+
+        start_export(
+            self, self._session_factory, "orders",
+            default_name=f"ordenes_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            ids=self._visible_ids,
+            where=(Sale.asesor == self._filter_user,) if self._filter_user else (),
+        )
+
     def _on_print(self) -> None:
         sid = self._selected_id()
         if sid is None:
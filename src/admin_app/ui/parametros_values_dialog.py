@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Dict, List, Any, Optional, Callable, ContextManager
 import json
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
     QTableWidget, QTableWidgetItem, QComboBox, QCheckBox, QSpinBox,
@@ -16,6 +16,56 @@ from ..repository import (
     get_parameter_table_data, add_parameter_table_row,
     update_parameter_table_row, delete_parameter_table_row
 )
+from ..services.corporeo_repricing import (
+    CONFIG_TOTAL_UNIT, PAYLOAD_TOTAL_UNIT, RepricingSummary, extract_row_price,
+    reprice_corporeo_configs, reprice_corporeo_payloads,
+)
+
+
+# Hilos en curso: se mantienen vivos hasta terminar aunque se cierre el diálogo que los lanzó
+_running: set[QThread] = set()
+
+
+class _RepricingThread(QThread):
+    """Re-cotiza payloads y configs corpóreo fuera del hilo de la interfaz."""
+
+    progress = Signal(int, int)  # revisadas, actualizadas (acumulado de ambas tablas)
+    done = Signal(object, object)  # RepricingSummary de payloads y de configs
+    failed = Signal(str)
+
+    def __init__(self, session_factory) -> None:
+        super().__init__()
+        self._session_factory = session_factory
+
+    def run(self) -> None:  # type: ignore[override]
+        try:
+            with self._session_factory() as session:
+                payloads = reprice_corporeo_payloads(
+                    session, progress=lambda s: self.progress.emit(s.scanned, s.changed)
+                )
+                configs = reprice_corporeo_configs(
+                    session,
+                    progress=lambda s: self.progress.emit(payloads.scanned + s.scanned, payloads.changed + s.changed),
+                )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(payloads, configs)
+
+
+def _repricing_message(payloads: RepricingSummary, configs: RepricingSummary) -> str:
+    """Texto del resultado: cada tabla con su propia unidad (sus totales no se suman)."""
+    parts = []
+    for title, summary, unit in (
+        ("Cotizaciones", payloads, PAYLOAD_TOTAL_UNIT),
+        ("Configuraciones", configs, f"precio final en {CONFIG_TOTAL_UNIT}"),
+    ):
+        parts.append(
+            f"{title}: {summary.scanned} revisadas, {summary.changed} actualizadas "
+            f"(suben {summary.increased}, bajan {summary.decreased})\n"
+            f"Variación ({unit}): {summary.delta_total:+,.2f}"
+        )
+    return "\n\n".join(parts)
 
 
 class ParametrosValuesDialog(QDialog):
@@ -458,6 +508,44 @@ class ParametrosValuesDialog(QDialog):
                 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al actualizar fila: {str(e)}")
+                return
+
+            if extract_row_price(edit_data) != extract_row_price(new_data):
+                self._offer_repricing()
+
+    def _offer_repricing(self):
+        """Ofrecer re-cotizar las cotizaciones corpóreo pendientes tras un cambio de precio."""
+        reply = QMessageBox.question(
+            self, "Precios actualizados",
+            "El precio cambió. ¿Desea recalcular las cotizaciones corpóreo pendientes?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        from PySide6.QtWidgets import QProgressDialog
+        progress = QProgressDialog("Recalculando cotizaciones...", None, 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        def _on_done(payloads: RepricingSummary, configs: RepricingSummary):
+            progress.close()
+            QMessageBox.information(self, "Cotizaciones recalculadas", _repricing_message(payloads, configs))
+
+        def _on_failed(message: str):
+            progress.close()
+            QMessageBox.critical(self, "Error", f"Error al recalcular cotizaciones: {message}")
+
+        thread = _RepricingThread(self.session_factory)
+        thread.progress.connect(
+            lambda scanned, changed: progress.setLabelText(f"Revisadas: {scanned}  |  Actualizadas: {changed}")
+        )
+        thread.done.connect(_on_done)
+        thread.failed.connect(_on_failed)
+        _running.add(thread)
+        thread.finished.connect(lambda t=thread: (_running.discard(t), t.deleteLater()))
+        thread.start()
     
     def _delete_row(self):
         """Eliminar fila seleccionada."""
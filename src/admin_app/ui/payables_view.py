@@ -12,8 +12,9 @@ from ..models import (
     AccountsPayable, Supplier, Worker, Transaction, 
     TransactionCategory, Account, Delivery, DeliveryPayment, User, Sale, SalePayment
 )
-from ..repository import get_bcv_rate, get_payroll_status_by_month
+from ..repository import get_bcv_rate, get_payroll_status_by_month, get_payroll_status_by_year
 from .pay_worker_dialog import PayWorkerDialog
+from ..services.delivery_settlement import pending_by_rider
 
 class PayablesView(QWidget):
     def __init__(self, session_factory, parent=None):
@@ -423,7 +424,8 @@ class PayrollList(QWidget):
                     account_id=acc_id,
                     category_id=cat_id,
                     related_table="workers",
-                    related_id=worker_id
+                    related_id=worker_id,
+                    quincena=quincena_idx
                 )
                 session.add(txn)
                 session.commit()
@@ -463,36 +465,22 @@ class DeliveryPayableManager(QWidget):
     def load_data(self):
         self.table.setRowCount(0)
         with self.session_factory() as session:
-            # Query deliveries not paid (payment_id is NULL) and status='ENTREGADO' and payment_source='EMPRESA'
-            query = session.query(
-                User.full_name,
-                func.count(Delivery.id),
-                func.sum(Delivery.amount_bs)
-            ).join(Delivery, Delivery.delivery_user_id == User.id)\
-             .filter(
-                 Delivery.status == 'ENTREGADO',
-                 Delivery.payment_id == None,
-                 Delivery.payment_source == 'EMPRESA'
-             )\
-             .group_by(User.id)
+            # Carreras ENTREGADO de EMPRESA sin pagar, agrupadas por motorizado
+            riders = pending_by_rider(session, status='ENTREGADO')
+
+        self.table.setRowCount(len(riders))
+        for i, r in enumerate(riders):
+            self.table.setItem(i, 0, QTableWidgetItem(r.display_name))
+            self.table.setItem(i, 1, QTableWidgetItem(str(r.count)))
+            self.table.setItem(i, 2, QTableWidgetItem(f"Bs. {r.total_bs:,.2f}"))
             
-            results = query.all()
-            self.table.setRowCount(len(results))
+            btn = QPushButton("Pagar")
+            btn.setStyleSheet("background-color: #3498db; color: white; padding: 4px;")
+            btn.setCursor(Qt.CursorShape.PointingHandCursor)
+            btn.clicked.connect(self.pay_all_dialog)
+            self.table.setItem(i, 3, QTableWidgetItem("")) # Placeholder
+            self.table.setCellWidget(i, 3, btn)
             
-            for i, row in enumerate(results):
-                name, count, total_bs = row
-                self.table.setItem(i, 0, QTableWidgetItem(name))
-                self.table.setItem(i, 1, QTableWidgetItem(str(count)))
-                amount_str = f"Bs. {total_bs:,.2f}" if total_bs else "Bs. 0.00"
-                self.table.setItem(i, 2, QTableWidgetItem(amount_str))
-                
-                btn = QPushButton("Pagar")
-                btn.setStyleSheet("background-color: #3498db; color: white; padding: 4px;")
-                btn.setCursor(Qt.CursorShape.PointingHandCursor)
-                btn.clicked.connect(self.pay_all_dialog)
-                self.table.setItem(i, 3, QTableWidgetItem("")) # Placeholder
-                self.table.setCellWidget(i, 3, btn)
-                
     def pay_all_dialog(self):
         # Could re-use PaymentDialog from deliveries_view, 
         # but that one imports a lot. Better to make a simple one or import it.
@@ -956,6 +944,8 @@ class BonusesManager(QWidget):
 
 
 class PayrollHistoryDialog(QDialog):
+    MONTHS = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
     def __init__(self, session_factory, parent=None):
         super().__init__(parent)
         self.session_factory = session_factory
@@ -964,7 +954,24 @@ class PayrollHistoryDialog(QDialog):
         
         layout = QVBoxLayout(self)
         
-        # Filters (Optional, maybe Month/Year later, for now just a list)
+        # Resumen anual: quincenas pagadas por trabajador y mes
+        year_bar = QHBoxLayout()
+        year_bar.addWidget(QLabel("Año:"))
+        self.cb_year = QComboBox()
+        current_year = datetime.now().year
+        for y in range(current_year, current_year - 5, -1):
+            self.cb_year.addItem(str(y), y)
+        self.cb_year.currentIndexChanged.connect(self.load_year_summary)
+        year_bar.addWidget(self.cb_year)
+        year_bar.addStretch()
+        layout.addLayout(year_bar)
+
+        self.summary_table = QTableWidget()
+        self.summary_table.setColumnCount(1 + len(self.MONTHS))
+        self.summary_table.setHorizontalHeaderLabels(["Trabajador"] + self.MONTHS)
+        self.summary_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.summary_table.setMaximumHeight(220)
+        layout.addWidget(self.summary_table)
         
         self.table = QTableWidget()
         self.table.setColumnCount(6)
@@ -978,7 +985,30 @@ class PayrollHistoryDialog(QDialog):
         btn_close.clicked.connect(self.accept)
         layout.addWidget(btn_close)
         
+        self.load_year_summary()
         self.load_data()
+
+    def load_year_summary(self):
+        year = self.cb_year.currentData()
+        with self.session_factory() as session:
+            status = get_payroll_status_by_year(session, year)
+            workers = (session.query(Worker.id, Worker.full_name)
+                       .filter(Worker.is_active == True, Worker.payment_frequency == "QUINCENAL")
+                       .order_by(Worker.full_name)
+                       .all())
+
+        self.summary_table.setRowCount(len(workers))
+        for i, (wid, name) in enumerate(workers):
+            self.summary_table.setItem(i, 0, QTableWidgetItem(name or ""))
+            months = status.get(wid, {})
+            for m in range(1, 13):
+                st = months.get(m, {'q1': False, 'q2': False})
+                marks = " ".join(q.upper() for q in ('q1', 'q2') if st[q])
+                item = QTableWidgetItem(marks or "-")
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                if st['q1'] and st['q2']:
+                    item.setForeground(QColor("#2ecc71"))
+                self.summary_table.setItem(i, m, item)
         
     def load_data(self):
         self.table.setRowCount(0)
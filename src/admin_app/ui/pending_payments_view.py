@@ -12,6 +12,7 @@ from datetime import datetime
 from ..repository import get_pending_sales, register_payment, get_payments_history
 from .sale_dialog import MoneySpinBox
 from ..exchange import get_bcv_rate
+from ..payment_methods import SALE_METHODS, is_bs_method
 
 class PaymentDialog(QDialog):
     def __init__(self, sale_data, parent=None):
@@ -171,9 +172,7 @@ class PaymentDialog(QDialog):
         # 0. Forma de Pago
         cmb_method = QComboBox(self)
         cmb_method.addItems([
-            "---- Seleccione ----",
-            "Efectivo USD", "Zelle", "Banesco Panamá", "Binance", "PayPal",
-            "Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"
+            "---- Seleccione ----", *SALE_METHODS
         ])
         self.tbl_payments.setCellWidget(row, 0, cmb_method)
         
@@ -217,10 +216,7 @@ class PaymentDialog(QDialog):
         self._apply_payment_autofill(row)
 
     def _is_bs_method(self, method_name: str) -> bool:
-        bs_methods = [
-            "Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"
-        ]
-        return method_name in bs_methods
+        return is_bs_method(method_name)
 
     def _apply_payment_autofill(self, row: int) -> None:
         cmb = self.tbl_payments.cellWidget(row, 0)
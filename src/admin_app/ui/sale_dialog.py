@@ -12,9 +12,12 @@ from sqlalchemy.orm import sessionmaker
 import unicodedata
 
 from ..exchange import get_bcv_rate, get_rate_for_date
-from ..repository import list_customers, add_customers, list_configurable_products, eav_list_types, generate_order_number
+from ..repository import add_customers, list_configurable_products, eav_list_types, generate_order_number
 from ..db import make_engine, make_session_factory
 from ..models import Customer, User, Role, UserRole, Account
+from ..payment_methods import SALE_METHODS, is_bs_method
+from ..services.customer_search import CustomerRecord, CustomerSearch
+from .customer_completer import CustomerCompleter
 from .customer_dialog import CustomerDialog
 from .login_dialog import LoginDialog
 import json
@@ -983,9 +986,7 @@ class SaleDialog(QDialog):
         # 0. Forma de Pago
         cmb_method = QComboBox(self)
         cmb_method.addItems([
-            "---- Seleccione ----",
-            "Efectivo USD", "Zelle", "Banesco Panamá", "Binance", "PayPal",
-            "Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"
+            "---- Seleccione ----", *SALE_METHODS
         ])
         self.tbl_payments.setCellWidget(row, 0, cmb_method)
         
@@ -1029,11 +1030,7 @@ class SaleDialog(QDialog):
         self._apply_payment_autofill(row)
 
     def _is_bs_method(self, method_name: str) -> bool:
-        # Define methods that are in Bolívares
-        bs_methods = [
-            "Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"
-        ]
-        return method_name in bs_methods
+        return is_bs_method(method_name)
 
     def _apply_payment_autofill(self, row: int) -> None:
         cmb = self.tbl_payments.cellWidget(row, 0)
@@ -1241,8 +1238,10 @@ class SaleDialog(QDialog):
         # Cliente como lista editable (con búsqueda)
         self.edt_cliente = QComboBox(self)
         self.edt_cliente.setEditable(True)
-        # Caché para clientes: id -> objeto
+        # Caché para clientes: id -> objeto (solo los elegidos; la búsqueda la hace el completer)
         self._customers_by_id = {}
+        self._customer_search: CustomerSearch | None = None
+        self._customer_completer: CustomerCompleter | None = None
 
         # Items de la venta
         self._items_data = []
@@ -1263,10 +1262,7 @@ class SaleDialog(QDialog):
 
         # Pagos (Legacy Single Payment)
         self.cmb_forma_pago = QComboBox(self)
-        self.cmb_forma_pago.addItems([
-            "Efectivo USD", "Zelle", "Banesco Panamá", "Binance", "PayPal",
-            "Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"
-        ])
+        self.cmb_forma_pago.addItems(SALE_METHODS)
         
         # Detalle del producto (Input area)
         self.edt_articulo = QComboBox(self)
@@ -1431,26 +1427,12 @@ class SaleDialog(QDialog):
             return
         try:
             with sf() as session:
-                # Clientes: usar name si existe, o nombre+apellido como fallback
-                customers = list_customers(session)
+                # Clientes: no se cargan todos en el combo; se buscan al tipear
                 self._customers_by_id = {}
                 self.edt_cliente.clear()
                 # Placeholder
                 self.edt_cliente.addItem("----Selecione----", None)
-                for c in customers:
-                    label = (getattr(c, 'name', None) or '').strip()
-                    if not label:
-                        first = getattr(c, 'first_name', '') or ''
-                        last = getattr(c, 'last_name', '') or ''
-                        label = f"{first} {last}".strip()
-                    if not label:
-                        label = f"Cliente #{getattr(c, 'id', '')}".strip()
-                    cid = getattr(c, 'id', None)
-                    if cid is not None:
-                        self._customers_by_id[int(cid)] = c
-                        self.edt_cliente.addItem(label, int(cid))
-                    else:
-                        self.edt_cliente.addItem(label)
+                self._setup_customer_completer(sf)
                 # Limpiar detalles al inicio
                 self._clear_customer_details()
 
@@ -2125,6 +2107,7 @@ class SaleDialog(QDialog):
             try:
                 if cid is not None and str(cid).strip().isdigit():
                     target = int(str(cid).strip())
+                    self._customer_item_index(target)
                     for i in range(self.edt_cliente.count()):
                         try:
                             if self.edt_cliente.itemData(i) == target:
@@ -2634,6 +2617,39 @@ class SaleDialog(QDialog):
             return None
 
     # --- Cliente: helpers ---
+    def _setup_customer_completer(self, sf) -> None:
+        """Sugerencias de clientes (índice en memoria o consulta al servidor) en el combo editable."""
+        if self._customer_completer is not None:
+            return
+        self._customer_search = CustomerSearch.shared(sf)
+        self._customer_completer = CustomerCompleter(self._customer_search, self)
+        self._customer_completer.attach(self.edt_cliente.lineEdit())
+        self._customer_completer.customerChosen.connect(self._select_customer)
+
+    def _customer_item_index(self, cid: int) -> int:
+        """Índice del cliente en el combo, agregándolo si todavía no está (-1 si no existe)."""
+        idx = self.edt_cliente.findData(cid)
+        if idx >= 0:
+            return idx
+        record = self._customers_by_id.get(cid)
+        if record is None and self._customer_search is not None:
+            try:
+                record = self._customer_search.get(cid)
+            except Exception:
+                record = None
+        if record is None:
+            return -1
+        self._customers_by_id[cid] = record
+        self.edt_cliente.addItem(record.label, cid)
+        return self.edt_cliente.count() - 1
+
+    def _select_customer(self, record: CustomerRecord) -> None:
+        self._customers_by_id[record.id] = record
+        idx = self._customer_item_index(record.id)
+        if idx >= 0:
+            self.edt_cliente.setCurrentIndex(idx)
+            self._on_customer_changed(idx)
+
     def _on_customer_changed(self, index: int) -> None:
         try:
             cid = self.edt_cliente.itemData(index)
@@ -2679,13 +2695,12 @@ class SaleDialog(QDialog):
                 # Recuperar ID desde la base por si acaso
                 session.refresh(cust)
                 cid = int(getattr(cust, 'id'))
-                # Preparar etiqueta
-                label = (cust.name or "").strip() or f"{(cust.first_name or '').strip()} {(cust.last_name or '').strip()}".strip()
-                if not label:
-                    label = f"Cliente #{cid}"
-                # Registrar en caché y combo
-                self._customers_by_id[cid] = cust
-                self.edt_cliente.addItem(label, cid)
+                record = CustomerRecord.from_row(cust)
+                # Registrar en caché, índice de búsqueda y combo
+                self._customers_by_id[cid] = record
+                if self._customer_search is not None:
+                    self._customer_search.upsert(record)
+                self.edt_cliente.addItem(record.label, cid)
                 self.edt_cliente.setCurrentIndex(self.edt_cliente.count() - 1)
                 # Actualizar panel de detalles
                 self._set_customer_details(
@@ -12,6 +12,7 @@ from sqlalchemy.orm import sessionmaker, joinedload
 import json
 
 from ..models import Sale, User
+from ..payment_methods import is_bs_method
 from ..repository import (
     list_sales,
     add_sale,
@@ -24,11 +25,14 @@ from ..repository import (
     user_has_role
 )
 from ..permissions import is_admin_user
-from ..events import events
+from ..events import CREATED, DELETED, UPDATED, PaymentChanged, SaleChanged, bus
 from .sale_dialog import SaleDialog as InvoiceSaleDialog
 
 
 class SalesView(QWidget):
+    # Por encima de esta cantidad de ventas afectadas conviene recargar todo
+    _PATCH_LIMIT = 50
+
     def __init__(self, session_factory: sessionmaker, parent=None):
         super().__init__(parent)
         self._session_factory = session_factory
@@ -39,8 +43,8 @@ class SalesView(QWidget):
         self._setup_ui()
         self._load_sales()
         
-        # Connect events (encolado para evitar refresco en medio de otras operaciones)
-        events.sale_updated.connect(self._on_sale_updated)
+        # Cambios confirmados llegan agrupados por ráfaga: se parchean solo las filas afectadas
+        bus.changes.connect(self._on_changes)
         
     def set_current_user(self, username: str):
         self._current_user = username
@@ -66,9 +70,6 @@ class SalesView(QWidget):
         """Contrato usado por MainWindow/DbWatcher para refrescar la vista."""
         self._load_sales()
 
-    def _on_sale_updated(self):
-        QTimer.singleShot(0, self._load_sales)
-        
     def _setup_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -112,12 +113,20 @@ class SalesView(QWidget):
         self.btn_delete.setVisible(False)
         top_bar.addWidget(self.btn_delete)
 
+        self.btn_export = QPushButton("📄 Exportar")
+        self.btn_export.clicked.connect(self._on_export)
+        top_bar.addWidget(self.btn_export)
+
+        self.btn_export_payments = QPushButton("📄 Exportar pagos")
+        self.btn_export_payments.clicked.connect(self._on_export_payments)
+        top_bar.addWidget(self.btn_export_payments)
+
         self.btn_refresh = QPushButton("🔄 Actualizar")
         self.btn_refresh.clicked.connect(self._load_sales)
         top_bar.addWidget(self.btn_refresh)
         
         # Style buttons
-        for btn in [self.btn_add, self.btn_edit, self.btn_delete, self.btn_refresh]:
+        for btn in [self.btn_add, self.btn_edit, self.btn_delete, self.btn_export, self.btn_export_payments, self.btn_refresh]:
             btn.setCursor(Qt.CursorShape.PointingHandCursor)
             btn.setStyleSheet("""
                 QPushButton {
@@ -207,187 +216,264 @@ class SalesView(QWidget):
                 self.table.clearSelection()
         return super().eventFilter(source, event)
         
+    def _can_view_all(self, session) -> bool:
+        """ADMIN/ADMINISTRACION ven todas las ventas; el resto solo las propias."""
+        if not self._current_user:
+            return True
+        user = session.query(User).filter(User.username == self._current_user).first()
+        if not user:
+            return False
+        is_admin = user_has_role(session, user_id=user.id, role_name="ADMIN")
+        is_administracion = user_has_role(session, user_id=user.id, role_name="ADMINISTRACION")
+        return is_admin or is_administracion
+
+    def _sales_query(self, session):
+        """Ventas visibles para el usuario actual (todas para ADMIN/ADMINISTRACION)."""
+        query = session.query(Sale).options(
+            joinedload(Sale.items),
+            joinedload(Sale.payments)
+        )
+
+        if not self._can_view_all(session):
+            # Filter by current user (asesor)
+            query = query.filter(Sale.asesor == self._current_user)
+        return query
+
+    def _on_export(self) -> None:
+        """Exportar a CSV/XLSX las ventas visibles para el usuario, directo desde la base."""
+        self._export("sales", "ventas")
+
+    def _on_export_payments(self) -> None:
+        """Exportar los pagos de las ventas visibles para el usuario."""
+        self._export("payments", "pagos")
+
+    def _export(self, key: str, prefix: str) -> None:
+        from .export_progress import start_export
+
+        # Las dos exportaciones unen `sales`, así que el filtro por asesor sirve igual
+        with self._session_factory() as session:
+            where = () if self._can_view_all(session) else (Sale.asesor == self._current_user,)
+        start_export(
+            self, self._session_factory, key,
+            default_name=f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            where=where,
+        )
+
     def _load_sales(self):
         """Cargar todas las ventas en la tabla."""
         self._status_label.setText("Cargando ventas...")
         try:
             with self._session_factory() as session:
-                # Determine visibility
-                can_view_all = False
-                if self._current_user:
-                    user = session.query(User).filter(User.username == self._current_user).first()
-                    if user:
-                        is_admin = user_has_role(session, user_id=user.id, role_name="ADMIN")
-                        is_administracion = user_has_role(session, user_id=user.id, role_name="ADMINISTRACION")
-                        can_view_all = is_admin or is_administracion
-                
-                query = session.query(Sale).options(
-                    joinedload(Sale.items),
-                    joinedload(Sale.payments)
-                )
-                
-                if not can_view_all and self._current_user:
-                    # Filter by current user (asesor)
-                    query = query.filter(Sale.asesor == self._current_user)
-                
-                sales = query.order_by(Sale.id.desc()).all()
+                sales = self._sales_query(session).order_by(Sale.id.desc()).all()
             
                 self.table.setRowCount(len(sales))
                 
                 for row, sale in enumerate(sales):
-                    # Llenar cada columna
-                    # Determinar nombre de cliente preferido
+                    self._fill_row(session, row, sale)
+                    
+            self._status_label.setText(f"✅ {len(sales)} ventas cargadas")
+        except Exception as e:
+            self._status_label.setText(f"❌ Error al cargar ventas: {str(e)}")
+            print(f"Error cargando ventas: {e}")
+
+    def _fill_row(self, session, row: int, sale: Sale) -> None:
+        """Escribir una venta en la fila indicada."""
+        # Llenar cada columna
+        # Determinar nombre de cliente preferido
+        client_name = ''
+        try:
+            if getattr(sale, 'cliente', None):
+                client_name = getattr(sale, 'cliente')
+            elif getattr(sale, 'cliente_id', None):
+                try:
+                    cust = get_customer_by_id(session, int(getattr(sale, 'cliente_id')))
+                    if cust:
+                        client_name = getattr(cust, 'name', '')
+                except Exception:
                     client_name = ''
-                    try:
-                        if getattr(sale, 'cliente', None):
-                            client_name = getattr(sale, 'cliente')
-                        elif getattr(sale, 'cliente_id', None):
-                            try:
-                                cust = get_customer_by_id(session, int(getattr(sale, 'cliente_id')))
-                                if cust:
-                                    client_name = getattr(cust, 'name', '')
-                            except Exception:
-                                client_name = ''
-                    except Exception:
-                        client_name = ''
+        except Exception:
+            client_name = ''
 
-                    # Formatear Artículo (Productos)
-                    articulo_display = sale.articulo or ""
-                    try:
-                        if hasattr(sale, 'items') and sale.items:
-                            product_counts = {}
-                            for item in sale.items:
-                                name = item.product_name
-                                qty = item.quantity
-                                if name in product_counts:
-                                    product_counts[name] += qty
-                                else:
-                                    product_counts[name] = qty
+        # Formatear Artículo (Productos)
+        articulo_display = sale.articulo or ""
+        try:
+            if hasattr(sale, 'items') and sale.items:
+                product_counts = {}
+                for item in sale.items:
+                    name = item.product_name
+                    qty = item.quantity
+                    if name in product_counts:
+                        product_counts[name] += qty
+                    else:
+                        product_counts[name] = qty
+                
+                parts = []
+                for name, total_qty in product_counts.items():
+                    if total_qty > 1:
+                        if total_qty % 1 == 0:
+                            parts.append(f"{name} x{int(total_qty)}")
+                        else:
+                            parts.append(f"{name} x{total_qty:.2f}")
+                    else:
+                        parts.append(name)
+                if parts:
+                    articulo_display = ", ".join(parts)
+        except Exception:
+            pass
+
+        # Formatear Forma de Pago y Calcular Ingresos USD reales
+        pago_display = sale.forma_pago or ""
+        real_ingresos_usd = 0.0
+        
+        try:
+            if hasattr(sale, 'payments') and sale.payments:
+                methods = []
+                for p in sale.payments:
+                    if p.payment_method:
+                        methods.append(p.payment_method)
+                        
+                        # Lógica para Ingresos $: Sumar solo si el método es en divisas
+                        # (cualquier método que no sea Bs.)
+                        if not is_bs_method(p.payment_method):
+                            real_ingresos_usd += (p.amount_usd or 0.0)
                             
-                            parts = []
-                            for name, total_qty in product_counts.items():
-                                if total_qty > 1:
-                                    if total_qty % 1 == 0:
-                                        parts.append(f"{name} x{int(total_qty)}")
-                                    else:
-                                        parts.append(f"{name} x{total_qty:.2f}")
-                                else:
-                                    parts.append(name)
-                            if parts:
-                                articulo_display = ", ".join(parts)
-                    except Exception:
-                        pass
+                if methods:
+                    pago_display = ", ".join(methods)
+        except Exception:
+            pass
 
-                    # Formatear Forma de Pago y Calcular Ingresos USD reales
-                    pago_display = sale.forma_pago or ""
-                    real_ingresos_usd = 0.0
+        # Construct description from details_json if sale.descripcion is empty or generic
+        description_text = sale.descripcion or ""
+        if (not description_text or description_text.strip().lower() == "producto") and sale.details_json:
+            try:
+                details = json.loads(sale.details_json)
+                items_list = details.get('items', [])
+                parts = []
+                for i in items_list:
+                    p_name = i.get('product_name', '')
+                    p_details = i.get('details', {})
+                    extra = ""
+                    if isinstance(p_details, dict):
+                        # Corporeo check
+                        if 'alto' in p_details and 'ancho' in p_details:
+                            alto = p_details.get('alto')
+                            ancho = p_details.get('ancho')
+                            mat = p_details.get('material_text') or ""
+                            extra = f"{alto}x{ancho}cm {mat}".strip()
+                        # ProductConfigDialog check
+                        elif 'summary' in p_details:
+                            desc = p_details.get('summary', {}).get('descripcion', '')
+                            if desc:
+                                extra = desc
                     
-                    try:
-                        if hasattr(sale, 'payments') and sale.payments:
-                            methods = []
-                            for p in sale.payments:
-                                if p.payment_method:
-                                    methods.append(p.payment_method)
-                                    
-                                    # Lógica para Ingresos $: Sumar solo si el método es en divisas
-                                    # Métodos considerados divisas: Efectivo USD, Zelle, Banesco Panamá, Binance, PayPal
-                                    # O cualquier otro que no sea Bs.
-                                    bs_methods = ["Efectivo Bs.D", "Pago móvil", "Transferencia Bs.D", "Punto de Venta"]
-                                    if p.payment_method not in bs_methods:
-                                        real_ingresos_usd += (p.amount_usd or 0.0)
-                                        
-                            if methods:
-                                pago_display = ", ".join(methods)
-                    except Exception:
-                        pass
+                    # Si tenemos detalles extra, usarlos como descripción principal
+                    # Esto evita mostrar "Producto" o "Sello" cuando tenemos "SELLO AUTOMATICO..."
+                    if extra:
+                        full_desc = extra
+                    else:
+                        full_desc = p_name or "Producto"
+                    
+                    parts.append(full_desc)
+                
+                if parts:
+                    description_text = "; ".join(parts)
+            except Exception:
+                pass
 
-                    # Construct description from details_json if sale.descripcion is empty or generic
-                    description_text = sale.descripcion or ""
-                    if (not description_text or description_text.strip().lower() == "producto") and sale.details_json:
-                        try:
-                            details = json.loads(sale.details_json)
-                            items_list = details.get('items', [])
-                            parts = []
-                            for i in items_list:
-                                p_name = i.get('product_name', '')
-                                p_details = i.get('details', {})
-                                extra = ""
-                                if isinstance(p_details, dict):
-                                    # Corporeo check
-                                    if 'alto' in p_details and 'ancho' in p_details:
-                                        alto = p_details.get('alto')
-                                        ancho = p_details.get('ancho')
-                                        mat = p_details.get('material_text') or ""
-                                        extra = f"{alto}x{ancho}cm {mat}".strip()
-                                    # ProductConfigDialog check
-                                    elif 'summary' in p_details:
-                                        desc = p_details.get('summary', {}).get('descripcion', '')
-                                        if desc:
-                                            extra = desc
-                                
-                                # Si tenemos detalles extra, usarlos como descripción principal
-                                # Esto evita mostrar "Producto" o "Sello" cuando tenemos "SELLO AUTOMATICO..."
-                                if extra:
-                                    full_desc = extra
-                                else:
-                                    full_desc = p_name or "Producto"
-                                
-                                parts.append(full_desc)
-                            
-                            if parts:
-                                description_text = "; ".join(parts)
-                        except Exception:
-                            pass
+        items = [
+            str(sale.id),
+            sale.fecha.strftime("%d/%m/%Y %H:%M") if sale.fecha else "",
+            sale.numero_orden or "",
+            articulo_display,
+            description_text,
+            sale.asesor or "",
+            client_name or "",
+            f"${sale.venta_usd:,.2f}" if sale.venta_usd else "$0.00",
+            pago_display,
+            sale.serial_billete or "",
+            sale.banco or "",
+            sale.referencia or "",
+            sale.fecha_pago.strftime("%d/%m/%Y") if sale.fecha_pago else "",
+            f"Bs. {sale.monto_bs:,.2f}" if sale.monto_bs else "",
+            f"${sale.monto_usd_calculado:,.2f}" if sale.monto_usd_calculado else "",
+            f"{sale.tasa_bcv:,.2f}" if sale.tasa_bcv else "",
+            f"${sale.abono_usd:,.2f}" if sale.abono_usd else "",
+            "",
+            f"${sale.iva:,.2f}" if sale.iva else "",
+            f"${sale.restante:,.2f}" if sale.restante else "",
+            f"${sale.diseno_usd:,.2f}" if sale.diseno_usd else "",
+            f"${sale.delivery_usd:,.2f}" if getattr(sale, 'delivery_usd', 0) else "",
+            f"${real_ingresos_usd:,.2f}" if real_ingresos_usd > 0 else "",
+        ]
+        
+        for col, text in enumerate(items):
+            item = QTableWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, sale.id)  # Guardar ID para referencia
+            
+            # Colorear Número de Orden (col 2) según deuda
+            if col == 2:
+                # Si hay deuda (restante > 0.01), Naranja. Si no, Verde.
+                restante = sale.restante if sale.restante is not None else 0.0
+                if restante > 0.01:
+                    item.setForeground(QColor("orange"))
+                else:
+                    item.setForeground(QColor("green"))
+                # Hacerlo negrita para que resalte más
+                font = item.font()
+                font.setBold(True)
+                item.setFont(font)
 
-                    items = [
-                        str(sale.id),
-                        sale.fecha.strftime("%d/%m/%Y %H:%M") if sale.fecha else "",
-                        sale.numero_orden or "",
-                        articulo_display,
-                        description_text,
-                        sale.asesor or "",
-                        client_name or "",
-                        f"${sale.venta_usd:,.2f}" if sale.venta_usd else "$0.00",
-                        pago_display,
-                        sale.serial_billete or "",
-                        sale.banco or "",
-                        sale.referencia or "",
-                        sale.fecha_pago.strftime("%d/%m/%Y") if sale.fecha_pago else "",
-                        f"Bs. {sale.monto_bs:,.2f}" if sale.monto_bs else "",
-                        f"${sale.monto_usd_calculado:,.2f}" if sale.monto_usd_calculado else "",
-                        f"{sale.tasa_bcv:,.2f}" if sale.tasa_bcv else "",
-                        f"${sale.abono_usd:,.2f}" if sale.abono_usd else "",
-                        "",
-                        f"${sale.iva:,.2f}" if sale.iva else "",
-                        f"${sale.restante:,.2f}" if sale.restante else "",
-                        f"${sale.diseno_usd:,.2f}" if sale.diseno_usd else "",
-                        f"${sale.delivery_usd:,.2f}" if getattr(sale, 'delivery_usd', 0) else "",
-                        f"${real_ingresos_usd:,.2f}" if real_ingresos_usd > 0 else "",
-                    ]
-                    
-                    for col, text in enumerate(items):
-                        item = QTableWidgetItem(text)
-                        item.setData(Qt.ItemDataRole.UserRole, sale.id)  # Guardar ID para referencia
-                        
-                        # Colorear Número de Orden (col 2) según deuda
-                        if col == 2:
-                            # Si hay deuda (restante > 0.01), Naranja. Si no, Verde.
-                            restante = sale.restante if sale.restante is not None else 0.0
-                            if restante > 0.01:
-                                item.setForeground(QColor("orange"))
-                            else:
-                                item.setForeground(QColor("green"))
-                            # Hacerlo negrita para que resalte más
-                            font = item.font()
-                            font.setBold(True)
-                            item.setFont(font)
+            self.table.setItem(row, col, item)
 
-                        self.table.setItem(row, col, item)
-                    
-            self._status_label.setText(f"✅ {len(sales)} ventas cargadas")
+    def _on_changes(self, batch):
+        """Aplicar a la tabla solo las ventas afectadas por una ráfaga de cambios."""
+        if not batch.touches(SaleChanged, PaymentChanged):
+            return
+        deleted = batch.ids(SaleChanged, DELETED)
+        changed = batch.ids(SaleChanged, CREATED, UPDATED)
+        changed |= {e.sale_id for e in batch.of(PaymentChanged) if e.sale_id}
+        changed -= deleted
+        if batch.whole(SaleChanged, PaymentChanged) or len(changed) + len(deleted) > self._PATCH_LIMIT:
+            self._load_sales()
+            return
+        try:
+            self._patch_rows(changed, deleted)
         except Exception as e:
-            self._status_label.setText(f"❌ Error al cargar ventas: {str(e)}")
-            print(f"Error cargando ventas: {e}")
+            print(f"Error actualizando ventas: {e}")
+            self._load_sales()
+
+    def _row_of(self, sale_id: int) -> int | None:
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item is not None and item.data(Qt.ItemDataRole.UserRole) == sale_id:
+                return row
+        return None
+
+    def _insert_position(self, sale_id: int) -> int:
+        # La tabla está ordenada por id descendente
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item is not None and (item.data(Qt.ItemDataRole.UserRole) or 0) < sale_id:
+                return row
+        return self.table.rowCount()
+
+    def _patch_rows(self, changed: set[int], deleted: set[int]) -> None:
+        with self._session_factory() as session:
+            sales = self._sales_query(session).filter(Sale.id.in_(changed)).all() if changed else []
+            # Borradas, o que ya no son visibles para este usuario
+            gone = deleted | (changed - {s.id for s in sales})
+            for sale_id in gone:
+                row = self._row_of(sale_id)
+                if row is not None:
+                    self.table.removeRow(row)
+            for sale in sales:
+                row = self._row_of(sale.id)
+                if row is None:
+                    row = self._insert_position(sale.id)
+                    self.table.insertRow(row)
+                self._fill_row(session, row, sale)
+        self._apply_filter()
+        self._status_label.setText(f"✅ {self.table.rowCount()} ventas cargadas")
             
     def _apply_filter(self):
         """Aplicar filtro de búsqueda a la tabla."""
@@ -577,8 +663,8 @@ class SalesView(QWidget):
                         except Exception:
                             pass
                 finally:
-                    # Recargar la lista de ventas
-                    self._load_sales()
+                    # Entregar ya los cambios confirmados (venta, pedido, corpóreo) como un solo parche
+                    bus.flush()
 
                 # Si la venta devolvió un pedido creado, mostrar notificación
                 try:
@@ -1003,7 +1089,7 @@ class SalesView(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al guardar cambios: {str(e)}")
 
-            self._load_sales()
+            bus.flush()
                 
     def _on_delete_sale(self):
         """Eliminar venta seleccionada."""
@@ -1022,7 +1108,7 @@ class SalesView(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             with self._session_factory() as session:
                 if delete_sale_by_id(session, sale_id):
-                    self._load_sales()
+                    bus.flush()
                     QMessageBox.information(self, "Éxito", "Venta eliminada correctamente.")
                 else:
                     QMessageBox.warning(self, "Error", "No se pudo eliminar la venta.")
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView, QDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QVBoxLayout,
+)
+
+from .. import sql_stats
+
+
+class SqlDiagnosticsDialog(QDialog):
+    """Resumen de la instrumentación SQL: sentencias más costosas y patrones N+1."""
+
+    def __init__(self, parent=None, stats: sql_stats.SqlStats | None = None):
+        super().__init__(parent)
+        self.stats = stats or sql_stats.STATS
+        self.setWindowTitle("Diagnóstico SQL")
+        self.resize(980, 620)
+
+        layout = QVBoxLayout(self)
+        self.status_lbl = QLabel()
+        self.status_lbl.setWordWrap(True)
+        self.status_lbl.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.status_lbl)
+
+        layout.addWidget(QLabel("<b>Sentencias (por tiempo total)</b>"))
+        self.statements_table = self._make_table(["Sentencia", "Veces", "Total ms", "p95 ms", "Máx ms", "Filas"])
+        layout.addWidget(self.statements_table, 3)
+
+        layout.addWidget(QLabel("<b>Posibles N+1 (misma sentencia repetida en una sesión)</b>"))
+        self.n_plus_one_table = self._make_table(["Función", "Veces", "Sentencia"])
+        layout.addWidget(self.n_plus_one_table, 1)
+
+        buttons = QHBoxLayout()
+        self.btn_refresh = QPushButton("🔄 Actualizar")
+        self.btn_reset = QPushButton("🧹 Reiniciar contadores")
+        btn_close = QPushButton("Cerrar")
+        self.btn_refresh.clicked.connect(self.refresh)
+        self.btn_reset.clicked.connect(self._on_reset)
+        btn_close.clicked.connect(self.accept)
+        buttons.addWidget(self.btn_refresh)
+        buttons.addWidget(self.btn_reset)
+        buttons.addStretch()
+        buttons.addWidget(btn_close)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def _make_table(self, headers: list[str]) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        for col in range(len(headers)):
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        stretch = headers.index("Sentencia")
+        header.setSectionResizeMode(stretch, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @staticmethod
+    def _fill(table: QTableWidget, rows: list[tuple]) -> None:
+        table.setRowCount(len(rows))
+        for r, values in enumerate(rows):
+            for c, value in enumerate(values):
+                if isinstance(value, float):
+                    item = QTableWidgetItem(f"{value:,.1f}")
+                else:
+                    item = QTableWidgetItem(str(value))
+                if isinstance(value, (int, float)):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                else:
+                    item.setToolTip(str(value))
+                table.setItem(r, c, item)
+
+    def refresh(self) -> None:
+        if sql_stats.enabled():
+            log = self.stats.slow_log_path or "—"
+            self.status_lbl.setText(
+                f"Instrumentación activa. N+1 a partir de {self.stats.n_plus_one + 1} repeticiones; "
+                f"consultas lentas ≥ {self.stats.slow_ms:.0f} ms en: {log}"
+            )
+        else:
+            self.status_lbl.setText(
+                "Instrumentación inactiva. Inicie la aplicación con ADMIN_APP_SQL_STATS=1 para medir las consultas."
+            )
+        summary = self.stats.summary()
+        self._fill(self.statements_table, [
+            (s.shape, s.count, s.total_ms, s.p95_ms, s.max_ms, s.rows) for s in summary
+        ])
+        self._fill(self.n_plus_one_table, [
+            (f.caller, f.count, f.shape) for f in self.stats.n_plus_one_findings()
+        ])
+        self.btn_reset.setEnabled(bool(summary))
+
+    def _on_reset(self) -> None:
+        self.stats.reset()
+        self.refresh()
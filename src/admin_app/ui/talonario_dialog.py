@@ -22,6 +22,7 @@ from ..models import (
     ConfigurableProduct, ProductParameterTable, ProductParameterValue
 )
 from .. import repository as _repo
+from ..services.talonario_pricing import TalonarioPriceMatrix, get_talonario_price_matrix
 
 
 class TalonarioDialog(QDialog):
@@ -48,8 +49,8 @@ class TalonarioDialog(QDialog):
         self._param_tables: dict[str, int] = {} # nombre -> table_id
         self._param_values: dict[int, list[dict]] = {} # table_id -> lista de valores
         
-        # Cache de precios: (id_papel, id_tamano) -> { cantidad_int: precio_float }
-        self._pricing_matrix: dict[tuple[int, int], dict[int, float]] = {}
+        # Matriz de precios (id_papel, id_tamano) -> escalones, compartida entre diálogos
+        self._pricing_matrix: TalonarioPriceMatrix = TalonarioPriceMatrix()
         
         # ID del producto configurable "talonario"
         self._talonario_config_id: int | None = None
@@ -193,59 +194,15 @@ class TalonarioDialog(QDialog):
                 self._populate_combo(self.cbo_tamano, "tamaño", "tamaño")
                 self._populate_combo(self.cbo_papel, "tipo de papel", "tipo de papel")
                 
-                # 4. Construir Matriz de Precios
-                self._build_pricing_matrix()
+                # 4. Matriz de Precios (se reconstruye solo si cambiaron las tablas)
+                self._pricing_matrix = get_talonario_price_matrix(session, conf_prod.id)
                 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error al cargar datos: {e}")
 
-    def _build_pricing_matrix(self) -> None:
-        """Construye un mapa de precios optimizado para búsquedas rápidas."""
-        # 1. Encontrar IDs de tablas relevantes
-        tid_precio = self._param_tables.get("talonario") # Nombre de la tabla de precios
-        tid_cantidad = self._param_tables.get("cantidad")
-        
-        if not tid_precio or not tid_cantidad:
-            return
-
-        # 2. Crear mapa de ID Cantidad -> Valor Entero
-        qty_map = {}
-        for row in self._param_values.get(tid_cantidad, []):
-            try:
-                qty_val = int(row.get('cantidad', 0))
-                qty_id = row.get('_id')
-                if qty_id:
-                    qty_map[qty_id] = qty_val
-            except:
-                pass
-                
-        # 3. Procesar tabla de precios
-        # Estructura esperada: id_cantidad, id_tipo_de_papel, id_tamaño, precio
-        for row in self._param_values.get(tid_precio, []):
-            try:
-                r_qty_id = int(row.get('id_cantidad', 0))
-                r_papel_id = int(row.get('id_tipo_de_papel', 0))
-                
-                # Manejar posible variación en nombre de columna tamaño
-                r_tamano_id = row.get('id_tamaño')
-                if r_tamano_id is None:
-                    for k, v in row.items():
-                        if 'tamano' in k or 'tamaño' in k:
-                            r_tamano_id = v
-                            break
-                r_tamano_id = int(r_tamano_id) if r_tamano_id else 0
-                
-                precio = float(row.get('precio', 0.0))
-                
-                qty_val = qty_map.get(r_qty_id)
-                
-                if qty_val and r_papel_id and r_tamano_id:
-                    key = (r_papel_id, r_tamano_id)
-                    if key not in self._pricing_matrix:
-                        self._pricing_matrix[key] = {}
-                    self._pricing_matrix[key][qty_val] = precio
-            except Exception:
-                continue
+    def price_for(self, id_papel, id_tamano, cantidad: int) -> float:
+        """Subtotal de `cantidad` talonarios para la combinación (papel, tamaño)."""
+        return self._pricing_matrix.price_for(id_papel, id_tamano, cantidad)
 
     def _populate_combo(self, combo: QComboBox, table_name_part: str, json_key_part: str) -> None:
         """Helper para poblar combos buscando tablas y claves de forma flexible."""
@@ -327,45 +284,9 @@ class TalonarioDialog(QDialog):
         
         subtotal = 0.0
         
-        # Lógica de precios escalonada / greedy
+        # Precio escalonado por paquetes (greedy de mayor a menor)
         if id_papel and id_tamano and cantidad_input > 0:
-            # Obtener mapa de precios para esta combinación (Papel, Tamaño)
-            # key = (id_papel, id_tamano)
-            # value = { 1: 20.0, 5: 70.0, 10: 120.0 }
-            precios_qty = self._pricing_matrix.get((int(id_papel), int(id_tamano)), {})
-            
-            if precios_qty:
-                # Ordenar cantidades disponibles de mayor a menor (ej. 10, 5, 1)
-                cantidades_disponibles = sorted(precios_qty.keys(), reverse=True)
-                
-                remanente = cantidad_input
-                costo_acumulado = 0.0
-                
-                for q_break in cantidades_disponibles:
-                    if remanente <= 0:
-                        break
-                    
-                    if remanente >= q_break:
-                        num_paquetes = remanente // q_break
-                        precio_paquete = precios_qty[q_break]
-                        
-                        costo_acumulado += num_paquetes * precio_paquete
-                        remanente = remanente % q_break
-                
-                # Si queda remanente y no hay unidad 1 definida, 
-                # podríamos cobrar el remanente al precio de la unidad más pequeña disponible 
-                # o asumir precio unitario proporcional.
-                # Por ahora, asumimos que existe la unidad 1 o similar en la base de datos.
-                # Si queda remanente, significa que no se pudo cubrir con los breaks disponibles.
-                if remanente > 0:
-                    # Fallback: buscar el precio más bajo unitario disponible
-                    min_q = cantidades_disponibles[-1] # El más pequeño (ej. 1)
-                    precio_min = precios_qty[min_q]
-                    # Calcular proporcional si min_q > 1 (aunque idealmente min_q debería ser 1)
-                    unitario_fallback = precio_min / min_q
-                    costo_acumulado += remanente * unitario_fallback
-                
-                subtotal = costo_acumulado
+            subtotal = self.price_for(id_papel, id_tamano, cantidad_input)
         
         # Recargo copia
         recargo = 0.0
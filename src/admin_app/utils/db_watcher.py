@@ -28,6 +28,10 @@ class DbWatcher(QObject):
     def stop(self):
         self._timer.stop()
 
+    def check_now(self):
+        """Revisar una vez (para usarlo desde un planificador externo en vez del timer propio)."""
+        self._check_update()
+
     def _check_update(self):
         if not self.db_path.exists():
             return
@@ -0,0 +1,164 @@
+"""
+Auditoría del tiempo de importación al arrancar.
+
+Ejecuta `python -X importtime -c "import <módulo>"` en un intérprete nuevo
+(sin módulos ya cargados, como en un arranque en frío) y resume la salida:
+tiempo total, qué paquetes externos trae nuestro código y cuánto cuesta
+cada uno, y los módulos propios más lentos. Sirve para decidir qué diferir
+con `utils.lazy_import`.
+
+Uso:
+  python -m src.admin_app.utils.import_audit                 # arranque de la app
+  python -m src.admin_app.utils.import_audit --module src.admin_app.ui.sales_view --top 25
+  python -X importtime run_app.py 2> it.log; python -m src.admin_app.utils.import_audit --from-file it.log
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+
+DEFAULT_MODULE = "src.admin_app.__main__"
+OWN_PACKAGE = "src"
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# import time:  self [us] | cumulative | imported package
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+@dataclass(frozen=True, slots=True)
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    parent: str | None
+
+    @property
+    def own(self) -> bool:
+        return _is_own(self.module)
+
+    @property
+    def package(self) -> str:
+        """Paquete de primer nivel (o el módulo completo si es nuestro)."""
+        return self.module if self.own else self.module.split(".")[0]
+
+
+def _is_own(module: str | None) -> bool:
+    return bool(module) and (module == OWN_PACKAGE or module.startswith(OWN_PACKAGE + "."))
+
+
+def parse_importtime(text: str) -> list[ImportRecord]:
+    """Convertir la salida de `-X importtime` en registros con su importador."""
+    raw: list[tuple[str, int, int, int]] = []
+    for line in text.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            raw.append((match[4], int(match[1]), int(match[2]), len(match[3]) // 2))
+    # Los hijos se imprimen antes que su padre, con un nivel más de sangría
+    parents: list[str | None] = [None] * len(raw)
+    pending: dict[int, list[int]] = {}
+    for i, (module, _, _, depth) in enumerate(raw):
+        for child in pending.pop(depth + 1, []):
+            parents[child] = module
+        pending.setdefault(depth, []).append(i)
+    return [ImportRecord(m, s, c, d, parents[i]) for i, (m, s, c, d) in enumerate(raw)]
+
+
+def run_importtime(module: str = DEFAULT_MODULE, *, cwd: Path | str | None = None) -> str:
+    """Importar `module` en un intérprete nuevo y devolver la salida de `-X importtime`."""
+    env = dict(os.environ)
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(cwd or PROJECT_ROOT), env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"No se pudo importar {module}:\n{tail}")
+    return proc.stderr
+
+
+def total_ms(records: list[ImportRecord], module: str | None = None) -> float:
+    """Tiempo acumulado de `module` (o de todo lo importado en el nivel superior)."""
+    if module is not None:
+        return max((r.cumulative_us for r in records if r.module == module), default=0) / 1000.0
+    return sum(r.cumulative_us for r in records if r.depth == 0) / 1000.0
+
+
+def external_offenders(records: list[ImportRecord], n: int = 15) -> list[ImportRecord]:
+    """
+    Paquetes externos importados directamente por nuestro código, del más caro
+    al más barato (uno por paquete): son los candidatos a diferir.
+    """
+    best: dict[str, ImportRecord] = {}
+    for rec in records:
+        if rec.own or not _is_own(rec.parent):
+            continue
+        current = best.get(rec.package)
+        if current is None or rec.cumulative_us > current.cumulative_us:
+            best[rec.package] = rec
+    return sorted(best.values(), key=lambda r: r.cumulative_us, reverse=True)[:n]
+
+
+def own_offenders(records: list[ImportRecord], n: int = 15) -> list[ImportRecord]:
+    """Módulos propios con mayor tiempo propio (cuerpo del módulo, sin sus imports)."""
+    own = [r for r in records if r.own]
+    return sorted(own, key=lambda r: r.self_us, reverse=True)[:n]
+
+
+def by_package(records: list[ImportRecord], n: int = 15) -> list[tuple[str, float]]:
+    """Tiempo propio sumado por paquete de primer nivel, en ms."""
+    totals: dict[str, int] = {}
+    for rec in records:
+        key = "src (propio)" if rec.own else rec.package
+        totals[key] = totals.get(key, 0) + rec.self_us
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:n]
+    return [(name, us / 1000.0) for name, us in ranked]
+
+
+def format_report(records: list[ImportRecord], top: int = 15, module: str | None = None) -> str:
+    lines = [f"Tiempo total de importación: {total_ms(records, module):.1f} ms ({len(records)} módulos)", ""]
+    lines.append("Paquetes externos importados por el código propio (acumulado):")
+    for rec in external_offenders(records, top):
+        lines.append(f"  {rec.cumulative_us / 1000.0:8.1f} ms  {rec.module:<32} <- {rec.parent}")
+    lines.append("")
+    lines.append("Módulos propios más lentos (tiempo propio / acumulado):")
+    for rec in own_offenders(records, top):
+        lines.append(f"  {rec.self_us / 1000.0:8.1f} ms  {rec.cumulative_us / 1000.0:8.1f} ms  {rec.module}")
+    lines.append("")
+    lines.append("Tiempo propio por paquete:")
+    for name, ms in by_package(records, top):
+        lines.append(f"  {ms:8.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Auditar el tiempo de importación (-X importtime)")
+    p.add_argument("--module", default=DEFAULT_MODULE, help="Módulo a importar en frío")
+    p.add_argument("--from-file", help="Analizar una salida de -X importtime ya guardada")
+    p.add_argument("--top", type=int, default=15)
+    args = p.parse_args(argv)
+
+    if args.from_file:
+        text = Path(args.from_file).read_text(encoding="utf-8", errors="replace")
+        module = None
+    else:
+        text = run_importtime(args.module)
+        module = args.module
+    records = parse_importtime(text)
+    if not records:
+        print("No se encontraron líneas de -X importtime")
+        return 1
+    print(format_report(records, args.top, module))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Importación diferida de dependencias pesadas u opcionales.
+
+`lazy_module("requests")` devuelve un sustituto del módulo que solo lo
+importa al acceder al primer atributo, así `requests.get(...)` sigue
+funcionando igual pero el costo (urllib3, ssl, charset_normalizer...) no se
+paga al arrancar la aplicación sino en la primera petición.
+
+Con `optional=True` se devuelve None si el paquete no está instalado,
+igual que el patrón `try: import x / except: x = None`.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Módulo que se importa de verdad en el primer acceso a un atributo."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "cargado" if self.__dict__["_lazy_module"] is not None else "diferido"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name: str, *, optional: bool = False) -> types.ModuleType | None:
+    """Sustituto diferido de `import name`; None si `optional` y el paquete no existe."""
+    if name in sys.modules:
+        return sys.modules[name]
+    if optional and importlib.util.find_spec(name.partition(".")[0]) is None:
+        return None
+    return LazyModule(name)
+
+
+def is_loaded(module: types.ModuleType | None) -> bool:
+    """True si `module` ya se importó (para sustitutos diferidos) o es un módulo normal."""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return module is not None
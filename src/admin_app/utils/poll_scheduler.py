@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QWidget
+
+
+@dataclass(slots=True)
+class _Job:
+    name: str
+    interval_ms: int
+    callback: Callable[[], None]
+    idle_backoff: bool
+    pause_when_hidden: bool
+    current_ms: int = 0
+    due_at: float = 0.0
+
+
+class PollScheduler(QObject):
+    """
+    Un solo temporizador para todos los sondeos periódicos de la ventana principal
+    (reloj, notificaciones, DbWatcher, tablero).
+
+    Mientras la ventana está inactiva o minimizada, los trabajos con `idle_backoff`
+    duplican su intervalo en cada ejecución hasta `max_backoff` veces el original;
+    al volver a activarse recuperan el intervalo normal y se ejecutan enseguida.
+    """
+
+    def __init__(self, tick_ms: int = 1000, max_backoff: int = 12, parent=None):
+        super().__init__(parent)
+        self.max_backoff = max_backoff
+        self._jobs: dict[str, _Job] = {}
+        self._window: QWidget | None = None
+        self._active = True
+        self._hidden = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(tick_ms)
+        self._timer.timeout.connect(self.tick)
+
+    @staticmethod
+    def _now_ms() -> float:
+        return time.monotonic() * 1000.0
+
+    def add_job(
+        self,
+        name: str,
+        interval_ms: int,
+        callback: Callable[[], None],
+        *,
+        idle_backoff: bool = True,
+        pause_when_hidden: bool = False,
+        delay_ms: int | None = None,
+    ) -> None:
+        """Registrar (o reemplazar) un trabajo; la primera ejecución es tras `delay_ms` (por defecto, un intervalo)."""
+        job = _Job(name, interval_ms, callback, idle_backoff, pause_when_hidden, current_ms=interval_ms)
+        job.due_at = self._now_ms() + (interval_ms if delay_ms is None else delay_ms)
+        self._jobs[name] = job
+
+    def remove_job(self, name: str) -> None:
+        self._jobs.pop(name, None)
+
+    def current_interval(self, name: str) -> int:
+        return self._jobs[name].current_ms
+
+    def start(self) -> None:
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._timer.stop()
+
+    def watch(self, window: QWidget) -> None:
+        """Seguir activación/minimizado de `window` para aplicar o retirar el backoff."""
+        self._window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if obj is self._window and event.type() in (QEvent.Type.ActivationChange, QEvent.Type.WindowStateChange):
+            self.set_active(obj.isActiveWindow() and not obj.isMinimized(), hidden=obj.isMinimized())
+        return super().eventFilter(obj, event)
+
+    def set_active(self, active: bool, *, hidden: bool = False) -> None:
+        was_active = self._active
+        self._active = active
+        self._hidden = hidden
+        if active and not was_active:
+            # De vuelta al frente: intervalo normal y sondeo inmediato
+            now = self._now_ms()
+            for job in self._jobs.values():
+                if job.idle_backoff and job.current_ms != job.interval_ms:
+                    job.current_ms = job.interval_ms
+                    job.due_at = now
+            self.tick()
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def tick(self) -> None:
+        now = self._now_ms()
+        for job in list(self._jobs.values()):
+            if job.pause_when_hidden and self._hidden:
+                continue
+            if now < job.due_at:
+                continue
+            try:
+                job.callback()
+            except Exception as e:
+                print(f"Error en sondeo '{job.name}': {e}")
+            if job.idle_backoff and not self._active:
+                job.current_ms = min(job.current_ms * 2, job.interval_ms * self.max_backoff)
+            else:
+                job.current_ms = job.interval_ms
+            job.due_at = now + job.current_ms
@@ -0,0 +1,328 @@
+"""
+Perfilador opcional de las rutas calientes de la interfaz.
+
+Con ADMIN_APP_PROFILE=chrome (o 1) o ADMIN_APP_PROFILE=speedscope, al
+arrancar se envuelven los métodos `load_data`, `refresh*`, `reload*` y
+`_load_*` de las vistas y el `__init__` de los diálogos pesados. Cada
+llamada queda como un tramo con su duración y la cantidad de sentencias
+SQL emitidas en ese hilo. Un latido de QTimer mide cuánto se atrasa el
+bucle de eventos (congelamientos).
+
+Al salir, la sesión se exporta a `profiles/` dentro de la carpeta de datos
+(o a ADMIN_APP_PROFILE_OUT) en formato Chrome trace-event (abrir en
+chrome://tracing o Perfetto) o speedscope (https://www.speedscope.app).
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import inspect
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from PySide6.QtCore import QObject, QTimer
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+FORMATS = ("chrome", "speedscope")
+HOT_METHOD_RE = re.compile(r"^(load_data|refresh\w*|reload\w*|_load_\w+)$")
+
+# Módulos de vistas cuyas clases se instrumentan (incluye sub-paneles como los de contabilidad)
+VIEW_MODULES = (
+    "accounting_view", "config_view", "customers_view", "daily_reports_view", "deliveries_view",
+    "delivery_zones_view", "home_view", "orders_view", "payables_view", "pending_payments_view",
+    "sales_view", "simple_products_view", "workers_view",
+)
+HEAVY_DIALOGS = (
+    ("sale_dialog", "SaleDialog"),
+    ("corporeo_dialog", "CorporeoDialog"),
+    ("talonario_dialog", "TalonarioDialog"),
+)
+
+HEARTBEAT_MS = 50
+STALL_THRESHOLD_MS = 100
+MAX_SPANS = 200_000
+
+_PROFILED_ATTR = "__ui_profiled__"
+_UI_PACKAGE = __name__.rsplit(".", 2)[0] + ".ui"
+
+
+def profile_format() -> str | None:
+    """Formato pedido por ADMIN_APP_PROFILE, o None si el perfilado está apagado."""
+    value = os.getenv("ADMIN_APP_PROFILE", "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return None
+    return value if value in FORMATS else "chrome"
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    category: str
+    thread: int
+    start_ns: int
+    open_seq: int
+    depth: int
+    end_ns: int = 0
+    close_seq: int = 0
+    args: dict = field(default_factory=dict)
+
+
+class _ThreadState(threading.local):
+    def __init__(self) -> None:
+        self.queries = 0
+        self.depth = 0
+
+
+class UiProfiler:
+    """Acumula tramos (llamadas envueltas y congelamientos) y los exporta."""
+
+    def __init__(self) -> None:
+        self.origin_ns = time.perf_counter_ns()
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._local = _ThreadState()
+        self._patched: list[tuple[type, str, object]] = []
+        self._listening = False
+        self._monitor: StallMonitor | None = None
+
+    # --- registro ---------------------------------------------------------
+
+    def start(self) -> None:
+        """Empezar a contar sentencias SQL de todos los engines."""
+        if not self._listening:
+            event.listen(Engine, "before_cursor_execute", self._on_execute)
+            self._listening = True
+
+    def stop(self) -> None:
+        if self._listening:
+            event.remove(Engine, "before_cursor_execute", self._on_execute)
+            self._listening = False
+        if self._monitor is not None:
+            self._monitor.stop()
+            self._monitor = None
+
+    def _on_execute(self, *args) -> None:
+        self._local.queries += 1
+
+    def _append(self, span: Span) -> None:
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(span)
+
+    def call(self, name: str, category: str, fn: Callable, *args, **kwargs):
+        local = self._local
+        queries_before = local.queries
+        span = Span(name, category, threading.get_ident(), time.perf_counter_ns(), next(self._seq), local.depth)
+        local.depth += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            local.depth -= 1
+            span.end_ns = time.perf_counter_ns()
+            span.close_seq = next(self._seq)
+            span.args["queries"] = local.queries - queries_before
+            self._append(span)
+
+    def record_stall(self, start_ns: int, end_ns: int) -> None:
+        seq = next(self._seq)
+        self._append(Span(
+            "Bucle de eventos bloqueado", "stall", threading.get_ident(), start_ns, seq, 0,
+            end_ns=end_ns, close_seq=seq, args={"stall_ms": round((end_ns - start_ns) / 1e6, 1)},
+        ))
+
+    def watch_event_loop(self, parent: QObject | None = None, **kwargs) -> StallMonitor:
+        self._monitor = StallMonitor(self, parent=parent, **kwargs)
+        self._monitor.start()
+        return self._monitor
+
+    # --- instrumentación --------------------------------------------------
+
+    def wrap(self, cls: type, method: str, category: str) -> None:
+        original = cls.__dict__.get(method)
+        if not callable(original) or getattr(original, _PROFILED_ATTR, False):
+            return
+        name = f"{cls.__name__}.{method}"
+        max_args = _positional_limit(original)
+        profiler = self
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            # Las señales de Qt pasan argumentos extra (p. ej. `checked`) si el
+            # slot acepta *args; se recortan a lo que acepta el original.
+            if max_args is not None and len(args) > max_args:
+                args = args[:max_args]
+            return profiler.call(name, category, original, *args, **kwargs)
+
+        setattr(wrapper, _PROFILED_ATTR, True)
+        setattr(cls, method, wrapper)
+        self._patched.append((cls, method, original))
+
+    def instrument_class(self, cls: type, category: str = "view") -> None:
+        for method in list(vars(cls)):
+            if HOT_METHOD_RE.match(method):
+                self.wrap(cls, method, category)
+
+    def install(self) -> None:
+        """Instrumentar las vistas y diálogos pesados de la app (antes de crear la ventana)."""
+        from PySide6.QtWidgets import QWidget
+
+        for module_name in VIEW_MODULES:
+            module = importlib.import_module(f"{_UI_PACKAGE}.{module_name}")
+            for obj in vars(module).values():
+                if isinstance(obj, type) and issubclass(obj, QWidget) and obj.__module__ == module.__name__:
+                    self.instrument_class(obj)
+        for module_name, class_name in HEAVY_DIALOGS:
+            module = importlib.import_module(f"{_UI_PACKAGE}.{module_name}")
+            self.wrap(getattr(module, class_name), "__init__", "dialog")
+
+    def uninstall(self) -> None:
+        for cls, method, original in reversed(self._patched):
+            setattr(cls, method, original)
+        self._patched.clear()
+
+    # --- exportación ------------------------------------------------------
+
+    def _ordered(self) -> list[Span]:
+        with self._lock:
+            return sorted(self.spans, key=lambda s: s.open_seq)
+
+    def _us(self, ns: int) -> float:
+        return round((ns - self.origin_ns) / 1000.0, 3)
+
+    def to_chrome_trace(self) -> dict:
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name, "cat": s.category, "ph": "X", "pid": pid, "tid": s.thread,
+                "ts": self._us(s.start_ns), "dur": round((s.end_ns - s.start_ns) / 1000.0, 3), "args": s.args,
+            }
+            for s in self._ordered()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_speedscope(self) -> dict:
+        frames: list[dict] = []
+        frame_ids: dict[str, int] = {}
+        by_profile: dict[str, list[Span]] = {}
+        for s in self._ordered():
+            key = "Bucle de eventos" if s.category == "stall" else f"Hilo {s.thread}"
+            by_profile.setdefault(key, []).append(s)
+
+        profiles = []
+        for key, spans in by_profile.items():
+            marks = []
+            for s in spans:
+                label = f"{s.name} ({s.args['queries']} q)" if "queries" in s.args else s.name
+                frame = frame_ids.get(label)
+                if frame is None:
+                    frame = frame_ids[label] = len(frames)
+                    frames.append({"name": label})
+                # Los cierres de tramos instantáneos (stall) van justo después de su apertura
+                marks.append((s.open_seq, 0, {"type": "O", "frame": frame, "at": self._us(s.start_ns) / 1000.0}))
+                marks.append((s.close_seq, 1, {"type": "C", "frame": frame, "at": self._us(s.end_ns) / 1000.0}))
+            marks.sort(key=lambda m: (m[0], m[1]))
+            events = [m[2] for m in marks]
+            profiles.append({
+                "type": "evented", "name": key, "unit": "milliseconds",
+                "startValue": events[0]["at"], "endValue": max(e["at"] for e in events), "events": events,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": "Sistema Admin UI", "exporter": "admin_app.ui_profiler",
+            "shared": {"frames": frames}, "profiles": profiles,
+        }
+
+    def export(self, path: Path | str, fmt: str = "chrome") -> Path:
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt!r}")
+        data = self.to_chrome_trace() if fmt == "chrome" else self.to_speedscope()
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return target
+
+
+class StallMonitor(QObject):
+    """Latido periódico: si llega tarde más de `threshold_ms`, el bucle estuvo bloqueado."""
+
+    def __init__(self, profiler: UiProfiler, interval_ms: int = HEARTBEAT_MS,
+                 threshold_ms: int = STALL_THRESHOLD_MS, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.interval_ms = interval_ms
+        self.threshold_ns = threshold_ms * 1_000_000
+        self.total_stall_ms = 0.0
+        self._last_ns = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._beat)
+
+    def start(self) -> None:
+        self._last_ns = time.perf_counter_ns()
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._timer.stop()
+
+    def _beat(self) -> None:
+        now = time.perf_counter_ns()
+        expected = self._last_ns + self.interval_ms * 1_000_000
+        if now - expected > self.threshold_ns:
+            self.profiler.record_stall(expected, now)
+            self.total_stall_ms += (now - expected) / 1e6
+        self._last_ns = now
+
+
+def _positional_limit(fn: Callable) -> int | None:
+    """Cantidad máxima de posicionales que acepta `fn` (None si acepta *args)."""
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    count = 0
+    for p in params:
+        if p.kind is p.VAR_POSITIONAL:
+            return None
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD):
+            count += 1
+    return count
+
+
+def default_output_path(fmt: str) -> Path:
+    override = os.getenv("ADMIN_APP_PROFILE_OUT")
+    if override:
+        return Path(override).expanduser()
+    from ..db import get_data_dir
+    suffix = ".speedscope.json" if fmt == "speedscope" else ".trace.json"
+    return get_data_dir() / "profiles" / f"ui-{datetime.now():%Y%m%d-%H%M%S}{suffix}"
+
+
+def start_from_env(app) -> UiProfiler | None:
+    """Si ADMIN_APP_PROFILE está activo, instrumentar y exportar al cerrar la aplicación."""
+    fmt = profile_format()
+    if fmt is None:
+        return None
+    profiler = UiProfiler()
+    profiler.install()
+    profiler.start()
+    profiler.watch_event_loop(parent=app)
+
+    def _export() -> None:
+        profiler.stop()
+        path = profiler.export(default_output_path(fmt), fmt)
+        print(f"Perfil de interfaz guardado en {path}")
+
+    app.aboutToQuit.connect(_export)
+    return profiler
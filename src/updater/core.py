@@ -8,8 +8,12 @@ import subprocess
 from dataclasses import dataclass
 from typing import Optional, Tuple
 from pathlib import Path
+import urllib.parse
 import urllib.request
 
+from .download import DEFAULT_WORKERS, download_all
+from .manifest import Diff, UnsafeManifest, diff_local, safe_path
+
 # Asumimos que version.py está en src/
 try:
     from src.version import VERSION as CURRENT_VERSION
@@ -28,34 +32,39 @@ logging.basicConfig(
 @dataclass
 class UpdateInfo:
     version: str
-    download_url: str
+    download_url: str  # Base de los objetos (objects/<sha[:2]>/<sha>)
     release_notes: str = ""
+    manifest: Optional[dict] = None
 
 class Updater:
-    def __init__(self, update_url: str, app_root: str):
-        self.update_url = update_url  # URL donde está versions.json
+    """
+    Actualizador por manifiesto: `latest.json` lista cada archivo con su
+    SHA-256 y solo se descargan los que difieren de la instalación local.
+    Los archivos verificados se preparan junto a su destino y se cambian con
+    `os.replace`; lo reemplazado queda en `backup_update/` como enlace duro
+    (sin copiar datos). Un diario en disco permite deshacer un cambio a
+    medias, incluso tras un corte de luz.
+    """
+
+    def __init__(self, update_url: str, app_root: str, workers: int = DEFAULT_WORKERS):
+        self.update_url = update_url  # URL de latest.json (manifiesto)
         self.app_root = Path(app_root)
+        self.workers = workers
         self.temp_dir = self.app_root / "temp_update"
         self.backup_dir = self.app_root / "backup_update"
         self.status_file = self.app_root / "update_status.json"
+        self.journal_file = self.app_root / "update_journal.json"
+        self.installed_file = self.app_root / "installed_manifest.json"
 
     def check_for_updates(self) -> Optional[UpdateInfo]:
         """Consulta el manifiesto remoto y compara versiones."""
         try:
             logging.info(f"Buscando actualizaciones en: {self.update_url}")
-            
-            # --- Simulación de Fetch (Reemplazar con requests.get o urllib real) ---
-            # En producción: 
-            # with urllib.request.urlopen(self.update_url) as url:
-            #     data = json.loads(url.read().decode())
-            
-            # MOCK para el ejemplo (simulamos que leemos esto del servidor)
-            # data = {"latest_version": "2.0.3", "url": "http://server/app.zip"}
-            
-            # Si quieres probarlo real, descomenta:
-            # return self._real_check()
-            return None # Por defecto no hay update en este diseño mock
-            
+            self.recover()
+            with urllib.request.urlopen(self.update_url, timeout=10) as resp:
+                data = json.loads(resp.read().decode("utf-8"))
+            base = urllib.parse.urljoin(self.update_url, data.get("base_url") or ".")
+            return UpdateInfo(data["version"], base, data.get("release_notes", ""), manifest=data)
         except Exception as e:
             logging.error(f"Error buscando actualizaciones: {e}")
             return None
@@ -79,19 +88,23 @@ class Updater:
 
         try:
             logging.info(f"Iniciando actualización a {info.version}...")
-            
-            # A. Descargar (Mock)
-            self._download_artifact(info.download_url)
-            
-            # B. Backup versión actual
+            self.recover()
+            manifest = info.manifest or self._fetch_manifest()
+            diff = diff_local(self.app_root, manifest, self._load_json(self.installed_file))
+            logging.info(f"Archivos a descargar: {len(diff.changed)} ({diff.download_bytes} bytes), a borrar: {len(diff.removed)}")
+
+            # A. Descargar solo lo que cambió (se reanuda si quedó a medias)
+            staged = self._download_artifact(info.download_url, diff)
+
+            # B. Backup (enlaces duros) y C. cambio atómico archivo por archivo
             self._create_backup()
-            
-            # C. Instalar nueva versión (Sobreescribir archivos)
-            # Aquí se extraería el ZIP sobre self.app_root
-            self._install_files()
-            
-            # D. Actualizar version.py localmente para reflejar el cambio
-            self._update_local_version_file(info.version)
+            self._install_files(diff, staged)
+
+            # D. Actualizar version.py si el manifiesto no lo trae
+            self._save_json(self.installed_file, manifest)
+            if "src/version.py" not in manifest.get("files", {}):
+                self._update_local_version_file(info.version)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
             
             # E. Limpiar estado de fallos si todo salió bien
             self._save_status({"failed_attempts": 0, "last_check": time.time()})
@@ -109,27 +122,71 @@ class Updater:
             self._restore_backup()
             return False
 
-    def _download_artifact(self, url: str):
-        # Implementar descarga a self.temp_dir
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-        self.temp_dir.mkdir()
-        # urllib.request.urlretrieve(url, self.temp_dir / "update.zip")
-        pass
+    def _fetch_manifest(self) -> dict:
+        with urllib.request.urlopen(self.update_url, timeout=10) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def _download_artifact(self, url: str, diff: Diff) -> dict:
+        # temp_dir se conserva entre intentos: las partes ya bajadas no se repiten
+        return download_all(url, diff.changed, self.temp_dir, workers=self.workers)
 
     def _create_backup(self):
-        # Hacer copia de src/ a backup/
+        # El backup anterior se descarta; el nuevo se llena con enlaces duros en _install_files
         if self.backup_dir.exists():
             shutil.rmtree(self.backup_dir)
-        # shutil.copytree(...) 
-        pass
+        self.backup_dir.mkdir(parents=True)
 
-    def _install_files(self):
-        # Descomprimir y mover
-        pass
+    @staticmethod
+    def _link_or_copy(src: Path, dst: Path):
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if dst.exists():
+            dst.unlink()
+        try:
+            os.link(src, dst)
+        except OSError:
+            # Otro volumen o sistema de archivos sin enlaces duros
+            shutil.copy2(src, dst)
+
+    def _install_files(self, diff: Diff, staged: dict):
+        # 1) Dejar cada archivo nuevo junto a su destino (mismo volumen => os.replace atómico)
+        journal = {"staged": [e.path for e in diff.changed], "replaced": [], "added": [], "removed": []}
+        self._save_json(self.journal_file, journal)
+        pending = []
+        for entry in diff.changed:
+            target = safe_path(self.app_root, entry.path)
+            new = target.with_name(target.name + ".new")
+            self._link_or_copy(staged[entry.path], new)
+            pending.append((entry.path, target, new))
+
+        # 2) Cambiar, anotando cada paso en el diario antes de darlo
+        for rel, target, new in pending:
+            if target.exists():
+                self._link_or_copy(target, safe_path(self.backup_dir, rel))
+                journal["replaced"].append(rel)
+            else:
+                journal["added"].append(rel)
+            self._save_json(self.journal_file, journal)
+            os.replace(new, target)
+        for rel in diff.removed:
+            target = safe_path(self.app_root, rel)
+            if not target.exists():
+                continue
+            self._link_or_copy(target, safe_path(self.backup_dir, rel))
+            journal["removed"].append(rel)
+            self._save_json(self.journal_file, journal)
+            target.unlink()
+        self.journal_file.unlink(missing_ok=True)
+
+    def recover(self) -> bool:
+        """Deshacer un cambio interrumpido (si quedó un diario). Devuelve True si hubo algo que deshacer."""
+        if not self.journal_file.exists():
+            return False
+        self._restore_backup()
+        return True
 
     def _update_local_version_file(self, new_ver: str):
         ver_file = self.app_root / "src" / "version.py"
+        ver_file.parent.mkdir(parents=True, exist_ok=True)
         with open(ver_file, 'w') as f:
             f.write(f'VERSION = "{new_ver}"\n')
 
@@ -145,10 +202,43 @@ class Updater:
     def _save_status(self, data: dict):
         with open(self.status_file, 'w') as f:
             json.dump(data, f)
-            
+
+    def _load_json(self, path: Path) -> dict:
+        if path.exists():
+            try:
+                return json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                pass
+        return {}
+
+    def _save_json(self, path: Path, data: dict):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
     def _restore_backup(self):
         logging.info("Restaurando copia de seguridad...")
-        if self.backup_dir.exists():
-            # lógica inversa de install
-            pass
+        journal = self._load_json(self.journal_file)
+        for rel in journal.get("replaced", []) + journal.get("removed", []):
+            saved, target = self._journal_path(self.backup_dir, rel), self._journal_path(self.app_root, rel)
+            if saved is not None and target is not None and saved.exists():
+                os.replace(saved, target)
+        for rel in journal.get("added", []):
+            target = self._journal_path(self.app_root, rel)
+            if target is not None:
+                target.unlink(missing_ok=True)
+        for rel in journal.get("staged", []):
+            target = self._journal_path(self.app_root, rel)
+            if target is not None:
+                target.with_name(target.name + ".new").unlink(missing_ok=True)
+        self.journal_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _journal_path(root: Path, rel: str) -> Optional[Path]:
+        # Un diario alterado no debe mover ni borrar nada fuera de la app: se omite la entrada
+        try:
+            return safe_path(root, rel)
+        except UnsafeManifest as e:
+            logging.error(f"Entrada del diario ignorada: {e}")
+            return None
 
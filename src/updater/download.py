@@ -0,0 +1,162 @@
+"""
+Descarga paralela, por rangos y reanudable de objetos de actualización.
+
+Cada objeto se baja a `<staging>/<sha>`. Los archivos grandes se parten en
+rangos (`Range: bytes=a-b`) que se bajan en paralelo a `<sha>.<n>.part`; si
+una transferencia se corta, el siguiente intento pide solo lo que falta de
+cada parte. Si el servidor no atiende rangos (responde 200), el objeto se
+baja entero en un solo flujo. Al terminar se unen las partes y se verifica
+el SHA-256: un objeto que no coincide se descarta y la descarga falla.
+"""
+
+import hashlib
+import http.client
+import logging
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from .manifest import FileEntry, check_sha256, object_path, sha256_file
+
+DEFAULT_WORKERS = 4
+RANGE_SIZE = 4 * 1024 * 1024
+READ_BLOCK = 64 * 1024
+RETRIES = 3
+TIMEOUT = 30
+
+
+class HashMismatch(Exception):
+    pass
+
+
+class _RangeIgnored(Exception):
+    """El servidor respondió 200 a un pedido con Range."""
+
+
+def _ranges(size: int, range_size: int) -> List[Tuple[int, int]]:
+    if size <= 0:
+        return [(0, -1)]
+    return [(start, min(start + range_size, size) - 1) for start in range(0, size, range_size)]
+
+
+def _fetch_range(url: str, part: Path, start: int, end: int, timeout: float) -> None:
+    """Completar `part` con los bytes [start, end] de `url`, continuando desde lo ya bajado."""
+    expected = end - start + 1
+    for attempt in range(1, RETRIES + 1):
+        have = part.stat().st_size if part.exists() else 0
+        if have >= expected:
+            return
+        request = urllib.request.Request(url, headers={"Range": f"bytes={start + have}-{end}"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                if resp.status != 206:
+                    # Se cierra sin leer el cuerpo: fetch_object lo baja entero una sola vez
+                    raise _RangeIgnored(url)
+                with open(part, "ab") as out:
+                    for block in iter(lambda: resp.read(READ_BLOCK), b""):
+                        out.write(block)
+        except (OSError, http.client.HTTPException) as ex:
+            logging.warning(f"Descarga interrumpida ({url}, intento {attempt}): {ex}")
+            if attempt == RETRIES:
+                raise
+            time.sleep(0.2 * attempt)
+    if part.stat().st_size < expected:
+        raise IOError(f"Descarga incompleta: {url}")
+
+
+def _fetch_whole(url: str, part: Path, timeout: float) -> None:
+    """Bajar `url` completo en un solo flujo (servidores sin soporte de Range; no se reanuda)."""
+    for attempt in range(1, RETRIES + 1):
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp, open(part, "wb") as out:
+                for block in iter(lambda: resp.read(READ_BLOCK), b""):
+                    out.write(block)
+            return
+        except (OSError, http.client.HTTPException) as ex:
+            logging.warning(f"Descarga interrumpida ({url}, intento {attempt}): {ex}")
+            if attempt == RETRIES:
+                raise
+            time.sleep(0.2 * attempt)
+
+
+def fetch_object(
+    base_url: str,
+    entry: FileEntry,
+    staging: Path,
+    pool: ThreadPoolExecutor,
+    *,
+    range_size: Optional[int] = None,
+    timeout: float = TIMEOUT,
+) -> Path:
+    """Bajar un objeto (reutilizando lo ya descargado) y verificar su hash."""
+    range_size = range_size or RANGE_SIZE
+    target = staging / check_sha256(entry.sha256)
+    if target.exists() and sha256_file(target) == entry.sha256:
+        return target
+    url = base_url.rstrip("/") + "/" + object_path(entry.sha256)
+    spans = _ranges(entry.size, range_size)
+    parts = [staging / f"{entry.sha256}.{n}.part" for n in range(len(spans))]
+    if entry.size > 0:
+        futures = [pool.submit(_fetch_range, url, p, a, b, timeout) for p, (a, b) in zip(parts, spans)]
+        ignored = False
+        for f in futures:
+            try:
+                f.result()
+            except _RangeIgnored:
+                ignored = True
+        if ignored:
+            for p in parts:
+                p.unlink(missing_ok=True)
+            parts = parts[:1]
+            _fetch_whole(url, parts[0], timeout)
+
+    digest = hashlib.sha256()
+    tmp = staging / f"{entry.sha256}.tmp"
+    with open(tmp, "wb") as out:
+        for p in parts:
+            if not p.exists():
+                continue
+            with open(p, "rb") as src:
+                for block in iter(lambda: src.read(READ_BLOCK), b""):
+                    digest.update(block)
+                    out.write(block)
+    for p in parts:
+        if p.exists():
+            p.unlink()
+    if digest.hexdigest() != entry.sha256:
+        tmp.unlink()
+        raise HashMismatch(f"{entry.path}: SHA-256 no coincide")
+    os.replace(tmp, target)
+    return target
+
+
+def download_all(
+    base_url: str,
+    files: Iterable[FileEntry],
+    staging: Path,
+    *,
+    workers: int = DEFAULT_WORKERS,
+    range_size: Optional[int] = None,
+    progress: Optional[Callable[[FileEntry], None]] = None,
+) -> dict:
+    """Bajar en paralelo los objetos de `files`; devuelve {ruta relativa: archivo preparado}."""
+    staging.mkdir(parents=True, exist_ok=True)
+    files = list(files)
+    unique = {}
+    for entry in files:
+        unique.setdefault(entry.sha256, entry)
+    # Un pool para los rangos y otro para los archivos, así un archivo no bloquea a sus propias partes
+    with ThreadPoolExecutor(max_workers=workers) as ranges, ThreadPoolExecutor(max_workers=workers) as objects:
+        futures = {
+            sha: objects.submit(fetch_object, base_url, entry, staging, ranges, range_size=range_size)
+            for sha, entry in unique.items()
+        }
+        staged = {}
+        for sha, future in futures.items():
+            staged[sha] = future.result()
+            if progress:
+                progress(unique[sha])
+    return {entry.path: staged[entry.sha256] for entry in files}
@@ -0,0 +1,153 @@
+"""
+Manifiesto de actualización: lista de archivos de la aplicación con su SHA-256.
+
+El servidor publica `latest.json` con la versión y el manifiesto, y cada
+archivo como objeto direccionado por contenido en `objects/<sha[:2]>/<sha>`.
+Dos versiones que comparten un archivo comparten el objeto, y el cliente
+solo descarga los hashes que no tiene.
+
+El manifiesto viene de la red: sus rutas deben ser relativas y quedar dentro
+de la app, y sus hashes ser SHA-256 en hexadecimal (con ellos se arman rutas
+de `staging`). Si no, `UnsafeManifest`.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Qué se distribuye por defecto (relativo a la raíz de la app)
+DEFAULT_INCLUDE = ("src", "assets", "run_app.py", "launcher.py", "requirements.txt")
+EXCLUDED_DIRS = {"__pycache__", ".git", ".pytest_cache"}
+EXCLUDED_SUFFIXES = {".pyc", ".pyo", ".log", ".bak"}
+
+HASH_BLOCK = 1024 * 1024
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UnsafeManifest(Exception):
+    pass
+
+
+def check_sha256(sha: str) -> str:
+    if not isinstance(sha, str) or not SHA256_RE.match(sha):
+        raise UnsafeManifest(f"SHA-256 inválido en el manifiesto: {sha!r}")
+    return sha
+
+
+def check_relpath(rel: str) -> str:
+    """Ruta del manifiesto: relativa, con `/`, sin `..` ni unidad de disco."""
+    if (not isinstance(rel, str) or not rel or rel.startswith("/") or "\\" in rel or ":" in rel
+            or any(part in ("", ".", "..") for part in rel.split("/"))):
+        raise UnsafeManifest(f"Ruta no permitida en el manifiesto: {rel!r}")
+    return rel
+
+
+def safe_path(root: Path, rel: str) -> Path:
+    """`root / rel`, comprobando que (resueltos los enlaces) no salga de `root`."""
+    path = Path(root) / check_relpath(rel)
+    if not path.resolve().is_relative_to(Path(root).resolve()):
+        raise UnsafeManifest(f"Ruta fuera de la aplicación: {rel!r}")
+    return path
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def object_path(sha: str) -> str:
+    """Ruta relativa del objeto en el servidor."""
+    return f"objects/{sha[:2]}/{sha}"
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    path: str
+    sha256: str
+    size: int
+
+
+@dataclass(frozen=True)
+class Diff:
+    changed: List[FileEntry]
+    removed: List[str]
+
+    @property
+    def download_bytes(self) -> int:
+        return sum(e.size for e in self.changed)
+
+
+def iter_files(root: Path, include: Iterable[str] = DEFAULT_INCLUDE) -> Iterable[Path]:
+    for item in include:
+        path = root / item
+        if path.is_file():
+            yield path
+        elif path.is_dir():
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+                for name in sorted(filenames):
+                    if Path(name).suffix not in EXCLUDED_SUFFIXES:
+                        yield Path(dirpath) / name
+
+
+def build_manifest(root: Path, version: str, include: Iterable[str] = DEFAULT_INCLUDE, release_notes: str = "") -> dict:
+    root = Path(root)
+    files = {}
+    for path in iter_files(root, include):
+        rel = path.relative_to(root).as_posix()
+        files[rel] = {"sha256": sha256_file(path), "size": path.stat().st_size}
+    return {"version": version, "release_notes": release_notes, "base_url": "", "files": files}
+
+
+def publish(root: Path, manifest: dict, out_dir: Path) -> int:
+    """Copiar al directorio del servidor los objetos que falten y escribir `latest.json`. Devuelve objetos nuevos."""
+    out_dir = Path(out_dir)
+    added = 0
+    for rel, meta in manifest["files"].items():
+        target = out_dir / object_path(meta["sha256"])
+        if target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(Path(root) / rel, target)
+        added += 1
+    (out_dir / "latest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return added
+
+
+def entries(manifest: dict) -> Dict[str, FileEntry]:
+    return {
+        check_relpath(rel): FileEntry(rel, check_sha256(m["sha256"]), int(m["size"]))
+        for rel, m in manifest.get("files", {}).items()
+    }
+
+
+def diff_local(app_root: Path, manifest: dict, installed: Optional[dict] = None) -> Diff:
+    """
+    Archivos a descargar (ausentes o con otro contenido) y a borrar (estaban en
+    el manifiesto instalado y ya no están). Solo se calcula el hash de los
+    archivos cuyo tamaño coincide.
+    """
+    app_root = Path(app_root)
+    wanted = entries(manifest)
+    changed = []
+    for rel, entry in sorted(wanted.items()):
+        path = safe_path(app_root, rel)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            changed.append(entry)
+            continue
+        if size != entry.size or sha256_file(path) != entry.sha256:
+            changed.append(entry)
+    removed = sorted(set((installed or {}).get("files", {})) - set(wanted))
+    for rel in removed:
+        safe_path(app_root, rel)
+    return Diff(changed, removed)
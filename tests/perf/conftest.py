@@ -0,0 +1,191 @@
+"""
+Banco de pruebas de rendimiento sobre el conjunto de datos sintético.
+
+Cada medición registra tiempo (mediana de varias rondas), cantidad de
+sentencias SQL y pico de memoria (tracemalloc), y se compara con
+`baseline.json` para el mismo tamaño de datos. Una regresión falla la
+prueba con una tabla métrica / línea base / actual / límite.
+
+Por defecto solo se exige la cantidad de consultas, que es determinista; el
+tiempo y la memoria dependen de la máquina y de la carga, y se exigen solo
+con ADMIN_PERF_STRICT=1.
+
+Variables de entorno:
+  ADMIN_PERF_SALES   ventas del conjunto sintético (por defecto 2000)
+  ADMIN_PERF_ROUNDS  rondas de tiempo por medición (por defecto 5)
+  ADMIN_PERF_UPDATE  si vale 1, reescribe la línea base con lo medido
+  ADMIN_PERF_STRICT  si vale 1, también falla por tiempo y memoria
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.models import Base
+from src.admin_app.services.synthetic_data import DatasetSpec, generate_dataset
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_SALES = 2000
+DEFAULT_ROUNDS = 5
+
+# Márgenes antes de considerar regresión: el tiempo y la memoria varían entre
+# máquinas; la cantidad de consultas es determinista y no puede crecer.
+TIME_FACTOR = 2.0
+TIME_SLACK_MS = 5.0
+MEMORY_FACTOR = 1.5
+MEMORY_SLACK_KIB = 256.0
+
+
+@dataclass(frozen=True, slots=True)
+class Measurement:
+    wall_ms: float
+    queries: int
+    peak_kib: float
+
+
+class _QueryCounter:
+    """Cuenta sentencias de todos los engines (print_order_pdf abre el suyo)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+    def close(self) -> None:
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+
+
+def _regressions(current: Measurement, baseline: dict, *, strict: bool = False) -> list[tuple[str, float, float, float]]:
+    limits = {"queries": baseline["queries"]}
+    if strict:
+        limits["wall_ms"] = baseline["wall_ms"] * TIME_FACTOR + TIME_SLACK_MS
+        limits["peak_kib"] = baseline["peak_kib"] * MEMORY_FACTOR + MEMORY_SLACK_KIB
+    return [
+        (metric, baseline[metric], getattr(current, metric), limit)
+        for metric, limit in limits.items()
+        if getattr(current, metric) > limit
+    ]
+
+
+def _format_diff(name: str, rows: list[tuple[str, float, float, float]]) -> str:
+    lines = [f"Regresión de rendimiento en {name}:", f"  {'métrica':<10} {'base':>12} {'actual':>12} {'límite':>12}"]
+    for metric, base, current, limit in rows:
+        lines.append(f"  {metric:<10} {base:>12.2f} {current:>12.2f} {limit:>12.2f}")
+    lines.append("Si el cambio es esperado, regenere la línea base con ADMIN_PERF_UPDATE=1.")
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="session")
+def perf_scale() -> str:
+    return f"sales={int(os.getenv('ADMIN_PERF_SALES', DEFAULT_SALES))}"
+
+
+@pytest.fixture(scope="session")
+def perf_db(tmp_path_factory, perf_scale) -> str:
+    """URL de un SQLite en disco con el conjunto sintético, hoy incluido (para los KPIs del día y del mes)."""
+    sales = int(perf_scale.split("=")[1])
+    url = f"sqlite:///{(tmp_path_factory.mktemp('perf') / 'bench.db').as_posix()}"
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+    # El fin es exclusivo: con hoy a las 00:00 el día 1 quedaba sin ventas del mes
+    tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    generate_dataset(engine, DatasetSpec.scaled(sales, end=tomorrow))
+    engine.dispose()
+    return url
+
+
+@pytest.fixture(scope="session")
+def perf_engine(perf_db):
+    engine = make_engine(perf_db)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def perf_session_factory(perf_engine):
+    return make_session_factory(perf_engine)
+
+
+@pytest.fixture()
+def scratch_session_factory(perf_db, tmp_path):
+    """
+    Sesiones sobre una copia del conjunto sintético, para mediciones que
+    escriben: así no alteran los datos que miden las demás pruebas.
+    """
+    target = tmp_path / "scratch.db"
+    with sqlite3.connect(perf_db.removeprefix("sqlite:///")) as source, sqlite3.connect(target) as copy:
+        source.backup(copy)
+    engine = make_engine(f"sqlite:///{target.as_posix()}")
+    yield make_session_factory(engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def _baseline(perf_scale):
+    data = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+    measured: dict[str, dict] = {}
+    yield data.get(perf_scale, {}), measured
+    if os.getenv("ADMIN_PERF_UPDATE") == "1" and measured:
+        data[perf_scale] = {**data.get(perf_scale, {}), **measured}
+        BASELINE_PATH.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+@pytest.fixture()
+def bench(_baseline, perf_session_factory):
+    """
+    `bench(nombre, fn)` ejecuta `fn(session)` con una sesión nueva por ronda,
+    mide y compara con la línea base. Devuelve el resultado de la última ronda.
+    """
+    baseline, measured = _baseline
+    rounds = int(os.getenv("ADMIN_PERF_ROUNDS", DEFAULT_ROUNDS))
+
+    def run(name: str, fn: Callable, *, session_factory=None):
+        factory = session_factory or perf_session_factory
+
+        def once():
+            with factory() as session:
+                return fn(session)
+
+        once()  # calentamiento: cachés de sesión/engine, imports perezosos
+        times = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            once()
+            times.append((time.perf_counter() - started) * 1000.0)
+
+        # Ronda aparte para consultas y memoria (tracemalloc distorsiona el tiempo)
+        counter = _QueryCounter()
+        tracemalloc.start()
+        try:
+            result = once()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            counter.close()
+
+        current = Measurement(round(statistics.median(times), 3), counter.count, round(peak / 1024.0, 1))
+        measured[name] = asdict(current)
+        if os.getenv("ADMIN_PERF_UPDATE") != "1" and name in baseline:
+            problems = _regressions(current, baseline[name], strict=os.getenv("ADMIN_PERF_STRICT") == "1")
+            if problems:
+                pytest.fail(_format_diff(name, problems), pytrace=False)
+        return result
+
+    return run
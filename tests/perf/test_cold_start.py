@@ -0,0 +1,41 @@
+"""
+Arranque en frío: importar la app en un intérprete nuevo debe quedar bajo un
+presupuesto de tiempo y sin cargar dependencias pesadas que solo se usan en
+algunas acciones (PDF, Excel, Windows, HTTP).
+
+ADMIN_PERF_COLD_START_MS ajusta el presupuesto (por defecto 2500 ms; en un
+equipo de desarrollo actual ronda los 800 ms).
+"""
+
+from __future__ import annotations
+
+import os
+
+from src.admin_app.utils.import_audit import DEFAULT_MODULE, format_report, parse_importtime, run_importtime, total_ms
+
+
+DEFAULT_BUDGET_MS = 2500.0
+RUNS = 3
+DEFERRED = ("requests", "urllib3", "reportlab", "openpyxl", "win32com", "pythoncom")
+
+
+def test_cold_start_import_budget() -> None:
+    budget = float(os.getenv("ADMIN_PERF_COLD_START_MS", DEFAULT_BUDGET_MS))
+    runs = [parse_importtime(run_importtime(DEFAULT_MODULE)) for _ in range(RUNS)]
+    best = min(runs, key=lambda records: total_ms(records, DEFAULT_MODULE))
+    elapsed = total_ms(best, DEFAULT_MODULE)
+    assert elapsed <= budget, (
+        f"Arranque en frío: {elapsed:.0f} ms > presupuesto {budget:.0f} ms\n\n" + format_report(best, top=10)
+    )
+
+
+def test_heavy_optional_modules_are_deferred() -> None:
+    records = parse_importtime(run_importtime(DEFAULT_MODULE))
+    loaded = {r.package for r in records}
+    eager = sorted(set(DEFERRED) & loaded)
+    # Solo el punto de entrada de cada paquete (quién lo importó), no sus submódulos
+    culprits = [
+        f"{r.module} <- {r.parent}" for r in records
+        if r.package in eager and (r.parent or "").split(".")[0] not in eager
+    ]
+    assert not eager, f"Se importan al arrancar: {eager}\n" + "\n".join(culprits)
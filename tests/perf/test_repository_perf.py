@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from src.admin_app.models import Order, ProductParameterTable, Role, Sale, User, UserRole
+from src.admin_app.receipts import print_order_pdf
+from src.admin_app.repository import (
+    add_sale, get_daily_sales_data, get_dashboard_kpis, get_dashboard_snapshot, get_parameter_table_data,
+    get_pending_orders_for_user, get_product_parameter_tables, get_sales_by_user, list_orders,
+    register_payment, update_sale,
+)
+
+
+@pytest.fixture(scope="module")
+def refs(perf_session_factory) -> dict:
+    """Ids estables del conjunto sintético para las mediciones."""
+    with perf_session_factory() as s:
+        sale = s.execute(select(Sale.id, Sale.asesor).order_by(Sale.fecha.desc()).limit(1)).one()
+        order = s.scalars(select(Order).where(Order.sale_id == sale.id)).first()
+        designer = s.scalar(
+            select(User.id).join(UserRole, UserRole.user_id == User.id).join(Role, Role.id == UserRole.role_id)
+            .where(Role.name == "DISEÑADOR").order_by(User.id)
+        )
+        table = s.execute(select(ProductParameterTable.id, ProductParameterTable.product_id).limit(1)).one()
+        return {
+            "sale_id": sale.id, "asesor": sale.asesor, "designer_id": designer,
+            "order": (order.id, order.product_name, order.status, order.details_json),
+            "table_id": table.id, "product_id": table.product_id,
+        }
+
+
+def test_add_sale(bench, refs, scratch_session_factory) -> None:
+    sale = bench("add_sale", session_factory=scratch_session_factory, fn=lambda s: add_sale(
+        s, articulo="Pendón", asesor=refs["asesor"], venta_usd=40.0, cantidad=1.0, precio_unitario=40.0,
+        items=[{"product_name": "Pendón", "quantity": 1, "unit_price": 40.0, "total_price": 40.0}],
+        payments=[{"payment_method": "Zelle", "amount_usd": 40.0}],
+    ))
+    assert sale.id
+
+
+def test_update_sale(bench, refs, scratch_session_factory) -> None:
+    assert bench("update_sale", session_factory=scratch_session_factory,
+                 fn=lambda s: update_sale(s, refs["sale_id"], notes="benchmark"))
+
+
+def test_register_payment(bench, refs, scratch_session_factory) -> None:
+    payment = bench("register_payment", session_factory=scratch_session_factory,
+                    fn=lambda s: register_payment(s, refs["sale_id"], 0.01, "Zelle"))
+    assert payment.id
+
+
+def test_get_daily_sales_data(bench) -> None:
+    bench("get_daily_sales_data", lambda s: get_daily_sales_data(s, date.today()))
+
+
+def test_get_dashboard_kpis(bench) -> None:
+    kpis = bench("get_dashboard_kpis", lambda s: get_dashboard_kpis(s))
+    assert kpis["monthly_orders"] > 0
+
+
+def test_get_dashboard_snapshot(bench, refs) -> None:
+    bench("get_dashboard_snapshot", lambda s: get_dashboard_snapshot(s, refs["asesor"]))
+
+
+def test_get_sales_by_user(bench) -> None:
+    assert bench("get_sales_by_user", lambda s: get_sales_by_user(s))
+
+
+def test_list_orders(bench) -> None:
+    assert bench("list_orders", lambda s: len(list_orders(s)))
+
+
+def test_get_pending_orders_for_user(bench, refs) -> None:
+    bench("get_pending_orders_for_user", lambda s: get_pending_orders_for_user(s, refs["designer_id"]))
+
+
+def test_get_parameter_table_data(bench, refs) -> None:
+    assert bench("get_parameter_table_data", lambda s: get_parameter_table_data(s, refs["table_id"]))
+
+
+def test_get_product_parameter_tables(bench, refs) -> None:
+    assert bench("get_product_parameter_tables", lambda s: get_product_parameter_tables(s, refs["product_id"]))
+
+
+def test_print_order_pdf(bench, refs, perf_db, tmp_path, monkeypatch) -> None:
+    # print_order_pdf abre su propia sesión con la base de DATABASE_URL
+    monkeypatch.setenv("DATABASE_URL", perf_db)
+    order_id, product_name, status, details_json = refs["order"]
+    path = bench("print_order_pdf", lambda s: print_order_pdf(
+        order_id=order_id, sale_id=refs["sale_id"], product_name=product_name, status=status or "NUEVO",
+        details_json=details_json, out_path=tmp_path / "order.pdf",
+    ))
+    assert path.exists()
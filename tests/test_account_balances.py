@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Account, AccountBalanceSnapshot, Base, Transaction
+from src.admin_app.services.account_balances import (
+    balance_at,
+    ledger_balances,
+    reconcile_account_balances,
+    take_balance_snapshot,
+)
+
+
+def _txn(acc: Account, day: int, amount: float, kind: str) -> Transaction:
+    return Transaction(date=datetime(2025, 1, day), amount=amount, transaction_type=kind,
+                       description="mov", account_id=acc.id)
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        caja = Account(name="Caja USD", type="CASH", currency="USD", balance=75.0)
+        banco = Account(name="Banco VES", type="BANK", currency="VES", balance=500.0)
+        vacia = Account(name="Zelle", type="DIGITAL", currency="USD", balance=0.0)
+        s.add_all([caja, banco, vacia])
+        s.flush()
+        s.add_all([
+            _txn(caja, 1, 100.0, 'INCOME'),
+            _txn(caja, 5, 30.0, 'EXPENSE'),
+            _txn(caja, 10, 5.0, 'INCOME'),
+            _txn(banco, 2, 400.0, 'INCOME'),
+        ])
+        s.commit()
+        yield s
+
+
+def test_ledger_balances_grouped_and_bounded_by_date(session) -> None:
+    assert ledger_balances(session) == {1: pytest.approx(75.0), 2: pytest.approx(400.0)}
+    assert ledger_balances(session, as_of=datetime(2025, 1, 5)) == {1: pytest.approx(70.0), 2: pytest.approx(400.0)}
+
+
+def test_snapshot_and_point_in_time_balance(session) -> None:
+    assert take_balance_snapshot(session, as_of=datetime(2025, 1, 5)) == 3
+    # Repetir el snapshot para la misma fecha reemplaza en lugar de duplicar
+    take_balance_snapshot(session, as_of=datetime(2025, 1, 5))
+    session.commit()
+    assert session.query(AccountBalanceSnapshot).count() == 3
+
+    assert balance_at(session, 1, datetime(2025, 1, 5)) == pytest.approx(70.0)
+    assert balance_at(session, 1, datetime(2025, 1, 31)) == pytest.approx(75.0)
+    assert balance_at(session, 1, datetime(2025, 1, 3)) == pytest.approx(100.0)
+    assert balance_at(session, 3, datetime(2025, 1, 31)) == 0.0
+
+
+def test_reconcile_flags_and_fixes_drift(session) -> None:
+    drifts = reconcile_account_balances(session)
+    assert [(d.name, d.stored, d.ledger) for d in drifts] == [("Banco VES", 500.0, 400.0)]
+    assert drifts[0].diff == pytest.approx(100.0)
+
+    reconcile_account_balances(session, fix=True)
+    session.commit()
+    assert session.get(Account, 2).balance == pytest.approx(400.0)
+    assert reconcile_account_balances(session) == []
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Account, Base, Transaction, TransactionCategory
+from src.admin_app.repository import _get_or_create_account_by_context, add_sale, update_sale
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        s.add_all([
+            Account(name="Caja Efectivo USD", type="CASH", currency="USD"),
+            Account(name="Zelle Empresa", type="DIGITAL", currency="USD"),
+            Account(name="Banco de Venezuela", type="BANK", currency="VES"),
+            Account(name="Banesco", type="BANK", currency="VES"),
+            Account(name="Caja Bs", type="CASH", currency="VES"),
+            TransactionCategory(name="Ventas", type="INCOME"),
+        ])
+        s.commit()
+        yield s
+
+
+def _names(session, *calls):
+    return [_get_or_create_account_by_context(session, *c).name for c in calls]
+
+
+def test_routing_matches_keywords_and_is_cached(session) -> None:
+    seen: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda conn, cur, stmt, *a: seen.append(stmt))
+
+    assert _names(
+        session,
+        ("Efectivo $", "USD"),
+        ("Zelle", "USD"),
+        ("Binance", "USD"),
+        ("Otro", "USD"),
+        ("Pago Móvil Venezuela", "VES"),
+        ("Transferencia", "VES"),
+        ("Efectivo", "VES"),
+        ("Pago Movil", "VES", "banesco"),
+    ) == [
+        "Caja Efectivo USD", "Zelle Empresa", "Zelle Empresa", "Caja Efectivo USD",
+        "Banco de Venezuela", "Banesco", "Caja Bs", "Banesco",
+    ]
+    # Una sola consulta de cuentas para todas las rutas
+    assert len(seen) == 1
+
+
+def test_new_bank_account_invalidates_routing(session) -> None:
+    acc = _get_or_create_account_by_context(session, "Transferencia", "VES", "mercantil")
+    assert acc.name == "Banco Mercantil"
+    assert _get_or_create_account_by_context(session, "Transferencia", "VES", "Mercantil").id == acc.id
+
+    # Cambios de saldo no descartan la tabla de rutas; desactivar una cuenta sí
+    banesco = session.query(Account).filter_by(name="Banesco").one()
+    acc.balance += 10
+    session.flush()
+    assert _get_or_create_account_by_context(session, "Transferencia", "VES").id == banesco.id
+    banesco.is_active = False
+    session.flush()
+    assert _get_or_create_account_by_context(session, "Transferencia", "VES").name == "Banco de Venezuela"
+
+
+def test_multi_payment_sale_syncs_and_replaces_transactions(session) -> None:
+    payments = [
+        {'payment_method': 'Zelle', 'amount_usd': 40.0},
+        {'payment_method': 'Efectivo $', 'amount_usd': 10.0},
+        {'payment_method': 'Pago Móvil', 'amount_bs': 2000.0, 'exchange_rate': 40.0, 'bank': 'Banesco'},
+    ]
+    sale = add_sale(session, articulo="Pendón", asesor="tester", venta_usd=100.0, payments=payments)
+    txns = session.query(Transaction).order_by(Transaction.id).all()
+    assert [t.account.name for t in txns] == ["Zelle Empresa", "Caja Efectivo USD", "Banesco"]
+    assert {t.category_id for t in txns} == {session.query(TransactionCategory.id).scalar()}
+    assert session.query(Account).filter_by(name="Banesco").one().balance == pytest.approx(2000.0)
+
+    assert update_sale(session, sale.id, payments=[{'payment_method': 'Zelle', 'amount_usd': 100.0}])
+    txns = session.query(Transaction).all()
+    assert [(t.account.name, t.amount) for t in txns] == [("Zelle Empresa", 100.0)]
+    assert session.query(Account).filter_by(name="Banesco").one().balance == pytest.approx(0.0)
+    assert session.query(Account).filter_by(name="Zelle Empresa").one().balance == pytest.approx(100.0)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Base, CorporeoConfig, CorporeoPayload, Order, ProductParameterValue
+from src.admin_app.services.corporeo_repricing import (
+    RepricingSummary,
+    extract_row_price,
+    reprice_corporeo_configs,
+    reprice_corporeo_payloads,
+    reprice_payload,
+)
+
+
+def _payload(esp_id: int, esp_price: float, luz_id: int, luz_price: float) -> dict:
+    # 100 x 100 cm -> 1 m², perímetro 4 m
+    return {
+        'medidas': {'alto_cm': 100.0, 'ancho_cm': 100.0, 'diam_mm': 0.0, 'area_m2': 1.0},
+        'espesor': {'label': '5 mm', 'id': esp_id, 'price': esp_price},
+        'soporte': {'model': '', 'size': '', 'price': 2.0, 'qty': 2},
+        'regulador': {'label': '', 'id': None, 'price': 0.0, 'qty': 0},
+        'tipos_corporeo': [],
+        'luces': {'selected': [{'type': 'Cinta', 'price': luz_price, 'pv_id': luz_id, 'unit': 'm'}]},
+        'caja': {'enabled': True, 'pct': 10.0},
+        'silueta': {'price_m2': 0.0, 'subtotal': 0.0},
+        'subtotal': esp_price + 4.0 + 4 * luz_price,
+        'total': (esp_price + 4.0 + 4 * luz_price) * 1.1,
+        'tasa_corporeo': 2.0,
+        'tasa_bcv': 40.0,
+        'totals': {'tasa_corporeo': 2.0, 'tasa_bcv': 40.0},
+    }
+
+
+def test_extract_row_price_accepts_json_and_currency_strings() -> None:
+    assert extract_row_price('{"Precio": "$1,250.50"}') == pytest.approx(1250.5)
+    assert extract_row_price({'price': 3}) == 3.0
+    assert extract_row_price('{"nombre": "x"}') is None
+
+
+def test_reprice_payload_uses_current_prices() -> None:
+    out = reprice_payload(_payload(1, 60.0, 2, 10.0), {1: 80.0, 2: 12.0})
+    # 80 (material) + 2*2 (soportes) + 12*4 (luz por perímetro) = 132; caja +10%
+    assert out['espesor']['price'] == 80.0
+    assert out['luces']['selected'][0]['price'] == 12.0
+    assert out['subtotal'] == pytest.approx(132.0)
+    assert out['total'] == pytest.approx(145.2)
+    assert out['precio_final_usd'] == pytest.approx(132.0 * 2.0 / 40.0)
+
+
+def test_reprice_jobs_update_only_changed_pending_rows() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(bind=engine) as session:
+        esp = ProductParameterValue(parameter_table_id=1, row_data_json=json.dumps({'Espesor': '5', 'Precio': 60.0}))
+        luz = ProductParameterValue(parameter_table_id=2, row_data_json=json.dumps({'Tipo': 'Cinta', 'precio': 10.0}))
+        session.add_all([esp, luz])
+        session.flush()
+        closed = Order(sale_id=1, order_number='ORD-1', product_name='Corpóreo', details_json='{}', status='ENTREGADO')
+        session.add(closed)
+        session.flush()
+
+        base = _payload(esp.id, 60.0, luz.id, 10.0)
+        for _ in range(7):
+            session.add(CorporeoPayload(payload_json=json.dumps(base), subtotal=base['subtotal'], total=base['total']))
+        session.add(CorporeoPayload(order_id=closed.id, payload_json=json.dumps(base), subtotal=base['subtotal'], total=base['total']))
+        session.add(CorporeoPayload(payload_json='no es json'))
+        session.add(CorporeoConfig(payload_json=json.dumps(base), precio_total_usd=base['subtotal'] * 2.0 / 40.0))
+        session.commit()
+        esp_id = esp.id
+
+    with Session(bind=engine) as session:
+        # Sin cambios de precio no hay nada que escribir
+        summary = reprice_corporeo_payloads(session, batch_size=3)
+        assert summary.scanned == 8
+        assert summary.changed == 0
+        assert summary.skipped == 1
+
+        session.get(ProductParameterValue, esp_id).row_data_json = json.dumps({'Espesor': '5', 'Precio': 80.0})
+        session.commit()
+
+        seen = []
+        summary = reprice_corporeo_payloads(session, batch_size=3, progress=lambda s: seen.append(s.scanned))
+        assert seen == [3, 6, 8]
+        assert summary.changed == 7
+        assert summary.increased == 7
+        assert summary.delta_total == pytest.approx(7 * 20.0 * 1.1)
+
+        cfg_summary = reprice_corporeo_configs(session)
+        assert cfg_summary.changed == 1
+
+    with Session(bind=engine) as session:
+        rows = session.query(CorporeoPayload).order_by(CorporeoPayload.id).all()
+        assert [r.total for r in rows[:7]] == [pytest.approx(124.0 * 1.1)] * 7
+        assert all(r.espesor_price == 80.0 for r in rows[:7])
+        assert json.loads(rows[0].payload_json)['espesor']['price'] == 80.0
+        # El pedido entregado conserva su cotización original
+        assert rows[7].total == pytest.approx(base['total'])
+        cfg = session.query(CorporeoConfig).one()
+        assert cfg.precio_total_usd == pytest.approx(124.0 * 2.0 / 40.0)
+
+
+def test_repricing_message_keeps_each_table_in_its_unit() -> None:
+    from src.admin_app.ui.parametros_values_dialog import _repricing_message
+
+    payloads, configs = RepricingSummary(scanned=8, skipped=1), RepricingSummary(scanned=2)
+    payloads.add_delta(5.0)
+    payloads.add_delta(-1.5)
+    configs.add_delta(2.0)
+    text = _repricing_message(payloads, configs)
+    assert "Cotizaciones: 8 revisadas, 2 actualizadas (suben 1, bajan 1)" in text
+    assert "Variación (total de lista, antes de tasas): +3.50" in text
+    assert "Configuraciones: 2 revisadas, 1 actualizadas" in text
+    assert "Variación (precio final en USD): +2.00" in text
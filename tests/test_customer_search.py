@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.models import Base, Customer
+from src.admin_app.services.customer_search import (
+    CustomerIndex, CustomerRecord, CustomerSearch, digits, fold, search_customers, tokenize,
+)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+CUSTOMERS = [
+    CustomerRecord(1, "José Núñez", "José", "Núñez", "V-12.345.678", "0414-555-1234", "jose@correo.com"),
+    CustomerRecord(2, "María González", "María", "González", "V-20111222", "0212-999-0000"),
+    CustomerRecord(3, "María Pérez", "María", "Pérez", "E-84000111", "0424-123-4567"),
+    CustomerRecord(4, "Inversiones Hernández C.A.", document="J-40123456-7", short_address="Av. Bolívar"),
+    CustomerRecord(5, "", "Josefina", "Rojas", "V-9876543"),
+]
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = make_engine(f"sqlite:///{(tmp_path / 'customers.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    factory = make_session_factory(engine)
+    with factory() as session:
+        for r in CUSTOMERS:
+            session.add(Customer(
+                id=r.id, name=r.name, first_name=r.first_name, last_name=r.last_name, document=r.document,
+                phone=r.phone, email=r.email, short_address=r.short_address,
+            ))
+        session.commit()
+    return factory
+
+
+def _ids(records):
+    return [r.id for r in records]
+
+
+def test_normalization() -> None:
+    assert fold("Núñez ÁÉÍÓÚ") == "nunez aeiou"
+    assert tokenize("María González, V-20.111.222") == ["maria", "gonzalez", "v", "20.111.222"]
+    assert digits("V-12.345.678") == "12345678"
+    assert CustomerRecord(9, "", "Ana", "Díaz").label == "Ana Díaz"
+    assert CustomerRecord(9, "").label == "Cliente #9"
+
+
+def test_index_prefix_accents_and_ranking() -> None:
+    index = CustomerIndex(CUSTOMERS)
+    # "jose" es exacto para José y prefijo de Josefina
+    assert _ids(index.search("jose")) == [1, 5]
+    assert _ids(index.search("NUNEZ")) == [1]
+    assert _ids(index.search("maria")) == [2, 3]
+    # Todos los términos deben coincidir
+    assert _ids(index.search("mar gonz")) == [2]
+    assert index.search("maria rojas") == []
+    assert _ids(index.search("bolivar")) == [4]
+    assert _ids(index.search("maria", limit=1)) == [2]
+    assert index.search("") == [] and index.search(" - ") == []
+
+
+def test_index_trigrams_match_fragments_and_typos() -> None:
+    index = CustomerIndex(CUSTOMERS)
+    assert _ids(index.search("ernandez")) == [4]
+    assert _ids(index.search("hernadez")) == [4]
+    assert 2 in _ids(index.search("gonzales"))
+
+
+def test_index_digits_ignore_separators() -> None:
+    index = CustomerIndex(CUSTOMERS)
+    assert _ids(index.search("12345678")) == [1]
+    # Prefijo del documento primero; luego subcadenas de otros documentos/teléfonos
+    assert _ids(index.search("V-12345")) == [1, 4, 3]
+    assert _ids(index.search("0414 555")) == [1]
+    assert _ids(index.search("4012")) == [4]
+    assert _ids(index.search("0424-123")) == [3]
+    # Subcadena interior del teléfono
+    assert _ids(index.search("999-0000")) == [2]
+
+
+def test_index_add_and_remove() -> None:
+    index = CustomerIndex(CUSTOMERS)
+    index.add(CustomerRecord(6, "Josué Ramírez", document="V-555"))
+    assert _ids(index.search("jos")) == [1, 5, 6]
+    index.add(CustomerRecord(6, "Pedro Ramírez"))
+    assert _ids(index.search("jos")) == [1, 5]
+    assert _ids(index.search("pedro")) == [6]
+    index.remove(1)
+    assert _ids(index.search("jose")) == [5]
+    assert index.get(1) is None and len(index) == 5
+
+
+def test_server_side_search_sqlite(session_factory) -> None:
+    with session_factory() as session:
+        assert _ids(search_customers(session, "maria")) == [2, 3]
+        assert _ids(search_customers(session, "mar gonz")) == [2]
+        assert _ids(search_customers(session, "12345678")) == [1]
+        assert _ids(search_customers(session, "0424-123")) == [3]
+        assert len(search_customers(session, "a", limit=2)) == 2
+
+
+def test_unicode_terms_and_like_wildcards(session_factory) -> None:
+    # Letras fuera de ASCII que fold no descompone siguen formando parte del término
+    assert tokenize("Søren Ødegård") == ["søren", "ødegard"]
+    with session_factory() as session:
+        session.add_all([
+            Customer(id=10, name="Søren Ødegård"),
+            Customer(id=11, name="Cuenta", email="juan_perez@correo.com"),
+            Customer(id=12, name="Otra", email="juanXperez@correo.com"),
+            Customer(id=13, name="Descuento 100% seguro"),
+        ])
+        session.commit()
+        assert _ids(search_customers(session, "søren")) == [10]
+        # "_" y "%" se buscan literalmente, no como comodines de LIKE
+        assert _ids(search_customers(session, "juan_perez")) == [11]
+        assert _ids(search_customers(session, "100%")) == [13]
+
+
+def test_concurrent_first_searches_build_the_index_once(session_factory, monkeypatch) -> None:
+    import threading
+
+    builds = []
+    real_build = CustomerIndex.build.__func__
+
+    def slow_build(cls, session):
+        builds.append(True)
+        time.sleep(0.05)
+        return real_build(cls, session)
+
+    monkeypatch.setattr(CustomerIndex, "build", classmethod(slow_build))
+    search = CustomerSearch(session_factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_ids(search.search("maria")))) for _ in range(6)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert builds == [True]
+    assert results == [[2, 3]] * 6
+
+
+def test_shared_search_is_reused_and_refreshed_on_customer_changes(qapp, session_factory) -> None:
+    from src.admin_app.events import bus
+    from src.admin_app.ui import customer_completer  # noqa: F401  (conecta el bus)
+
+    search = CustomerSearch.shared(session_factory)
+    assert CustomerSearch.shared(session_factory) is search
+    assert CustomerSearch.shared(make_session_factory(make_engine(":memory:"))) is not search
+    assert _ids(search.search("rojas")) == [5]
+
+    with session_factory() as session:
+        session.add(Customer(id=20, name="Pedro Rojas"))
+        session.commit()
+    bus.flush()
+    assert sorted(_ids(search.search("rojas"))) == [5, 20]
+
+
+def test_customer_search_falls_back_to_server(session_factory) -> None:
+    in_memory = CustomerSearch(session_factory)
+    assert _ids(in_memory.search("jose")) == [1, 5]
+    assert in_memory.index is not None and len(in_memory.index) == 5
+
+    remote = CustomerSearch(session_factory, max_rows=2)
+    assert _ids(remote.search("perez")) == [3]
+    assert remote.index is None
+    assert remote.get(4).name == "Inversiones Hernández C.A."
+
+
+def _wait(qapp, condition, timeout=5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+
+
+def test_completer_fetches_async_and_drops_stale_results(qapp, session_factory) -> None:
+    from PySide6.QtWidgets import QLineEdit
+    from src.admin_app.ui.customer_completer import CustomerCompleter
+
+    edit = QLineEdit()
+    completer = CustomerCompleter(CustomerSearch(session_factory), delay_ms=0)
+    completer.attach(edit)
+    chosen = []
+    completer.customerChosen.connect(chosen.append)
+
+    edit.setText("gonz")
+    completer._start_search()
+    _wait(qapp, lambda: completer.records)
+    assert _ids(completer.records) == [2]
+    assert completer.model().stringList() == ["María González · V-20111222 · 0212-999-0000"]
+
+    # Una respuesta de una consulta anterior no pisa la actual
+    completer._on_found(completer._request_id - 1, [CUSTOMERS[0]])
+    assert _ids(completer.records) == [2]
+
+    completer._on_activated(completer.model().index(0, 0))
+    assert _ids(chosen) == [2]
+
+
+def test_customers_view_filters_with_index(qapp, session_factory) -> None:
+    from src.admin_app.ui.customers_view import CustomersView
+
+    view = CustomersView(session_factory)
+    view._loader.wait()
+    _wait(qapp, lambda: view._index is not None)
+    assert view._table.rowCount() == 5
+
+    view.search_edit.setText("maria")
+    view._apply_filter()
+    visible = [r for r in range(5) if not view._table.isRowHidden(r)]
+    assert len(visible) == 2
+    assert view._status_label.text() == "Mostrando 2 de 5 clientes"
+
+    view.filter_document.setCurrentText("E-")
+    view._apply_filter()
+    assert [view._table.item(r, 0).text() for r in range(5) if not view._table.isRowHidden(r)] == ["3"]
+
+    view.search_edit.setText("")
+    view.filter_document.setCurrentText("Todos")
+    view._apply_filter()
+    assert view._status_label.text() == "Mostrando 5 de 5 clientes"
+
+
+def test_sale_dialog_selects_customer_from_completer(qapp, session_factory) -> None:
+    from src.admin_app.ui.sale_dialog import SaleDialog
+
+    dlg = SaleDialog(session_factory=session_factory)
+    # El combo ya no trae todos los clientes, solo el marcador
+    assert dlg.edt_cliente.count() == 1
+
+    dlg._customer_completer.customerChosen.emit(CUSTOMERS[1])
+    assert dlg.edt_cliente.currentData() == 2
+    assert dlg.edt_cliente.currentText() == "María González"
+    assert dlg.lbl_cli_doc.text() == "V-20111222"
+
+    # Un cliente que no está en el combo (p. ej. al cargar una venta) se busca por id
+    idx = dlg._customer_item_index(4)
+    assert dlg.edt_cliente.itemText(idx) == "Inversiones Hernández C.A."
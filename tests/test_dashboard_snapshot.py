@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date, datetime
+
+import pytest
+from PySide6.QtWidgets import QApplication
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.admin_app.models import Base, Customer, Order, Role, Sale, User, UserRole
+from src.admin_app.repository import TeamMember, get_dashboard_snapshot
+
+
+TODAY = date(2025, 3, 12)
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        design = Role(name="DISEÑADOR")
+        ana = User(username="ana", password_hash="x", monthly_goal=500.0)
+        luis = User(username="luis", password_hash="x")
+        s.add_all([design, ana, luis, Customer(name="C1"), Customer(name="C2")])
+        s.flush()
+        s.add(UserRole(user_id=ana.id, role_id=design.id))
+        sales = [
+            Sale(articulo="A", asesor="ana", venta_usd=100.0, numero_orden="O-1", fecha=datetime(2025, 3, 12, 9)),
+            Sale(articulo="B", asesor="ana", venta_usd=50.0, numero_orden="O-2", fecha=datetime(2025, 3, 10, 18)),
+            Sale(articulo="C", asesor="luis", venta_usd=30.0, numero_orden="O-3", fecha=datetime(2025, 3, 1)),
+            Sale(articulo="D", asesor="luis", venta_usd=99.0, numero_orden="O-4", fecha=datetime(2025, 2, 28)),
+        ]
+        s.add_all(sales)
+        s.flush()
+        s.add_all([
+            Order(sale_id=sales[2].id, order_number="O-3", product_name="P3", details_json="{}",
+                  status="NUEVO", designer_id=ana.id, created_at=datetime(2025, 3, 2)),
+            Order(sale_id=sales[0].id, order_number="O-1", product_name="P1", details_json="{}",
+                  status="LISTO", created_at=datetime(2025, 3, 1)),
+            Order(sale_id=sales[2].id, order_number="O-3b", product_name="P3", details_json="{}",
+                  status="NUEVO", created_at=datetime(2025, 3, 3)),
+        ])
+        s.commit()
+    return engine
+
+
+def test_snapshot_is_a_short_batch_of_aggregates(engine) -> None:
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    with Session(bind=engine) as s:
+        snap = get_dashboard_snapshot(s, "ana", today=TODAY)
+    assert len(statements) == 5
+
+    # Sin rol administrativo: KPIs y gráfico filtrados por asesor
+    assert (snap.kpis.total_customers, snap.kpis.monthly_sales, snap.kpis.monthly_orders, snap.kpis.today_sales) == (
+        2, 150.0, 2, 100.0,
+    )
+    assert snap.goal == 12000.0
+    assert [(p.start, p.total_sales) for p in snap.chart][-3:] == [
+        (date(2025, 3, 10), 50.0), (date(2025, 3, 11), 0.0), (date(2025, 3, 12), 100.0),
+    ]
+    assert len(snap.chart) == 7
+
+    # Equipo completo, ordenado por ventas, con meta individual o global
+    assert snap.team == (TeamMember("ana", 150.0, 2, 500.0), TeamMember("luis", 30.0, 1, 12000.0))
+
+    # Diseñadora: sus pedidos en NUEVO + pedidos LISTO de sus ventas, más antiguos primero
+    assert [o.order_number for o in snap.pending_orders] == ["O-1", "O-3"]
+    assert snap.show_pending
+
+
+def test_unknown_user_gets_no_pending_panel(engine) -> None:
+    with Session(bind=engine) as s:
+        snap = get_dashboard_snapshot(s, "nadie", today=TODAY)
+    assert snap.pending_orders == () and not snap.show_pending
+    assert snap.kpis.monthly_orders == 0
+
+
+def test_view_only_redraws_changed_parts(engine, qapp, monkeypatch) -> None:
+    from src.admin_app.ui.home_view import HomeView
+
+    with Session(bind=engine) as s:
+        snap = get_dashboard_snapshot(s, "ana", today=TODAY)
+    view = HomeView(sessionmaker(bind=engine), current_user="ana")
+    view.set_auto_refresh(False)
+    view.apply_snapshot(snap)
+    vendor_rows = dict(view._vendor_items)
+    order_rows = {k: v[1] for k, v in view.assigned_orders_widget._rows.items()}
+
+    chart_calls = []
+    monkeypatch.setattr(view, "update_sales_chart", lambda points: chart_calls.append(points))
+    view.apply_snapshot(snap)
+    view.apply_snapshot(replace(snap, team=(replace(snap.team[0], total_sales=400.0), snap.team[1])))
+
+    assert chart_calls == []
+    assert view._vendor_items == vendor_rows  # mismas instancias, solo valores nuevos
+    assert vendor_rows["ana"].amount_lbl.text() == "$400.00"
+    assert vendor_rows["ana"].progress.value() == 80
+    assert {k: v[1] for k, v in view.assigned_orders_widget._rows.items()} == order_rows
+
+    # Un pedido atendido desaparece sin recrear el resto
+    view.apply_snapshot(replace(snap, pending_orders=snap.pending_orders[1:]))
+    rows = view.assigned_orders_widget._rows
+    assert list(rows) == [snap.pending_orders[1].id]
+    assert rows[snap.pending_orders[1].id][1] is order_rows[snap.pending_orders[1].id]
+    assert view.assigned_orders_widget.count_badge.text() == "1"
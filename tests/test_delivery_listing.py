@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from PySide6.QtWidgets import QApplication
+from sqlalchemy import event, text
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.models import Base, Customer, Delivery, DeliveryZone, Order, Sale, User
+from src.admin_app.services.delivery_listing import delivery_window_summary, query_deliveries
+
+
+START = datetime(2025, 3, 3)
+END = datetime(2025, 3, 10)
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+@pytest.fixture()
+def session_factory():
+    return _build_factory()
+
+
+@pytest.fixture()
+def legacy_session_factory(monkeypatch):
+    # Bases antiguas: deliveries.sent_at admitía NULL
+    monkeypatch.setattr(Delivery.__table__.c.sent_at, "nullable", True)
+    return _build_factory()
+
+
+def _build_factory():
+    engine = make_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    factory = make_session_factory(engine)
+    with factory() as s:
+        rider = User(username="pedro", password_hash="x")
+        zone = DeliveryZone(name="Chacao", price=3.0)
+        customer = Customer(name="Cliente", short_address="Av. Principal")
+        s.add_all([rider, zone, customer])
+        s.flush()
+        sale = Sale(articulo="Pendón", asesor="tester", venta_usd=10.0, numero_orden="ORD-9", cliente_id=customer.id)
+        s.add(sale)
+        s.flush()
+        order = Order(sale_id=sale.id, order_number="ORD-9", product_name="Pendón", details_json="{}")
+        s.add(order)
+        s.flush()
+        for i in range(30):
+            s.add(Delivery(
+                zone_id=zone.id, delivery_user_id=rider.id, order_id=order.id if i == 0 else None,
+                sent_at=START + timedelta(hours=5 * i), amount_bs=10.0,
+                status='ENTREGADO' if i % 3 == 0 else 'PENDIENTE',
+                payment_source='CLIENTE' if i % 10 == 9 else 'EMPRESA', notes=f"nota {i}",
+            ))
+        # Fuera de la semana
+        s.add(Delivery(zone_id=zone.id, sent_at=END, amount_bs=99.0))
+        s.commit()
+    return factory
+
+
+def test_query_deliveries_filters_and_keyset_pages(session_factory) -> None:
+    with session_factory() as s:
+        first = query_deliveries(s, START, END, limit=12)
+        assert [r.id for r in first[:2]] == [30, 29]
+        rest = query_deliveries(s, START, END, after=(first[-1].sent_at, first[-1].id), limit=100)
+        assert len(first) + len(rest) == 30
+        assert rest[-1].order_number == "ORD-9" and rest[-1].address == "Av. Principal"
+
+        assert len(query_deliveries(s, START, END, status='ENTREGADO')) == 10
+        assert [r.id for r in query_deliveries(s, START, END, search="nota 15")] == [16]
+        assert len(query_deliveries(s, START, END, search="PEDRO")) == 30
+        assert query_deliveries(s, START, END, search="principal")[0].zone == "Chacao"
+
+
+def test_undated_deliveries_are_listed_last(legacy_session_factory) -> None:
+    with legacy_session_factory() as s:
+        # Datos antiguos sin fecha de envío: no se pierden con el rango ni con la paginación
+        s.execute(text("UPDATE deliveries SET sent_at = NULL WHERE id IN (5, 7)"))
+        s.commit()
+
+        everything = query_deliveries(s, START, END)
+        assert len(everything) == 30
+        assert [r.id for r in everything[-2:]] == [7, 5]
+        assert everything[-1].sent_at is None
+
+        pages, after = [], None
+        while True:
+            page = query_deliveries(s, START, END, after=after, limit=4)
+            pages.extend(r.id for r in page)
+            if len(page) < 4:
+                break
+            after = (page[-1].sent_at, page[-1].id)
+        assert pages == [r.id for r in everything]
+
+        # El total de la tabla las cuenta; el pendiente del cierre semanal no
+        summary = delivery_window_summary(s, START, END)
+        assert (summary.total_count, summary.pending_count) == (30, 25)
+
+
+def test_search_matches_placeholder_labels(session_factory) -> None:
+    with session_factory() as s:
+        # Solo la entrega 1 tiene pedido; el resto se muestra como DILIGENCIA
+        assert len(query_deliveries(s, START, END, search="diligencia")) == 29
+        assert [r.id for r in query_deliveries(s, START, END, search="ORD-9")] == [1]
+        # La entrega fuera de la semana no tiene motorizado
+        assert [r.id for r in query_deliveries(s, END, None, search="sin asignar")] == [31]
+
+
+def test_window_summary_is_one_query(session_factory) -> None:
+    with session_factory() as s:
+        statements: list[str] = []
+        event.listen(s.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+        summary = delivery_window_summary(s, START, END, status='ENTREGADO')
+        assert len(statements) == 1
+    # El pendiente no depende del filtro de estado: 30 - 3 de CLIENTE
+    assert (summary.total_count, summary.pending_count, summary.pending_bs) == (10, 27, 270.0)
+
+
+def test_view_fetches_pages_on_scroll(qapp, session_factory) -> None:
+    from PySide6.QtCore import QDate
+    from src.admin_app.ui.deliveries_view import DeliveriesView
+    from src.admin_app.services import delivery_listing
+
+    view = DeliveriesView(session_factory)
+    view.dt_start.setDate(QDate(2025, 3, 3))
+    view.dt_end.setDate(QDate(2025, 3, 9))
+    view.refresh()
+    assert view.table.rowCount() == min(30, delivery_listing.DEFAULT_PAGE_SIZE)
+    assert view.lbl_week_count.text() == "Carreras Empresa: 27"
+
+    view.cb_status_filter.setCurrentIndex(view.cb_status_filter.findData('ENTREGADO'))
+    assert view.table.rowCount() == 10
+    assert view._status_label.text().endswith("10 de 10 entregas cargadas")
+
+    view._has_more = True
+    view._fetch_page()
+    assert view.table.rowCount() == 10
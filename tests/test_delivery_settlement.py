@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Account, Base, Delivery, DeliveryPayment, DeliveryZone, Transaction, TransactionCategory, User
+from src.admin_app.services.delivery_settlement import (
+    pending_by_rider,
+    pending_totals,
+    settle_all_riders,
+    settle_rider,
+    unsettle_payment,
+)
+
+
+WEEK = (datetime(2025, 3, 3), datetime(2025, 3, 10))
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        ana = User(username="ana", full_name="Ana Pérez", password_hash="x")
+        luis = User(username="luis", password_hash="x")
+        zone = DeliveryZone(name="Centro", price=2.0)
+        acc = Account(name="Banesco", type="BANK", currency="VES", balance=1000.0)
+        s.add_all([ana, luis, zone, acc, TransactionCategory(name="Delivery", type="EXPENSE")])
+        s.flush()
+
+        def d(user, day, amount, source='EMPRESA', status='ENTREGADO'):
+            s.add(Delivery(zone_id=zone.id, delivery_user_id=user.id, sent_at=datetime(2025, 3, day, 12),
+                           amount_bs=amount, payment_source=source, status=status))
+
+        d(ana, 3, 50.0)
+        d(ana, 9, 70.0, status='PENDIENTE')
+        d(ana, 10, 99.0)                 # fuera de la semana (rango semiabierto)
+        d(luis, 5, 40.0)
+        d(luis, 6, 30.0, source='CLIENTE')
+        s.commit()
+        yield s
+
+
+def test_pending_by_rider_groups_in_one_query(session) -> None:
+    statements: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    riders = pending_by_rider(session, *WEEK)
+    assert len(statements) == 1
+    assert [(r.username, r.display_name, r.count, r.total_bs) for r in riders] == [
+        ("ana", "Ana Pérez", 2, 120.0),
+        ("luis", "luis", 1, 40.0),
+    ]
+    assert [r.count for r in pending_by_rider(session, status='ENTREGADO')] == [2, 1]
+    assert pending_totals(session, *WEEK) == (3, 160.0)
+
+
+def test_settle_rider_marks_batch_and_debits_account(session) -> None:
+    ana = session.query(User).filter_by(username="ana").one()
+    acc = session.query(Account).one()
+
+    statements: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    result = settle_rider(session, ana.id, *WEEK, acc.id, notes="Semana 1")
+    updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE DELIVERIES")]
+    assert len(updates) == 1
+
+    assert (result.count, result.amount_bs) == (2, 120.0)
+    payment = session.get(DeliveryPayment, result.payment_id)
+    assert (payment.quantity, payment.amount_bs, payment.notes) == (2, 120.0, "Semana 1")
+    assert session.query(Delivery).filter_by(payment_id=payment.id).count() == 2
+    txn = session.get(Transaction, result.transaction_id)
+    assert (txn.amount, txn.related_table, txn.related_id) == (120.0, 'delivery_payments', payment.id)
+    assert txn.category.name == "Delivery"
+    assert session.get(Account, acc.id).balance == pytest.approx(880.0)
+
+    # Nada pendiente: no se crea un pago vacío
+    assert settle_rider(session, ana.id, *WEEK, acc.id) is None
+    assert session.query(DeliveryPayment).count() == 1
+
+
+def test_settle_all_riders_and_undo(session) -> None:
+    acc = session.query(Account).one()
+    settled = settle_all_riders(session, *WEEK, acc.id)
+    assert sorted((s.count, s.amount_bs) for s in settled) == [(1, 40.0), (2, 120.0)]
+    assert pending_totals(session, *WEEK) == (0, 0.0)
+    assert session.query(Transaction).count() == 2
+    assert session.get(Account, acc.id).balance == pytest.approx(840.0)
+
+    assert unsettle_payment(session, settled[0].payment_id)
+    assert not unsettle_payment(session, settled[0].payment_id)
+    assert session.query(Transaction).count() == 1
+    assert pending_totals(session, *WEEK) == (settled[0].count, settled[0].amount_bs)
+    assert session.get(Account, acc.id).balance == pytest.approx(840.0 + settled[0].amount_bs)
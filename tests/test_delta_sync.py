@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, delete, func, insert, select, text, update
+
+from src.admin_app.db import make_session_factory
+from src.admin_app.models import Base, Customer, Sale, SyncChange, SyncOrigin, Worker
+from src.admin_app.services.delta_sync import SyncConflict, SyncState, claim_existing, sync_once, track_changes
+from src.admin_app.services.synthetic_data import DatasetSpec, generate_dataset
+
+
+SPEC = DatasetSpec(sales=120, customers=25, workers=4, parameter_tables=1, parameter_rows=5, seed=11)
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _rows(engine, model) -> list:
+    table = model.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(table).order_by(table.c.id)).all()
+
+
+def test_delta_sync_ships_inserts_updates_and_deletes(tmp_path) -> None:
+    local, remote = _engine(tmp_path / "local.db"), _engine(tmp_path / "remote.db")
+    track_changes(local)
+    generate_dataset(local, SPEC)
+    state = SyncState(tmp_path / "sync.json")
+
+    first = sync_once(local, remote, state, batch_size=50)
+    assert first.upserted["sales"] == 120
+    assert _rows(remote, Sale) == _rows(local, Sale)
+
+    # Sin cambios no se reenvía nada (tampoco las filas en el borde de updated_at)
+    assert sync_once(local, remote, SyncState(tmp_path / "sync.json")).total == 0
+
+    factory = make_session_factory(local)
+    with factory() as s:
+        sale = s.get(Sale, 5)
+        sale.notes = "corregida"
+        s.add(Customer(name="Cliente nuevo"))
+        s.delete(s.get(Customer, 3))
+        s.commit()
+    # Escritura Core sobre una tabla con updated_at: la detecta la marca de agua
+    with local.begin() as conn:
+        conn.execute(update(Worker.__table__).where(Worker.__table__.c.id == 2)
+                     .values(updated_at=func.datetime("now", "+1 day"), salario=999.0))
+
+    report = sync_once(local, remote, state)
+    assert report.upserted == {"customers": 1, "sales": 1, "workers": 1}
+    assert report.deleted == {"customers": 1}
+    for model in (Sale, Customer, Worker):
+        assert _rows(remote, model) == _rows(local, model)
+
+    # Lo enviado se purga del registro local
+    with local.connect() as conn:
+        assert conn.execute(select(func.count(SyncChange.id))).scalar() == 0
+
+
+def test_untracked_engine_does_not_log_changes(tmp_path) -> None:
+    engine = _engine(tmp_path / "plain.db")
+    factory = make_session_factory(engine)
+    with factory() as s:
+        s.add(Customer(name="A"))
+        s.commit()
+        s.delete(s.get(Customer, 1))
+        s.commit()
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count(SyncChange.id))).scalar() == 0
+
+
+def test_bulk_and_raw_writes_are_tracked(tmp_path) -> None:
+    local, remote = _engine(tmp_path / "local.db"), _engine(tmp_path / "remote.db")
+    track_changes(local)
+    generate_dataset(local, SPEC)
+    state = SyncState(tmp_path / "sync.json")
+    sync_once(local, remote, state)
+
+    # Nada de esto pasa por el flush del ORM
+    factory = make_session_factory(local)
+    with factory() as s:
+        s.execute(update(Customer).where(Customer.id <= 3).values(phone="masivo"))
+        s.query(Customer).filter(Customer.id == 10).delete()
+        s.commit()
+    with local.begin() as conn:
+        conn.execute(delete(Sale.__table__).where(Sale.__table__.c.id == 7))
+        conn.execute(text("UPDATE sales SET notes = 'sql' WHERE id = 8"))
+
+    report = sync_once(local, remote, state)
+    assert report.upserted == {"customers": 3, "sales": 1}
+    assert report.deleted == {"customers": 1, "sales": 1}
+    for model in (Sale, Customer):
+        assert _rows(remote, model) == _rows(local, model)
+
+
+def test_rows_of_another_station_are_not_overwritten(tmp_path, monkeypatch) -> None:
+    remote = _engine(tmp_path / "remote.db")
+    first, second = _engine(tmp_path / "a.db"), _engine(tmp_path / "b.db")
+    for engine, name in ((first, "Cliente A"), (second, "Cliente B")):
+        track_changes(engine)
+        with make_session_factory(engine)() as s:
+            s.add(Customer(name=name))
+            s.commit()
+
+    monkeypatch.setenv("ADMIN_APP_STATION_ID", "sucursal-a")
+    assert sync_once(first, remote, SyncState(tmp_path / "a.json")).upserted == {"customers": 1}
+    monkeypatch.setenv("ADMIN_APP_STATION_ID", "sucursal-b")
+    with pytest.raises(SyncConflict, match="sucursal-a") as info:
+        sync_once(second, remote, SyncState(tmp_path / "b.json"))
+    assert (info.value.table, info.value.ids) == ("customers", [1])
+    assert [r.name for r in _rows(remote, Customer)] == ["Cliente A"]
+
+    # La estación conserva su nombre aunque cambie la variable
+    state_a = SyncState(tmp_path / "a.json")
+    with first.begin() as conn:
+        conn.execute(text("UPDATE customers SET name = 'Cliente A2'"))
+    assert sync_once(first, remote, state_a).upserted == {"customers": 1}
+    assert state_a.station == "sucursal-a"
+
+
+def test_claim_existing_adopts_migrated_rows(tmp_path) -> None:
+    from src.admin_app.services.pg_migration import Checkpoint, migrate
+
+    local, remote = _engine(tmp_path / "local.db"), _engine(tmp_path / "remote.db")
+    generate_dataset(local, SPEC)
+    migrate(local, remote, Checkpoint(None))
+    track_changes(local)
+    with local.begin() as conn:
+        conn.execute(text("UPDATE customers SET phone = 'editado' WHERE id = 2"))
+
+    state = SyncState(tmp_path / "sync.json")
+    # Sin reclamarlas, las filas migradas no tienen dueño en el servidor
+    with pytest.raises(SyncConflict):
+        sync_once(local, remote, state)
+    claimed = claim_existing(local, remote, state.station)
+    assert claimed["customers"] == 25
+    with remote.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(SyncOrigin)).scalar() == sum(claimed.values())
+    sync_once(local, remote, state)
+    assert _rows(remote, Customer) == _rows(local, Customer)
+
+
+def test_changes_after_a_purge_keep_syncing(tmp_path) -> None:
+    local, remote = _engine(tmp_path / "local.db"), _engine(tmp_path / "remote.db")
+    track_changes(local)
+    with make_session_factory(local)() as s:
+        s.add_all([Customer(name="A"), Customer(name="B")])
+        s.commit()
+    state = SyncState(tmp_path / "sync.json")
+    sync_once(local, remote, state)
+
+    # Tras cada purga SQLite vuelve a numerar `sync_changes` desde 1
+    for phone in ("111", "222", "333"):
+        with local.begin() as conn:
+            conn.execute(text("UPDATE customers SET phone = :p WHERE id = 1"), {"p": phone})
+        assert sync_once(local, remote, state).upserted == {"customers": 1}
+        assert _rows(remote, Customer) == _rows(local, Customer)
+
+
+def test_reused_id_is_not_deleted_on_the_server(tmp_path) -> None:
+    local, remote = _engine(tmp_path / "local.db"), _engine(tmp_path / "remote.db")
+    track_changes(local)
+    with local.begin() as conn:
+        conn.execute(insert(Customer.__table__), [{"name": "A"}, {"name": "B"}])
+    state = SyncState(tmp_path / "sync.json")
+    sync_once(local, remote, state)
+
+    # Sin AUTOINCREMENT el alta reutiliza el id 2 de la fila borrada
+    with local.begin() as conn:
+        conn.execute(text("DELETE FROM customers WHERE id = 2"))
+        conn.execute(insert(Customer.__table__).values(name="C"))
+    report = sync_once(local, remote, state)
+    assert report.upserted == {"customers": 1} and report.deleted == {}
+    assert [(r.id, r.name) for r in _rows(remote, Customer)] == [(1, "A"), (2, "C")]
+
+    with local.begin() as conn:
+        conn.execute(text("DELETE FROM customers WHERE id = 2"))
+    assert sync_once(local, remote, state).deleted == {"customers": 1}
+    assert [(r.id, r.name) for r in _rows(remote, Customer)] == [(1, "A")]
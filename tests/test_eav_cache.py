@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Base
+from src.admin_app.repository import (
+    eav_get_attribute_by_code,
+    eav_list_attributes_for_type,
+    eav_list_types,
+    eav_set_option_price,
+    ensure_corporeo_eav,
+)
+
+
+def _count_statements(engine) -> list[str]:
+    seen: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: seen.append(stmt))
+    return seen
+
+
+def test_eav_schema_served_from_cache_and_invalidated_on_price_change() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(bind=engine) as session:
+        type_id = ensure_corporeo_eav(session)
+        seen = _count_statements(engine)
+        # Tras sembrar se recarga el esquema una sola vez (atributos+opciones y tipos)
+        assert ensure_corporeo_eav(session) == type_id
+        assert len(seen) == 2
+
+        seen.clear()
+        assert ensure_corporeo_eav(session) == type_id
+        attrs = eav_list_attributes_for_type(session, type_id)
+        assert [t.key for t in eav_list_types(session)] == ['CORPOREO']
+        assert seen == []
+
+        codes = [atr.code for atr, _ in attrs]
+        assert codes[:3] == ['alto_mm', 'ancho_mm', 'diametro_mm']
+        corte = dict((atr.code, opts) for atr, opts in attrs)['corte_tipo']
+        assert [o.code for o in corte] == ['recto', 'silueta', 'redondo']
+
+        eav_set_option_price(session, option_id=corte[1].id, price_per_unit=30.0)
+        assert eav_get_attribute_by_code(session, 'corte_tipo').id == corte[1].attribute_id
+        refreshed = dict((atr.code, opts) for atr, opts in eav_list_attributes_for_type(session, type_id))
+        assert refreshed['corte_tipo'][1].price_per_unit == 30.0
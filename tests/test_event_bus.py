@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.events import (
+    CREATED, DELETED, UPDATED, EventBus, OrderChanged, PaymentChanged, SaleChanged, TableChanged, bus, events,
+)
+from src.admin_app.models import Base, Delivery, DeliveryZone, Order, Sale, SalePayment
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+@pytest.fixture()
+def session_factory(qapp):
+    engine = make_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    bus.flush()  # descartar lo que hayan dejado otras pruebas
+    return make_session_factory(engine)
+
+
+@pytest.fixture()
+def published(session_factory):
+    """Lotes del bus y avisos de la señal antigua; se desconectan al terminar la prueba."""
+    batches, legacy = [], []
+    on_legacy = lambda: legacy.append(True)  # noqa: E731
+    bus.changes.connect(batches.append)
+    events.sale_updated.connect(on_legacy)
+    yield batches, legacy
+    bus.changes.disconnect(batches.append)
+    events.sale_updated.disconnect(on_legacy)
+
+
+def test_bursts_are_coalesced_per_entity(qapp) -> None:
+    local = EventBus()
+    batches = []
+    local.changes.connect(batches.append)
+
+    local.publish(SaleChanged(1, CREATED), SaleChanged(1, UPDATED), SaleChanged(2, UPDATED))
+    local.publish(SaleChanged(2, DELETED), SaleChanged(3, CREATED), SaleChanged(3, DELETED))
+    local.publish(PaymentChanged(7, UPDATED, sale_id=1))
+    assert local.flush() is batches[0]
+    assert local.flush() is None
+
+    batch = batches[0]
+    assert set(batch.events) == {
+        SaleChanged(1, CREATED), SaleChanged(2, DELETED), SaleChanged(3, DELETED), PaymentChanged(7, UPDATED, 1),
+    }
+    assert batch.ids(SaleChanged, DELETED) == {2, 3}
+    assert batch.touches(PaymentChanged) and not batch.touches(OrderChanged)
+
+
+def test_committed_orm_changes_are_published_once(session_factory, published) -> None:
+    batches, legacy = published
+    with session_factory() as s:
+        sale = Sale(articulo="Pendón", asesor="tester", venta_usd=10.0, numero_orden="ORD-1")
+        s.add(sale)
+        s.flush()
+        s.add(Order(sale_id=sale.id, order_number="ORD-1", product_name="Pendón", details_json="{}"))
+        s.commit()
+        sale.venta_usd = 12.0
+        s.add(SalePayment(sale_id=sale.id, payment_method="Zelle", amount_usd=12.0))
+        s.commit()
+        sale_id = sale.id
+
+        s.add(Sale(articulo="Nunca", asesor="tester", venta_usd=1.0, numero_orden="X"))
+        s.flush()
+        s.rollback()
+
+    batch = bus.flush()
+    assert batches == [batch]
+    assert legacy == [True]
+    assert {type(e).__name__: e.op for e in batch.events} == {
+        'SaleChanged': CREATED, 'OrderChanged': CREATED, 'PaymentChanged': CREATED,
+    }
+    assert batch.of(PaymentChanged)[0].sale_id == sale_id
+
+
+def test_bulk_update_and_delete_are_published(session_factory, published) -> None:
+    from sqlalchemy import update
+    from src.admin_app.events import DeliveryChanged
+    from src.admin_app.repository import delete_sale_by_id
+
+    batches, _legacy = published
+    with session_factory() as s:
+        zone = DeliveryZone(name="Chacao", price=3.0)
+        sale = Sale(articulo="Pendón", asesor="tester", venta_usd=10.0, numero_orden="ORD-1")
+        s.add_all([zone, sale])
+        s.flush()
+        order = Order(sale_id=sale.id, order_number="ORD-1", product_name="Pendón", details_json="{}")
+        s.add(order)
+        s.flush()
+        s.add_all([Delivery(zone_id=zone.id, order_id=order.id), Delivery(zone_id=zone.id)])
+        s.commit()
+        sale_id, order_id = sale.id, order.id
+    bus.flush()
+    batches.clear()
+
+    # UPDATE masivo sin pasar por el flush (como el cierre semanal de deliveries)
+    with session_factory() as s:
+        s.execute(update(Delivery).where(Delivery.order_id.is_(None)).values(amount_bs=5.0))
+        s.execute(update(Delivery).where(Delivery.id == -1).values(amount_bs=1.0))
+        s.commit()
+    assert bus.flush().events == (DeliveryChanged(2, UPDATED, None),)
+
+    # Lo que no se confirma no se publica
+    with session_factory() as s:
+        s.execute(update(Sale).values(venta_usd=0.0))
+        s.rollback()
+    assert bus.flush() is None
+
+    # delete_sale_by_id borra las entregas con query(...).delete()
+    with session_factory() as s:
+        assert delete_sale_by_id(s, sale_id)
+    batch = bus.flush()
+    assert batch.ids(DeliveryChanged, DELETED) == {1}
+    assert batch.of(DeliveryChanged)[0].order_id == order_id
+    assert batch.ids(OrderChanged, DELETED) == {order_id}
+    assert batch.ids(SaleChanged, DELETED) == {sale_id}
+
+
+def test_large_bulk_writes_publish_a_table_event(session_factory, published, monkeypatch) -> None:
+    from sqlalchemy import event, update
+    from src.admin_app import events as events_mod
+
+    batches, _legacy = published
+    with session_factory() as s:
+        s.add_all([Sale(articulo=f"Art {i}", asesor="tester", venta_usd=1.0, numero_orden=f"ORD-{i}") for i in range(5)])
+        s.commit()
+    bus.flush()
+    batches.clear()
+
+    # Por encima del límite no se guardan los ids: la vista recarga la tabla
+    monkeypatch.setattr(events_mod, "BULK_ID_LIMIT", 3)
+    with session_factory() as s:
+        s.execute(update(Sale).values(venta_usd=2.0))
+        s.commit()
+    batch = bus.flush()
+    assert batch.events == (TableChanged(SaleChanged, UPDATED),)
+    assert batch.whole(SaleChanged) and batch.touches(SaleChanged) and not batch.ids(SaleChanged)
+
+    # Sin aplicación Qt no se publica nada, así que tampoco se leen los ids antes
+    monkeypatch.setattr(events_mod.QCoreApplication, "instance", staticmethod(lambda: None))
+    with session_factory() as s:
+        statements: list[str] = []
+        event.listen(s.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+        s.execute(update(Sale).where(Sale.id == 1).values(venta_usd=3.0))
+        s.commit()
+    assert len(statements) == 1 and statements[0].startswith("UPDATE")
+
+
+def test_sales_view_patches_rows_instead_of_reloading(session_factory, monkeypatch) -> None:
+    from src.admin_app.ui.sales_view import SalesView
+
+    with session_factory() as s:
+        s.add_all([Sale(articulo=f"Art {i}", asesor="tester", venta_usd=5.0, numero_orden=f"ORD-{i}") for i in range(3)])
+        s.commit()
+    view = SalesView(session_factory)
+    assert view.table.rowCount() == 3
+
+    reloads = []
+    monkeypatch.setattr(view, "_load_sales", lambda: reloads.append(True))
+    with session_factory() as s:
+        first = s.query(Sale).order_by(Sale.id).first()
+        first.articulo = "Editado"
+        s.add(Sale(articulo="Nueva", asesor="tester", venta_usd=7.0, numero_orden="ORD-9"))
+        s.commit()
+        s.delete(s.query(Sale).filter_by(numero_orden="ORD-1").one())
+        s.commit()
+    bus.flush()
+
+    assert reloads == []
+    assert view.table.rowCount() == 3
+    assert [view.table.item(r, 2).text() for r in range(3)] == ["ORD-9", "ORD-2", "ORD-0"]
+    assert view.table.item(2, 3).text() == "Editado"
+
+    # Un cambio en bloque sin ids recarga la tabla completa
+    bus.publish(TableChanged(SaleChanged, UPDATED))
+    bus.flush()
+    assert reloads == [True]
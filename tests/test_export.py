@@ -0,0 +1,184 @@
+import csv
+import os
+import sys
+import time
+from datetime import date, datetime
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.models import Account, Base, Customer, Sale, SalePayment, Transaction, TransactionCategory
+from src.admin_app.services import export as export_mod
+from src.admin_app.services.export import SPECS, export, format_for
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+N_CUSTOMERS = 250
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = make_engine(f"sqlite:///{(tmp_path / 'export.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    factory = make_session_factory(engine)
+    with factory() as session:
+        session.add_all(
+            Customer(id=i, name=f"Cliente {i}", first_name="José" if i % 2 else None, document=f"V-{i:08d}")
+            for i in range(1, N_CUSTOMERS + 1)
+        )
+        session.add_all([
+            Sale(id=1, fecha=datetime(2025, 1, 10, 9, 30), numero_orden="ORD-1", articulo="Corpóreo",
+                 asesor="ana", venta_usd=100.0, cliente="Cliente 1", cliente_id=1),
+            Sale(id=2, fecha=datetime(2025, 2, 5), numero_orden="ORD-2", articulo="Banner",
+                 asesor="luis", venta_usd=50.5),
+            Sale(id=3, fecha=datetime(2025, 3, 1), numero_orden="ORD-3", articulo="Vinil",
+                 asesor="ana", venta_usd=20.0),
+        ])
+        session.add(Account(id=1, name="Caja", type="CASH", currency="USD"))
+        session.add(TransactionCategory(id=1, name="Ventas", type="INCOME"))
+        session.add_all([
+            Transaction(date=datetime(2025, 1, 2), amount=10.0, transaction_type="INCOME",
+                        description="Abono", account_id=1, category_id=1),
+            Transaction(date=datetime(2025, 2, 2), amount=-4.0, transaction_type="EXPENSE",
+                        description="Tinta", account_id=1),
+        ])
+        session.commit()
+    return factory
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_streams_all_rows_in_batches(session_factory, tmp_path) -> None:
+    calls = []
+    result = export(
+        session_factory, "customers", tmp_path / "clientes.csv",
+        batch_size=100, progress=lambda done, total: calls.append((done, total)),
+    )
+    assert result.rows == N_CUSTOMERS and not result.cancelled
+    rows = _read_csv(result.path)
+    assert rows[0] == SPECS["customers"].headers
+    assert len(rows) == N_CUSTOMERS + 1
+    # Acentos con BOM; None se escribe vacío
+    assert rows[1][:3] == ["1", "José", ""] and rows[2][1] == ""
+    assert calls == [(0, 250), (100, 250), (200, 250), (250, 250)]
+    assert list(tmp_path.glob(".*.part")) == []
+
+
+def test_xlsx_write_only_with_filters(session_factory, tmp_path) -> None:
+    from openpyxl import load_workbook
+
+    result = export(
+        session_factory, "sales", tmp_path / "ventas.xlsx",
+        start=date(2025, 1, 1), end=date(2025, 3, 1), where=(Sale.asesor == "ana",),
+    )
+    assert result.rows == 1
+    sheet = load_workbook(result.path, read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert sheet.title == "Ventas"
+    assert list(rows[0][:4]) == ["ID", "Fecha", "Orden", "Cliente"]
+    assert rows[1][:4] == (1, datetime(2025, 1, 10, 9, 30), "ORD-1", "Cliente 1")
+
+
+def test_ids_filter_is_chunked(session_factory, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(export_mod, "IDS_CHUNK", 7)
+    ids = set(range(5, 60, 2)) | {9999}
+    result = export(session_factory, "customers", tmp_path / "c.csv", ids=ids, progress=lambda *_: None)
+    assert [int(r[0]) for r in _read_csv(result.path)[1:]] == sorted(ids - {9999})
+
+
+def test_payments_by_ids_are_sorted_by_id_across_chunks(session_factory, tmp_path, monkeypatch) -> None:
+    with session_factory() as session:
+        # Fechas al revés de los ids: dentro de un tramo se ordenaría por fecha
+        session.add_all(
+            SalePayment(id=i, sale_id=1 + i % 3, payment_method="Zelle", amount_usd=float(i),
+                        payment_date=datetime(2025, 4, 30 - i))
+            for i in range(1, 11)
+        )
+        session.commit()
+    monkeypatch.setattr(export_mod, "IDS_CHUNK", 4)
+
+    result = export(session_factory, "payments", tmp_path / "p.csv", ids=range(1, 11))
+    assert [int(r[0]) for r in _read_csv(result.path)[1:]] == list(range(1, 11))
+
+    # El filtro por asesor de la vista de ventas alcanza a los pagos por el join con `sales`
+    result = export(session_factory, "payments", tmp_path / "luis.csv", where=(Sale.asesor == "luis",))
+    rows = _read_csv(result.path)[1:]
+    assert [int(r[0]) for r in rows] == [10, 7, 4, 1]
+    assert {r[3] for r in rows} == {"ORD-2"}
+
+
+def test_sales_view_exports_payments(qapp, session_factory, monkeypatch) -> None:
+    from src.admin_app.ui import export_progress
+    from src.admin_app.ui.sales_view import SalesView
+
+    calls = []
+    monkeypatch.setattr(export_progress, "start_export", lambda *a, **kw: calls.append((a[2], kw)))
+    view = SalesView(session_factory)
+    view.set_current_user("luis")
+    view.btn_export_payments.click()
+
+    key, kwargs = calls[0]
+    assert key == "payments" and kwargs["default_name"].startswith("pagos_")
+    assert len(kwargs["where"]) == 1
+
+
+def test_transactions_join_account_and_category(session_factory, tmp_path) -> None:
+    result = export(session_factory, "transactions", tmp_path / "mov.csv", start=date(2025, 1, 1))
+    rows = _read_csv(result.path)
+    by_desc = {r[3]: r for r in rows[1:]}
+    assert by_desc["Abono"][1] == "2025-01-02 00:00:00"
+    assert by_desc["Abono"][4:7] == ["Ventas", "Caja", "USD"]
+    assert by_desc["Tinta"][4] == "" and by_desc["Tinta"][7] == "-4.0"
+
+
+def test_xlsx_rolls_over_to_new_sheet(session_factory, tmp_path, monkeypatch) -> None:
+    from openpyxl import load_workbook
+
+    monkeypatch.setattr(export_mod, "XLSX_MAX_ROWS", 101)
+    result = export(session_factory, "customers", tmp_path / "c.xlsx", batch_size=64)
+    book = load_workbook(result.path, read_only=True)
+    assert book.sheetnames == ["Clientes", "Clientes (2)", "Clientes (3)"]
+    counts = [sum(1 for _ in book[name].iter_rows()) for name in book.sheetnames]
+    assert counts == [101, 101, 51]
+
+
+def test_cancel_and_errors_leave_no_file(session_factory, tmp_path) -> None:
+    target = tmp_path / "clientes.xlsx"
+    seen = []
+    result = export(
+        session_factory, "customers", target, batch_size=50,
+        progress=lambda done, total: seen.append(done), cancelled=lambda: len(seen) > 2,
+    )
+    assert result.cancelled and result.rows == 100
+    assert not target.exists() and list(tmp_path.iterdir()) == [tmp_path / "export.db"]
+
+    with pytest.raises(ValueError):
+        format_for("clientes.pdf")
+
+
+def test_export_thread_reports_progress(qapp, session_factory, tmp_path) -> None:
+    from src.admin_app.ui.export_progress import ExportThread
+
+    thread = ExportThread(session_factory, "customers", str(tmp_path / "c.csv"), batch_size=100)
+    progress, done = [], []
+    thread.progress.connect(lambda n, total: progress.append((n, total)))
+    thread.done.connect(done.append)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not done and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    thread.wait()
+    assert done and done[0].rows == N_CUSTOMERS
+    assert progress[-1] == (N_CUSTOMERS, N_CUSTOMERS)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sys
+import types
+
+from src.admin_app.utils.import_audit import external_offenders, own_offenders, parse_importtime, total_ms
+from src.admin_app.utils.lazy_import import LazyModule, is_loaded, lazy_module
+
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     _json
+import time:       400 |        500 |   json
+import time:      2000 |       2000 |       urllib3.util
+import time:      3000 |       5000 |     urllib3
+import time:      1000 |       6000 |   requests
+import time:       700 |       7200 |   src.admin_app.exchange
+import time:       250 |      13950 | src.admin_app
+"""
+
+
+def test_parse_importtime_links_children_to_parent() -> None:
+    records = {r.module: r for r in parse_importtime(SAMPLE)}
+    assert len(records) == 7
+    assert records["json"].parent == "src.admin_app"
+    assert records["_json"].parent == "json"
+    assert records["urllib3.util"].parent == "urllib3"
+    assert records["urllib3"].parent == "requests"
+    assert records["requests"].parent == "src.admin_app"
+    assert records["src.admin_app"].parent is None
+    assert records["urllib3"].self_us == 3000 and records["urllib3"].cumulative_us == 5000
+
+
+def test_offenders_and_total() -> None:
+    records = parse_importtime("garbage line\n" + SAMPLE)
+    assert total_ms(records) == 13.95
+    assert total_ms(records, "src.admin_app.exchange") == 7.2
+    assert [r.module for r in external_offenders(records)] == ["requests", "json"]
+    assert [r.module for r in own_offenders(records)] == ["src.admin_app.exchange", "src.admin_app"]
+
+
+def test_lazy_module_imports_on_first_attribute(monkeypatch) -> None:
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    proxy = lazy_module("colorsys")
+    assert isinstance(proxy, LazyModule)
+    assert not is_loaded(proxy) and "colorsys" not in sys.modules
+    assert proxy.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert is_loaded(proxy) and "colorsys" in sys.modules
+
+
+def test_lazy_module_optional_and_already_loaded() -> None:
+    assert lazy_module("no_existe_este_paquete_xyz", optional=True) is None
+    assert lazy_module("json") is sys.modules["json"]
+    assert is_loaded(sys.modules["json"]) and not is_loaded(None)
+    assert isinstance(lazy_module("no_existe_este_paquete_xyz"), types.ModuleType)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.models import Account, Base, Transaction, TransactionCategory
+from src.admin_app.services.ledger import query_ledger
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+@pytest.fixture()
+def session_factory():
+    engine = make_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    factory = make_session_factory(engine)
+    base = datetime(2025, 3, 1)
+    with factory() as s:
+        usd = Account(name="Caja USD", type="CASH", currency="USD", balance=0.0)
+        ves = Account(name="Banesco", type="BANK", currency="VES", balance=0.0)
+        cat = TransactionCategory(name="Ventas", type="INCOME")
+        s.add_all([usd, ves, cat])
+        s.flush()
+        for i in range(25):
+            acc = usd if i % 2 == 0 else ves
+            kind = 'INCOME' if i % 5 else 'EXPENSE'
+            s.add(Transaction(date=base + timedelta(hours=i), amount=10.0 + i, transaction_type=kind,
+                              description=f"mov {i}", account_id=acc.id, category_id=cat.id if i < 3 else None))
+        s.commit()
+    return factory
+
+
+def test_query_ledger_pages_and_totals(session_factory) -> None:
+    with session_factory() as s:
+        page = query_ledger(s, start=datetime(2025, 3, 1, 5), limit=7)
+        assert [r.description for r in page.rows[:2]] == ["mov 24", "mov 23"]
+        assert page.total_count == 20 and page.has_more
+        # EXPENSE: i = 5, 10, 15, 20 -> USD (10, 20): 20+30; VES (5, 15): 15+25
+        assert page.total('EXPENSE', 'USD') == pytest.approx(50.0)
+        assert page.total('EXPENSE', 'VES') == pytest.approx(40.0)
+
+        last = query_ledger(s, start=datetime(2025, 3, 1, 5), offset=14, limit=7, with_totals=False)
+        assert len(last.rows) == 6 and last.total_count == -1
+
+        # Rango semiabierto y categoría por outer join
+        day = query_ledger(s, start=datetime(2025, 3, 1), end=datetime(2025, 3, 1, 3), transaction_type='EXPENSE')
+        assert [(r.description, r.category_name) for r in day.rows] == [("mov 0", "Ventas")]
+
+
+def test_ledger_model_fetches_pages_on_demand(qapp, session_factory) -> None:
+    from src.admin_app.ui.accounting_view import IncomeExpensesManager, LedgerTableModel
+
+    model = LedgerTableModel(session_factory, IncomeExpensesManager._COLUMNS, amount_column=2, page_size=10)
+    page = model.load(datetime(2025, 3, 1))
+    assert page.total_count == 25
+    assert model.rowCount() == 10 and model.canFetchMore()
+    model.fetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 25 and not model.canFetchMore()
+    assert model.data(model.index(0, 2)) == "USD 34.00"
+    assert model.row_at(24).description == "mov 0"
+
+
+def test_dashboard_updates_only_changed_cards(qapp, session_factory) -> None:
+    from src.admin_app.ui.accounting_view import AccountingView
+
+    view = AccountingView(session_factory)
+    cards = dict(view._card_values)
+    with session_factory() as s:
+        s.query(Account).filter_by(name="Banesco").update({Account.balance: 150.0})
+        s.commit()
+    view.refresh_dashboard()
+    assert view._card_values == cards
+    assert cards['total_bs'].text() == "Bs. 150.00"
+    assert cards['total_usd'].text() == "$0.00"
+
+    with session_factory() as s:
+        s.add(Account(name="Zelle", type="DIGITAL", currency="USD", balance=5.0))
+        s.commit()
+    view.refresh_dashboard()
+    assert view._card_values['total_usd'].text() == "$5.00"
+    assert len(view._card_values) == 5
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from PySide6.QtWidgets import QApplication
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Base, DailyReport, Order, Sale, User
+from src.admin_app.services.notifications import badge_deltas, notification_counts
+from src.admin_app.utils.poll_scheduler import PollScheduler
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+def test_counts_come_from_one_statement() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        user = User(username="admin", password_hash="x")
+        sale = Sale(articulo="Pendón", asesor="admin", venta_usd=1.0, numero_orden="ORD-1")
+        s.add_all([user, sale])
+        s.flush()
+        for status in ('NUEVO', 'POR_PRODUCIR', 'LISTO', 'NUEVO'):
+            s.add(Order(sale_id=sale.id, order_number="ORD-1", product_name="P", details_json="{}", status=status))
+        s.add(DailyReport(report_date=datetime(2025, 1, 1), generated_by=user.id, report_status='PENDIENTE'))
+        s.add(DailyReport(report_date=datetime(2025, 1, 2), generated_by=user.id, report_status='CERRADO'))
+        s.commit()
+
+        statements: list[str] = []
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+        counts = notification_counts(s)
+        assert len(statements) == 1
+        assert (counts.new_orders, counts.pending_reports) == (3, 1)
+        assert counts.badges(include_reports=True) == {'pedidos': 3, 'reportes_diarios': 1, 'home': 4}
+
+        only_orders = notification_counts(s, include_reports=False)
+        assert only_orders.badges(include_reports=False) == {'pedidos': 3, 'home': 3}
+
+
+def test_badge_deltas_only_report_changes() -> None:
+    assert badge_deltas({}, {'pedidos': 0, 'home': 0}) == {'pedidos': 0, 'home': 0}
+    assert badge_deltas({'pedidos': 2, 'home': 2}, {'pedidos': 2, 'home': 3}) == {'home': 3}
+
+
+def test_scheduler_backs_off_while_inactive(qapp, monkeypatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(PollScheduler, "_now_ms", staticmethod(lambda: now[0]))
+    calls: list[str] = []
+    sched = PollScheduler(max_backoff=4)
+    sched.add_job("poll", 1000, lambda: calls.append("poll"))
+    sched.add_job("clock", 1000, lambda: calls.append("clock"), idle_backoff=False, pause_when_hidden=True)
+
+    now[0] = 1000
+    sched.tick()
+    assert calls == ["poll", "clock"]
+
+    sched.set_active(False, hidden=True)
+    for t in range(2000, 12001, 1000):
+        now[0] = t
+        sched.tick()
+    # Minimizada: el reloj se pausa y el sondeo corre en 2s, 4s, 8s y 12s (tope = 4x)
+    assert calls.count("clock") == 1
+    assert calls.count("poll") == 5
+    assert sched.current_interval("poll") == 4000
+
+    calls.clear()
+    sched.set_active(True)
+    assert calls == ["poll", "clock"]
+    assert sched.current_interval("poll") == 1000
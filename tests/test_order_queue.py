@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Base, Order, Role, Sale, User, UserRole
+from src.admin_app.repository import (
+    PendingOrder, assign_role_to_user, get_pending_orders_for_user, user_has_role,
+)
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        design, prod = Role(name="DISEÑADOR"), Role(name="PRODUCCION")
+        ana, beto = User(username="ana", password_hash="x"), User(username="beto", password_hash="x")
+        s.add_all([design, prod, ana, beto])
+        s.flush()
+        s.add_all([UserRole(user_id=ana.id, role_id=design.id), UserRole(user_id=ana.id, role_id=prod.id)])
+        sale = Sale(articulo="A", asesor="ana", venta_usd=1.0, numero_orden="V-1")
+        other = Sale(articulo="B", asesor="beto", venta_usd=1.0, numero_orden="V-2")
+        s.add_all([sale, other])
+        s.flush()
+        for i, (status, designer, owner) in enumerate([
+            ("NUEVO", ana.id, other),       # diseño asignado a ana
+            ("NUEVO", beto.id, other),      # diseño de otro
+            ("EN_PRODUCCION", None, other), # producción
+            ("LISTO", None, sale),          # venta de ana lista
+            ("LISTO", None, other),         # venta de beto lista
+            ("ENTREGADO", ana.id, sale),
+        ]):
+            s.add(Order(sale_id=owner.id, order_number=f"O-{i}", product_name="P", details_json="{}",
+                        status=status, designer_id=designer, created_at=datetime(2025, 1, 1 + i)))
+        s.commit()
+        yield s
+
+
+def test_queue_unions_role_branches_in_one_statement(session) -> None:
+    ana = session.query(User).filter_by(username="ana").one()
+    statements: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    queue = get_pending_orders_for_user(session, ana.id)
+    assert [o.order_number for o in queue] == ["O-0", "O-2", "O-3"]
+    assert all(type(o) is PendingOrder for o in queue)
+    # usuario + roles + la cola
+    assert len(statements) == 3
+    assert "UNION ALL" in statements[-1]
+
+    statements.clear()
+    get_pending_orders_for_user(session, ana.id, roles={"DISEÑADOR", "PRODUCCION"})
+    assert len(statements) == 2
+
+
+def test_cursor_pages_through_long_queues(session) -> None:
+    ana = session.query(User).filter_by(username="ana").one()
+    first = get_pending_orders_for_user(session, ana.id, limit=2)
+    rest = get_pending_orders_for_user(session, ana.id, limit=2, after=(first[-1].created_at, first[-1].id))
+    assert [o.order_number for o in first + rest] == ["O-0", "O-2", "O-3"]
+
+    beto = session.query(User).filter_by(username="beto").one()
+    assert [o.order_number for o in get_pending_orders_for_user(session, beto.id)] == ["O-4"]
+
+
+def test_roles_are_cached_per_session_until_they_change(session) -> None:
+    beto = session.query(User).filter_by(username="beto").one()
+    prod_id = session.query(Role.id).filter_by(name="PRODUCCION").scalar()
+    statements: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    assert not user_has_role(session, user_id=beto.id, role_name="ADMIN")
+    assert not user_has_role(session, user_id=beto.id, role_name="PRODUCCION")
+    assert len(statements) == 1
+
+    assign_role_to_user(session, user_id=beto.id, role_id=prod_id)
+    assert user_has_role(session, user_id=beto.id, role_name="PRODUCCION")
+
+
+def test_queue_branch_uses_composite_index(session) -> None:
+    plan = session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM orders WHERE status IN ('NUEVO', 'DISEÑO') AND designer_id = 1 "
+        "ORDER BY created_at"
+    )).all()
+    assert any("ix_orders_status_designer_created" in row[-1] for row in plan)
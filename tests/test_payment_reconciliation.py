@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Account, Base, Sale, SalePayment, Transaction
+from src.admin_app.services.payment_reconciliation import expected_amount, reconcile_payment_transactions
+
+
+def _txn(acc: Account, payment_id: int, amount: float) -> Transaction:
+    return Transaction(amount=amount, transaction_type='INCOME', description="Venta", account_id=acc.id,
+                       related_table='sale_payments', related_id=payment_id)
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        usd = Account(name="Zelle", type="DIGITAL", currency="USD", balance=0.0)
+        ves = Account(name="Banesco", type="BANK", currency="VES", balance=0.0)
+        sale = Sale(articulo="Pendón", asesor="tester", venta_usd=100.0, numero_orden="ORD-1")
+        s.add_all([usd, ves, sale])
+        s.flush()
+        pays = [
+            SalePayment(sale_id=sale.id, payment_method="Zelle", amount_usd=10.0),                      # ok
+            SalePayment(sale_id=sale.id, payment_method="Zelle", amount_usd=20.0),                      # sin transacción
+            SalePayment(sale_id=sale.id, payment_method="Pago Móvil", amount_bs=400.0, exchange_rate=40.0),  # monto distinto
+            SalePayment(sale_id=sale.id, payment_method="Zelle", amount_usd=5.0),                       # duplicada
+            SalePayment(sale_id=sale.id, payment_method="Zelle", amount_usd=0.0),                       # sin monto
+            SalePayment(sale_id=sale.id, payment_method="Pago Móvil", amount_usd=3.0),                  # sin tasa
+        ]
+        s.add_all(pays)
+        s.flush()
+        s.add_all([
+            _txn(usd, pays[0].id, 10.0),
+            _txn(ves, pays[2].id, 350.0),
+            _txn(usd, pays[3].id, 5.0),
+            _txn(usd, pays[3].id, 5.0),
+            _txn(ves, pays[5].id, 120.0),
+            _txn(usd, 999, 7.0),  # huérfana
+        ])
+        usd.balance = 10.0 + 5.0 + 5.0 + 7.0
+        ves.balance = 350.0 + 120.0
+        s.commit()
+        yield s
+
+
+def test_expected_amount_by_account_currency() -> None:
+    assert expected_amount(10.0, 0.0, 40.0, 'VES') == pytest.approx(400.0)
+    assert expected_amount(0.0, 400.0, 40.0, 'USD') == pytest.approx(10.0)
+    assert expected_amount(3.0, 0.0, 0.0, 'VES') is None
+
+
+def test_merge_join_reports_each_discrepancy(session) -> None:
+    report = reconcile_payment_transactions(session, batch_size=2)
+    ids = [p.id for p in session.query(SalePayment).order_by(SalePayment.id)]
+    assert report.payments_scanned == 6
+    assert report.transactions_scanned == 6
+    assert report.missing == [ids[1]]
+    assert len(report.orphans) == 1 and len(report.duplicates) == 1
+    assert [(m.payment_id, m.expected, m.actual) for m in report.mismatches] == [(ids[2], 400.0, 350.0)]
+    assert report.undetermined == 1
+    assert not report.is_clean
+
+
+def test_fix_applies_bulk_corrections_and_balances(session, monkeypatch) -> None:
+    from src.admin_app import events
+
+    published = []
+    monkeypatch.setattr(events.bus, "publish", lambda *items: published.extend(items))
+    report = reconcile_payment_transactions(session, fix=True, batch_size=2)
+    assert report.fixed == 4
+    # Las correcciones son UPDATE/DELETE directos: se avisa por cada pago afectado (la huérfana no tiene pago)
+    assert sorted(e.id for e in published if isinstance(e, events.PaymentChanged)) == [2, 3, 4]
+
+    again = reconcile_payment_transactions(session, batch_size=2)
+    assert again.is_clean
+    # Zelle: 10 + 5 (duplicada y huérfana revertidas) + 20 nueva; Banesco: 400 + 120
+    assert session.query(Account).filter_by(name="Zelle").one().balance == pytest.approx(35.0)
+    assert session.query(Account).filter_by(name="Banesco").one().balance == pytest.approx(520.0)
+    assert session.query(Transaction).count() == 5
+
+
+def test_unlinked_transactions_and_unfixable_payments(session, monkeypatch) -> None:
+    from src.admin_app import repository
+
+    usd = session.query(Account).filter_by(name="Zelle").one()
+    sale = session.query(Sale).one()
+    # Solo Bs y ninguna tasa disponible: no se puede crear su transacción en USD
+    unfixable = SalePayment(sale_id=sale.id, payment_method="Zelle", amount_bs=80.0)
+    session.add(unfixable)
+    session.add(Transaction(amount=9.0, transaction_type='INCOME', description="Venta", account_id=usd.id,
+                            related_table='sale_payments', related_id=None))
+    session.commit()
+    unlinked_id = session.query(Transaction.id).filter(Transaction.related_id.is_(None)).scalar()
+    monkeypatch.setattr(repository, "get_bcv_rate", lambda: None)
+
+    report = reconcile_payment_transactions(session, batch_size=2)
+    assert report.unlinked == [unlinked_id] and report.unlinked_count == 1
+    assert report.transactions_scanned == 7
+    assert unfixable.id in report.missing
+
+    report = reconcile_payment_transactions(session, fix=True, batch_size=2)
+    # Las mismas 4 de antes; el pago sin tasa y la transacción sin pago quedan pendientes
+    assert report.fixed == 4
+    again = reconcile_payment_transactions(session, batch_size=2)
+    assert again.missing == [unfixable.id] and again.unlinked == [unlinked_id]
+    assert not again.is_clean
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Account, Base, Transaction, TransactionCategory
+from src.admin_app.repository import get_payroll_status_by_month, get_payroll_status_by_year
+
+
+def _pay(session, cat_id, acc_id, worker_id, date, quincena=None, related_table="workers"):
+    session.add(Transaction(date=date, amount=100.0, transaction_type="EXPENSE", description="Pago de Nómina",
+                            account_id=acc_id, category_id=cat_id, related_table=related_table,
+                            related_id=worker_id, quincena=quincena))
+
+
+def test_payroll_status_uses_quincena_column_and_half_open_ranges() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as session:
+        assert get_payroll_status_by_month(session, 2025, 1) == {}
+
+        acc = Account(name="Caja", type="CASH", currency="USD")
+        nomina = TransactionCategory(name="Nómina", type="EXPENSE")
+        bonos = TransactionCategory(name="Bonos", type="EXPENSE")
+        session.add_all([acc, nomina, bonos])
+        session.flush()
+
+        # El mes sale de la fecha del pago y la quincena de la columna; sin columna, del día
+        # (1-15 -> q1). Así el pago del 1 de febrero con quincena=2 cuenta como q2 de febrero,
+        # y el del 20 de diciembre con quincena=1 como q1 aunque el día diga q2.
+        _pay(session, nomina.id, acc.id, 1, datetime(2025, 1, 10))
+        _pay(session, nomina.id, acc.id, 1, datetime(2025, 2, 1), quincena=2)
+        _pay(session, nomina.id, acc.id, 2, datetime(2025, 1, 31, 23, 59))
+        _pay(session, nomina.id, acc.id, 2, datetime(2025, 12, 20), quincena=1)
+        # No cuentan: otra categoría, otro origen, otro año
+        _pay(session, bonos.id, acc.id, 3, datetime(2025, 1, 5))
+        _pay(session, nomina.id, acc.id, 4, datetime(2025, 1, 5), related_table="suppliers")
+        _pay(session, nomina.id, acc.id, 1, datetime(2026, 1, 1))
+        session.commit()
+
+        assert get_payroll_status_by_month(session, 2025, 1) == {
+            1: {'q1': True, 'q2': False},
+            2: {'q1': False, 'q2': True},
+        }
+        assert get_payroll_status_by_month(session, 2025, 2) == {1: {'q1': False, 'q2': True}}
+        assert get_payroll_status_by_month(session, 2025, 12) == {2: {'q1': True, 'q2': False}}
+
+        year = get_payroll_status_by_year(session, 2025)
+        assert set(year) == {1, 2}
+        assert year[1] == {1: {'q1': True, 'q2': False}, 2: {'q1': False, 'q2': True}}
+        assert year[2][12] == {'q1': True, 'q2': False}
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from src.admin_app.models import Base, Sale, SaleItem, User, UserRole
+from src.admin_app.services import pg_migration
+from src.admin_app.services.pg_migration import Checkpoint, fk_levels, migrate, stream_chunks
+from src.admin_app.services.synthetic_data import DatasetSpec, generate_dataset
+
+
+SPEC = DatasetSpec(sales=150, customers=30, workers=4, parameter_tables=2, parameter_rows=8, seed=3)
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _dump(engine) -> dict[str, list]:
+    with engine.connect() as conn:
+        return {
+            t.name: conn.execute(select(t).order_by(*t.primary_key.columns)).all()
+            for t in Base.metadata.sorted_tables
+        }
+
+
+@pytest.fixture()
+def source(tmp_path):
+    engine = _engine(tmp_path / "src.db")
+    generate_dataset(engine, SPEC)
+    return engine
+
+
+def test_fk_levels_put_parents_first() -> None:
+    level_of = {t.name: n for n, level in enumerate(fk_levels(Base.metadata.sorted_tables)) for t in level}
+    assert level_of[User.__tablename__] < level_of[UserRole.__tablename__]
+    assert level_of[Sale.__tablename__] < level_of[SaleItem.__tablename__]
+
+
+def test_stream_chunks_respects_chunk_size_and_resume_point(source) -> None:
+    table = SaleItem.__table__
+    chunks = list(stream_chunks(source, table, None, 40))
+    assert chunks and all(len(c) <= 40 for c in chunks)
+    ids = [row.id for c in chunks for row in c]
+    assert ids == sorted(ids)
+    rest = [row.id for c in stream_chunks(source, table, [ids[99]], 40) for row in c]
+    assert rest == ids[100:]
+
+
+def test_parallel_copy_matches_source(source, tmp_path) -> None:
+    target = _engine(tmp_path / "dst.db")
+    reports = migrate(source, target, Checkpoint(tmp_path / "cp.json"), jobs=3, chunk_size=50)
+    assert _dump(target) == _dump(source)
+    assert sum(r.rows for r in reports) == sum(len(rows) for rows in _dump(source).values())
+
+
+def test_interrupted_copy_resumes_without_duplicates(source, tmp_path, monkeypatch) -> None:
+    target = _engine(tmp_path / "dst.db")
+    cp_path = tmp_path / "cp.json"
+    original = pg_migration.InsertLoader.load
+    calls = {"n": 0}
+
+    def flaky(self, table, rows):
+        if table.name == SaleItem.__tablename__:
+            calls["n"] += 1
+            if calls["n"] == 3:
+                raise RuntimeError("conexión perdida")
+        return original(self, table, rows)
+
+    monkeypatch.setattr(pg_migration.InsertLoader, "load", flaky)
+    with pytest.raises(RuntimeError):
+        migrate(source, target, Checkpoint(cp_path), jobs=2, chunk_size=50)
+
+    state = Checkpoint(cp_path).get(SaleItem.__tablename__)
+    assert state == {"last_pk": state["last_pk"], "rows": 100, "done": False}
+    with target.connect() as conn:
+        assert conn.execute(select(func.count(SaleItem.id))).scalar() == 100
+
+    monkeypatch.setattr(pg_migration.InsertLoader, "load", original)
+    reports = migrate(source, target, Checkpoint(cp_path), jobs=2, chunk_size=50)
+    assert _dump(target) == _dump(source)
+    resumed = next(r for r in reports if r.table == SaleItem.__tablename__)
+    assert resumed.resumed and resumed.rows == len(_dump(source)[SaleItem.__tablename__]) - 100
+
+
+def test_copy_refuses_non_empty_target_without_checkpoint(source, tmp_path) -> None:
+    target = _engine(tmp_path / "dst.db")
+    migrate(source, target, Checkpoint(tmp_path / "cp.json"), jobs=2, chunk_size=50)
+    before = _dump(target)
+
+    # Otra migración sobre el mismo destino sin su archivo de control: falla antes de copiar
+    with pytest.raises(RuntimeError, match="ya tiene filas"):
+        migrate(source, target, Checkpoint(tmp_path / "otro.json"), jobs=2, chunk_size=50)
+    with pytest.raises(RuntimeError, match=SaleItem.__tablename__):
+        pg_migration.copy_table(source, target, SaleItem.__table__, Checkpoint(None))
+    assert _dump(target) == before
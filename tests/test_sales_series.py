@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Base, Sale
+from src.admin_app.repository import SalesBucket, get_dashboard_snapshot, get_sales_series
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as s:
+        for i, (asesor, amount, fecha) in enumerate([
+            ("ana", 10.0, datetime(2025, 1, 6, 8)),     # lunes
+            ("ana", 5.0, datetime(2025, 1, 12, 23)),    # domingo, misma semana
+            ("luis", 7.0, datetime(2025, 1, 20, 12)),
+            ("ana", 3.0, datetime(2025, 3, 31, 18)),
+            ("luis", 99.0, datetime(2025, 4, 1)),       # fuera del rango
+        ]):
+            s.add(Sale(articulo="A", asesor=asesor, venta_usd=amount, numero_orden=f"O-{i}", fecha=fecha))
+        s.commit()
+        yield s
+
+
+def test_weeks_are_gap_filled_and_start_on_monday(session) -> None:
+    series = get_sales_series(session, date(2025, 1, 8), date(2025, 1, 27), "week")
+    assert series == (
+        SalesBucket(date(2025, 1, 6), 15.0, 2),
+        SalesBucket(date(2025, 1, 13), 0.0, 0),
+        SalesBucket(date(2025, 1, 20), 7.0, 1),
+    )
+
+
+def test_months_with_per_asesor_breakdown(session) -> None:
+    series = get_sales_series(session, date(2025, 1, 1), date(2025, 4, 1), "month", by_asesor=True)
+    assert [(b.asesor, b.start.month, b.total_sales) for b in series] == [
+        ("ana", 1, 15.0), ("ana", 2, 0.0), ("ana", 3, 3.0),
+        ("luis", 1, 7.0), ("luis", 2, 0.0), ("luis", 3, 0.0),
+    ]
+
+
+def test_days_filtered_by_asesor(session) -> None:
+    series = get_sales_series(session, date(2025, 1, 5), date(2025, 1, 8), filter_user="ana")
+    assert [(b.start.day, b.total_sales) for b in series] == [(5, 0.0), (6, 10.0), (7, 0.0)]
+    with pytest.raises(ValueError):
+        get_sales_series(session, date(2025, 1, 5), date(2025, 1, 8), "quarter")
+
+
+def test_year_of_months_costs_the_same_single_query(session) -> None:
+    statements: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    snap = get_dashboard_snapshot(session, "ana", chart_granularity="month", today=date(2025, 3, 31))
+    # Sin fila de usuario no hay consulta de pedidos pendientes
+    assert len(statements) == 4
+    assert len(snap.chart) == 12
+    assert snap.chart[0].start == date(2024, 4, 1)
+    assert [b.total_sales for b in snap.chart[-3:]] == [15.0, 0.0, 3.0]
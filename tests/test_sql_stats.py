@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from src.admin_app import sql_stats
+from src.admin_app.db import make_engine, make_session_factory
+from src.admin_app.models import Customer
+from src.admin_app.repository import get_customer_by_id
+
+
+@pytest.fixture()
+def instrumented(monkeypatch, tmp_path):
+    monkeypatch.setenv("ADMIN_APP_SQL_STATS", "1")
+    monkeypatch.setenv("ADMIN_APP_SQL_N_PLUS_ONE", "5")
+    monkeypatch.setenv("ADMIN_APP_SLOW_QUERY_LOG", str(tmp_path / "slow.log"))
+    handlers = list(sql_stats.slow_log.handlers)
+    for h in handlers:
+        sql_stats.slow_log.removeHandler(h)
+    sql_stats.STATS.reset()
+    engine = make_engine(":memory:")
+    yield engine
+    for h in list(sql_stats.slow_log.handlers):
+        sql_stats.slow_log.removeHandler(h)
+        h.close()
+    for h in handlers:
+        sql_stats.slow_log.addHandler(h)
+    sql_stats.STATS.reset()
+    engine.dispose()
+
+
+def test_statement_shape_normalizes_literals_and_in_lists() -> None:
+    a = sql_stats.statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'x'  AND n > 10")
+    b = sql_stats.statement_shape("SELECT * FROM t WHERE id IN (?, ?) AND name = 'yy' AND n > 3")
+    assert a == b == "SELECT * FROM t WHERE id IN (?, ...) AND name = ? AND n > ?"
+    assert sql_stats.statement_shape("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (?, ...), ..."
+    )
+
+
+def test_statement_shape_normalizes_other_paramstyles() -> None:
+    # psycopg (pyformat/format), named y numeric caen en la misma forma que qmark
+    expected = "SELECT * FROM t WHERE id IN (?, ...) AND name = ?"
+    assert sql_stats.statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s) AND name = %(name)s") == expected
+    assert sql_stats.statement_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = %s") == expected
+    assert sql_stats.statement_shape("SELECT * FROM t WHERE id IN (:id_1, :id_2) AND name = :name") == expected
+    assert sql_stats.statement_shape("SELECT * FROM t WHERE id IN ($1, $2) AND name = $3") == expected
+    # Los casts de Postgres no son marcadores
+    assert sql_stats.statement_shape("SELECT a::text FROM t") == "SELECT a::text FROM t"
+
+
+def test_disabled_by_default(monkeypatch) -> None:
+    monkeypatch.delenv("ADMIN_APP_SQL_STATS", raising=False)
+    engine = make_engine(":memory:")
+    assert not sql_stats.is_instrumented(engine)
+
+
+def test_n_plus_one_is_reported_with_repository_caller(instrumented) -> None:
+    factory = make_session_factory(instrumented)
+    with factory() as s:
+        s.add_all([Customer(name=f"Cliente {i}") for i in range(8)])
+        s.commit()
+    sql_stats.STATS.reset()
+
+    with factory() as s:
+        for cid in range(1, 9):
+            assert get_customer_by_id(s, cid) is not None
+
+    [finding] = sql_stats.STATS.n_plus_one_findings()
+    assert finding.count == 8
+    assert finding.caller == "repository.get_customer_by_id"
+    assert "FROM customers" in finding.shape
+
+    top = next(r for r in sql_stats.STATS.summary() if r.shape == finding.shape)
+    assert top.count == 8
+    assert top.total_ms >= top.p95_ms > 0
+
+    # En sesiones separadas no hay N+1
+    sql_stats.STATS.reset()
+    for cid in range(1, 9):
+        with factory() as s:
+            get_customer_by_id(s, cid)
+    assert sql_stats.STATS.n_plus_one_findings() == []
+
+
+def test_slow_queries_go_to_log_file(instrumented, tmp_path) -> None:
+    sql_stats.STATS.slow_ms = 0.0
+    with instrumented.connect() as conn:
+        conn.execute(text("SELECT 42"))
+        conn.execute(text("SELECT :name, :code"), {"name": "María Pérez", "code": 7})
+    for h in sql_stats.slow_log.handlers:
+        h.flush()
+    content = (tmp_path / "slow.log").read_text(encoding="utf-8")
+    assert "SELECT 42" in content
+    # Los valores no se escriben por defecto, solo cantidad y tipos
+    assert "María" not in content
+    assert "2 parámetros (str, int)" in content
+    assert sql_stats.STATS.slow_log_path == tmp_path / "slow.log"
+    assert logging.getLogger("admin_app.sql.slow").propagate is False
+
+
+def test_diagnostics_dialog_lists_statements(instrumented) -> None:
+    from PySide6.QtWidgets import QApplication
+    from src.admin_app.ui.sql_diagnostics_dialog import SqlDiagnosticsDialog
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+
+    with instrumented.connect() as conn:
+        for _ in range(3):
+            conn.execute(text("SELECT 1"))
+    dlg = SqlDiagnosticsDialog()
+    assert dlg.statements_table.rowCount() == 1
+    assert dlg.statements_table.item(0, 1).text() == "3"
+    assert "activa" in dlg.status_lbl.text()
+    dlg.btn_reset.click()
+    assert dlg.statements_table.rowCount() == 0
+
+
+
+def test_slow_log_parameter_values_are_opt_in(instrumented, monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("ADMIN_APP_SLOW_QUERY_PARAMS", "1")
+    monkeypatch.setenv("ADMIN_APP_SLOW_QUERY_MS", "0")
+    monkeypatch.setattr(sql_stats.STATS, "log_parameter_values", False)  # se restaura al terminar
+    engine = make_engine(":memory:")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :name"), {"name": "María Pérez"})
+    engine.dispose()
+    for h in sql_stats.slow_log.handlers:
+        h.flush()
+    assert "María Pérez" in (tmp_path / "slow.log").read_text(encoding="utf-8")
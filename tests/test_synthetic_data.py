@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import replace
+
+from sqlalchemy import create_engine, event, func, select, text
+
+from src.admin_app.models import Base, Delivery, Order, Sale, SaleItem, SalePayment, Transaction
+from src.admin_app.payment_methods import SALE_METHODS, is_bs_method
+from src.admin_app.services.synthetic_data import DatasetSpec, generate_dataset
+
+
+SPEC = DatasetSpec(sales=300, customers=40, workers=5, parameter_tables=2, parameter_rows=10, seed=7)
+
+
+def _engine():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _fingerprint(engine) -> str:
+    digest = hashlib.sha256()
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            for row in conn.execute(select(table).order_by(*table.primary_key.columns)):
+                digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def test_same_seed_gives_same_rows_regardless_of_batch_size() -> None:
+    a, b = _engine(), _engine()
+    counts = generate_dataset(a, SPEC, batch_size=1000)
+    assert generate_dataset(b, SPEC, batch_size=64) == counts
+    assert _fingerprint(a) == _fingerprint(b)
+
+    c = _engine()
+    generate_dataset(c, replace(SPEC, seed=8))
+    assert _fingerprint(c) != _fingerprint(a)
+
+
+def test_rows_are_consistent_and_inserted_in_batches() -> None:
+    engine = _engine()
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    counts = generate_dataset(engine, SPEC, batch_size=100)
+
+    assert counts["sales"] == counts["orders"] == 300
+    assert counts["sale_payments"] == counts["transactions"]
+    assert counts["sale_items"] >= 300
+    # executemany por lote, no una sentencia por fila
+    assert len(statements) < 150
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA foreign_key_check")).all() == []
+        orphans = conn.execute(
+            select(func.count(Delivery.id)).where(~Delivery.order_id.in_(select(Order.id)))
+        ).scalar()
+        assert orphans == 0
+        # Lo pagado cuadra con el abono de cada venta
+        paid = conn.execute(select(func.sum(SalePayment.amount_usd))).scalar()
+        abono = conn.execute(select(func.sum(Sale.abono_usd))).scalar()
+        assert abs(paid - abono) < 0.05
+        assert conn.execute(select(func.count(SaleItem.id))).scalar() == counts["sale_items"]
+        assert conn.execute(select(func.count(Transaction.id))).scalar() == counts["transactions"]
+        open_orders = conn.execute(select(func.count(Order.id)).where(Order.status != "ENTREGADO")).scalar()
+        assert 0 < open_orders < 300
+
+
+def test_payments_use_the_app_payment_methods() -> None:
+    engine = _engine()
+    generate_dataset(engine, SPEC)
+    with engine.connect() as conn:
+        rows = conn.execute(select(SalePayment.payment_method, SalePayment.amount_bs)).all()
+    assert {method for method, _ in rows} <= set(SALE_METHODS)
+    # Solo los pagos en Bs llevan monto en bolívares (lo que excluye "Ingresos $")
+    assert all((amount_bs > 0) == is_bs_method(method) for method, amount_bs in rows)
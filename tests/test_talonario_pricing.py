@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.admin_app.models import Base, ConfigurableProduct, ProductParameterTable, ProductParameterValue
+from src.admin_app.services.talonario_pricing import (
+    PriceTiers,
+    build_price_matrix,
+    get_talonario_price_matrix,
+)
+
+
+def test_price_tiers_greedy_packages_with_remainder() -> None:
+    tiers = PriceTiers(quantities=(5, 10, 50), prices=(70.0, 120.0, 500.0))
+    assert tiers.price_for(0) == 0.0
+    assert tiers.price_for(10) == 120.0
+    # 50 + 10 + 5 + 3 sueltos al unitario del escalón menor (70/5)
+    assert tiers.price_for(68) == pytest.approx(500.0 + 120.0 + 70.0 + 3 * 14.0)
+    assert tiers.price_for(2) == pytest.approx(28.0)
+
+
+def test_build_price_matrix_normalizes_column_variants() -> None:
+    quantities = [(1, {'cantidad': '1'}), (2, {'cantidad': 5}), (3, {'cantidad': 'x'})]
+    prices = [
+        (10, {'id_cantidad': 1, 'id_tipo_de_papel': 7, 'id_tamano': 3, 'precio': '20'}),
+        (11, {'id_cantidad': 2, 'id_tipo_de_papel': 7, 'id_tamano': 3, 'precio': 70}),
+        (12, {'id_cantidad': 3, 'id_tipo_de_papel': 7, 'id_tamano': 3, 'precio': 99}),
+    ]
+    matrix = build_price_matrix(quantities, prices)
+    assert matrix.tiers[(7, 3)].quantities == (1, 5)
+    assert matrix.price_for('7', '3', 6) == pytest.approx(90.0)
+    assert matrix.price_for(7, 4, 6) == 0.0
+    assert matrix.price_for(None, 3, 6) == 0.0
+
+
+def test_build_price_matrix_skips_rows_missing_keys(caplog) -> None:
+    quantities = [(1, {'cantidad': 1}), (2, {'cantidad': 5})]
+    prices = [
+        # Una primera fila mal formada no vacía la matriz
+        (10, {'id_cantidad': 1, 'precio': 20}),
+        (11, {'id_cantidad': 1, 'id_tipo_de_papel': 7, 'id_tamano': 3, 'precio': 20}),
+        (12, {'id_cantidad': 2, 'papel': 7, 'tamaño': 3, 'Precio': 70}),
+    ]
+    with caplog.at_level("WARNING"):
+        matrix = build_price_matrix(quantities, prices)
+    assert matrix.tiers[(7, 3)].quantities == (1, 5)
+    assert matrix.tiers[(7, 3)].prices == (20.0, 70.0)
+    assert "ids [10]" in caplog.text
+
+
+def test_matrix_cached_until_parameter_tables_change() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(bind=engine) as session:
+        prod = ConfigurableProduct(name="talonario", created_by=1)
+        session.add(prod)
+        session.flush()
+        t_qty = ProductParameterTable(product_id=prod.id, table_name="p_cantidad", display_name="Cantidad", schema_json="[]")
+        t_price = ProductParameterTable(product_id=prod.id, table_name="p_talonario", display_name="Talonario", schema_json="[]")
+        session.add_all([t_qty, t_price])
+        session.flush()
+        q1 = ProductParameterValue(parameter_table_id=t_qty.id, row_data_json=json.dumps({'cantidad': 1}))
+        q10 = ProductParameterValue(parameter_table_id=t_qty.id, row_data_json=json.dumps({'cantidad': 10}))
+        session.add_all([q1, q10])
+        session.flush()
+        session.add_all([
+            ProductParameterValue(parameter_table_id=t_price.id, row_data_json=json.dumps(
+                {'id_cantidad': q1.id, 'id_tipo_de_papel': 1, 'id_tamaño': 2, 'precio': 15.0})),
+            ProductParameterValue(parameter_table_id=t_price.id, row_data_json=json.dumps(
+                {'id_cantidad': q10.id, 'id_tipo_de_papel': 1, 'id_tamaño': 2, 'precio': 100.0})),
+        ])
+        session.commit()
+        prod_id = prod.id
+
+        matrix = get_talonario_price_matrix(session, prod_id)
+        assert matrix.price_for(1, 2, 12) == pytest.approx(130.0)
+
+        seen: list[str] = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: seen.append(stmt))
+        assert get_talonario_price_matrix(session, prod_id) is matrix
+        # Solo la búsqueda de tablas y la consulta de versión
+        assert len(seen) == 2
+
+        row = session.query(ProductParameterValue).filter_by(parameter_table_id=t_price.id).order_by(ProductParameterValue.id.desc()).first()
+        row.row_data_json = json.dumps({'id_cantidad': q10.id, 'id_tipo_de_papel': 1, 'id_tamaño': 2, 'precio': 90.0})
+        session.commit()
+
+        refreshed = get_talonario_price_matrix(session, prod_id)
+        assert refreshed is not matrix
+        assert refreshed.price_for(1, 2, 12) == pytest.approx(120.0)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import time
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication, QPushButton, QWidget
+from sqlalchemy import create_engine, text
+
+from src.admin_app.utils.ui_profiler import UiProfiler, profile_format
+
+
+def _app():
+    return QApplication.instance() or QApplication([])
+
+
+class _FakeView(QWidget):
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self.calls = 0
+
+    def refresh(self):
+        self.calls += 1
+        self._load_rows()
+
+    def _load_rows(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    def helper(self):
+        return "sin instrumentar"
+
+
+def test_wrapped_methods_record_duration_and_queries() -> None:
+    _app()
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    profiler = UiProfiler()
+    profiler.instrument_class(_FakeView)
+    profiler.start()
+    try:
+        view = _FakeView(engine)
+        # Las señales pasan `checked`; refresh(self) no lo acepta
+        btn = QPushButton()
+        btn.clicked.connect(view.refresh)
+        btn.click()
+        assert view.helper() == "sin instrumentar"
+    finally:
+        profiler.stop()
+        profiler.uninstall()
+
+    assert view.calls == 1
+    names = [(s.name, s.depth, s.args["queries"]) for s in sorted(profiler.spans, key=lambda s: s.open_seq)]
+    assert names == [("_FakeView.refresh", 0, 2), ("_FakeView._load_rows", 1, 2)]
+    assert not hasattr(_FakeView.refresh, "__ui_profiled__")
+
+    trace = profiler.to_chrome_trace()
+    assert [e["name"] for e in trace["traceEvents"]] == ["_FakeView.refresh", "_FakeView._load_rows"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in trace["traceEvents"])
+
+    scope = profiler.to_speedscope()
+    [profile] = scope["profiles"]
+    assert [e["type"] for e in profile["events"]] == ["O", "O", "C", "C"]
+    ats = [e["at"] for e in profile["events"]]
+    assert ats == sorted(ats)
+    assert scope["shared"]["frames"][0]["name"] == "_FakeView.refresh (2 q)"
+
+
+def test_stall_monitor_detects_blocked_event_loop(tmp_path) -> None:
+    _app()
+    profiler = UiProfiler()
+    monitor = profiler.watch_event_loop(interval_ms=20, threshold_ms=80)
+    loop = QEventLoop()
+    QTimer.singleShot(60, lambda: time.sleep(0.3))
+    QTimer.singleShot(600, loop.quit)
+    loop.exec()
+    profiler.stop()
+
+    stalls = [s for s in profiler.spans if s.category == "stall"]
+    assert stalls and monitor.total_stall_ms >= 150
+    assert max(s.args["stall_ms"] for s in stalls) >= 150
+
+    path = profiler.export(tmp_path / "ui.speedscope.json", "speedscope")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["profiles"][0]["name"] == "Bucle de eventos"
+
+
+def test_profile_format_from_env(monkeypatch) -> None:
+    monkeypatch.delenv("ADMIN_APP_PROFILE", raising=False)
+    assert profile_format() is None
+    monkeypatch.setenv("ADMIN_APP_PROFILE", "1")
+    assert profile_format() == "chrome"
+    monkeypatch.setenv("ADMIN_APP_PROFILE", "speedscope")
+    assert profile_format() == "speedscope"
+
+
+def test_install_wraps_views_and_heavy_dialogs() -> None:
+    from src.admin_app.ui.sale_dialog import SaleDialog
+    from src.admin_app.ui.sales_view import SalesView
+
+    profiler = UiProfiler()
+    original = SalesView.__dict__["refresh"]
+    profiler.install()
+    try:
+        assert getattr(SalesView.refresh, "__ui_profiled__", False)
+        assert getattr(SalesView._load_sales, "__ui_profiled__", False)
+        assert getattr(SaleDialog.__init__, "__ui_profiled__", False)
+    finally:
+        profiler.uninstall()
+    assert SalesView.__dict__["refresh"] is original
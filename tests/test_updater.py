@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.updater import download
+from src.updater.core import Updater
+from src.updater.manifest import UnsafeManifest, build_manifest, diff_local, object_path, publish
+
+
+class _RangeHandler(SimpleHTTPRequestHandler):
+    """Servidor de actualizaciones de prueba: atiende Range y puede cortar la primera respuesta."""
+
+    log: list = []
+    cut_after: int | None = None
+    ignore_range = False
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            self.send_error(404)
+            return
+        data = path.read_bytes()
+        header = self.headers.get("Range")
+        type(self).log.append((self.path, header))
+        if header and not type(self).ignore_range:
+            start, end = header.removeprefix("bytes=").split("-")
+            start, end = int(start), int(end or len(data) - 1)
+            body = data[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            body = data
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        cut = type(self).cut_after
+        if cut is not None and len(body) > cut:
+            # Simular un corte de red: se envía solo una parte y se cierra
+            type(self).cut_after = None
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def host(tmp_path):
+    root = tmp_path / "host"
+    root.mkdir()
+    _RangeHandler.log = []
+    _RangeHandler.cut_after = None
+    _RangeHandler.ignore_range = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_RangeHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def _write(root: Path, files: dict[str, bytes]) -> None:
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+V1 = {
+    "src/admin_app/app.py": b"print('v1')\n",
+    "src/admin_app/old.py": b"# se elimina en v2\n",
+    "assets/logo.png": os.urandom(300_000),
+    "run_app.py": b"import src\n",
+}
+
+
+def _release(host_root: Path, build: Path, files: dict[str, bytes], version: str) -> dict:
+    _write(build, files)
+    manifest = build_manifest(build, version)
+    publish(build, manifest, host_root)
+    return manifest
+
+
+def _install(app: Path, files: dict[str, bytes], manifest: dict) -> None:
+    _write(app, files)
+    (app / "installed_manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def test_only_changed_files_are_downloaded_and_swapped(host, tmp_path, monkeypatch) -> None:
+    host_root, url = host
+    v1 = _release(host_root, tmp_path / "b1", V1, "2.0.2")
+    app = tmp_path / "app"
+    _install(app, V1, v1)
+    inode_before = (app / "src/admin_app/app.py").stat().st_ino
+
+    v2_files = {k: v for k, v in V1.items() if k != "src/admin_app/old.py"}
+    v2_files["src/admin_app/app.py"] = b"print('v2')\n"
+    v2_files["src/admin_app/new.py"] = b"NUEVO = True\n"
+    _release(host_root, tmp_path / "b2", v2_files, "2.0.3")
+
+    monkeypatch.setattr(download, "RANGE_SIZE", 64 * 1024)
+    updater = Updater(url + "latest.json", str(app))
+    info = updater.check_for_updates()
+    assert info.version == "2.0.3"
+    _RangeHandler.log.clear()
+    assert updater.apply_update(info) is True
+
+    for rel, data in v2_files.items():
+        assert (app / rel).read_bytes() == data
+    assert not (app / "src/admin_app/old.py").exists()
+    # Solo se pidieron los dos objetos nuevos; el logo (sin cambios) no se bajó
+    fetched = {p for p, _ in _RangeHandler.log}
+    assert fetched == {"/" + object_path(v2["sha256"]) for rel, v2 in
+                       json.loads((host_root / "latest.json").read_text())["files"].items()
+                       if rel in ("src/admin_app/app.py", "src/admin_app/new.py")}
+    # El backup es un enlace duro al archivo anterior (mismo inode, sin copia)
+    backup = app / "backup_update/src/admin_app/app.py"
+    assert backup.read_bytes() == b"print('v1')\n"
+    assert backup.stat().st_ino == inode_before
+    assert (app / "backup_update/src/admin_app/old.py").exists()
+    assert not updater.journal_file.exists()
+    assert (app / "src/version.py").read_text() == 'VERSION = "2.0.3"\n'
+
+
+def test_large_file_downloads_in_ranges_and_resumes_after_cut(host, tmp_path, monkeypatch) -> None:
+    host_root, url = host
+    app = tmp_path / "app"
+    _install(app, {"run_app.py": b"x"}, {"files": {}})
+    files = {"run_app.py": b"x", "assets/video.bin": os.urandom(500_000)}
+    _release(host_root, tmp_path / "b", files, "2.0.3")
+
+    monkeypatch.setattr(download, "RANGE_SIZE", 100_000)
+    _RangeHandler.cut_after = 30_000
+    updater = Updater(url + "latest.json", str(app))
+    assert updater.apply_update(updater.check_for_updates()) is True
+    assert (app / "assets/video.bin").read_bytes() == files["assets/video.bin"]
+
+    ranges = [h for p, h in _RangeHandler.log if h]
+    assert len(ranges) >= 6  # 5 rangos + la reanudación del cortado
+    resumed = [h for h in ranges if int(h.removeprefix("bytes=").split("-")[0]) % 100_000 == 30_000]
+    assert resumed, ranges
+
+
+def test_hash_mismatch_leaves_installation_untouched(host, tmp_path) -> None:
+    host_root, url = host
+    v1 = _release(host_root, tmp_path / "b1", V1, "2.0.2")
+    app = tmp_path / "app"
+    _install(app, V1, v1)
+    v2_files = dict(V1, **{"src/admin_app/app.py": b"print('v2')\n"})
+    v2 = _release(host_root, tmp_path / "b2", v2_files, "2.0.3")
+    (host_root / object_path(v2["files"]["src/admin_app/app.py"]["sha256"])).write_bytes(b"print('hackeado')\n")
+
+    updater = Updater(url + "latest.json", str(app))
+    assert updater.apply_update(updater.check_for_updates()) is False
+    assert (app / "src/admin_app/app.py").read_bytes() == b"print('v1')\n"
+    assert json.loads(updater.status_file.read_text())["failed_attempts"] == 1
+
+
+def test_failure_mid_swap_rolls_back(host, tmp_path, monkeypatch) -> None:
+    host_root, url = host
+    v1 = _release(host_root, tmp_path / "b1", V1, "2.0.2")
+    app = tmp_path / "app"
+    _install(app, V1, v1)
+    v2_files = dict(V1, **{"src/admin_app/app.py": b"print('v2')\n", "run_app.py": b"import src  # v2\n",
+                          "src/admin_app/new.py": b"NUEVO = True\n"})
+    _release(host_root, tmp_path / "b2", v2_files, "2.0.3")
+
+    real_replace = os.replace
+    calls = {"n": 0}
+
+    def flaky_replace(src, dst):
+        if str(src).endswith(".new"):
+            calls["n"] += 1
+            if calls["n"] == 3:
+                raise OSError("disco lleno")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", flaky_replace)
+    updater = Updater(url + "latest.json", str(app))
+    assert updater.apply_update(updater.check_for_updates()) is False
+
+    for rel, data in V1.items():
+        assert (app / rel).read_bytes() == data
+    assert not (app / "src/admin_app/new.py").exists()
+    assert not list(app.rglob("*.new"))
+    assert not updater.journal_file.exists()
+
+
+def test_server_without_range_support_downloads_each_object_once(host, tmp_path, monkeypatch) -> None:
+    host_root, url = host
+    app = tmp_path / "app"
+    _install(app, {"run_app.py": b"x"}, {"files": {}})
+    files = {"run_app.py": b"x", "assets/video.bin": os.urandom(500_000)}
+    manifest = _release(host_root, tmp_path / "b", files, "2.0.3")
+
+    monkeypatch.setattr(download, "RANGE_SIZE", 100_000)
+    _RangeHandler.ignore_range = True
+    updater = Updater(url + "latest.json", str(app))
+    assert updater.apply_update(updater.check_for_updates()) is True
+    assert (app / "assets/video.bin").read_bytes() == files["assets/video.bin"]
+
+    # Tras el primer 200 se baja el objeto completo en un solo pedido, sin Range
+    video = "/" + object_path(manifest["files"]["assets/video.bin"]["sha256"])
+    assert [h for p, h in _RangeHandler.log if p == video and h is None] == [None]
+    assert not list((app / "temp_update").glob("*.part"))
+
+
+@pytest.mark.parametrize("rel", ["../fuera.py", "/etc/passwd", "src/../../fuera.py", "C:/fuera.py", "src\\..\\x.py"])
+def test_manifest_paths_outside_the_app_are_rejected(tmp_path, rel) -> None:
+    manifest = {"files": {rel: {"sha256": "a" * 64, "size": 1}}}
+    with pytest.raises(UnsafeManifest):
+        diff_local(tmp_path, manifest)
+
+
+def test_manifest_symlink_escape_and_bad_hash_are_rejected(tmp_path) -> None:
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    app = tmp_path / "app"
+    app.mkdir()
+    (app / "link").symlink_to(outside, target_is_directory=True)
+    with pytest.raises(UnsafeManifest):
+        diff_local(app, {"files": {"link/x.py": {"sha256": "a" * 64, "size": 1}}})
+    with pytest.raises(UnsafeManifest):
+        diff_local(app, {"files": {"x.py": {"sha256": "../../x", "size": 1}}})
+    with pytest.raises(UnsafeManifest):
+        diff_local(app, {"files": {}}, installed={"files": {"../x.py": {}}})
+
+
+def test_unsafe_manifest_fails_update_without_writing(host, tmp_path) -> None:
+    host_root, url = host
+    app = tmp_path / "app"
+    _install(app, {"run_app.py": b"x"}, {"files": {}})
+    manifest = _release(host_root, tmp_path / "b", {"run_app.py": b"y"}, "2.0.3")
+    manifest["files"]["../evil.py"] = manifest["files"]["run_app.py"]
+    (host_root / "latest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    updater = Updater(url + "latest.json", str(app))
+    assert updater.apply_update(updater.check_for_updates()) is False
+    assert not (tmp_path / "evil.py").exists()
+    assert (app / "run_app.py").read_bytes() == b"x"